@@ -0,0 +1,123 @@
+"""
+Aggregate store for NYC DOE Reports
+
+The stats stage writes everything the render stage needs into one SQLite file: the four
+statistics levels, the payroll matching summary, the fill rate time series, heatmaps, school ranks, flagged schools, substitute
+utilization and the school directory (DBN and name per location), a job count cube
+(jobs per Location, District, Borough, Superintendent, Classification, Type and Fill_Status)
+and build metadata.
+Rendering can then run from this file alone, without the raw SubCentral/SREPP data, e.g. on a
+smaller machine or to re-render after a template change.
+"""
+
+import os
+import json
+import time
+import sqlite3
+import pandas as pd
+
+STORE_SCHEMA_VERSION = 7
+STATS_TABLES = ['citywide_stats', 'borough_stats', 'superintendent_stats', 'school_stats']
+MATCHING_TABLE = 'matching_stats'
+# Further render inputs; a table that was empty when the store was written reads back as an empty frame
+OPTIONAL_TABLES = ['time_series', 'heatmaps', 'school_ranks', 'anomalies', 'substitutes', 'top_substitutes',
+                   'school_directory']
+CUBE_TABLE = 'job_cube'
+META_TABLE = 'meta'
+
+
+def write_aggregate_store(store_file, job_cube, stats, matching_stats, meta, extra_tables=None):
+    """
+    Write the aggregate store, replacing any existing file atomically
+
+    Args:
+        store_file: Path of the SQLite file
+        job_cube: DataFrame from data_processing.build_job_cube()
+        stats: Dict with one DataFrame per name in STATS_TABLES
+        matching_stats: DataFrame from create_matching_analysis() (may be empty)
+        meta: Dict of JSON-serializable build metadata (date_range_info, source ids, ...)
+        extra_tables: Optional dict of DataFrames keyed by a name in OPTIONAL_TABLES
+
+    Returns:
+        str: Path of the written store
+    """
+    os.makedirs(os.path.dirname(store_file) or '.', exist_ok=True)
+    tmp_file = store_file + '.tmp'
+    if os.path.exists(tmp_file):
+        os.remove(tmp_file)
+
+    conn = sqlite3.connect(tmp_file)
+    try:
+        for name in STATS_TABLES:
+            stats[name].to_sql(name, conn, index=False)
+        # An empty frame has no columns to create a table from, so only write non-empty matching data
+        if matching_stats is not None and not matching_stats.empty:
+            matching_stats.to_sql(MATCHING_TABLE, conn, index=False)
+        for name, table in (extra_tables or {}).items():
+            if name not in OPTIONAL_TABLES:
+                raise ValueError(f"Unknown aggregate store table '{name}'")
+            if table is not None and not table.empty:
+                table.to_sql(name, conn, index=False)
+        job_cube.to_sql(CUBE_TABLE, conn, index=False)
+
+        meta_rows = dict(meta, schema_version=STORE_SCHEMA_VERSION, created_at=time.strftime('%Y-%m-%dT%H:%M:%S'))
+        conn.execute(f"CREATE TABLE {META_TABLE} (key TEXT PRIMARY KEY, value TEXT)")
+        conn.executemany(
+            f"INSERT INTO {META_TABLE} (key, value) VALUES (?, ?)",
+            [(key, json.dumps(value)) for key, value in meta_rows.items()]
+        )
+        conn.commit()
+    finally:
+        conn.close()
+
+    os.replace(tmp_file, store_file)
+    return store_file
+
+
+def read_store_meta(store_file):
+    """Return the metadata dict of an aggregate store, or None if it is missing or unreadable"""
+    if not os.path.exists(store_file):
+        return None
+    try:
+        conn = sqlite3.connect(f"file:{store_file}?mode=ro", uri=True)
+        try:
+            rows = conn.execute(f"SELECT key, value FROM {META_TABLE}").fetchall()
+        finally:
+            conn.close()
+    except sqlite3.Error:
+        return None
+    meta = {key: json.loads(value) for key, value in rows}
+    if meta.get('schema_version') != STORE_SCHEMA_VERSION:
+        return None
+    return meta
+
+
+def read_aggregate_store(store_file):
+    """
+    Load everything the render stage needs from an aggregate store
+
+    Returns:
+        dict: 'df' (the job count cube, used by the report generators in place of the raw data),
+              one DataFrame per name in STATS_TABLES and OPTIONAL_TABLES, 'matching_stats',
+              'date_range_info' and 'meta'
+    """
+    meta = read_store_meta(store_file)
+    if meta is None:
+        raise FileNotFoundError(f"No readable aggregate store at {store_file}")
+
+    conn = sqlite3.connect(f"file:{store_file}?mode=ro", uri=True)
+    try:
+        tables = {row[0] for row in conn.execute("SELECT name FROM sqlite_master WHERE type = 'table'")}
+        aggregates = {name: pd.read_sql_query(f'SELECT * FROM "{name}"', conn) for name in STATS_TABLES}
+        aggregates['df'] = pd.read_sql_query(f'SELECT * FROM "{CUBE_TABLE}"', conn)
+        aggregates['matching_stats'] = (
+            pd.read_sql_query(f'SELECT * FROM "{MATCHING_TABLE}"', conn) if MATCHING_TABLE in tables else pd.DataFrame()
+        )
+        for name in OPTIONAL_TABLES:
+            aggregates[name] = pd.read_sql_query(f'SELECT * FROM "{name}"', conn) if name in tables else pd.DataFrame()
+    finally:
+        conn.close()
+
+    aggregates['date_range_info'] = meta.get('date_range_info', 'Date range not available')
+    aggregates['meta'] = meta
+    return aggregates
@@ -0,0 +1,116 @@
+"""
+Schools needing attention for NYC DOE Reports
+
+Flags schools whose overall fill rate or payroll match % is significantly below that of their
+peers, the schools with a similar job volume (rankings.peer_groups()). A school is flagged when
+the whole Wilson score interval of its rate lies below the pooled rate of the other schools in its
+peer group. The interval widens as the job count shrinks, so a small school with a handful of
+unfilled jobs is not flagged on noise alone.
+
+Every school and metric is tested at once with array arithmetic; the result is one table of
+flagged schools (ANOMALY_COLUMNS) that the stats stage stores in the aggregate store.
+"""
+
+import numpy as np
+import pandas as pd
+
+from rankings import peer_groups, peer_group_labels
+
+ANOMALY_COLUMNS = ['Location', 'Superintendent_Name', 'Borough', 'Peer_Group', 'Metric',
+                   'Value', 'Jobs', 'Lower', 'Upper', 'Peer_Pct', 'Gap']
+# Tested metric -> label in the reports
+ANOMALY_METRICS = {'Fill_Pct': 'Overall Fill Rate', 'Match_Pct': 'Payroll Match %'}
+# z score of the Wilson interval (1.96 = 95% confidence)
+ANOMALY_Z = 1.96
+
+
+def wilson_interval(successes, trials, z=ANOMALY_Z):
+    """
+    Wilson score interval of a binomial proportion, element-wise
+
+    Args:
+        successes: Array of successes (e.g. filled jobs)
+        trials: Array of trials (e.g. total jobs)
+        z: z score of the confidence level
+
+    Returns:
+        Tuple of (lower, upper) arrays in percent; NaN where there are no trials
+    """
+    successes = np.asarray(successes, dtype=np.float64)
+    trials = np.asarray(trials, dtype=np.float64)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        p = np.clip(successes / trials, 0, 1)
+        denominator = 1 + z ** 2 / trials
+        center = (p + z ** 2 / (2 * trials)) / denominator
+        half_width = z * np.sqrt(p * (1 - p) / trials + z ** 2 / (4 * trials ** 2)) / denominator
+    valid = trials > 0
+    return (np.where(valid, np.clip(center - half_width, 0, 1) * 100, np.nan),
+            np.where(valid, np.clip(center + half_width, 0, 1) * 100, np.nan))
+
+
+def _flag_metric(metric, successes, trials, groups, labels, z):
+    """
+    Test one metric for every school against the pooled rate of the rest of its peer group
+
+    groups holds the band numbers the schools are pooled by, labels their display names.
+    """
+    group_successes = successes.groupby(groups).transform('sum')
+    group_trials = trials.groupby(groups).transform('sum')
+    # Leave the school itself out of its peer rate
+    other_trials = group_trials - trials
+    with np.errstate(invalid='ignore', divide='ignore'):
+        peer_pct = np.where(other_trials > 0, (group_successes - successes) / other_trials * 100, np.nan)
+        value = np.where(trials > 0, successes / trials * 100, np.nan)
+    lower, upper = wilson_interval(successes, trials, z)
+
+    flagged = upper < peer_pct
+    return pd.DataFrame({
+        'Location': successes.index[flagged],
+        'Peer_Group': labels.to_numpy()[flagged],
+        'Metric': metric,
+        'Value': value[flagged],
+        'Jobs': trials.to_numpy()[flagged].astype(np.int64),
+        'Lower': lower[flagged],
+        'Upper': upper[flagged],
+        'Peer_Pct': peer_pct[flagged],
+        'Gap': peer_pct[flagged] - value[flagged]
+    })
+
+
+def compute_anomalies(df, school_stats, matching_stats=None, z=ANOMALY_Z):
+    """
+    Schools whose fill rate or payroll match % is significantly below their peers
+
+    The fill rate is tested on the school's jobs, the match % on its payroll job days (the
+    denominator of the matching analysis' Match Percentage).
+
+    Args:
+        df: Main processed DataFrame or job count cube (for each school's borough)
+        school_stats: School-level statistics (one row per school and classification)
+        matching_stats: Optional matching analysis DataFrame
+        z: z score of the Wilson interval
+
+    Returns:
+        pandas.DataFrame: ANOMALY_COLUMNS, largest Gap (peer rate minus school rate, in points) first;
+                          empty if no school is flagged
+    """
+    if school_stats is None or school_stats.empty:
+        return pd.DataFrame(columns=ANOMALY_COLUMNS)
+
+    counts = school_stats.groupby('Location')[['Total_Filled', 'Total']].sum()
+    groups = peer_groups(counts['Total'])
+    labels = peer_group_labels(counts['Total'], groups)
+    frames = [_flag_metric('Fill_Pct', counts['Total_Filled'], counts['Total'], groups, labels, z)]
+
+    if matching_stats is not None and {'Matched Jobs', 'Payroll Job Days'} <= set(matching_stats.columns):
+        matching = matching_stats.groupby('Location')[['Matched Jobs', 'Payroll Job Days']].sum().reindex(counts.index)
+        has_matching = matching['Payroll Job Days'].notna()
+        frames.append(_flag_metric('Match_Pct', matching.loc[has_matching, 'Matched Jobs'],
+                                   matching.loc[has_matching, 'Payroll Job Days'], groups[has_matching],
+                                   labels[has_matching], z))
+
+    anomalies = pd.concat(frames, ignore_index=True)
+    schools = school_stats.drop_duplicates('Location').set_index('Location')['Superintendent_Name']
+    anomalies['Superintendent_Name'] = anomalies['Location'].map(schools)
+    anomalies['Borough'] = anomalies['Location'].map(df.drop_duplicates('Location').set_index('Location')['Borough'])
+    return anomalies[ANOMALY_COLUMNS].sort_values('Gap', ascending=False, ignore_index=True).round(1)
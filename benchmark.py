@@ -0,0 +1,352 @@
+"""
+Synthetic-data benchmark runner for NYC DOE Reports
+
+Generates seeded synthetic inputs at several scale factors, times the main pipeline steps
+(load_and_process_data, add_superintendent_info, create_matching_analysis,
+create_summary_stats) and optionally a full report build, and writes the results to a JSON
+file that can be compared between commits.
+
+It also records CLI startup cost: `python -X importtime` for each entry module, plus whether
+importing it pulls in Plotly.
+
+Usage:
+    python benchmark.py [--scales 1 10 100] [--base-jobs N] [--skip-render]
+    python benchmark.py --startup-only
+    python benchmark.py --compare old_results.json new_results.json
+"""
+
+import os
+import io
+import sys
+import json
+import time
+import shutil
+import argparse
+import platform
+import tempfile
+import subprocess
+import contextlib
+
+import numpy as np
+import pandas as pd
+
+from synthetic_data import write_synthetic_dataset
+from data_processing import (
+    load_and_process_data, load_superintendent_mapping, add_superintendent_info,
+    create_matching_analysis, create_summary_stats
+)
+from profiling import get_stage_timings, reset_timings
+
+DEFAULT_RESULTS_FILE = 'benchmark_results.json'
+# Modules whose import cost is tracked by the startup benchmark
+STARTUP_MODULES = ['data_processing', 'para_fillrate_modular', 'report_generators', 'chart_utils', 'district_mapping']
+# Static assets main() expects to find in the working directory
+STATIC_ASSETS = ['Horizontal_logo_White_PublicSchools.png', 'NYC_School_Districts_-2063935521060471505.geojson']
+REPO_DIR = os.path.dirname(os.path.abspath(__file__))
+
+
+def _git_commit():
+    """Return the current git commit hash, or None outside a git checkout"""
+    try:
+        return subprocess.run(
+            ['git', 'rev-parse', '--short', 'HEAD'], cwd=REPO_DIR, capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+@contextlib.contextmanager
+def _working_directory(path):
+    """Temporarily change the working directory (the pipeline resolves inputs relative to it)"""
+    previous = os.getcwd()
+    os.chdir(path)
+    try:
+        yield
+    finally:
+        os.chdir(previous)
+
+
+def _time_call(timings, name, func, *args, quiet=True, **kwargs):
+    """Run func, store its wall time in timings[name] and return its result"""
+    sink = io.StringIO() if quiet else sys.stdout
+    start = time.perf_counter()
+    with contextlib.redirect_stdout(sink):
+        result = func(*args, **kwargs)
+    timings[name] = round(time.perf_counter() - start, 4)
+    return result
+
+
+def _link_static_assets(data_dir):
+    """Make the logo and district GeoJSON available to a full build run inside data_dir"""
+    for asset in STATIC_ASSETS:
+        source = os.path.join(REPO_DIR, asset)
+        target = os.path.join(data_dir, asset)
+        if os.path.exists(source) and not os.path.exists(target):
+            try:
+                os.symlink(source, target)
+            except OSError:
+                shutil.copy2(source, target)
+
+
+def run_full_build(data_dir, school_page_mode='static', quiet=True):
+    """
+    Run para_fillrate_modular.main() against a synthetic dataset
+
+    Returns:
+        dict: Total build seconds, per-stage timings and whether index.html was produced
+    """
+    import para_fillrate_modular
+
+    _link_static_assets(data_dir)
+    argv = ['para_fillrate_modular.py', '--force']
+    if school_page_mode == 'client':
+        argv.append('--client-schools')
+
+    reset_timings()
+    sink = io.StringIO() if quiet else sys.stdout
+    saved_argv = sys.argv
+    sys.argv = argv
+    try:
+        with _working_directory(data_dir), contextlib.redirect_stdout(sink):
+            start = time.perf_counter()
+            para_fillrate_modular.main()
+            elapsed = time.perf_counter() - start
+    finally:
+        sys.argv = saved_argv
+
+    return {
+        'seconds': round(elapsed, 4),
+        'succeeded': os.path.exists(os.path.join(data_dir, 'nycdoe_reports', 'index.html')),
+        'stages': {name: round(entry['seconds'], 4) for name, entry in get_stage_timings().items()}
+    }
+
+
+def benchmark_scale(scale, base_jobs, n_schools, seed, work_dir, render=True, school_page_mode='static', quiet=True):
+    """
+    Generate one synthetic dataset and time each pipeline step against it
+
+    Returns:
+        dict: Scale, dataset sizes, generation time and per-step timings
+    """
+    data_dir = os.path.join(work_dir, f'scale_{scale:g}')
+    timings = {}
+
+    start = time.perf_counter()
+    dataset = write_synthetic_dataset(data_dir, scale=scale, base_jobs=base_jobs, n_schools=n_schools, seed=seed)
+    generate_seconds = round(time.perf_counter() - start, 4)
+    print(f"  Generated {dataset['subcentral_rows']:,} jobs / {dataset['srepp_rows']:,} payroll records "
+          f"in {generate_seconds:.1f}s")
+
+    csv_files = [os.path.relpath(path, data_dir) for path in dataset['csv_files']]
+    with _working_directory(data_dir):
+        df, srepp_df = _time_call(timings, 'load_and_process_data', load_and_process_data, csv_files, quiet=quiet)
+        mapping_df = _time_call(timings, 'load_superintendent_mapping', load_superintendent_mapping, quiet=quiet)
+        df = _time_call(timings, 'add_superintendent_info', add_superintendent_info, df, mapping_df, quiet=quiet)
+        _time_call(timings, 'create_matching_analysis', create_matching_analysis, df, srepp_df, quiet=quiet)
+
+        stats_start = time.perf_counter()
+        for level, group_cols in [('citywide', []), ('borough', ['Borough']),
+                                  ('superintendent', ['Superintendent_Name']),
+                                  ('school', ['Superintendent_Name', 'Location'])]:
+            _time_call(timings, f'create_summary_stats[{level}]', create_summary_stats, df, group_cols, quiet=quiet)
+        timings['create_summary_stats'] = round(time.perf_counter() - stats_start, 4)
+
+    result = {
+        'scale': scale,
+        'subcentral_rows': dataset['subcentral_rows'],
+        'srepp_rows': dataset['srepp_rows'],
+        'processed_rows': len(df),
+        'schools': dataset['schools'],
+        'superintendents': dataset['superintendents'],
+        'generate_seconds': generate_seconds,
+        'timings': timings
+    }
+
+    if render:
+        print(f"  Running full build ({school_page_mode} school pages)...")
+        result['full_build'] = run_full_build(data_dir, school_page_mode, quiet=quiet)
+
+    return result
+
+
+def measure_import_time(module, repeat=3):
+    """
+    Measure the cold import cost of a module in a fresh interpreter with -X importtime
+
+    Returns:
+        dict: Best cumulative import time in milliseconds, slowest third-party imports and whether Plotly was loaded
+    """
+    best = None
+    for _ in range(repeat):
+        proc = subprocess.run(
+            [sys.executable, '-X', 'importtime', '-c',
+             f"import sys, {module}; print(any(m == 'plotly' or m.startswith('plotly.') for m in sys.modules))"],
+            cwd=REPO_DIR, capture_output=True, text=True
+        )
+        if proc.returncode != 0:
+            return {'error': proc.stderr.strip().splitlines()[-1] if proc.stderr.strip() else 'import failed'}
+
+        # Lines look like: "import time:       self [us] |  cumulative | imported package"
+        cumulative = {}
+        for line in proc.stderr.splitlines():
+            if not line.startswith('import time:') or 'cumulative' in line:
+                continue
+            _, self_us, cumulative_us, name = line.replace('import time:', '|', 1).split('|')
+            # Nested imports are indented under their parent; keep only top-level ones
+            if not name[1:].startswith(' '):
+                cumulative[name.strip()] = int(cumulative_us)
+        run = {
+            'cumulative_ms': round(cumulative.get(module, 0) / 1000, 1),
+            'plotly_loaded': proc.stdout.strip() == 'True',
+            'slowest_top_level': sorted(
+                ({'module': name, 'ms': round(us / 1000, 1)} for name, us in cumulative.items() if name != module),
+                key=lambda item: item['ms'], reverse=True
+            )[:5]
+        }
+        if best is None or run['cumulative_ms'] < best['cumulative_ms']:
+            best = run
+    return best
+
+
+def run_startup_benchmark(modules=STARTUP_MODULES):
+    """Measure import time for each entry module and print a summary"""
+    print("Measuring import-time startup cost...")
+    startup = {}
+    for module in modules:
+        result = measure_import_time(module)
+        startup[module] = result
+        if 'error' in result:
+            print(f"  ✗ {module}: {result['error']}")
+        else:
+            plotly_note = ' (loads Plotly)' if result['plotly_loaded'] else ''
+            print(f"  {module:<28} {result['cumulative_ms']:8.1f} ms{plotly_note}")
+    return startup
+
+
+def print_results_table(results):
+    """Print per-step timings with one column per scale factor"""
+    runs = results['runs']
+    steps = []
+    for run in runs:
+        for step in list(run['timings']) + (['full_build'] if 'full_build' in run else []):
+            if step not in steps and '[' not in step:
+                steps.append(step)
+
+    header = f"  {'step':<30}" + ''.join(f"{str(run['scale']) + 'x':>12}" for run in runs)
+    print(header)
+    for step in steps:
+        cells = []
+        for run in runs:
+            seconds = run['full_build']['seconds'] if step == 'full_build' and 'full_build' in run else run['timings'].get(step)
+            cells.append(f"{seconds:>11.2f}s" if seconds is not None else f"{'-':>12}")
+        print(f"  {step:<30}" + ''.join(cells))
+
+
+def compare_results(old_file, new_file):
+    """Print the per-step speedup between two benchmark result files at matching scales"""
+    with open(old_file, 'r', encoding='utf-8') as f:
+        old = json.load(f)
+    with open(new_file, 'r', encoding='utf-8') as f:
+        new = json.load(f)
+
+    print(f"Comparing {old.get('git_commit') or old_file} → {new.get('git_commit') or new_file}")
+    for module, result in new.get('startup', {}).items():
+        before = old.get('startup', {}).get(module, {}).get('cumulative_ms')
+        if before and result.get('cumulative_ms'):
+            print(f"  import {module:<30} {before:9.1f}ms → {result['cumulative_ms']:9.1f}ms  "
+                  f"({before / result['cumulative_ms']:.2f}x)")
+    old_runs = {run['scale']: run for run in old['runs']}
+    for run in new['runs']:
+        old_run = old_runs.get(run['scale'])
+        if old_run is None:
+            continue
+        print(f"  Scale {run['scale']}x:")
+        steps = dict(run['timings'])
+        if 'full_build' in run and 'full_build' in old_run:
+            steps['full_build'] = run['full_build']['seconds']
+        for step, seconds in steps.items():
+            before = old_run['full_build']['seconds'] if step == 'full_build' else old_run['timings'].get(step)
+            if before is None:
+                continue
+            speedup = before / seconds if seconds else float('inf')
+            print(f"    {step:<36} {before:9.2f}s → {seconds:9.2f}s  ({speedup:.2f}x)")
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark the fill rate pipeline on synthetic data')
+    parser.add_argument('--scales', type=float, nargs='+', default=[1, 10, 100],
+                        help='Scale factors to run (multiples of --base-jobs)')
+    parser.add_argument('--base-jobs', type=int, default=100000, help='SubCentral job rows at scale 1')
+    parser.add_argument('--schools', type=int, default=1600, help='Number of schools in the synthetic city')
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--skip-render', action='store_true', help='Skip the full report build')
+    parser.add_argument('--client-schools', action='store_true', help='Use client-rendered school pages in the full build')
+    parser.add_argument('--work-dir', help='Where to write synthetic data (defaults to a temporary directory)')
+    parser.add_argument('--keep-data', action='store_true', help='Keep the generated data and reports')
+    parser.add_argument('--output', default=DEFAULT_RESULTS_FILE, help='JSON results file')
+    parser.add_argument('--verbose', action='store_true', help='Show pipeline output')
+    parser.add_argument('--startup-only', action='store_true', help='Only run the import-time startup benchmark')
+    parser.add_argument('--compare', nargs=2, metavar=('OLD', 'NEW'), help='Compare two results files and exit')
+    args = parser.parse_args()
+
+    if args.compare:
+        compare_results(*args.compare)
+        return
+
+    work_dir = args.work_dir or tempfile.mkdtemp(prefix='fillrate_bench_')
+    os.makedirs(work_dir, exist_ok=True)
+    school_page_mode = 'client' if args.client_schools else 'static'
+
+    results = {
+        'generated_at': time.strftime('%Y-%m-%dT%H:%M:%S'),
+        'git_commit': _git_commit(),
+        'environment': {
+            'python': platform.python_version(),
+            'pandas': pd.__version__,
+            'numpy': np.__version__,
+            'platform': platform.platform(),
+            'cpu_count': os.cpu_count()
+        },
+        'config': {
+            'base_jobs': args.base_jobs,
+            'schools': args.schools,
+            'seed': args.seed,
+            'render': not args.skip_render,
+            'school_page_mode': school_page_mode
+        },
+        'startup': {},
+        'runs': []
+    }
+
+    print("🧪 Fill rate pipeline benchmark")
+    results['startup'] = run_startup_benchmark()
+    if args.startup_only:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump(results, f, indent=2)
+        print(f"✓ Results written to {args.output}")
+        return
+
+    try:
+        for scale in args.scales:
+            print(f"Scale {scale:g}x ({int(args.base_jobs * scale):,} SubCentral jobs)...")
+            run = benchmark_scale(
+                scale, args.base_jobs, args.schools, args.seed, work_dir,
+                render=not args.skip_render, school_page_mode=school_page_mode, quiet=not args.verbose
+            )
+            results['runs'].append(run)
+
+            # Write after every scale so a long run that is interrupted still leaves results
+            with open(args.output, 'w', encoding='utf-8') as f:
+                json.dump(results, f, indent=2)
+            if not args.keep_data:
+                shutil.rmtree(os.path.join(work_dir, f'scale_{scale:g}'), ignore_errors=True)
+    finally:
+        if not args.keep_data and not args.work_dir:
+            shutil.rmtree(work_dir, ignore_errors=True)
+
+    print_results_table(results)
+    print(f"✓ Results written to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
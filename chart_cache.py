@@ -0,0 +1,146 @@
+"""
+Chart file cache for NYC DOE Reports
+
+Many chart files in a build are drawn from identical numbers, and with --force (or a changed
+template) every page rebuilds its charts even when its data has not changed. Building the Plotly
+figure and serializing it is the most expensive per-page step of rendering.
+
+Every chart is fingerprinted from what it is drawn from: the chart kind and backend, the exact
+data arrays, title and layout, and the Plotly version. The rendered file is kept under
+.build_cache/charts/ by fingerprint; a chart with a known fingerprint is hard-linked (or copied,
+where links are not supported) to its output path instead of being built again.
+
+Output files that share an inode with a cache entry are always replaced, never rewritten in
+place, so a cache entry cannot change under its fingerprint.
+"""
+
+import os
+import json
+import time
+import shutil
+import hashlib
+import functools
+from importlib import metadata
+
+DEFAULT_CHART_CACHE_DIR = os.path.join('.build_cache', 'charts')
+# Bump when chart rendering changes without a change in its inputs
+CHART_CACHE_VERSION = 1
+# Cache entries unused for this many days are removed by prune_chart_cache()
+CHART_CACHE_MAX_AGE_DAYS = 14
+
+# Cache directory, or None when caching is disabled; set once per build
+_cache_dir = None
+_cache_counts = {'reused': 0, 'built': 0}
+
+
+def configure_chart_cache(cache_dir=DEFAULT_CHART_CACHE_DIR):
+    """Enable the chart cache in cache_dir, or disable it with None, and reset the counts"""
+    global _cache_dir
+    _cache_dir = cache_dir
+    _cache_counts.update(reused=0, built=0)
+
+
+def get_chart_cache_counts():
+    """Return the number of charts reused from and built into the cache since configure_chart_cache()"""
+    return dict(_cache_counts)
+
+
+@functools.lru_cache(maxsize=None)
+def _plotly_version():
+    """Installed Plotly version, or '' without Plotly"""
+    try:
+        return metadata.version('plotly')
+    except metadata.PackageNotFoundError:
+        return ''
+
+
+def chart_fingerprint(kind, backend, parts):
+    """
+    SHA-256 fingerprint of a chart
+
+    Args:
+        kind: Chart kind, e.g. 'bar' or 'pie'
+        backend: Chart backend ('plotly' or 'svg')
+        parts: JSON-serializable data arrays, title and layout of the chart
+
+    Returns:
+        str: Hex digest
+    """
+    payload = json.dumps(
+        [CHART_CACHE_VERSION, kind, backend, _plotly_version() if backend == 'plotly' else '', parts],
+        sort_keys=True, separators=(',', ':'), default=str
+    )
+    return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+
+def _replace_with_link(cache_file, output_file):
+    """Point output_file at cache_file: a hard link, or a copy where links are not supported"""
+    if os.path.exists(output_file):
+        if os.path.samefile(cache_file, output_file):
+            return
+        os.remove(output_file)
+    os.makedirs(os.path.dirname(output_file) or '.', exist_ok=True)
+    try:
+        os.link(cache_file, output_file)
+    except OSError:
+        shutil.copyfile(cache_file, output_file)
+
+
+def cached_chart(output_file, kind, backend, parts, render):
+    """
+    Write a chart file, reusing the cached file of an identical chart
+
+    Args:
+        output_file: Path of the chart file in the report tree
+        kind: Chart kind (part of the fingerprint)
+        backend: Chart backend (part of the fingerprint)
+        parts: Data arrays, title and layout of the chart (see chart_fingerprint)
+        render: Function writing the chart to the path it is given
+
+    Returns:
+        str: output_file
+    """
+    if _cache_dir is None:
+        # Never write through a link into a cache entry
+        if os.path.exists(output_file):
+            os.remove(output_file)
+        render(output_file)
+        return output_file
+
+    key = chart_fingerprint(kind, backend, parts)
+    ext = os.path.splitext(output_file)[1]
+    cache_file = os.path.join(_cache_dir, key[:2], key + ext)
+    if os.path.exists(cache_file):
+        # Mark the entry as used for prune_chart_cache()
+        os.utime(cache_file)
+        _cache_counts['reused'] += 1
+    else:
+        os.makedirs(os.path.dirname(cache_file), exist_ok=True)
+        tmp_file = os.path.join(os.path.dirname(cache_file), f"{key}.tmp{ext}")
+        render(tmp_file)
+        os.replace(tmp_file, cache_file)
+        _cache_counts['built'] += 1
+    _replace_with_link(cache_file, output_file)
+    return output_file
+
+
+def prune_chart_cache(cache_dir=DEFAULT_CHART_CACHE_DIR, max_age_days=CHART_CACHE_MAX_AGE_DAYS):
+    """
+    Remove cache entries that no build has used for max_age_days
+
+    Report files linked to a removed entry keep their content.
+
+    Returns:
+        int: Number of removed entries
+    """
+    if not os.path.isdir(cache_dir):
+        return 0
+    cutoff = time.time() - max_age_days * 86400
+    removed = 0
+    for root, _, files in os.walk(cache_dir):
+        for name in files:
+            path = os.path.join(root, name)
+            if os.path.getmtime(path) < cutoff:
+                os.remove(path)
+                removed += 1
+    return removed
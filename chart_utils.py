@@ -1,12 +1,113 @@
 """
 Chart generation utilities for NYC DOE Reports
+
+Plotly is imported inside the chart functions so that importing this module (and the
+report generators) stays cheap for data-only runs.
+
+The bar and pie charts can also be drawn as static SVG (svg_charts.py) with
+set_chart_backend('svg'); the SVG is then inlined in the page instead of written to a chart file
+and embedded with an iframe. Trend charts are always Plotly.
+
+Every Plotly chart file goes through the chart cache (chart_cache.py), so a chart drawn from the
+same numbers as an earlier one is linked from the cache instead of being built again.
+
+With set_chart_embed('lazy'), Plotly charts are written as figure JSON (same file name, .json)
+instead of standalone HTML, and chart_embed_html() embeds them as sized placeholders that the
+base page JavaScript draws with the shared plotly.min.js when they scroll into view.
 """
 
-import plotly.graph_objects as go
-import plotly.io as pio
-import plotly.offline as pyo
 import os
 import re
+from profiling import timed_stage
+from svg_charts import CHART_SERIES, grouped_bar_svg, donut_svg, inline_svg_chart
+from chart_cache import cached_chart
+
+# Plotly bundle written once per build and referenced by the lightweight trend chart files
+PLOTLY_JS_FILENAME = 'plotly.min.js'
+CHART_BACKENDS = ['plotly', 'svg']
+CHART_EMBEDS = ['iframe', 'lazy']
+
+# Backend of the bar and pie charts, set once per build
+_chart_backend = 'plotly'
+# How pages embed chart files, and the shared plotly.min.js lazy embeds load
+_chart_embed = 'iframe'
+_plotly_js_file = None
+
+def set_chart_backend(backend):
+    """Select the bar and pie chart backend: 'plotly' (interactive chart files) or 'svg' (static, inlined in the page)"""
+    global _chart_backend
+    if backend not in CHART_BACKENDS:
+        raise ValueError(f"Unknown chart backend '{backend}' (expected one of {', '.join(CHART_BACKENDS)})")
+    _chart_backend = backend
+
+def get_chart_backend():
+    """Return the current bar and pie chart backend"""
+    return _chart_backend
+
+def set_chart_embed(embed, plotly_js_file=None):
+    """
+    Select how pages embed chart files
+
+    Args:
+        embed: 'iframe' (each chart is a standalone page loaded with the report) or 'lazy'
+               (Plotly charts are figure JSON drawn when they scroll into view)
+        plotly_js_file: Path of the shared plotly.min.js (see write_shared_plotly_js); required for 'lazy'
+    """
+    global _chart_embed, _plotly_js_file
+    if embed not in CHART_EMBEDS:
+        raise ValueError(f"Unknown chart embed '{embed}' (expected one of {', '.join(CHART_EMBEDS)})")
+    if embed == 'lazy' and plotly_js_file is None:
+        raise ValueError("Lazy chart embeds need the shared plotly.min.js")
+    _chart_embed = embed
+    _plotly_js_file = plotly_js_file
+
+def figure_file(output_file, backend=None):
+    """
+    Path a chart is written to: output_file, or its .json sibling for lazy Plotly embeds
+
+    Args:
+        output_file: Chart HTML path given to the chart functions
+        backend: Chart backend, default the bar and pie chart backend
+    """
+    if _chart_embed == 'lazy' and (backend or _chart_backend) == 'plotly':
+        return os.path.splitext(output_file)[0] + '.json'
+    return output_file
+
+def chart_embed_html(chart_file, width, height, backend=None):
+    """
+    HTML embedding a chart file that is written next to the page
+
+    Args:
+        chart_file: Chart HTML path given to the chart functions
+        width: Embed width in pixels
+        height: Embed height in pixels
+        backend: Chart backend, default the bar and pie chart backend
+
+    Returns:
+        str: An iframe, or for lazy Plotly embeds a placeholder of the same size
+    """
+    if _chart_embed == 'lazy' and (backend or _chart_backend) == 'plotly':
+        plotly_src = os.path.relpath(_plotly_js_file, os.path.dirname(chart_file) or '.').replace(os.sep, '/')
+        return (f'<div class="lazy-chart" data-figure="{os.path.basename(figure_file(chart_file, backend))}" '
+                f'data-plotly="{plotly_src}" style="width: {width}px; height: {height}px;"></div>')
+    return f'<iframe src="{os.path.basename(chart_file)}" width="{width}" height="{height}" frameborder="0"></iframe>'
+
+def write_figure_json(fig, output_file):
+    """Write a Plotly figure as JSON for a lazy embed"""
+    os.makedirs(os.path.dirname(output_file) or '.', exist_ok=True)
+    with open(output_file, 'w', encoding='utf-8') as f:
+        f.write(fig.to_json())
+    return output_file
+
+def _svg_bar_chart(data, title, width, height):
+    """Grouped bar chart of the four job series as inline SVG (SVG backend)"""
+    categories = [clean_classification_for_display(x) for x in data['Classification']]
+    series = [(label, [int(val) for val in data[col]], color) for label, col, color in CHART_SERIES]
+    return inline_svg_chart(grouped_bar_svg(categories, series, title, width, height), title)
+
+def _bar_chart_parts(data):
+    """Classification labels and job series of a bar chart, for its cache fingerprint"""
+    return [[str(x) for x in data['Classification']]] + [[int(val) for val in data[col]] for _, col, _ in CHART_SERIES]
 
 def clean_classification_for_display(classification):
     """
@@ -14,6 +115,7 @@ def clean_classification_for_display(classification):
     """
     return classification.replace(' SPEAKING PARA', '')
 
+@timed_stage('chart generation')
 def create_bar_chart(data, title, output_file, div_id=None):
     """
     Create a grouped bar chart for job data
@@ -21,9 +123,25 @@ def create_bar_chart(data, title, output_file, div_id=None):
     Args:
         data: DataFrame with job data
         title: Chart title
-        output_file: Path to save the chart HTML
+        output_file: Path to save the chart HTML (see figure_file for lazy embeds; not written
+                     with the SVG backend)
         div_id: HTML div ID for the chart
+
+    Returns:
+        str: HTML placing the chart in the page: inline SVG, or an embed of the chart file
+             (see chart_embed_html)
     """
+    if _chart_backend == 'svg':
+        return _svg_bar_chart(data, title, width=1200, height=500)
+    cached_chart(figure_file(output_file), 'bar', _chart_backend, [_bar_chart_parts(data), title, div_id],
+                 lambda path: _write_bar_chart(data, title, path, div_id))
+    return chart_embed_html(output_file, 1220, 520)
+
+def _write_bar_chart(data, title, output_file, div_id=None):
+    """Build and write the Plotly grouped bar chart of create_bar_chart()"""
+    import plotly.graph_objects as go
+    import plotly.io as pio
+    
     fig = go.Figure()
     
     # Add bars for each category
@@ -71,6 +189,8 @@ def create_bar_chart(data, title, output_file, div_id=None):
         height=500,
         width=1200
     )
+    if output_file.endswith('.json'):
+        return write_figure_json(fig, output_file)
     
     # Ensure the directory exists
     os.makedirs(os.path.dirname(output_file), exist_ok=True)
@@ -115,6 +235,7 @@ def sanitize_filename(name):
     
     return sanitized
 
+@timed_stage('chart generation')
 def create_pie_chart(classification, data_row, location_clean, output_dir):
     """
     Create a pie chart for a specific classification
@@ -126,10 +247,17 @@ def create_pie_chart(classification, data_row, location_clean, output_dir):
         output_dir: Directory to save the chart
     
     Returns:
-        Tuple of (pie_file_path, iframe_html)
+        Tuple of (pie_file_path, embed_html); see chart_embed_html. With the SVG backend no
+        file is written and embed_html is the inline SVG chart.
     """
     if data_row['Total'] <= 0:
         return None, ""
+    if _chart_backend == 'svg':
+        svg = donut_svg(
+            [label for label, _, _ in CHART_SERIES], [int(data_row[col]) for _, col, _ in CHART_SERIES],
+            [color for _, _, color in CHART_SERIES], [classification, f"({int(data_row['Total']):,} total jobs)"]
+        )
+        return None, inline_svg_chart(svg, classification)
     
     # Use enhanced sanitization with additional safety
     safe_location = sanitize_filename(location_clean)
@@ -161,6 +289,22 @@ def create_pie_chart(classification, data_row, location_clean, output_dir):
         print(f"Warning: Could not create valid filename for {location_clean} {classification}")
         return None, ""
     
+    embed_html = chart_embed_html(pie_file, 450, 500)
+    pie_file = figure_file(pie_file)
+    values = [int(data_row[col]) for _, col, _ in CHART_SERIES]
+    try:
+        cached_chart(pie_file, 'pie', _chart_backend, [classification, values, int(data_row['Total'])],
+                     lambda path: _write_pie_chart(classification, data_row, path))
+        return pie_file, embed_html
+    except Exception as e:
+        print(f"Error creating pie chart file '{pie_file}': {e}")
+        return None, ""
+
+def _write_pie_chart(classification, data_row, pie_file):
+    """Build and write the Plotly classification pie chart of create_pie_chart()"""
+    import plotly.graph_objects as go
+    import plotly.offline as pyo
+    
     pie_fig = go.Figure(data=[go.Pie(
         labels=['Vacancy Filled', 'Vacancy Unfilled', 'Absence Filled', 'Absence Unfilled'],
         values=[data_row['Vacancy_Filled'], data_row['Vacancy_Unfilled'], 
@@ -187,16 +331,12 @@ def create_pie_chart(classification, data_row, location_clean, output_dir):
         showlegend=True,
         margin=dict(t=60, b=40, l=40, r=40)
     )
+    if pie_file.endswith('.json'):
+        return write_figure_json(pie_fig, pie_file)
     
-    try:
-        pyo.plot(pie_fig, filename=pie_file, auto_open=False)
-        base_filename = os.path.basename(pie_file)
-        iframe_html = f'<iframe src="{base_filename}" width="450" height="500" frameborder="0"></iframe>'
-        return pie_file, iframe_html
-    except Exception as e:
-        print(f"Error creating pie chart file '{pie_file}': {e}")
-        return None, ""
-        fallback_name = f"chart_{abs(hash(f'{location_clean}_{classification}')) % 100000}.html"
+    pyo.plot(pie_fig, filename=pie_file, auto_open=False)
+    return pie_file
+
 def create_pie_charts_for_data(data, location_clean, output_dir):
     """
     Create pie charts for all classifications in the data
@@ -207,30 +347,46 @@ def create_pie_charts_for_data(data, location_clean, output_dir):
         output_dir: Directory to save the charts
     
     Returns:
-        HTML string containing all pie chart iframes
+        HTML string containing all pie chart embeds
     """
     pie_charts_html = ""
     
     for idx, (_, row) in enumerate(data.iterrows()):
         if row['Total'] > 0:  # Only create pie chart if there are jobs
-            pie_file, iframe_html = create_pie_chart(
+            pie_file, embed_html = create_pie_chart(
                 row['Classification'], row, location_clean, output_dir
             )
-            if iframe_html:
-                pie_charts_html += iframe_html
+            if embed_html:
+                pie_charts_html += embed_html
     
     return pie_charts_html
 
+@timed_stage('chart generation')
 def create_overall_bar_chart(overall_stats, output_file):
     """
     Create the overall citywide bar chart
     
     Args:
         overall_stats: DataFrame with overall statistics
-        output_file: Path to save the chart HTML
+        output_file: Path to save the chart HTML (see figure_file for lazy embeds; not written
+                     with the SVG backend)
+
+    Returns:
+        str: HTML placing the chart in the page (see create_bar_chart)
     """
     # Filter out PARAPROFESSIONAL from the dataset
     filtered_stats = overall_stats[overall_stats['Classification'] != 'PARAPROFESSIONAL']
+    if _chart_backend == 'svg':
+        return _svg_bar_chart(filtered_stats, 'Overall Jobs by Classification and Type - All Districts',
+                              width=1400, height=550)
+    cached_chart(figure_file(output_file), 'overall_bar', _chart_backend, [_bar_chart_parts(filtered_stats)],
+                 lambda path: _write_overall_bar_chart(filtered_stats, path))
+    return chart_embed_html(output_file, 1450, 600)
+
+def _write_overall_bar_chart(filtered_stats, output_file):
+    """Build and write the Plotly citywide bar chart of create_overall_bar_chart()"""
+    import plotly.graph_objects as go
+    import plotly.io as pio
     
     fig_overall = go.Figure()
     
@@ -278,6 +434,8 @@ def create_overall_bar_chart(overall_stats, output_file):
         height=550,
         width=1400
     )
+    if output_file.endswith('.json'):
+        return write_figure_json(fig_overall, output_file)
     
     # Generate HTML and write to file
     html_str = pio.to_html(fig_overall, include_plotlyjs=True, div_id="overall_bar_chart")
@@ -285,3 +443,104 @@ def create_overall_bar_chart(overall_stats, output_file):
         f.write(html_str)
     
     return output_file
+
+def write_shared_plotly_js(output_dir):
+    """
+    Write plotly.min.js once at the root of the output directory
+
+    Trend charts reference this file instead of inlining the ~3.5 MB Plotly bundle in every chart,
+    which keeps them cheap to write (one per report page).
+
+    Returns:
+        str: Path of the shared script
+    """
+    from plotly.offline import get_plotlyjs
+    
+    js_file = os.path.join(output_dir, PLOTLY_JS_FILENAME)
+    plotly_js = get_plotlyjs()
+    if not os.path.exists(js_file) or os.path.getsize(js_file) != len(plotly_js.encode('utf-8')):
+        os.makedirs(output_dir, exist_ok=True)
+        with open(js_file, 'w', encoding='utf-8') as f:
+            f.write(plotly_js)
+    return js_file
+
+@timed_stage('chart generation')
+def create_trend_chart(series, title, output_file, plotly_js_file, div_id=None):
+    """
+    Create a fill rate trend chart: weekly and monthly fill rates plus the rolling 4-week rate
+    
+    Args:
+        series: Time-series rows of one entity (see time_series.compute_time_series)
+        title: Chart title
+        output_file: Path to save the chart HTML (see figure_file for lazy embeds)
+        plotly_js_file: Path of the shared plotly.min.js (see write_shared_plotly_js)
+        div_id: HTML div ID for the chart
+    """
+    output_file = figure_file(output_file, 'plotly')
+    # Reference the shared Plotly bundle by a path relative to the chart
+    plotly_js_src = os.path.relpath(plotly_js_file, os.path.dirname(output_file)).replace(os.sep, '/')
+    columns = ['Frequency', 'Period_Start', 'Filled', 'Total', 'Fill_Pct', 'Rolling_Fill_Pct']
+    rows = series[columns].astype(str).to_numpy().tolist()
+    return cached_chart(output_file, 'trend', 'plotly', [rows, title, plotly_js_src, div_id],
+                        lambda path: _write_trend_chart(series, title, path, plotly_js_src, div_id))
+
+def _write_trend_chart(series, title, output_file, plotly_js_src, div_id=None):
+    """Build and write the trend chart of create_trend_chart()"""
+    import plotly.graph_objects as go
+    import plotly.io as pio
+    
+    weekly = series[series['Frequency'] == 'W']
+    monthly = series[series['Frequency'] == 'M']
+    
+    fig = go.Figure()
+    
+    fig.add_trace(go.Scatter(
+        name='Weekly Fill %',
+        x=weekly['Period_Start'],
+        y=weekly['Fill_Pct'],
+        mode='lines+markers',
+        line=dict(color='lightgray', width=1),
+        marker=dict(size=5),
+        customdata=weekly[['Filled', 'Total']],
+        hovertemplate='Week of %{x}<br>%{y:.1f}% (%{customdata[0]:,} of %{customdata[1]:,} filled)<extra></extra>'
+    ))
+    
+    fig.add_trace(go.Scatter(
+        name='Rolling 4-Week Fill %',
+        x=weekly['Period_Start'],
+        y=weekly['Rolling_Fill_Pct'],
+        mode='lines',
+        line=dict(color='#007bff', width=3),
+        hovertemplate='4 weeks to %{x}<br>%{y:.1f}%<extra></extra>'
+    ))
+    
+    fig.add_trace(go.Scatter(
+        name='Monthly Fill %',
+        x=monthly['Period_Start'],
+        y=monthly['Fill_Pct'],
+        mode='lines+markers',
+        line=dict(color='forestgreen', width=2, dash='dot', shape='hv'),
+        customdata=monthly[['Filled', 'Total']],
+        hovertemplate='Month of %{x}<br>%{y:.1f}% (%{customdata[0]:,} of %{customdata[1]:,} filled)<extra></extra>'
+    ))
+    
+    fig.update_layout(
+        title=title,
+        xaxis_title='Job Start',
+        yaxis_title='Overall Fill Rate (%)',
+        yaxis=dict(range=[0, 100]),
+        hovermode='x unified',
+        height=450,
+        width=1200
+    )
+    if output_file.endswith('.json'):
+        return write_figure_json(fig, output_file)
+    
+    # Ensure the directory exists
+    os.makedirs(os.path.dirname(output_file), exist_ok=True)
+    
+    html_str = pio.to_html(fig, include_plotlyjs=plotly_js_src, div_id=div_id)
+    with open(output_file, 'w', encoding='utf-8') as f:
+        f.write(html_str)
+    
+    return output_file
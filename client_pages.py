@@ -0,0 +1,452 @@
+"""
+Client-side rendered school pages for NYC DOE Reports
+
+Instead of writing one standalone HTML page (plus bar and pie chart files) per school,
+this output mode writes a single shared school page shell at the root of the output
+directory and one compact JSON data bundle per superintendent. The browser fetches the
+bundle and renders the comparison cards, classification tables and charts itself.
+"""
+
+import os
+import gzip
+import json
+import math
+from templates import get_html_template, get_header_html, get_professional_footer
+from data_processing import create_summary_stats, get_totals_from_data, clean_location_name, get_match_column
+from time_series import get_entity_series
+from rankings import school_rank_cells, PEER_GROUPS
+
+SCHOOL_SHELL_FILENAME = 'school.html'
+SCHOOL_BUNDLE_FILENAME = 'schools_data.json'
+
+# Count columns stored per classification row in the bundle (keeps the JSON compact)
+BUNDLE_ROW_COLUMNS = ['Classification', 'Vacancy_Filled', 'Vacancy_Unfilled', 'Absence_Filled', 'Absence_Unfilled']
+
+
+def get_school_page_url(safe_superintendent_name, location_clean, root_prefix="../"):
+    """
+    Build the link to a school rendered by the shared school page shell
+
+    Args:
+        safe_superintendent_name: Sanitized superintendent name used for the folder
+        location_clean: Sanitized location code
+        root_prefix: Relative path from the linking page to the output root
+    """
+    return f"{root_prefix}{SCHOOL_SHELL_FILENAME}?s={safe_superintendent_name}&loc={location_clean}"
+
+
+def _totals_payload(totals, match_pct, school_count):
+    """Convert a totals dictionary into the compact card payload"""
+    return {
+        'total': int(totals['Total']),
+        'vacancy': int(totals['Total_Vacancy']),
+        'absence': int(totals['Total_Absence']),
+        'vacancy_filled': int(totals['Vacancy_Filled']),
+        'absence_filled': int(totals['Absence_Filled']),
+        'match_pct': round(float(match_pct), 1) if match_pct else 0,
+        'schools': int(school_count)
+    }
+
+
+def _mean_match_pct(matching_stats, locations=None):
+    """Average match percentage over the given locations (or citywide when None)"""
+    match_col = get_match_column(matching_stats)
+    if match_col is None:
+        return 0
+    subset = matching_stats if locations is None else matching_stats[matching_stats['Location'].isin(locations)]
+    return subset[match_col].mean() if not subset.empty else 0
+
+
+def _trend_payload(series):
+    """
+    Compact fill rate trend of one school: weekly [start, filled, total, rolling 4-week %] and
+    monthly [start, filled, total] rows, or None without time-series data
+    """
+    if series is None or series.empty:
+        return None
+    weekly = series[series['Frequency'] == 'W']
+    monthly = series[series['Frequency'] == 'M']
+    return {
+        'weeks': [
+            [start, int(filled), int(total), None if math.isnan(rolling) else float(rolling)]
+            for start, filled, total, rolling in weekly[['Period_Start', 'Filled', 'Total', 'Rolling_Fill_Pct']].itertuples(index=False, name=None)
+        ],
+        'months': [
+            [start, int(filled), int(total)]
+            for start, filled, total in monthly[['Period_Start', 'Filled', 'Total']].itertuples(index=False, name=None)
+        ]
+    }
+
+
+def build_superintendent_school_bundle(superintendent, df, summary_stats, school_stats, date_range_info, matching_stats=None,
+                                       trends=None, rankings=None):
+    """
+    Build the data bundle rendered by the shared school page for one superintendent
+
+    Args:
+        superintendent: Superintendent name
+        df: Main processed DataFrame
+        summary_stats: Superintendent-level statistics (used for citywide totals)
+        school_stats: School-level statistics grouped by Superintendent_Name and Location
+        date_range_info: Report period string
+        matching_stats: Optional matching analysis DataFrame
+        trends: Optional result of time_series.group_time_series(); adds each school's fill rate trend
+        rankings: Optional result of rankings.group_rankings(); adds each school's percentiles
+
+    Returns:
+        dict: JSON-serializable bundle with shared card totals and per-school classification rows
+    """
+    superintendent_df = df[df['Superintendent_Name'] == superintendent]
+    school_boroughs = superintendent_df.drop_duplicates('Location').set_index('Location')['Borough']
+
+    # Citywide and superintendent cards are shared by every school in the bundle
+    overall_totals = summary_stats.agg({
+        'Vacancy_Filled': 'sum', 'Vacancy_Unfilled': 'sum', 'Absence_Filled': 'sum',
+        'Absence_Unfilled': 'sum', 'Total_Vacancy': 'sum', 'Total_Absence': 'sum', 'Total': 'sum'
+    })
+    citywide = _totals_payload(
+        {k: int(v) for k, v in overall_totals.items()},
+        _mean_match_pct(matching_stats), df['Location'].nunique()
+    )
+
+    superintendent_locations = school_boroughs.index.unique()
+    superintendent_card = _totals_payload(
+        get_totals_from_data(create_summary_stats(superintendent_df, ['Superintendent_Name'])),
+        _mean_match_pct(matching_stats, superintendent_locations), len(superintendent_locations)
+    )
+
+    # Borough cards - computed once per borough rather than once per school
+    boroughs = {}
+    for borough in sorted(school_boroughs.unique()):
+        borough_df = df[df['Borough'] == borough]
+        borough_locations = borough_df['Location'].unique()
+        boroughs[borough] = _totals_payload(
+            get_totals_from_data(create_summary_stats(borough_df, ['Borough'])),
+            _mean_match_pct(matching_stats, borough_locations), len(borough_locations)
+        )
+
+    schools = {}
+    superintendent_school_stats = school_stats[school_stats['Superintendent_Name'] == superintendent]
+    for location, school_data in superintendent_school_stats.groupby('Location', sort=True):
+        location_clean = clean_location_name(location)
+
+        rows = school_data.groupby('Classification', as_index=False)[BUNDLE_ROW_COLUMNS[1:]].sum()
+        rows['Total'] = rows[BUNDLE_ROW_COLUMNS[1:]].sum(axis=1)
+        rows = rows.sort_values('Total', ascending=False)
+
+        schools[location_clean] = {
+            'location': str(location),
+            'borough': school_boroughs.get(location, 'Unknown'),
+            'rows': [
+                [row[0]] + [int(value) for value in row[1:]]
+                for row in rows[BUNDLE_ROW_COLUMNS].itertuples(index=False, name=None)
+            ]
+        }
+        trend = _trend_payload(get_entity_series(trends, 'school', location))
+        if trend is not None:
+            schools[location_clean]['trend'] = trend
+        ranks = school_rank_cells(rankings.get(location)) if rankings else None
+        if ranks is not None:
+            schools[location_clean]['ranks'] = ranks
+
+    return {
+        'superintendent': superintendent,
+        'date_range': date_range_info,
+        'columns': BUNDLE_ROW_COLUMNS,
+        'cards': {'citywide': citywide, 'superintendent': superintendent_card, 'boroughs': boroughs},
+        'schools': schools
+    }
+
+
+def school_bundle_filename(compress=False):
+    """File name of the superintendent school bundles, as written and as fetched by the school page shell"""
+    return f"{SCHOOL_BUNDLE_FILENAME}.gz" if compress else SCHOOL_BUNDLE_FILENAME
+
+
+def write_superintendent_school_bundle(bundle, superintendent_dir, compress=False):
+    """
+    Write a superintendent's school data bundle as compact JSON (optionally gzipped)
+
+    The file is named by school_bundle_filename(); a bundle left over from a build with the other
+    compression setting is removed.
+
+    Returns:
+        str: Path of the written bundle file
+    """
+    os.makedirs(superintendent_dir, exist_ok=True)
+    payload = json.dumps(bundle, separators=(',', ':'), ensure_ascii=False).encode('utf-8')
+
+    bundle_file = os.path.join(superintendent_dir, school_bundle_filename(compress))
+    stale_file = os.path.join(superintendent_dir, school_bundle_filename(not compress))
+    if os.path.exists(stale_file):
+        os.remove(stale_file)
+    if compress:
+        with gzip.open(bundle_file, 'wb', compresslevel=9) as f:
+            f.write(payload)
+    else:
+        with open(bundle_file, 'wb') as f:
+            f.write(payload)
+
+    return bundle_file
+
+
+SCHOOL_SHELL_JS = """
+(function() {
+    var COLORS = ['darkgreen', 'lightcoral', 'forestgreen', 'red'];
+    var LABELS = ['Vacancy Filled', 'Vacancy Unfilled', 'Absence Filled', 'Absence Unfilled'];
+
+    function fmtInt(x) { return Number(x).toLocaleString('en-US'); }
+    function pct(part, whole) { return whole > 0 ? part / whole * 100 : 0; }
+    function fmtPct(x) { return x.toFixed(1) + '%'; }
+    function esc(s) { return String(s).replace(/[&<>"]/g, function(c) { return {'&': '&amp;', '<': '&lt;', '>': '&gt;', '"': '&quot;'}[c]; }); }
+
+    function card(title, cls, t, extra) {
+        var stats = [
+            ['Total Jobs', fmtInt(t.total)],
+            ['Total Vacancies', fmtInt(t.vacancy) + ' (' + fmtPct(pct(t.vacancy, t.total)) + ')'],
+            ['Total Absences', fmtInt(t.absence) + ' (' + fmtPct(pct(t.absence, t.total)) + ')'],
+            ['Overall Fill Rate', fmtPct(pct(t.vacancy_filled + t.absence_filled, t.total))],
+            ['Vacancy Fill Rate', fmtPct(pct(t.vacancy_filled, t.vacancy))],
+            ['Absence Fill Rate', fmtPct(pct(t.absence_filled, t.absence))]
+        ].concat(extra);
+        return '<div class="comparison-card ' + cls + '"><h4>' + esc(title) + '</h4><ul>' +
+            stats.map(function(s) { return '<li><strong>' + s[0] + ':</strong> ' + esc(s[1]) + '</li>'; }).join('') +
+            '</ul></div>';
+    }
+
+    function areaCard(t) {
+        return [['Average Match %', t.match_pct > 0 ? fmtPct(t.match_pct) : 'N/A'], ['Number of Schools', String(t.schools)]];
+    }
+
+    function table(headers, rows) {
+        return '<table border="1" class="table table-striped"><thead><tr>' +
+            headers.map(function(h) { return '<th>' + h + '</th>'; }).join('') + '</tr></thead><tbody>' +
+            rows.map(function(r) { return '<tr>' + r.map(function(c) { return '<td>' + esc(c) + '</td>'; }).join('') + '</tr>'; }).join('') +
+            '</tbody></table>';
+    }
+
+    function tabbedTables(rows) {
+        var combined = rows.map(function(r) {
+            var total = r[1] + r[2] + r[3] + r[4], filled = r[1] + r[3];
+            return [r[0], fmtInt(filled), fmtInt(r[2] + r[4]), fmtInt(total), fmtPct(pct(filled, total))];
+        });
+        var details = rows.map(function(r) {
+            return [r[0], fmtInt(r[1]), fmtInt(r[2]), fmtInt(r[1] + r[2]), fmtPct(pct(r[1], r[1] + r[2])),
+                    fmtInt(r[3]), fmtInt(r[4]), fmtInt(r[3] + r[4]), fmtPct(pct(r[3], r[3] + r[4]))];
+        });
+        return '<div class="tabbed-container"><div class="tab-buttons">' +
+            '<button class="tab-button active" data-tab="combined">Combined Totals</button>' +
+            '<button class="tab-button" data-tab="details">Vacancy and Absence Details</button></div>' +
+            '<div class="tab-content active" data-tab="combined"><div class="table-responsive">' +
+            table(['Classification', 'Total Filled', 'Total Unfilled', 'Total', 'Overall Fill %'], combined) + '</div></div>' +
+            '<div class="tab-content" data-tab="details"><div class="table-responsive">' +
+            table(['Classification', 'Vacancy Filled', 'Vacancy Unfilled', 'Total Vacancy', 'Vacancy Fill %',
+                   'Absence Filled', 'Absence Unfilled', 'Total Absence', 'Absence Fill %'], details) + '</div></div></div>';
+    }
+
+    function loadBundle(url) {
+        return fetch(url).then(function(resp) {
+            var type = resp.headers.get('Content-Type') || '';
+            // A static host's catch-all rewrite answers a missing file with its HTML index page
+            if (!resp.ok || type.indexOf('text/html') !== -1) { throw new Error('School data not found'); }
+            // A gzipped bundle served as JSON has already been decoded by the browser (Content-Encoding)
+            if (/\.gz$/.test(url) && type.indexOf('json') === -1) {
+                return new Response(resp.body.pipeThrough(new DecompressionStream('gzip'))).json();
+            }
+            return resp.json();
+        });
+    }
+
+    function render(bundle, supt, loc) {
+        var school = bundle.schools[loc];
+        if (!school) { throw new Error('School ' + loc + ' not found'); }
+        var t = {total: 0, vacancy: 0, absence: 0, vacancy_filled: 0, absence_filled: 0};
+        school.rows.forEach(function(r) {
+            t.vacancy += r[1] + r[2]; t.absence += r[3] + r[4];
+            t.vacancy_filled += r[1]; t.absence_filled += r[3];
+        });
+        t.total = t.vacancy + t.absence;
+        var borough = bundle.cards.boroughs[school.borough];
+
+        document.title = 'Jobs Report - ' + school.location;
+        $('#school-subtitle').text('School: ' + school.location + ' (Superintendent: ' + bundle.superintendent + ')');
+        $('#school-date-range').text(bundle.date_range);
+        $('#school-back').attr('href', 'Superintendent_' + supt + '/' + supt + '_report.html')
+            .text('\\u2190 Back to Superintendent ' + bundle.superintendent);
+        $('#school-cards').html(
+            card('Citywide Statistics', 'citywide', bundle.cards.citywide, areaCard(bundle.cards.citywide)) +
+            (borough ? card(school.borough + ' Statistics', 'borough', borough, areaCard(borough)) : '') +
+            card('Superintendent ' + bundle.superintendent, 'superintendent', bundle.cards.superintendent, areaCard(bundle.cards.superintendent)) +
+            card('This School (' + school.location + ')', 'school', t,
+                 [['Classifications', school.rows.map(function(r) { return r[0]; }).join(', ')]])
+        );
+        $('#school-tables').html(tabbedTables(school.rows));
+
+        var names = school.rows.map(function(r) { return r[0].replace(' SPEAKING PARA', ''); });
+        Plotly.newPlot('school-bar-chart', [1, 2, 3, 4].map(function(i) {
+            return {type: 'bar', name: LABELS[i - 1], x: names, marker: {color: COLORS[i - 1]},
+                    y: school.rows.map(function(r) { return r[i]; }),
+                    text: school.rows.map(function(r) { return fmtInt(r[i]); }), textposition: 'auto'};
+        }), {title: 'Jobs by Classification and Type - ' + school.location, xaxis: {title: 'Classification'},
+             yaxis: {title: 'Number of Jobs'}, barmode: 'group', height: 500, width: 1200});
+
+        var pies = $('#school-pies');
+        school.rows.forEach(function(r, idx) {
+            var total = r[1] + r[2] + r[3] + r[4];
+            if (total <= 0) { return; }
+            var id = 'school-pie-' + idx;
+            pies.append('<div id="' + id + '" style="width: 450px; height: 500px; display: inline-block;"></div>');
+            Plotly.newPlot(id, [{type: 'pie', labels: LABELS, values: r.slice(1), hole: 0.3, marker: {colors: COLORS},
+                                 textinfo: 'value+percent', textposition: 'inside', textfont: {size: 14},
+                                 texttemplate: '%{value:,}<br>%{percent}'}],
+                           {title: {text: r[0] + '<br>(' + fmtInt(total) + ' total jobs)', y: 0.95, x: 0.5,
+                                    xanchor: 'center', yanchor: 'top', font: {size: 16}},
+                            height: 450, width: 400, showlegend: true, margin: {t: 60, b: 40, l: 40, r: 40}});
+        });
+
+        if (school.ranks) { renderRanks(school.ranks); }
+        if (school.trend) { renderTrend(school.trend, school.location); }
+    }
+
+    function ordinalPercentile(p) {
+        var n = Math.min(Math.max(Math.round(p), 1), 99);
+        var suffix = (n % 100 >= 10 && n % 100 <= 20) ? 'th' : ({1: 'st', 2: 'nd', 3: 'rd'}[n % 10] || 'th');
+        return n + suffix + ' percentile';
+    }
+
+    function renderRanks(ranks) {
+        var head = '<tr><th>Metric</th>' + ranks.scopes.map(function(scope, i) {
+            return '<th>' + esc(scope) + '<br><small>' + esc(ranks.groups[i]) + '</small></th>';
+        }).join('') + '</tr>';
+        var body = ranks.metrics.map(function(metric, i) {
+            return '<tr><td>' + esc(metric) + '</td>' + ranks.cells[i].map(function(c) {
+                return c ? '<td><strong>' + ordinalPercentile(c[0]) + '</strong><br><small>#' + c[1] + ' of ' + c[2] + '</small></td>'
+                         : '<td>N/A</td>';
+            }).join('') + '</tr>';
+        }).join('');
+        $('#school-ranks-table').html('<div class="table-responsive"><table class="table"><thead>' + head +
+            '</thead><tbody>' + body + '</tbody></table></div>');
+        $('#school-ranks').show();
+    }
+
+    function renderTrend(trend, location) {
+        var weeks = trend.weeks, months = trend.months;
+        var rolling = weeks.filter(function(w) { return w[3] !== null; });
+        if (rolling.length) {
+            var latest = rolling[rolling.length - 1];
+            $('#school-trend-note').html('<em><strong>Rolling 4-week fill rate:</strong> ' + fmtPct(latest[3]) +
+                ' (4 weeks to the week of ' + esc(latest[0]) + ').</em>');
+        }
+        Plotly.newPlot('school-trend-chart', [
+            {type: 'scatter', mode: 'lines+markers', name: 'Weekly Fill %', line: {color: 'lightgray', width: 1}, marker: {size: 5},
+             x: weeks.map(function(w) { return w[0]; }), y: weeks.map(function(w) { return pct(w[1], w[2]); })},
+            {type: 'scatter', mode: 'lines', name: 'Rolling 4-Week Fill %', line: {color: '#007bff', width: 3},
+             x: weeks.map(function(w) { return w[0]; }), y: weeks.map(function(w) { return w[3]; })},
+            {type: 'scatter', mode: 'lines+markers', name: 'Monthly Fill %', line: {color: 'forestgreen', width: 2, dash: 'dot', shape: 'hv'},
+             x: months.map(function(m) { return m[0]; }), y: months.map(function(m) { return pct(m[1], m[2]); })}
+        ], {title: 'Fill Rate Trend - ' + location, xaxis: {title: 'Job Start'}, yaxis: {title: 'Overall Fill Rate (%)', range: [0, 100]},
+            hovermode: 'x unified', height: 450, width: 1200});
+        $('#school-trend').show();
+    }
+
+    $(document).on('click', '#school-app .tab-button', function() {
+        var container = $(this).closest('.tabbed-container');
+        container.find('.tab-button, .tab-content').removeClass('active');
+        $(this).addClass('active');
+        container.find('.tab-content[data-tab="' + $(this).data('tab') + '"]').addClass('active');
+    });
+
+    $(function() {
+        var params = new URLSearchParams(window.location.search);
+        var supt = params.get('s'), loc = params.get('loc');
+        if (!supt || !loc) {
+            $('#school-error').text('No school selected.').show();
+            return;
+        }
+        loadBundle('Superintendent_' + supt + '/' + $('#school-app').data('bundle'))
+            .then(function(bundle) { render(bundle, supt, loc); })
+            .catch(function(e) { $('#school-error').text(e.message).show(); });
+    });
+})();
+"""
+
+
+def write_school_page_shell(output_dir, bundle_filename=SCHOOL_BUNDLE_FILENAME):
+    """
+    Write the shared school page shell that renders any school from its superintendent's bundle
+
+    Args:
+        output_dir: Root output directory (the shell is written at its top level)
+        bundle_filename: Bundle file fetched from the superintendent folder (school_bundle_filename()),
+                         so the page requests exactly the file the build wrote
+
+    Returns:
+        str: Path of the written shell file
+    """
+    content = f"""
+        {get_header_html("Horizontal_logo_White_PublicSchools.png",
+                        "Substitute Paraprofessional Jobs Report",
+                        '<span id="school-subtitle">Loading school...</span>',
+                        '<span id="school-date-range"></span>', root_prefix="")}
+
+        <div class="content" id="school-app" data-bundle="{bundle_filename}">
+            <div class="navigation">
+                <a id="school-back" href="index.html">← Back to Overall Summary</a>
+            </div>
+            <div class="section" id="school-error" style="display: none;"></div>
+
+            <div class="section">
+                <h3>Comparison Statistics</h3>
+                <p><em>This comparison shows how this school performs relative to schools under the same
+                superintendent, the borough, and citywide averages.</em></p>
+                <div class="comparison-grid-four" id="school-cards"></div>
+            </div>
+
+            <div class="section" id="school-ranks" style="display: none;">
+                <h3>How This School Ranks</h3>
+                <p><em>Percentile among all schools, the schools in the same borough, and schools with a similar
+                number of jobs (one of {PEER_GROUPS} job volume bands). The 80th percentile means the school is at or
+                above 80% of the schools in that group; #1 is the highest value.</em></p>
+                <div id="school-ranks-table"></div>
+            </div>
+
+            <div class="section" id="school-trend" style="display: none;">
+                <h3>Fill Rate Trend</h3>
+                <p><em>Weekly and monthly fill rates by job start date, with the rolling 4-week fill rate.</em></p>
+                <p id="school-trend-note"></p>
+                <div class="chart-container"><div id="school-trend-chart" style="width: 1220px; height: 470px;"></div></div>
+            </div>
+
+            <div class="section">
+                <h3>Fill Rate Analysis by Classification</h3>
+                <p><em><strong>Note:</strong> This data is based on SubCentral data only. Use the tabs below to switch
+                between different views of the classification data. Data is sorted from highest to lowest number of
+                total jobs.</em></p>
+                <div id="school-tables"></div>
+            </div>
+
+            <div class="section">
+                <h3>Jobs by Classification and Type</h3>
+                <div class="chart-container"><div id="school-bar-chart" style="width: 1220px; height: 520px;"></div></div>
+            </div>
+
+            <div class="section">
+                <h3>Breakdown by Classification</h3>
+                <div class="pie-container" id="school-pies"></div>
+            </div>
+        </div>
+
+        {get_professional_footer(['SubCentral@schools.nyc.gov'])}
+
+        <script src="https://cdn.plot.ly/plotly-2.27.0.min.js"></script>
+        <script>{SCHOOL_SHELL_JS}</script>
+    """
+
+    html_content = get_html_template("Jobs Report - School", "Horizontal_logo_White_PublicSchools.png", content)
+
+    os.makedirs(output_dir, exist_ok=True)
+    shell_file = os.path.join(output_dir, SCHOOL_SHELL_FILENAME)
+    with open(shell_file, 'w', encoding='utf-8') as f:
+        f.write(html_content)
+
+    return shell_file
@@ -0,0 +1,228 @@
+"""
+Pre-compression of build artifacts for NYC DOE Reports
+
+Writes .gz (and .br when the optional brotli package is installed) siblings next to the
+HTML, JSON, CSS and JS files in the output directory so a static host or the local
+preview server can serve them directly. Files whose content hash is unchanged since the
+last run are skipped using a manifest stored in the output directory, which also keeps the
+sizes of every file and its siblings so the reported totals cover the whole tree. Siblings
+this stage wrote for files that no longer exist are deleted.
+"""
+
+import os
+import sys
+import gzip
+import json
+import hashlib
+from concurrent.futures import ProcessPoolExecutor
+from http.server import SimpleHTTPRequestHandler, ThreadingHTTPServer
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+COMPRESSIBLE_EXTENSIONS = ('.html', '.json', '.css', '.js', '.svg', '.geojson')
+MANIFEST_FILENAME = '.compression_manifest.json'
+# Compressed sibling suffix -> manifest key prefix of its size and digest
+SIBLING_SUFFIXES = {'.gz': 'gzip', '.br': 'brotli'}
+
+
+def _file_sha256(path):
+    """Return the SHA-256 hex digest of a file's contents"""
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(1024 * 1024), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def _compress_file(path):
+    """
+    Write compressed siblings for a single file (runs in a worker process)
+
+    Returns:
+        Tuple of (path, manifest entry): the file's SHA-256 and size, and the size and SHA-256
+        of each sibling written (brotli ones None without brotli)
+    """
+    with open(path, 'rb') as f:
+        data = f.read()
+
+    # mtime=0 keeps the gzip output byte-identical between builds
+    gz_data = gzip.compress(data, compresslevel=9, mtime=0)
+    with open(path + '.gz', 'wb') as f:
+        f.write(gz_data)
+
+    br_data = None
+    if brotli is not None:
+        br_data = brotli.compress(data, quality=11)
+        with open(path + '.br', 'wb') as f:
+            f.write(br_data)
+
+    return path, {
+        'sha256': hashlib.sha256(data).hexdigest(),
+        'original': len(data),
+        'gzip': len(gz_data),
+        'gzip_sha256': hashlib.sha256(gz_data).hexdigest(),
+        'brotli': len(br_data) if br_data is not None else None,
+        'brotli_sha256': hashlib.sha256(br_data).hexdigest() if br_data is not None else None
+    }
+
+
+def _read_manifest(manifest_file):
+    """Load the manifest of the previous run ({} when missing or unreadable)"""
+    if not os.path.exists(manifest_file):
+        return {}
+    try:
+        with open(manifest_file, 'r', encoding='utf-8') as f:
+            manifest = json.load(f)
+    except (OSError, ValueError) as e:
+        print(f"⚠ Could not read compression manifest, recompressing everything: {e}")
+        return {}
+    # Entries of older manifests (a bare hash, no sizes) are treated as unknown
+    return {rel_path: entry for rel_path, entry in manifest.items() if isinstance(entry, dict)}
+
+
+def remove_stale_siblings(output_dir, manifest, current_files):
+    """
+    Delete compressed siblings written for files that are gone from the tree
+
+    Only siblings whose content still matches the manifest are deleted, so a .gz file written by
+    the build itself (e.g. a gzipped school bundle) is never mistaken for a stale sibling.
+
+    Args:
+        output_dir: Root of the generated report tree
+        manifest: Manifest of the previous run
+        current_files: Relative paths of the compressible files now in the tree
+
+    Returns:
+        int: Number of sibling files deleted
+    """
+    removed = 0
+    for rel_path, entry in manifest.items():
+        if rel_path in current_files:
+            continue
+        for suffix, key in SIBLING_SUFFIXES.items():
+            sibling = os.path.join(output_dir, rel_path + suffix)
+            if entry.get(f'{key}_sha256') and os.path.isfile(sibling) and _file_sha256(sibling) == entry[f'{key}_sha256']:
+                os.remove(sibling)
+                removed += 1
+    return removed
+
+
+def find_compressible_files(output_dir, extensions=COMPRESSIBLE_EXTENSIONS):
+    """Return all files under output_dir with a compressible extension"""
+    files = []
+    for root, _, filenames in os.walk(output_dir):
+        for filename in filenames:
+            if filename.endswith(extensions) and filename != MANIFEST_FILENAME:
+                files.append(os.path.join(root, filename))
+    return sorted(files)
+
+
+def compress_output_tree(output_dir, extensions=COMPRESSIBLE_EXTENSIONS, workers=None, force=False):
+    """
+    Pre-compress build artifacts in parallel across cores
+
+    Args:
+        output_dir: Root of the generated report tree
+        extensions: File extensions to compress
+        workers: Number of worker processes (defaults to the CPU count)
+        force: Recompress every file even if its content hash is unchanged
+
+    Returns:
+        dict: Summary with files compressed/skipped, stale siblings removed and the original and
+              compressed byte totals of the whole tree (skipped files included)
+    """
+    manifest_file = os.path.join(output_dir, MANIFEST_FILENAME)
+    manifest = _read_manifest(manifest_file)
+
+    files = find_compressible_files(output_dir, extensions)
+    new_manifest = {}
+    to_compress = []
+    for path in files:
+        rel_path = os.path.relpath(path, output_dir)
+        entry = manifest.get(rel_path)
+        siblings_exist = os.path.exists(path + '.gz') and (brotli is None or os.path.exists(path + '.br'))
+        if (not force and entry is not None and siblings_exist and (brotli is None or entry.get('brotli') is not None)
+                and entry.get('sha256') == _file_sha256(path)):
+            new_manifest[rel_path] = entry
+        else:
+            to_compress.append(path)
+    skipped = len(new_manifest)
+
+    if to_compress:
+        chunksize = max(1, len(to_compress) // ((workers or os.cpu_count() or 1) * 4))
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            for path, entry in executor.map(_compress_file, to_compress, chunksize=chunksize):
+                new_manifest[os.path.relpath(path, output_dir)] = entry
+
+    removed = remove_stale_siblings(output_dir, manifest, new_manifest)
+
+    with open(manifest_file, 'w', encoding='utf-8') as f:
+        json.dump(new_manifest, f, indent=0, sort_keys=True)
+
+    original_bytes = sum(entry['original'] for entry in new_manifest.values())
+    gzip_bytes = sum(entry['gzip'] for entry in new_manifest.values())
+    brotli_bytes = sum(entry['brotli'] or 0 for entry in new_manifest.values())
+    summary = {
+        'files_compressed': len(to_compress),
+        'files_skipped': skipped,
+        'siblings_removed': removed,
+        'original_bytes': original_bytes,
+        'gzip_bytes': gzip_bytes,
+        'brotli_bytes': brotli_bytes if brotli is not None else None,
+        'gzip_ratio': (original_bytes / gzip_bytes) if gzip_bytes else 0,
+        'brotli_ratio': (original_bytes / brotli_bytes) if brotli_bytes else 0
+    }
+
+    print(f"✓ Compressed {summary['files_compressed']} files, skipped {skipped} unchanged, "
+          f"removed {removed} stale siblings")
+    if original_bytes:
+        print(f"  • Tree: {len(new_manifest)} files, {original_bytes / 1e6:.1f} MB → gzip: {gzip_bytes / 1e6:.1f} MB "
+              f"({summary['gzip_ratio']:.1f}x)")
+        if brotli is not None:
+            print(f"  • Tree: {original_bytes / 1e6:.1f} MB → brotli: {brotli_bytes / 1e6:.1f} MB "
+                  f"({summary['brotli_ratio']:.1f}x)")
+        else:
+            print("  • brotli not installed: skipped .br output (pip install brotli to enable)")
+
+    return summary
+
+
+class PrecompressedRequestHandler(SimpleHTTPRequestHandler):
+    """Local preview handler that serves .br/.gz siblings when the browser accepts them"""
+
+    def send_head(self):
+        path = self.translate_path(self.path)
+        accept = self.headers.get('Accept-Encoding', '')
+        if os.path.isfile(path):
+            for encoding, suffix in (('br', '.br'), ('gzip', '.gz')):
+                if encoding in accept and os.path.isfile(path + suffix):
+                    f = open(path + suffix, 'rb')
+                    self.send_response(200)
+                    self.send_header('Content-Type', self.guess_type(path))
+                    self.send_header('Content-Encoding', encoding)
+                    self.send_header('Content-Length', str(os.fstat(f.fileno()).st_size))
+                    self.send_header('Vary', 'Accept-Encoding')
+                    self.end_headers()
+                    return f
+        return super().send_head()
+
+
+def serve_precompressed(output_dir, port=8000):
+    """Serve the report tree locally, preferring pre-compressed siblings"""
+    handler = lambda *args, **kwargs: PrecompressedRequestHandler(*args, directory=output_dir, **kwargs)
+    with ThreadingHTTPServer(('', port), handler) as server:
+        print(f"Serving {output_dir} at http://localhost:{port}/ (pre-compressed)")
+        server.serve_forever()
+
+
+if __name__ == "__main__":
+    # Usage: python compression.py [compress|serve] [output_dir] [port]
+    command = sys.argv[1] if len(sys.argv) > 1 else 'compress'
+    target_dir = sys.argv[2] if len(sys.argv) > 2 else 'nycdoe_reports'
+    if command == 'serve':
+        serve_precompressed(target_dir, int(sys.argv[3]) if len(sys.argv) > 3 else 8000)
+    else:
+        compress_output_tree(target_dir, force='--force' in sys.argv)
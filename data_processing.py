@@ -9,20 +9,27 @@ import os
 import re
 import glob
 
-def load_superintendent_mapping():
+def find_superintendent_mapping_file(search_dir='.'):
+    """Return the path of the superintendent mapping CSV (the first file starting with '8.8.25'), or None"""
+    csv_files = sorted(os.path.normpath(f) for f in glob.glob(os.path.join(glob.escape(search_dir), "8.8.25*.csv")))
+    return csv_files[0] if csv_files else None
+
+def load_superintendent_mapping(search_dir='.'):
     """
     Load the superintendent mapping from the CSV file starting with '8.8.25'
     
+    Args:
+        search_dir: Directory to look for the mapping CSV in
+    
     Returns:
         pandas.DataFrame: DataFrame with school-to-superintendent mappings containing columns:
                          DBN, District, Borough, Location, Superintendent
     """
     # Find the CSV file starting with '8.8.25'
-    csv_files = glob.glob("8.8.25*.csv")
-    if not csv_files:
+    csv_file = find_superintendent_mapping_file(search_dir)
+    if csv_file is None:
         raise FileNotFoundError("Could not find CSV file starting with '8.8.25'")
     
-    csv_file = csv_files[0]  # Take the first matching file
     print(f"Loading superintendent mapping from: {csv_file}")
     
     # Load the CSV
@@ -135,86 +142,98 @@ def copy_logo_to_output(output_directory):
     else:
         print(f"Warning: Logo file {logo_source} not found")
 
-def load_and_process_data(csv_file_paths):
+# Report page of every entity kind, relative to the output root. {0} and {1} are the names from
+# clean_superintendent_name() (or clean_borough_name()) and clean_location_name(); the report
+# generators write their pages here and every link to a page (including the search index) is
+# built from these.
+REPORT_PAGE_PATHS = {
+    'superintendent': 'Superintendent_{0}/{0}_report.html',
+    'school': 'Superintendent_{0}/Schools/School_{1}/{1}_report.html',
+    'borough': 'Borough_{0}/{0}_report.html'
+}
+
+def clean_location_name(location):
+    """Location code as used in school report folder and file names"""
+    location_clean = re.sub(r'[<>:"/\\|?*\n\r\t\s]', '_', str(location)).strip()
+    location_clean = re.sub(r'_+', '_', location_clean).strip('_')
+    location_clean = location_clean.replace('.', '_')
+    if len(location_clean) > 200:
+        location_clean = location_clean[:200].rstrip('._')
+    return location_clean
+
+def clean_superintendent_name(superintendent):
+    """Superintendent name as used in superintendent report folder and file names"""
+    return superintendent.replace(',', '').replace(' ', '_').replace('.', '').replace("'", "")
+
+def clean_borough_name(borough):
+    """Borough name as used in borough report folder and file names"""
+    return borough.replace(' ', '_').replace('/', '_')
+
+def report_page_path(kind, *names):
+    """Path of an entity's report page relative to the output root (see REPORT_PAGE_PATHS), with '/' separators"""
+    return REPORT_PAGE_PATHS[kind].format(*names)
+
+def report_root_prefix(kind):
+    """Relative path from a report page of the given kind back to the output root, e.g. '../'"""
+    return '../' * REPORT_PAGE_PATHS[kind].count('/')
+
+# Payroll exports are recognised by file name; every other input is a SubCentral jobs export
+SREPP_FILENAMES = ['SREPP1.csv', 'SREPP2.csv']
+
+def load_srepp_file(csv_file_path):
     """
-    Load CSV data from multiple files and process it for dashboard display
+    Load one SREPP payroll CSV
     
-    Args:
-        csv_file_paths: Single CSV file path (string) or list of CSV file paths
+    Returns:
+        pandas.DataFrame with a Source_File column, or None if the file could not be read
     """
-    # Handle both single file and multiple files
-    if isinstance(csv_file_paths, str):
-        csv_file_paths = [csv_file_paths]
-    
-    # Separate SREPP files from main data files
-    main_dataframes = []
-    srepp_dataframes = []
-    
-    for csv_file_path in csv_file_paths:
-        filename = os.path.basename(csv_file_path)
+    filename = os.path.basename(csv_file_path)
+    print(f"Loading payroll data from: {csv_file_path}")
+    # First, read the file to check available columns
+    try:
+        # Try reading without specifying columns first
+        temp_df = pd.read_csv(csv_file_path, nrows=1, encoding='UTF-8', sep=',')
+        temp_df = remove_unnamed_columns(temp_df)
+        available_cols = len(temp_df.columns)
+        print(f"  Available columns in {filename}: {available_cols}")
+        print(f"  Column names: {list(temp_df.columns)}")
         
-        if filename in ['SREPP1.csv', 'SREPP2.csv']:
-            print(f"Loading payroll data from: {csv_file_path}")
-            # First, read the file to check available columns
-            try:
-                # Try reading without specifying columns first
-                temp_df = pd.read_csv(csv_file_path, nrows=1, encoding='UTF-8', sep=',')
-                temp_df = remove_unnamed_columns(temp_df)
-                available_cols = len(temp_df.columns)
-                print(f"  Available columns in {filename}: {available_cols}")
-                print(f"  Column names: {list(temp_df.columns)}")
-                
-                # Only read the columns that actually exist
-                if available_cols >= 10:
-                    # If we have enough columns, use the even-numbered ones
-                    cols_to_use = [2*i for i in range(0, min(10, available_cols//2))]
-                    df = pd.read_csv(csv_file_path, skiprows=[1], usecols=cols_to_use, encoding='UTF-8', sep=',')
-                else:
-                    # If we don't have enough columns, read all available columns
-                    df = pd.read_csv(csv_file_path, encoding='UTF-8', sep=',')
-                    
-                print(f"  Loaded columns from {filename}: {list(df.columns)}")
-                df = remove_unnamed_columns(df)
-                df['Source_File'] = filename
-                srepp_dataframes.append(df)
-            except Exception as e:
-                print(f"  Error loading {csv_file_path}: {str(e)}")
-                print(f"  Skipping this file and continuing...")
-                continue
+        # Only read the columns that actually exist
+        if available_cols >= 10:
+            # If we have enough columns, use the even-numbered ones
+            cols_to_use = [2*i for i in range(0, min(10, available_cols//2))]
+            df = pd.read_csv(csv_file_path, skiprows=[1], usecols=cols_to_use, encoding='UTF-8', sep=',')
         else:
-            print(f"Loading data from: {csv_file_path}")
-            df = pd.read_csv(csv_file_path)
-            df = remove_unnamed_columns(df)
-            # Add source file information for tracking
-            df['Source_File'] = filename
-            main_dataframes.append(df)
-
-    # Combine main dataframes (excluding SREPP files)
-    if main_dataframes:
-        df = pd.concat(main_dataframes, ignore_index=True)
+            # If we don't have enough columns, read all available columns
+            df = pd.read_csv(csv_file_path, encoding='UTF-8', sep=',')
+            
+        print(f"  Loaded columns from {filename}: {list(df.columns)}")
         df = remove_unnamed_columns(df)
-    else:
-        df = pd.DataFrame()  # Empty dataframe if no main files
+        df['Source_File'] = filename
+        return df
+    except Exception as e:
+        print(f"  Error loading {csv_file_path}: {str(e)}")
+        print(f"  Skipping this file and continuing...")
+        return None
+
+def clean_job_rows(df):
+    """
+    Clean SubCentral job rows: parse Job Start, normalise Classification and Type, and add
+    Borough, Location_Clean, Fill_Status and Type_Fill_Status
     
-    # Combine SREPP dataframes separately
-    if srepp_dataframes:
-        srepp_df = pd.concat(srepp_dataframes, ignore_index=True)
-        srepp_df = remove_unnamed_columns(srepp_df)
-        print(f"Combined SREPP payroll data: {len(srepp_df)} records from {len(srepp_dataframes)} files")
-    else:
-        srepp_df = pd.DataFrame()  # Empty dataframe if no SREPP files
+    Every step works row by row, so cleaning a file in chunks gives the same rows as cleaning
+    all files at once.
     
-    print(f"Combined main data: {len(df)} total records from {len(main_dataframes)} files")
+    Args:
+        df: Raw SubCentral rows (concatenated files or one chunk of a file)
     
+    Returns:
+        pandas.DataFrame: Cleaned rows (rows without a District are dropped)
+    """
     # Clean column names (remove extra spaces) for main dataframe
     if not df.empty:
         df.columns = df.columns.str.strip()
     
-    # Clean column names for SREPP dataframe if it exists
-    if not srepp_df.empty:
-        srepp_df.columns = srepp_df.columns.str.strip()
-    
-    # Continue processing main dataframe only (SREPP data will be returned separately)
     df_to_process = df
     
     # Parse Job Start dates (handle different formats) - only for main data
@@ -223,11 +242,12 @@ def load_and_process_data(csv_file_paths):
             # First, try to convert numeric Excel serial dates
             numeric_mask = pd.to_numeric(df_to_process['Job Start'], errors='coerce').notna()
             if numeric_mask.any():
-                # Convert Excel serial date to datetime for numeric values
+                # Convert Excel serial date to datetime for numeric values (Excel's day 0 is 1899-12-30,
+                # which absorbs its fictitious 1900-02-29)
                 df_to_process.loc[numeric_mask, 'Job Start'] = pd.to_datetime(
-                    pd.to_numeric(df_to_process.loc[numeric_mask, 'Job Start']) - 1, 
+                    pd.to_numeric(df_to_process.loc[numeric_mask, 'Job Start']), 
                     unit='D', 
-                    origin='1900-01-01'
+                    origin='1899-12-30'
                 )
             
             # Then try to parse any remaining string dates
@@ -279,9 +299,244 @@ def load_and_process_data(csv_file_paths):
         # Create combined category for Type + Fill Status
         df_to_process['Type_Fill_Status'] = df_to_process['Type'] + '_' + df_to_process['Fill_Status']
     
+    return df_to_process
+
+def load_and_process_data(csv_file_paths):
+    """
+    Load CSV data from multiple files and process it for dashboard display
+    
+    Args:
+        csv_file_paths: Single CSV file path (string) or list of CSV file paths
+    """
+    # Handle both single file and multiple files
+    if isinstance(csv_file_paths, str):
+        csv_file_paths = [csv_file_paths]
+    
+    # Separate SREPP files from main data files
+    main_dataframes = []
+    srepp_dataframes = []
+    
+    for csv_file_path in csv_file_paths:
+        filename = os.path.basename(csv_file_path)
+        
+        if filename in SREPP_FILENAMES:
+            df = load_srepp_file(csv_file_path)
+            if df is not None:
+                srepp_dataframes.append(df)
+        else:
+            print(f"Loading data from: {csv_file_path}")
+            df = pd.read_csv(csv_file_path)
+            df = remove_unnamed_columns(df)
+            # Add source file information for tracking
+            df['Source_File'] = filename
+            main_dataframes.append(df)
+
+    # Combine main dataframes (excluding SREPP files)
+    if main_dataframes:
+        df = pd.concat(main_dataframes, ignore_index=True)
+        df = remove_unnamed_columns(df)
+    else:
+        df = pd.DataFrame()  # Empty dataframe if no main files
+    
+    # Combine SREPP dataframes separately
+    if srepp_dataframes:
+        srepp_df = pd.concat(srepp_dataframes, ignore_index=True)
+        srepp_df = remove_unnamed_columns(srepp_df)
+        print(f"Combined SREPP payroll data: {len(srepp_df)} records from {len(srepp_dataframes)} files")
+    else:
+        srepp_df = pd.DataFrame()  # Empty dataframe if no SREPP files
+    
+    print(f"Combined main data: {len(df)} total records from {len(main_dataframes)} files")
+    
+    # Clean column names for SREPP dataframe if it exists
+    if not srepp_df.empty:
+        srepp_df.columns = srepp_df.columns.str.strip()
+    
+    # Continue processing main dataframe only (SREPP data will be returned separately)
+    df_to_process = sort_by_job_start(clean_job_rows(df))
+    
     # Return both main processed data and SREPP data
     return df_to_process, srepp_df
 
+def sort_by_job_start(df):
+    """
+    Sort cleaned job rows by Job Start so date windows can be cut with slice_job_window()
+    
+    The sort is stable (jobs on the same date keep their file order) and jobs without a
+    valid Job Start go last.
+    
+    Returns:
+        pandas.DataFrame: Sorted rows with Job Start as datetime64 and a fresh RangeIndex
+    """
+    if df.empty or 'Job Start' not in df.columns:
+        return df
+    df['Job Start'] = pd.to_datetime(df['Job Start'], errors='coerce')
+    return df.sort_values('Job Start', kind='stable', na_position='last', ignore_index=True)
+
+def slice_job_window(df, start=None, end=None):
+    """
+    Jobs whose Job Start falls between two dates, from rows sorted by sort_by_job_start()
+    
+    Two binary searches on the sorted dates find the window, so each period costs
+    O(log n) plus the copy of its own rows instead of a comparison over every job.
+    
+    Args:
+        df: Job rows sorted by Job Start
+        start: First job date of the window (inclusive), or None for the first job
+        end: Last job date of the window (inclusive), or None for the last job
+    
+    Returns:
+        pandas.DataFrame: The rows in the window (jobs without a Job Start are left out
+                          once either bound is given)
+    """
+    if start is None and end is None:
+        return df
+    dates = df['Job Start'].to_numpy(dtype='datetime64[ns]')
+    # NaT sorts after every date, so searching for it finds the end of the dated rows
+    lo = 0 if start is None else np.searchsorted(dates, pd.Timestamp(start).normalize().to_datetime64(), side='left')
+    if end is None:
+        hi = np.searchsorted(dates, np.datetime64('NaT'), side='left')
+    else:
+        hi = np.searchsorted(dates, (pd.Timestamp(end).normalize() + pd.Timedelta(days=1)).to_datetime64(), side='left')
+    return df.iloc[lo:max(lo, hi)].copy()
+
+# Month, week (Monday) and weekday buckets of a job in the streaming job count cube
+# ('YYYY-MM', 'YYYY-MM-DD', 0 = Monday)
+JOB_MONTH_COL = 'Job_Month'
+JOB_WEEK_COL = 'Job_Week'
+JOB_WEEKDAY_COL = 'Job_Weekday'
+
+# Keys of the streaming job count cube: school x classification x type x fill status x month,
+# split by week for the weekly trends and by weekday for the day-of-week heatmaps. District is
+# kept because the district map groups on it; Borough and Type_Fill_Status are derived from the
+# keys once the stream is folded.
+STREAM_CUBE_KEYS = ['Location', 'District', 'Classification', 'Type', 'Fill_Status', JOB_MONTH_COL, JOB_WEEK_COL,
+                    JOB_WEEKDAY_COL]
+
+# Columns read as text so a chunk that happens to hold only numbers or blanks parses like the whole file
+STREAM_TEXT_COLUMNS = {'Location': str, 'Classification': str, 'Type': str, 'Status': str, 'Job Start': str}
+
+# Queued partial count tables are folded into the running total once they hold this many rows or
+# as many rows as the total, whichever is more, so every row is re-grouped a bounded number of times
+FOLD_BATCH_ROWS = 500000
+
+def _fold_counts(total, parts, keys):
+    """Fold partial count tables into a running total (all with a Job_Count column) with one groupby"""
+    combined = pd.concat(([] if total is None else [total]) + parts, ignore_index=True)
+    return combined.groupby(keys, dropna=False, sort=False)[JOB_COUNT_COL].sum().reset_index()
+
+def _queue_counts(fold, part, keys):
+    """Queue one partial count table on a fold ({'total', 'parts', 'rows'}), folding the batch once it is full"""
+    fold['parts'].append(part)
+    fold['rows'] += len(part)
+    if fold['rows'] >= max(FOLD_BATCH_ROWS, 0 if fold['total'] is None else len(fold['total'])):
+        fold['total'] = _fold_counts(fold['total'], fold['parts'], keys)
+        fold['parts'], fold['rows'] = [], 0
+
+def _finish_counts(fold, keys):
+    """Fold any queued partial count tables and return the total, or None if nothing was queued"""
+    if fold['parts']:
+        fold['total'] = _fold_counts(fold['total'], fold['parts'], keys)
+        fold['parts'], fold['rows'] = [], 0
+    return fold['total']
+
+def stream_job_cube(csv_file_paths, chunksize=100000):
+    """
+    Streaming alternative to load_and_process_data() for job histories too large for memory
+    
+    Each SubCentral file is read in chunks; every chunk is cleaned with clean_job_rows() and folded
+    into a running job count cube keyed by STREAM_CUBE_KEYS, so memory is bounded by the cube
+    rather than by the number of rows. Partial counts are queued and folded in batches at least
+    as large as the cube (FOLD_BATCH_ROWS), so the folding work grows with the rows streamed,
+    not with cube size x chunks, and the queue never holds more than about one cube. The
+    filled-job matching keys are folded the same way, into one row per distinct Location +
+    EISID + job day. SREPP payroll files are loaded whole, as in load_and_process_data().
+    
+    The cube gives the same statistics (create_summary_stats honours Job_Count) and date range as
+    the in-memory path, provided each export uses a single Job Start date format.
+    
+    Args:
+        csv_file_paths: Single CSV file path (string) or list of CSV file paths
+        chunksize: Rows per chunk
+    
+    Returns:
+        dict: 'cube' (job count cube with Borough and Type_Fill_Status), 'srepp_df',
+              'subcentral_keys' (Location, EISID, Day, Job_Count), 'date_range_info' and 'rows'
+    """
+    if isinstance(csv_file_paths, str):
+        csv_file_paths = [csv_file_paths]
+    
+    cube_fold = {'total': None, 'parts': [], 'rows': 0}
+    keys_fold = {'total': None, 'parts': [], 'rows': 0}
+    key_columns = ['Location', 'EISID', 'Day']
+    min_date = max_date = None
+    rows = 0
+    main_files = 0
+    srepp_dataframes = []
+    
+    for csv_file_path in csv_file_paths:
+        filename = os.path.basename(csv_file_path)
+        if filename in SREPP_FILENAMES:
+            df = load_srepp_file(csv_file_path)
+            if df is not None:
+                srepp_dataframes.append(df)
+            continue
+        
+        print(f"Streaming data from: {csv_file_path} (chunks of {chunksize:,} rows)")
+        main_files += 1
+        for chunk in pd.read_csv(csv_file_path, chunksize=chunksize, dtype=STREAM_TEXT_COLUMNS):
+            chunk = remove_unnamed_columns(chunk)
+            chunk['Source_File'] = filename
+            chunk = clean_job_rows(chunk)
+            if chunk.empty:
+                continue
+            rows += len(chunk)
+            
+            job_start = pd.to_datetime(chunk['Job Start'], errors='coerce')
+            chunk[JOB_MONTH_COL] = job_start.dt.strftime('%Y-%m')
+            job_day = job_start.dt.normalize()
+            chunk[JOB_WEEK_COL] = (job_day - pd.to_timedelta(job_day.dt.weekday, unit='D')).dt.strftime('%Y-%m-%d')
+            chunk[JOB_WEEKDAY_COL] = job_day.dt.weekday
+            if job_start.notna().any():
+                min_date = job_start.min() if min_date is None else min(min_date, job_start.min())
+                max_date = job_start.max() if max_date is None else max(max_date, job_start.max())
+            
+            part = chunk.groupby(STREAM_CUBE_KEYS, dropna=False, sort=False).size().reset_index(name=JOB_COUNT_COL)
+            _queue_counts(cube_fold, part, STREAM_CUBE_KEYS)
+            
+            if 'Specified Sub' in chunk.columns:
+                keys = _subcentral_job_keys(chunk, verbose=False)
+                part = keys.groupby(key_columns, sort=False).size().reset_index(name=JOB_COUNT_COL)
+                _queue_counts(keys_fold, part, key_columns)
+    
+    cube = _finish_counts(cube_fold, STREAM_CUBE_KEYS)
+    subcentral_keys = _finish_counts(keys_fold, key_columns)
+    
+    if srepp_dataframes:
+        srepp_df = pd.concat(srepp_dataframes, ignore_index=True)
+        srepp_df = remove_unnamed_columns(srepp_df)
+        srepp_df.columns = srepp_df.columns.str.strip()
+        print(f"Combined SREPP payroll data: {len(srepp_df)} records from {len(srepp_dataframes)} files")
+    else:
+        srepp_df = pd.DataFrame()
+    
+    if cube is None:
+        cube = pd.DataFrame()
+    else:
+        cube = cube.sort_values(STREAM_CUBE_KEYS, na_position='last', ignore_index=True)
+        cube['Borough'] = cube['Location'].apply(get_borough_from_location)
+        cube['Type_Fill_Status'] = cube['Type'] + '_' + cube['Fill_Status']
+    
+    print(f"Streamed main data: {rows} total records from {main_files} files into {len(cube)} cube rows")
+    
+    return {
+        'cube': cube,
+        'srepp_df': srepp_df,
+        'subcentral_keys': subcentral_keys,
+        'date_range_info': format_date_range(min_date, max_date) if min_date is not None else "Date range not available",
+        'rows': rows
+    }
+
 def add_superintendent_info(df, mapping_df=None):
     """
     Add superintendent, district, and borough information to the main dataframe
@@ -307,297 +562,257 @@ def add_superintendent_info(df, mapping_df=None):
     df['DBN'] = df['Location'].map(lambda x: school_info.get(x, {}).get('dbn', 'Unknown'))
     df['School_Name_Full'] = df['Location'].map(lambda x: school_info.get(x, {}).get('school_name', 'Unknown'))
     
-    # Report mapping success
-    mapped_count = (df['Superintendent_Name'] != 'Unknown').sum()
-    total_count = len(df)
+    # Report mapping success (in jobs, also for a job count cube)
+    mapped = df['Superintendent_Name'] != 'Unknown'
+    mapped_count = int(df.loc[mapped, JOB_COUNT_COL].sum()) if JOB_COUNT_COL in df.columns else mapped.sum()
+    total_count = total_job_count(df)
     print(f"✓ Successfully mapped {mapped_count}/{total_count} records to superintendents ({mapped_count/total_count*100:.1f}%)")
     
     # Show summary by superintendent
     if mapped_count > 0:
-        supt_summary = df[df['Superintendent_Name'] != 'Unknown']['Superintendent_Name'].value_counts()
+        supt_summary = df[mapped]['Superintendent_Name'].value_counts()
         print(f"✓ Found {len(supt_summary)} unique superintendents managing schools in the data")
     
     return df
 
-def create_matching_analysis(main_df, srepp_df):
+def _subcentral_job_keys(main_df, verbose=True):
     """
-    Create analysis comparing individual jobs between SubCentral and SREPP payroll data by location
+    Project filled SubCentral jobs down to their matching key: Location, EISID and job day
+
+    Returns:
+        pandas.DataFrame: Columns Location (stripped string), EISID (int64), Day (int64 days since epoch)
+                          for filled jobs with a valid Job Start and a numeric Specified Sub
+    """
+    filled = main_df['Fill_Status'].to_numpy() == 'Filled'
+    job_start = pd.to_datetime(main_df['Job Start'][filled], errors='coerce')
+    eisid = pd.to_numeric(main_df['Specified Sub'][filled], errors='coerce')
+    valid = (job_start.notna() & eisid.notna()).to_numpy()
+    if verbose:
+        print(f"  Filled SubCentral jobs: {filled.sum()} of {len(main_df)}, "
+              f"{valid.sum()} with a valid Job Start and Specified Sub")
+
+    return pd.DataFrame({
+        'Location': main_df['Location'][filled][valid].astype(str).str.strip().to_numpy(),
+        'EISID': eisid.to_numpy()[valid].astype(np.int64),
+        'Day': job_start.to_numpy()[valid].astype('datetime64[D]').astype(np.int64)
+    })
+
+
+def _srepp_job_keys(srepp_df, main_locations):
+    """
+    Project SREPP payroll records down to their matching key and the SubCentral location they map to
+
+    SCHOOL values are DBNs; dropping the 2-digit district prefix gives the location code, which is
+    matched against the last 4 characters of the SubCentral Location.
+
+    Returns:
+        pandas.DataFrame: Columns Location (mapped SubCentral location), School (location code from SCHOOL),
+                          EISID (int64) and Day (int64 days since epoch)
+    """
+    eisid = pd.to_numeric(srepp_df['EISID'], errors='coerce')
+    pay_date = pd.to_datetime(srepp_df['DATE'], errors='coerce')
+    school = srepp_df['SCHOOL'].astype(str).str.strip().str[2:]
+
+    locations = pd.Series(main_locations).astype(str).str.strip()
+    location_mapping = dict(zip(locations.str[-4:], locations))
+    location = school.map(location_mapping)
+
+    valid_key = (eisid.notna() & pay_date.notna()).to_numpy()
+    mapped = valid_key & location.notna().to_numpy()
+    print(f"  SREPP records: {valid_key.sum()} of {len(srepp_df)} with a valid EISID and DATE, "
+          f"{mapped.sum()} mapped to SubCentral locations, {valid_key.sum() - mapped.sum()} unmapped")
+
+    return pd.DataFrame({
+        'Location': location.to_numpy()[mapped],
+        'School': school.to_numpy()[mapped],
+        'EISID': eisid.to_numpy()[mapped].astype(np.int64),
+        'Day': pay_date.to_numpy()[mapped].astype('datetime64[D]').astype(np.int64)
+    })
+
+
+MATCH_KEY_COLUMNS = ['Location', 'EISID', 'Day']
+
+def build_matching_keys(main_df, srepp_df, subcentral_keys=None):
+    """
+    Project SubCentral and SREPP data down to their matching keys, one row per distinct key
+
+    A job is identified by LOCATION + EISID + DATE. Only the key columns are projected from the
+    inputs and every filter is a combined boolean mask, so no intermediate frame copies are made.
+    Duplicate keys are folded into a Job_Count column, so the keys can be cached per build and
+    filtered to any date window (window_matching_keys) before aggregate_matching_keys().
     
     Args:
         main_df: SubCentral data with 'Location', 'Specified Sub', and 'Job Start' columns (filled jobs only)
         srepp_df: SREPP payroll data with 'SCHOOL', 'EISID', and 'DATE' columns  
+        subcentral_keys: Optional SubCentral keys already folded by stream_job_cube() (with a
+                         Job_Count column); main_df then only needs a 'Location' column
     
     Returns:
-        pandas.DataFrame: Job-level matching analysis by location with columns:
-            - Location: School location
-            - SubCentral Job Days: Total filled job days in SubCentral for this location
-            - Payroll Job Days: Total payroll records for this location
-            - Matched Jobs: Number of SubCentral jobs that have matching payroll records
-            - Match Percentage: Percentage of payroll records that have corresponding SubCentral records
+        dict: 'subcentral_keys' (Location, EISID, Day, Job_Count) and 'srepp_keys' (Location, School,
+              EISID, Day, Job_Count); either is None when its data is missing or lacks the key columns
     """
-    print(f"  Starting sophisticated job-level matching analysis...")
+    print(f"  Starting job-level matching analysis...")
     print(f"  Main df shape: {main_df.shape}, SREPP df shape: {srepp_df.shape}")
-    
-    if main_df.empty and srepp_df.empty:
-        print("  Both dataframes are empty, returning empty result")
-        return pd.DataFrame()
-    
-    # Process SubCentral data to create unique job identifiers
-    subcentral_jobs = {}
-    subcentral_totals = {}
-    if not main_df.empty:
-        # Only work with filled jobs
-        filled_jobs = main_df[main_df['Fill_Status'] == 'Filled'].copy()
-        print(f"  Processing {len(filled_jobs)} filled jobs from {len(main_df)} total SubCentral records")
-        
-        if not filled_jobs.empty:
-            # Check required columns
-            required_cols = ['Location', 'Specified Sub', 'Job Start']
-            missing_cols = [col for col in required_cols if col not in filled_jobs.columns]
-            
-            if missing_cols:
-                print(f"  Warning: Missing required columns in SubCentral data: {missing_cols}")
-                print(f"  Available columns: {list(filled_jobs.columns)}")
-                print(f"  Cannot perform job-level matching")
-            else:
-                # Create unique job identifiers: LOCATION+SPECIFIED_SUB+DATE_INTEGER
-                # First ensure Job Start is in datetime format
-                filled_jobs['Job Start'] = pd.to_datetime(filled_jobs['Job Start'], errors='coerce')
-                
-                # Remove jobs with invalid dates
-                filled_jobs = filled_jobs[filled_jobs['Job Start'].notna()].copy()
-                print(f"  SubCentral jobs with valid dates: {len(filled_jobs)}")
-                
-                if len(filled_jobs) == 0:
-                    print("  No SubCentral jobs with valid dates found")
-                else:
-                    # Remove jobs with NaN Specified Sub values and convert to int
-                    filled_jobs = filled_jobs[filled_jobs['Specified Sub'].notna()].copy()
-                    print(f"  SubCentral jobs after removing NaN Specified Sub: {len(filled_jobs)}")
-                    
-                    if len(filled_jobs) == 0:
-                        print("  No SubCentral jobs with valid Specified Sub found")
-                    else:
-                        # Convert Job Start to date integer (YYYYMMDD format)
-                        filled_jobs['Job_Date_Int'] = filled_jobs['Job Start'].dt.strftime('%Y%m%d').astype(str)
-                        
-                        # Clean and format Specified Sub (EISID) - convert to int first, then to 7-char string
-                        filled_jobs['Specified_Sub_Int'] = pd.to_numeric(filled_jobs['Specified Sub'], errors='coerce').astype('Int64')
-                        filled_jobs = filled_jobs[filled_jobs['Specified_Sub_Int'].notna()].copy()
-                        print(f"  SubCentral jobs after converting Specified Sub to int: {len(filled_jobs)}")
-                        
-                        if len(filled_jobs) == 0:
-                            print("  No SubCentral jobs with numeric Specified Sub found")
-                        else:
-                            # Format as 7-character zero-padded string
-                            filled_jobs['EISID_Clean'] = filled_jobs['Specified_Sub_Int'].astype(str).str.zfill(7)
-                            
-                            # Clean Location
-                            filled_jobs['Location_Clean'] = filled_jobs['Location'].astype(str).str.strip()
-                
-                            filled_jobs['Job_ID'] = (
-                                filled_jobs['Location_Clean'] + '|' + 
-                                filled_jobs['EISID_Clean'] + '|' + 
-                                filled_jobs['Job_Date_Int']
-                            )
-                            
-                            # Create location mapping for job IDs
-                            for _, row in filled_jobs.iterrows():
-                                location = row['Location_Clean']
-                                job_id = row['Job_ID']
-                                
-                                if location not in subcentral_jobs:
-                                    subcentral_jobs[location] = set()
-                                subcentral_jobs[location].add(job_id)
-                            
-                            # Count total jobs by location
-                            subcentral_totals = filled_jobs.groupby('Location_Clean').size().to_dict()
-                            
-                            total_subcentral_jobs = sum(subcentral_totals.values())
-                            print(f"  SubCentral: {len(subcentral_totals)} locations, {total_subcentral_jobs} total job days")
-                            print(f"  Created {sum(len(jobs) for jobs in subcentral_jobs.values())} unique job identifiers")
-                            print(f"  Sample SubCentral job IDs: {list(list(subcentral_jobs.values())[0])[:3] if subcentral_jobs else []}")
-                            print(f"  Top 5 SubCentral locations by job days: {dict(list(sorted(subcentral_totals.items(), key=lambda x: x[1], reverse=True)[:5]))}")
-                            
+
+    if subcentral_keys is not None:
+        print(f"  Using {len(subcentral_keys)} pre-aggregated SubCentral job keys")
+    elif main_df.empty:
+        print("  No SubCentral data to process")
+    else:
+        missing_cols = [col for col in ['Location', 'Specified Sub', 'Job Start'] if col not in main_df.columns]
+        if missing_cols:
+            print(f"  Warning: Missing required columns in SubCentral data: {missing_cols}")
+            print(f"  Cannot perform job-level matching")
         else:
-            print("  No filled SubCentral jobs found")
+            subcentral_keys = (
+                _subcentral_job_keys(main_df).groupby(MATCH_KEY_COLUMNS, sort=False).size()
+                .reset_index(name=JOB_COUNT_COL)
+            )
+
+    srepp_keys = None
+    if srepp_df.empty:
+        print("  No SREPP data to process")
     else:
-        print("  No SubCentral data to process")
-    
-    # Process SREPP data to find matching jobs
-    srepp_jobs = {}
-    srepp_totals = {}
-    if not srepp_df.empty:
-        print(f"  Processing {len(srepp_df)} SREPP payroll records...")
-        print(f"  SREPP columns available: {list(srepp_df.columns)}")
-        
-        # Check required columns
-        required_cols = ['SCHOOL', 'EISID', 'DATE']
-        missing_cols = [col for col in required_cols if col not in srepp_df.columns]
-        
+        missing_cols = [col for col in ['SCHOOL', 'EISID', 'DATE'] if col not in srepp_df.columns]
         if missing_cols:
             print(f"  Warning: Missing required columns in SREPP data: {missing_cols}")
             print(f"  Available columns: {list(srepp_df.columns)}")
             print(f"  Cannot perform job-level matching")
         else:
-            print(f"  Using columns: SCHOOL, EISID, DATE for job matching")
-            
-            # Process SREPP records
-            srepp_df_copy = srepp_df.copy()
-            
-            # Remove records with NaN EISID values
-            srepp_df_copy = srepp_df_copy[srepp_df_copy['EISID'].notna()].copy()
-            print(f"  SREPP records after removing NaN EISID: {len(srepp_df_copy)}")
-            
-            if len(srepp_df_copy) == 0:
-                print("  No SREPP records with valid EISID found")
-            else:
-                # Clean SCHOOL column - remove first 2 characters and clean
-                srepp_df_copy['School_Clean'] = srepp_df_copy['SCHOOL'].astype(str).str.strip().str[2:]
-                
-                # Clean and format EISID - convert to int first, then to 7-char string
-                srepp_df_copy['EISID_Int'] = pd.to_numeric(srepp_df_copy['EISID'], errors='coerce').astype('Int64')
-                srepp_df_copy = srepp_df_copy[srepp_df_copy['EISID_Int'].notna()].copy()
-                print(f"  SREPP records after converting EISID to int: {len(srepp_df_copy)}")
-                
-                if len(srepp_df_copy) == 0:
-                    print("  No SREPP records with numeric EISID found")
-                else:
-                    # Format as 7-character zero-padded string
-                    srepp_df_copy['EISID_Clean'] = srepp_df_copy['EISID_Int'].astype(str).str.zfill(7)
-                    
-                    # Parse dates and convert to integer format (YYYYMMDD)
-                    srepp_df_copy['DATE_Clean'] = pd.to_datetime(srepp_df_copy['DATE'], errors='coerce')
-                    srepp_df_copy['Date_Int'] = srepp_df_copy['DATE_Clean'].dt.strftime('%Y%m%d').astype(str)
-                    
-                    # Remove records with invalid dates
-                    valid_srepp = srepp_df_copy[srepp_df_copy['DATE_Clean'].notna()].copy()
-                    print(f"  SREPP records with valid dates: {len(valid_srepp)}")
-                    
-                    if len(valid_srepp) > 0:
-                        # Create job identifiers: SCHOOL_CLEAN+EISID_CLEAN+DATE_INTEGER
-                        valid_srepp['Job_ID'] = (
-                            valid_srepp['School_Clean'] + '|' + 
-                            valid_srepp['EISID_Clean'] + '|' + 
-                            valid_srepp['Date_Int']
-                        )
-                        
-                        # Create location mapping from SubCentral locations to match with SREPP School_Clean
-                        location_mapping = {}
-                        if not main_df.empty:
-                            main_locations = main_df['Location'].unique()
-                            print(f"  Mapping to {len(main_locations)} unique SubCentral locations...")
-                            
-                            # Map location codes to full location names
-                            for main_location in main_locations:
-                                main_location_str = str(main_location).strip()
-                                # Extract location code from main location (last 4 characters)
-                                main_location_code = main_location_str[-4:]
-                                location_mapping[main_location_code] = main_location_str
-                            
-                            print(f"  Created {len(location_mapping)} location mappings")
-                        
-                        # Map SREPP School_Clean to SubCentral location names
-                        valid_srepp['Location'] = valid_srepp['School_Clean'].map(location_mapping)
-                        
-                        # Filter to only records that map to SubCentral locations
-                        mapped_srepp = valid_srepp[valid_srepp['Location'].notna()].copy()
-                        
-                        print(f"  SREPP records: {len(mapped_srepp)} mapped to SubCentral locations, {len(valid_srepp) - len(mapped_srepp)} unmapped")
-                        
-                        if len(mapped_srepp) > 0:
-                            # Create location mapping for SREPP job IDs (using the mapped SubCentral location names)
-                            for _, row in mapped_srepp.iterrows():
-                                location = row['Location']
-                                job_id = row['Job_ID']
-                                
-                                if location not in srepp_jobs:
-                                    srepp_jobs[location] = set()
-                                srepp_jobs[location].add(job_id)
-                            
-                            # Count total SREPP records by location
-                            srepp_totals = mapped_srepp.groupby('Location').size().to_dict()
-                            
-                            total_srepp_jobs = sum(srepp_totals.values())
-                            print(f"  SREPP: {len(srepp_totals)} locations, {total_srepp_jobs} total job days")
-                            print(f"  Created {sum(len(jobs) for jobs in srepp_jobs.values())} unique SREPP job identifiers")
-                            print(f"  Sample SREPP job IDs: {list(list(srepp_jobs.values())[0])[:3] if srepp_jobs else []}")
-                            print(f"  Top 5 SREPP locations by job days: {dict(list(sorted(srepp_totals.items(), key=lambda x: x[1], reverse=True)[:5]))}")
-
-                        else:
-                            print("  No SREPP records could be mapped to SubCentral locations")
-                    else:
-                        print("  No valid SREPP records found")
-    else:
-        print("  No SREPP data to process")
-    
-    # Create comparison results
-    all_locations = set(subcentral_totals.keys()) | set(srepp_totals.keys())
+            main_locations = main_df['Location'].unique() if not main_df.empty else []
+            srepp_keys = (
+                _srepp_job_keys(srepp_df, main_locations).groupby(['Location', 'School', 'EISID', 'Day'], sort=False)
+                .size().reset_index(name=JOB_COUNT_COL)
+            )
+
+    # Working set is the projected key frames; the inputs themselves are never copied
+    key_bytes = sum(int(keys.memory_usage(index=False, deep=True).sum())
+                    for keys in (subcentral_keys, srepp_keys) if keys is not None)
+    print(f"  Matching key frames: {key_bytes / 1e6:.1f} MB")
+
+    return {'subcentral_keys': subcentral_keys, 'srepp_keys': srepp_keys}
+
+def window_matching_keys(keys, start=None, end=None):
+    """
+    Matching keys (build_matching_keys) of the jobs and payroll records dated within a window
+
+    Args:
+        keys: Dict with 'subcentral_keys' and 'srepp_keys'
+        start: First day of the window (inclusive), or None
+        end: Last day of the window (inclusive), or None
+
+    Returns:
+        dict: The same layout with only the keys whose Day falls in the window
+    """
+    first = None if start is None else pd.Timestamp(start).normalize().to_datetime64().astype('datetime64[D]').astype(np.int64)
+    last = None if end is None else pd.Timestamp(end).normalize().to_datetime64().astype('datetime64[D]').astype(np.int64)
+    windowed = {}
+    for name in ('subcentral_keys', 'srepp_keys'):
+        frame = keys.get(name)
+        if frame is not None and (first is not None or last is not None):
+            day = frame['Day'].to_numpy()
+            in_window = np.ones(len(frame), dtype=bool)
+            if first is not None:
+                in_window &= day >= first
+            if last is not None:
+                in_window &= day <= last
+            frame = frame[in_window]
+        windowed[name] = frame
+    return windowed
+
+def aggregate_matching_keys(keys):
+    """
+    Create analysis comparing individual jobs between SubCentral and SREPP payroll data by location
+
+    Args:
+        keys: Matching keys from build_matching_keys(), optionally windowed by window_matching_keys()
+
+    Returns:
+        pandas.DataFrame: Job-level matching analysis by location with columns:
+            - Location: School location
+            - SubCentral Job Days: Total filled job days in SubCentral for this location
+            - Payroll Job Days: Total payroll records for this location
+            - Matched Jobs: Number of SubCentral jobs that have matching payroll records
+            - Match Percentage: Percentage of payroll records that have corresponding SubCentral records
+    """
+    subcentral_keys, srepp_keys = keys.get('subcentral_keys'), keys.get('srepp_keys')
+    if subcentral_keys is None and srepp_keys is None:
+        print("  No matching keys in either system, returning empty result")
+        return pd.DataFrame()
+
+    subcentral_totals = (
+        subcentral_keys.groupby('Location')[JOB_COUNT_COL].sum() if subcentral_keys is not None
+        else pd.Series(dtype=np.int64)
+    )
+    srepp_totals = (
+        srepp_keys.groupby('Location')[JOB_COUNT_COL].sum() if srepp_keys is not None
+        else pd.Series(dtype=np.int64)
+    )
+
+    all_locations = subcentral_totals.index.union(srepp_totals.index)
     print(f"  Total unique locations across both systems: {len(all_locations)}")
-    
-    if not all_locations:
+    if len(all_locations) == 0:
         print("  No locations found in either system")
         return pd.DataFrame()
-    
-    # Calculate matches by location using simple unique ID matching
-    matching_results = []
-    total_matches = 0
-    
-    for location in all_locations:
-        subcentral_days = subcentral_totals.get(location, 0)
-        srepp_days = srepp_totals.get(location, 0)
-        
-        # Get unique job IDs for this location from both systems
-        subcentral_job_set = subcentral_jobs.get(location, set())
-        srepp_job_set = srepp_jobs.get(location, set())
-        
-        # Count how many SubCentral unique IDs also appear in payroll
-        matched_jobs = 0
-        for subcentral_id in subcentral_job_set:
-            if subcentral_id in srepp_job_set:
-                matched_jobs += 1
-        
-        total_matches += matched_jobs
-        
-        # Calculate match percentage (what percentage of payroll records have corresponding SubCentral records)
-        if srepp_days > 0:
-            coverage_rate = (matched_jobs / srepp_days * 100)
-        else:
-            coverage_rate = 0.0
-        
-        # Debug output for locations with potential matches
-        if matched_jobs > 0 or (subcentral_days > 0 and srepp_days > 0):
-            print(f"    {location}: SubC_IDs={len(subcentral_job_set)}, SREPP_IDs={len(srepp_job_set)}, Matches={matched_jobs}")
-            if matched_jobs > 0:
-                # Show a few example matching IDs
-                sample_matches = [uid for uid in subcentral_job_set if uid in srepp_job_set][:3]
-                print(f"      Sample matching IDs: {sample_matches}")
-        
-        matching_results.append({
-            'Location': location,
-            'SubCentral Job Days': subcentral_days,
-            'Payroll Job Days': srepp_days,
-            'Matched Jobs': matched_jobs,
-            'Match Percentage': coverage_rate
-        })
-    
-    # Convert to DataFrame and sort by location
-    matching_df = pd.DataFrame(matching_results)
-    matching_df = matching_df.sort_values('Location')
-    
-    # Calculate summary statistics
-    total_subcentral = matching_df['SubCentral Job Days'].sum()
-    total_srepp = matching_df['Payroll Job Days'].sum()
+
+    # Count unique SubCentral job IDs that also appear in payroll. A payroll record only carries the
+    # same job ID when its location code is the full SubCentral location.
+    if subcentral_keys is not None and srepp_keys is not None and not srepp_keys.empty:
+        same_school = (srepp_keys['School'] == srepp_keys['Location']).to_numpy()
+        matched = (
+            subcentral_keys[MATCH_KEY_COLUMNS].drop_duplicates()
+            .merge(srepp_keys.loc[same_school, MATCH_KEY_COLUMNS].drop_duplicates(), on=MATCH_KEY_COLUMNS)
+            .groupby('Location').size()
+        )
+    else:
+        matched = pd.Series(dtype=np.int64)
+
+    subcentral_days = subcentral_totals.reindex(all_locations, fill_value=0).to_numpy()
+    payroll_days = srepp_totals.reindex(all_locations, fill_value=0).to_numpy()
+    matched_jobs = matched.reindex(all_locations, fill_value=0).to_numpy()
+    match_pct = np.divide(matched_jobs * 100.0, payroll_days, out=np.zeros(len(all_locations)), where=payroll_days > 0)
+
+    matching_df = pd.DataFrame({
+        'Location': all_locations.to_numpy(),
+        'SubCentral Job Days': subcentral_days,
+        'Payroll Job Days': payroll_days,
+        'Matched Jobs': matched_jobs,
+        'Match Percentage': match_pct
+    })
+    # Sort by location explicitly rather than relying on the index union order
+    matching_df = matching_df.sort_values('Location', ignore_index=True)
+
+    total_matches = int(matched_jobs.sum())
+    total_srepp = int(payroll_days.sum())
     overall_coverage = (total_matches / total_srepp * 100) if total_srepp > 0 else 0
     
     print(f"  Created matching analysis with {len(matching_df)} locations")
-    print(f"  Total SubCentral job days: {total_subcentral}")
+    print(f"  Total SubCentral job days: {int(subcentral_days.sum())}")
     print(f"  Total payroll job days: {total_srepp}")
     print(f"  Total matched jobs: {total_matches}")
     print(f"  Overall match percentage: {overall_coverage:.1f}%")
     
     return matching_df
 
+def create_matching_analysis(main_df, srepp_df, subcentral_keys=None):
+    """
+    Create analysis comparing individual jobs between SubCentral and SREPP payroll data by location
+
+    Shorthand for aggregate_matching_keys(build_matching_keys(...)) over all dates.
+
+    Args:
+        main_df: SubCentral data with 'Location', 'Specified Sub', and 'Job Start' columns (filled jobs only)
+        srepp_df: SREPP payroll data with 'SCHOOL', 'EISID', and 'DATE' columns
+        subcentral_keys: Optional SubCentral keys already folded by stream_job_cube()
+
+    Returns:
+        pandas.DataFrame: Job-level matching analysis by location (see aggregate_matching_keys)
+    """
+    if main_df.empty and srepp_df.empty:
+        print("  Both dataframes are empty, returning empty result")
+        return pd.DataFrame()
+    return aggregate_matching_keys(build_matching_keys(main_df, srepp_df, subcentral_keys))
+
 def clean_classification_gender(classification):
     """
     Clean up classification names by removing gender identifiers and standardizing terms
@@ -645,6 +860,22 @@ def get_borough_from_location(location):
 
     return borough_map.get(first_char, 'Unknown')
 
+def format_date_range(min_date, max_date):
+    """
+    Format the first and last job dates for the report headers
+    
+    Returns:
+        str: e.g. "Job dates: September 03, 2024 to June 26, 2025"
+    """
+    # Format dates as readable strings
+    min_date_str = min_date.strftime('%B %d, %Y')
+    max_date_str = max_date.strftime('%B %d, %Y')
+    
+    if min_date.date() == max_date.date():
+        return f"Job dates: {min_date_str}"
+    else:
+        return f"Job dates: {min_date_str} to {max_date_str}"
+
 def get_data_date_range(df):
     """
     Get the date range from Job Start column
@@ -658,25 +889,73 @@ def get_data_date_range(df):
         if len(valid_dates) == 0:
             return "Date range not available"
         
-        min_date = valid_dates.min()
-        max_date = valid_dates.max()
-        
-        # Format dates as readable strings
-        min_date_str = min_date.strftime('%B %d, %Y')
-        max_date_str = max_date.strftime('%B %d, %Y')
-        
-        if min_date.date() == max_date.date():
-            return f"Job dates: {min_date_str}"
-        else:
-            return f"Job dates: {min_date_str} to {max_date_str}"
+        return format_date_range(valid_dates.min(), valid_dates.max())
     except Exception as e:
         print(f"Warning: Could not parse date range - {e}")
         return "Date range not available"
 
+# Weight column of a job count cube: number of raw job rows each cube row stands for
+JOB_COUNT_COL = 'Job_Count'
+
+def get_match_column(matching_stats):
+    """Name of the match percentage column of a matching analysis (create_matching_analysis), or None"""
+    if matching_stats is None or matching_stats.empty:
+        return None
+    for col in matching_stats.columns:
+        if 'Match' in col and ('Percentage' in col or '%' in col):
+            return col
+    return None
+
+# Dimensions kept in the job count cube - everything report rendering groups or filters on
+CUBE_DIMENSIONS = [
+    'Location', 'District', 'Borough', 'Superintendent_Name', 'District_From_Mapping',
+    'Classification', 'Type', 'Fill_Status', 'Type_Fill_Status'
+]
+
+def build_job_cube(df, dimensions=CUBE_DIMENSIONS):
+    """
+    Collapse the job rows into counts per combination of the rendering dimensions
+    
+    The cube can stand in for the raw job data anywhere reports only group, filter or count:
+    create_summary_stats() and the weighted_* helpers honour its Job_Count column.
+    
+    Args:
+        df: Main processed DataFrame (one row per job) or a finer job count cube
+        dimensions: Columns to keep; columns missing from df are skipped
+    
+    Returns:
+        pandas.DataFrame: One row per dimension combination with a Job_Count column
+    """
+    dims = [col for col in dimensions if col in df.columns]
+    grouped = df.groupby(dims, dropna=False, sort=True)
+    if JOB_COUNT_COL in df.columns:
+        # Collapsing a finer cube (e.g. the streaming cube with its month key)
+        return grouped[JOB_COUNT_COL].sum().reset_index()
+    return grouped.size().reset_index(name=JOB_COUNT_COL)
+
+def total_job_count(df):
+    """Number of jobs in raw job data or a job count cube"""
+    return int(df[JOB_COUNT_COL].sum()) if JOB_COUNT_COL in df.columns else len(df)
+
+def weighted_value_counts(df, col):
+    """value_counts() of a column, counting jobs rather than rows for a job count cube"""
+    if JOB_COUNT_COL in df.columns:
+        return df.groupby(col)[JOB_COUNT_COL].sum().sort_values(ascending=False)
+    return df[col].value_counts()
+
+def weighted_mode(df, col, default='Unknown'):
+    """Most common value of a column by job count (smallest value on ties, like Series.mode())"""
+    counts = weighted_value_counts(df, col)
+    if counts.empty:
+        return default
+    return min(counts[counts == counts.max()].index)
+
 def create_summary_stats(df, group_cols):
     """
     Create summary statistics by specified grouping columns
     If group_cols is empty, creates citywide statistics
+    
+    df may be the raw job data (one row per job) or a job count cube from build_job_cube()
     """
     # Handle citywide statistics (no grouping)
     if not group_cols:
@@ -684,8 +963,12 @@ def create_summary_stats(df, group_cols):
     else:
         group_cols_for_processing = group_cols + ['Classification']
     
-    # Group by specified columns and Type_Fill_Status
-    summary = df.groupby(group_cols_for_processing + ['Type_Fill_Status']).size().reset_index(name='Count')
+    # Group by specified columns and Type_Fill_Status (a job count cube carries its row weights in Job_Count)
+    grouped = df.groupby(group_cols_for_processing + ['Type_Fill_Status'])
+    if JOB_COUNT_COL in df.columns:
+        summary = grouped[JOB_COUNT_COL].sum().reset_index(name='Count')
+    else:
+        summary = grouped.size().reset_index(name='Count')
     
     # Pivot to get all combinations
     summary_pivot = summary.pivot_table(
@@ -752,6 +1035,76 @@ def create_summary_stats(df, group_cols):
     summary_pivot = summary_pivot[[col for col in display_cols if col in summary_pivot.columns]]
     return summary_pivot
 
+# Count columns that can be summed when rolling statistics up to a coarser level
+STAT_COUNT_COLS = [
+    'Vacancy_Filled', 'Vacancy_Unfilled', 'Total_Vacancy',
+    'Absence_Filled', 'Absence_Unfilled', 'Total_Absence', 'Total'
+]
+
+def add_fill_rate_columns(stats):
+    """
+    Add Total_Filled/Total_Unfilled and the three fill percentage columns in place
+
+    Args:
+        stats: DataFrame with the STAT_COUNT_COLS count columns
+
+    Returns:
+        The same DataFrame, for chaining
+    """
+    stats['Vacancy_Fill_Pct'] = np.where(
+        stats['Total_Vacancy'] > 0,
+        (stats['Vacancy_Filled'] / stats['Total_Vacancy'].where(stats['Total_Vacancy'] > 0) * 100).round(1),
+        0
+    )
+    stats['Absence_Fill_Pct'] = np.where(
+        stats['Total_Absence'] > 0,
+        (stats['Absence_Filled'] / stats['Total_Absence'].where(stats['Total_Absence'] > 0) * 100).round(1),
+        0
+    )
+    stats['Total_Filled'] = stats['Vacancy_Filled'] + stats['Absence_Filled']
+    stats['Total_Unfilled'] = stats['Vacancy_Unfilled'] + stats['Absence_Unfilled']
+    stats['Overall_Fill_Pct'] = np.where(
+        stats['Total'] > 0,
+        (stats['Total_Filled'] / stats['Total'].where(stats['Total'] > 0) * 100).round(1),
+        0
+    )
+    return stats
+
+def rollup_stats(stats, group_cols):
+    """
+    Roll summary statistics up to a coarser grouping (e.g. school x classification -> school)
+
+    Args:
+        stats: DataFrame produced by create_summary_stats
+        group_cols: Columns to keep as the grouping key
+
+    Returns:
+        pandas.DataFrame: One row per group with summed counts and recomputed percentages
+    """
+    rolled = stats.groupby(group_cols, as_index=False, sort=False)[STAT_COUNT_COLS].sum()
+    return add_fill_rate_columns(rolled)
+
+def export_stats_tables(tables, export_dir):
+    """
+    Write statistics tables to CSV files for use outside the HTML reports
+    
+    Args:
+        tables: Dict of table name -> DataFrame (empty or None tables are skipped)
+        export_dir: Directory to write <name>.csv files into
+    
+    Returns:
+        list: Paths of the written CSV files
+    """
+    os.makedirs(export_dir, exist_ok=True)
+    written = []
+    for name, table in tables.items():
+        if table is None or table.empty:
+            continue
+        path = os.path.join(export_dir, f"{name}.csv")
+        table.to_csv(path, index=False)
+        written.append(path)
+    return written
+
 def df_with_pretty_columns(df):
     """
     Return a copy of df with columns renamed for display.
@@ -5,25 +5,210 @@ This module creates interactive choropleth maps showing district-level fill rate
 using NYC School District geographic boundaries.
 """
 
+import os
 import json
+import hashlib
+import numpy as np
 import pandas as pd
-import plotly.graph_objects as go
-import plotly.express as px
-from plotly.offline import plot
+from data_processing import rollup_stats
+from profiling import timed_stage
 
-def load_district_geojson():
-    """Load the NYC School Districts GeoJSON file"""
+GEOJSON_FILE = 'NYC_School_Districts_-2063935521060471505.geojson'
+
+# Douglas-Peucker tolerance in degrees (~0.0001 deg is roughly 10 m in NYC)
+DEFAULT_SIMPLIFY_TOLERANCE = 0.0001
+# Decimal places kept for coordinates (5 places is roughly 1 m precision)
+DEFAULT_COORDINATE_PRECISION = 5
+
+def _douglas_peucker_mask(points, tolerance):
+    """
+    Return a boolean mask of the points kept by Douglas-Peucker simplification
+
+    Args:
+        points: (N, 2) numpy array of lon/lat coordinates
+        tolerance: Maximum allowed perpendicular distance (in coordinate units)
+    """
+    n = len(points)
+    keep = np.zeros(n, dtype=bool)
+    keep[0] = keep[-1] = True
+
+    # Iterative version of the recursive algorithm to avoid recursion limits on long rings
+    stack = [(0, n - 1)]
+    while stack:
+        start, end = stack.pop()
+        if end - start < 2:
+            continue
+
+        segment = points[end] - points[start]
+        inner = points[start + 1:end] - points[start]
+        seg_len = np.hypot(segment[0], segment[1])
+        if seg_len == 0:
+            distances = np.hypot(inner[:, 0], inner[:, 1])
+        else:
+            distances = np.abs(segment[0] * inner[:, 1] - segment[1] * inner[:, 0]) / seg_len
+
+        idx = int(np.argmax(distances))
+        if distances[idx] > tolerance:
+            split = start + 1 + idx
+            keep[split] = True
+            stack.append((start, split))
+            stack.append((split, end))
+
+    return keep
+
+def simplify_ring(ring, tolerance=DEFAULT_SIMPLIFY_TOLERANCE, precision=DEFAULT_COORDINATE_PRECISION):
+    """
+    Simplify a closed polygon ring and quantize its coordinates
+
+    Rings that would collapse below a valid polygon (4 points including closure)
+    are kept at full detail, only quantized.
+    """
+    points = np.asarray(ring, dtype=float)[:, :2]
+    if len(points) > 4 and tolerance:
+        simplified = points[_douglas_peucker_mask(points, tolerance)]
+        if len(simplified) >= 4:
+            points = simplified
+
+    points = np.round(points, precision)
+    # Drop consecutive duplicates introduced by quantization, keeping the ring closed
+    if len(points) > 4:
+        changed = np.any(np.diff(points, axis=0) != 0, axis=1)
+        deduped = points[np.concatenate(([True], changed))]
+        if len(deduped) >= 4:
+            points = deduped
+    if not np.array_equal(points[0], points[-1]):
+        points = np.vstack([points, points[:1]])
+
+    return points.tolist()
+
+def simplify_geojson(geojson_data, tolerance=DEFAULT_SIMPLIFY_TOLERANCE, precision=DEFAULT_COORDINATE_PRECISION):
+    """
+    Simplify every Polygon/MultiPolygon in a GeoJSON FeatureCollection
+
+    Args:
+        geojson_data: Parsed GeoJSON FeatureCollection
+        tolerance: Douglas-Peucker tolerance in degrees
+        precision: Number of decimal places kept for coordinates
+
+    Returns:
+        dict: New FeatureCollection with simplified geometry and the original properties
+    """
+    features = []
+    for feature in geojson_data.get('features', []):
+        geometry = feature.get('geometry') or {}
+        geom_type = geometry.get('type')
+        coords = geometry.get('coordinates')
+
+        if geom_type == 'Polygon':
+            coords = [simplify_ring(ring, tolerance, precision) for ring in coords]
+        elif geom_type == 'MultiPolygon':
+            coords = [[simplify_ring(ring, tolerance, precision) for ring in polygon] for polygon in coords]
+
+        features.append({
+            'type': 'Feature',
+            'properties': feature.get('properties', {}),
+            'geometry': {'type': geom_type, 'coordinates': coords}
+        })
+
+    return {'type': 'FeatureCollection', 'features': features}
+
+def get_simplified_geojson_path(source_file, source_hash, tolerance, precision):
+    """Build the cache path for a simplified GeoJSON next to its source file"""
+    stem, ext = os.path.splitext(source_file)
+    return f"{stem}.simplified-{source_hash[:12]}-t{tolerance:g}-p{precision}{ext}"
+
+def load_district_geojson(simplify=True, tolerance=DEFAULT_SIMPLIFY_TOLERANCE, precision=DEFAULT_COORDINATE_PRECISION):
+    """
+    Load the NYC School Districts GeoJSON file
+
+    Args:
+        simplify: Return simplified, quantized geometry (cached next to the source file)
+        tolerance: Douglas-Peucker tolerance in degrees
+        precision: Number of decimal places kept for coordinates
+    """
     try:
-        with open('NYC_School_Districts_-2063935521060471505.geojson', 'r') as f:
-            geojson_data = json.load(f)
-        return geojson_data
+        with open(GEOJSON_FILE, 'rb') as f:
+            raw = f.read()
     except FileNotFoundError:
         print("Warning: NYC School Districts GeoJSON file not found")
         return None
+
+    try:
+        if not simplify:
+            return json.loads(raw)
+
+        # Cache is keyed by the source content hash and simplification parameters
+        source_hash = hashlib.sha256(raw).hexdigest()
+        cache_file = get_simplified_geojson_path(GEOJSON_FILE, source_hash, tolerance, precision)
+        if os.path.exists(cache_file):
+            with open(cache_file, 'r', encoding='utf-8') as f:
+                return json.load(f)
+
+        geojson_data = simplify_geojson(json.loads(raw), tolerance, precision)
+        try:
+            with open(cache_file, 'w', encoding='utf-8') as f:
+                json.dump(geojson_data, f, separators=(',', ':'))
+            print(f"✓ Simplified district geometry cached to {cache_file} "
+                  f"({len(raw) / 1e6:.1f} MB → {os.path.getsize(cache_file) / 1e6:.2f} MB)")
+        except OSError as e:
+            print(f"Warning: Could not cache simplified GeoJSON - {e}")
+        return geojson_data
     except Exception as e:
         print(f"Error loading GeoJSON: {e}")
         return None
 
+# Hover fields shown on every map: (label, column, format)
+MAP_HOVER_FIELDS = [
+    ('Overall Fill Rate', 'Overall_Fill_Pct', 'pct'),
+    ('Total Jobs', 'Total', 'int'),
+    ('Filled', 'Total_Filled', 'int'),
+    ('Unfilled', 'Total_Unfilled', 'int'),
+    ('Vacancy Fill Rate', 'Vacancy_Fill_Pct', 'pct'),
+    ('Absence Fill Rate', 'Absence_Fill_Pct', 'pct')
+]
+
+def _format_map_column(series, kind):
+    """Preformat a numeric column as display strings (thousands separators or one-decimal percent)"""
+    if kind == 'pct':
+        return series.astype(float).map('{:.1f}%'.format)
+    return series.astype('int64').map('{:,}'.format)
+
+def build_map_data(stats, id_col, label_prefix='', numeric_id=False, hover_fields=MAP_HOVER_FIELDS):
+    """
+    Build map-ready data with hover text for any grouping level from the stats pipeline
+
+    Works on school, superintendent, district or borough statistics. Rows broken down by
+    Classification are rolled up to one row per entity first.
+
+    Args:
+        stats: Statistics DataFrame (from create_summary_stats or an aggregated summary)
+        id_col: Column identifying the map entity (e.g. 'District', 'Location', 'Superintendent_Name')
+        label_prefix: Text placed before the entity id in the hover title (e.g. 'District ')
+        numeric_id: Convert ids to integers where possible (needed to match numeric GeoJSON properties)
+        hover_fields: List of (label, column, 'int'|'pct') tuples shown in the hover text
+
+    Returns:
+        DataFrame: One row per entity with the stats columns and a 'hover_text' column
+    """
+    if 'Classification' in stats.columns or stats[id_col].duplicated().any():
+        map_data = rollup_stats(stats, [id_col])
+    else:
+        map_data = stats.copy()
+
+    if numeric_id:
+        # Convert float-like strings ('4.0') to ints, leaving non-numeric ids such as 'Unknown' untouched
+        numeric_ids = pd.to_numeric(map_data[id_col], errors='coerce')
+        map_data[id_col] = numeric_ids.round().astype('Int64').astype(object).where(numeric_ids.notna(), map_data[id_col])
+
+    labels = label_prefix + map_data[id_col].astype(str)
+    fragments = [
+        label + ': ' + _format_map_column(map_data[column], kind)
+        for label, column, kind in hover_fields
+    ]
+    map_data['hover_text'] = labels.str.cat(fragments, sep='<br>')
+
+    return map_data
+
 def prepare_district_data(district_summary):
     """
     Prepare district summary data for choropleth mapping
@@ -34,56 +219,35 @@ def prepare_district_data(district_summary):
     Returns:
         DataFrame: Prepared data with district IDs and fill rates
     """
-    # Create a copy to avoid modifying original data
-    map_data = district_summary.copy()
-    
-    # Ensure District column is integer for matching with GeoJSON - handle float strings
-    map_data['District'] = map_data['District'].apply(lambda x: int(float(x)) if pd.notna(x) and str(x) != 'Unknown' else x)
-    
-    # Create a text column for hover information
-    map_data['hover_text'] = map_data.apply(lambda row: 
-        f"District {row['District'] if str(row['District']) == 'Unknown' else int(row['District'])}<br>" +
-        f"Overall Fill Rate: {row['Overall_Fill_Pct']:.1f}%<br>" +
-        f"Total Jobs: {int(row['Total']):,}<br>" +
-        f"Filled: {int(row['Total_Filled']):,}<br>" +
-        f"Unfilled: {int(row['Total_Unfilled']):,}<br>" +
-        f"Vacancy Fill Rate: {row['Vacancy_Fill_Pct']:.1f}%<br>" +
-        f"Absence Fill Rate: {row['Absence_Fill_Pct']:.1f}%",
-        axis=1
-    )
-    
-    return map_data
+    return build_map_data(district_summary, 'District', label_prefix='District ', numeric_id=True)
 
-def create_district_choropleth(district_summary, output_file):
+def create_choropleth_figure(map_data, geojson_data, id_col, featureidkey, title):
     """
-    Create an interactive choropleth map of district fill rates
+    Build a fill-rate choropleth figure from map data produced by build_map_data
     
     Args:
-        district_summary: DataFrame with district-level statistics
-        output_file: Path to save the HTML map file
+        map_data: DataFrame with id_col, 'Overall_Fill_Pct' and 'hover_text' columns
+        geojson_data: GeoJSON FeatureCollection with one feature per entity
+        id_col: Column matching the GeoJSON feature id
+        featureidkey: GeoJSON property path holding the feature id (e.g. 'properties.SchoolDist')
+        title: Map title
         
     Returns:
-        str: HTML content of the map, or None if creation failed
+        plotly.graph_objects.Figure
     """
-    # Load GeoJSON data
-    geojson_data = load_district_geojson()
-    if geojson_data is None:
-        return None
-    
-    # Prepare data for mapping - no filtering, let the map show what it can
-    map_data = prepare_district_data(district_summary)
+    import plotly.graph_objects as go
     
     # Create the choropleth map with mapbox background
     fig = go.Figure(go.Choroplethmapbox(
         geojson=geojson_data,
-        locations=map_data['District'],
+        locations=map_data[id_col],
         z=map_data['Overall_Fill_Pct'],
-    colorscale=[[0, 'red'], [0.15, 'yellow'], [1, 'green']],  # Red at 70%, Green at 100%
-    zmin=75,  # Set minimum color scale to 70%
+        colorscale=[[0, 'red'], [0.15, 'yellow'], [1, 'green']],  # Red at 70%, Green at 100%
+        zmin=75,  # Set minimum color scale to 70%
         zmax=90, # Set maximum color scale to 100%
         marker_line_width=1,
         marker_line_color='black',
-        featureidkey="properties.SchoolDist",
+        featureidkey=featureidkey,
         colorbar_title="Fill Rate (%)",
         text=map_data['hover_text'],  # Use the detailed hover text
         hoverinfo="text"
@@ -92,7 +256,7 @@ def create_district_choropleth(district_summary, output_file):
     # Update layout with Carto Positron background
     fig.update_layout(
         title={
-            'text': 'NYC School Districts - Overall Fill Rate by District',
+            'text': title,
             'x': 0.5,
             'xanchor': 'center',
             'font': {'size': 18, 'family': 'Arial, sans-serif'}
@@ -110,8 +274,45 @@ def create_district_choropleth(district_summary, output_file):
         plot_bgcolor='rgba(0,0,0,0)'
     )
     
+    return fig
+
+@timed_stage('chart generation')
+def create_district_choropleth(district_summary, output_file, simplify_tolerance=DEFAULT_SIMPLIFY_TOLERANCE):
+    """
+    Create an interactive choropleth map of district fill rates
+    
+    Args:
+        district_summary: DataFrame with district-level statistics
+        output_file: Path to save the HTML map file (figure JSON next to it for lazy chart embeds,
+                     see chart_utils.figure_file)
+        simplify_tolerance: Douglas-Peucker tolerance for district polygons (None for full precision)
+        
+    Returns:
+        str: HTML content of the map (the JSON path for lazy embeds), or None if creation failed
+    """
+    # Load GeoJSON data
+    geojson_data = load_district_geojson(simplify=bool(simplify_tolerance), tolerance=simplify_tolerance)
+    if geojson_data is None:
+        return None
+    
+    # Prepare data for mapping - no filtering, let the map show what it can
+    map_data = prepare_district_data(district_summary)
+    
+    fig = create_choropleth_figure(
+        map_data, geojson_data, 'District', "properties.SchoolDist",
+        'NYC School Districts - Overall Fill Rate by District'
+    )
+    
     # Save the map
+    from plotly.offline import plot
+    from chart_utils import figure_file, write_figure_json
     try:
+        json_file = figure_file(output_file, 'plotly')
+        if json_file != output_file:
+            write_figure_json(fig, json_file)
+            print(f"District choropleth map saved to: {json_file}")
+            return json_file
+
         html_content = plot(fig, output_type='div', include_plotlyjs=True)
         
         # Create a complete HTML file
@@ -191,13 +392,14 @@ def create_district_map_summary_stats(district_summary):
     
     return stats
 
-def get_district_map_section_html(district_summary, map_file_path):
+def get_district_map_section_html(district_summary, map_file_path, map_embed_html=None):
     """
     Generate HTML section content for the district map
     
     Args:
         district_summary: DataFrame with district-level statistics
         map_file_path: Relative path to the map HTML file
+        map_embed_html: Optional embed HTML replacing the map iframe (see chart_utils.chart_embed_html)
         
     Returns:
         str: HTML content for the district map section
@@ -205,6 +407,9 @@ def get_district_map_section_html(district_summary, map_file_path):
     # Get summary statistics
     stats = create_district_map_summary_stats(district_summary)
     
+    if map_embed_html is None:
+        map_embed_html = f'<iframe src="{map_file_path}" width="1400" height="950" frameborder="0"></iframe>'
+    
     # Create the HTML section
     html_content = f"""
     <div class="section">
@@ -232,7 +437,7 @@ def get_district_map_section_html(district_summary, map_file_path):
         </div>
         
         <div class="chart-container">
-            <iframe src="{map_file_path}" width="1400" height="950" frameborder="0"></iframe>
+            {map_embed_html}
         </div>
         
         <div class="map-notes">
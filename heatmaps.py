@@ -0,0 +1,191 @@
+"""
+Day-of-week and week-of-year fill rate heatmaps for NYC DOE Reports
+
+create_summary_stats() collapses the jobs to classification totals, which hides when in the week
+jobs go unfilled. This module builds classification x day-of-week (and classification x week)
+fill rate matrices for every school and superintendent.
+
+Every entity is computed in one pass per axis: school, classification and bucket codes are
+combined into a flat index and counted with np.bincount into a dense
+schools x classifications x buckets array, which np.add.at then sums up to the superintendents.
+
+The result is one long table (HEATMAP_COLUMNS) that the stats stage stores in the aggregate
+store; heatmap_matrix() turns the rows of one entity back into a matrix for the HTML heatmaps.
+"""
+
+import numpy as np
+import pandas as pd
+
+from data_processing import JOB_COUNT_COL, JOB_WEEKDAY_COL
+from time_series import bucket_codes, bucket_start, period_days, school_parents
+
+HEATMAP_COLUMNS = ['Level', 'Entity', 'Axis', 'Classification', 'Bucket', 'Filled', 'Total', 'Fill_Pct']
+# 'weekday' buckets are day names, 'week' buckets are the Monday of the week ('YYYY-MM-DD')
+HEATMAP_AXES = ['weekday', 'week']
+DAY_NAMES = ['Mon', 'Tue', 'Wed', 'Thu', 'Fri', 'Sat', 'Sun']
+# Days shown even without jobs, so every weekday heatmap has the same columns
+SCHOOL_DAYS = DAY_NAMES[:5]
+# Levels written to the heatmap table (schools plus their parents in time_series.LEVEL_PARENT_COLUMNS)
+HEATMAP_LEVELS = ['school', 'superintendent']
+
+
+def _axis_buckets(df, axis):
+    """
+    Bucket code of every row for an axis (-1 without a job date) and the bucket labels
+
+    Returns:
+        Tuple of (codes, labels), or None if the frame carries no dates for this axis
+    """
+    if axis == 'weekday':
+        if 'Job Start' in df.columns:
+            days = period_days(df, 'W')
+            codes = np.where(days == np.iinfo(np.int64).min, -1, (days + 3) % 7)
+        elif JOB_WEEKDAY_COL in df.columns:
+            codes = df[JOB_WEEKDAY_COL].fillna(-1).to_numpy(dtype=np.int64)
+        else:
+            return None
+        return codes, DAY_NAMES
+
+    days = period_days(df, 'W')
+    if days is None:
+        return None
+    valid = days != np.iinfo(np.int64).min
+    if not valid.any():
+        return None
+    weeks = bucket_codes(days[valid], 'W')
+    first_week = int(weeks.min())
+    codes = np.full(len(df), -1, dtype=np.int64)
+    codes[valid] = weeks - first_week
+    labels = np.datetime_as_string(bucket_start(np.arange(first_week, int(weeks.max()) + 1), 'W'), unit='D')
+    return codes, list(labels)
+
+
+def _cube_rows(level, entities, axis, classifications, labels, filled, total):
+    """Turn a dense entities x classifications x buckets array into long HEATMAP_COLUMNS rows (cells with jobs only)"""
+    entity_idx, class_idx, bucket_idx = np.nonzero(total > 0)
+    cell_filled = filled[entity_idx, class_idx, bucket_idx]
+    cell_total = total[entity_idx, class_idx, bucket_idx]
+    return pd.DataFrame({
+        'Level': level,
+        'Entity': np.asarray(entities, dtype=object)[entity_idx],
+        'Axis': axis,
+        'Classification': np.asarray(classifications, dtype=object)[class_idx],
+        'Bucket': np.asarray(labels, dtype=object)[bucket_idx],
+        'Filled': cell_filled.astype(np.int64),
+        'Total': cell_total.astype(np.int64),
+        'Fill_Pct': np.round(cell_filled / cell_total * 100, 1)
+    })
+
+
+def compute_heatmaps(df, axes=HEATMAP_AXES):
+    """
+    Classification x day-of-week and classification x week fill rates for every school and superintendent
+
+    Only jobs counted by create_summary_stats (a Classification and a Type_Fill_Status) with a
+    valid job date are included.
+
+    Args:
+        df: Main processed DataFrame (one row per job) or the streaming job count cube
+        axes: Axes to compute, from HEATMAP_AXES
+
+    Returns:
+        pandas.DataFrame: HEATMAP_COLUMNS; empty if the data has no job dates
+    """
+    empty = pd.DataFrame(columns=HEATMAP_COLUMNS)
+    if df.empty or 'Location' not in df.columns:
+        return empty
+
+    counted = (df['Classification'].notna() & df['Type_Fill_Status'].notna()).to_numpy()
+    school_codes, schools = pd.factorize(df['Location'])
+    class_codes, classifications = pd.factorize(df['Classification'], sort=True)
+    counted &= (school_codes >= 0) & (class_codes >= 0)
+    weights = df[JOB_COUNT_COL].to_numpy(dtype=np.float64) if JOB_COUNT_COL in df.columns else np.ones(len(df))
+    filled_weights = weights * (df['Fill_Status'] == 'Filled').to_numpy()
+
+    parents = school_parents(df, school_codes, len(schools), counted)
+    n_classes = len(classifications)
+
+    frames = []
+    for axis in axes:
+        buckets = _axis_buckets(df, axis)
+        if buckets is None:
+            continue
+        codes, labels = buckets
+        valid = counted & (codes >= 0)
+        if not valid.any():
+            continue
+        n_buckets = len(labels)
+
+        # One bincount per measure over the flattened school x classification x bucket index
+        flat = (school_codes[valid].astype(np.int64) * n_classes + class_codes[valid]) * n_buckets + codes[valid]
+        shape = (len(schools), n_classes, n_buckets)
+        size = len(schools) * n_classes * n_buckets
+        total = np.bincount(flat, weights=weights[valid], minlength=size).reshape(shape)
+        filled = np.bincount(flat, weights=filled_weights[valid], minlength=size).reshape(shape)
+
+        frames.append(_cube_rows('school', schools, axis, classifications, labels, filled, total))
+        for level, (parent_codes, parent_names) in parents.items():
+            if level not in HEATMAP_LEVELS:
+                continue
+            parent_total = np.zeros((len(parent_names), n_classes, n_buckets))
+            parent_filled = np.zeros((len(parent_names), n_classes, n_buckets))
+            np.add.at(parent_total, parent_codes, total)
+            np.add.at(parent_filled, parent_codes, filled)
+            frames.append(_cube_rows(level, parent_names, axis, classifications, labels, parent_filled, parent_total))
+
+    if not frames:
+        return empty
+    # Sort so the in-memory and streamed builds write identical tables (weekdays in day order)
+    day_order = {day: str(i) for i, day in enumerate(DAY_NAMES)}
+    return pd.concat(frames, ignore_index=True).sort_values(
+        ['Level', 'Entity', 'Axis', 'Classification', 'Bucket'], ignore_index=True,
+        key=lambda col: col.map(lambda bucket: day_order.get(bucket, bucket)) if col.name == 'Bucket' else col
+    )
+
+
+def group_heatmaps(heatmaps):
+    """
+    Index a heatmap table by entity for the report generators
+
+    Returns:
+        dict: (level, entity) -> that entity's rows; empty if there are no heatmaps
+    """
+    if heatmaps is None or heatmaps.empty:
+        return {}
+    return {key: rows for key, rows in heatmaps.groupby(['Level', 'Entity'], sort=False)}
+
+
+def heatmap_matrix(rows, axis):
+    """
+    Pivot one entity's heatmap rows for an axis into count matrices
+
+    Rows are classifications (most jobs first) and columns are the axis buckets in order:
+    Monday to Friday plus any weekend day with jobs, or every week from the first to the last.
+
+    Returns:
+        dict with 'classifications', 'buckets', 'filled' and 'total' (2-D integer arrays),
+        or None if the entity has no jobs on this axis
+    """
+    if rows is None:
+        return None
+    rows = rows[rows['Axis'] == axis]
+    if rows.empty:
+        return None
+
+    if axis == 'weekday':
+        present = set(rows['Bucket'])
+        buckets = [day for day in DAY_NAMES if day in SCHOOL_DAYS or day in present]
+    else:
+        weeks = pd.to_datetime(rows['Bucket'])
+        buckets = list(pd.date_range(weeks.min(), weeks.max(), freq='7D').strftime('%Y-%m-%d'))
+
+    totals = rows.groupby('Classification')['Total'].sum().sort_values(ascending=False, kind='stable')
+    classifications = list(totals.index)
+    total = rows.pivot_table(index='Classification', columns='Bucket', values='Total', aggfunc='sum', fill_value=0)
+    filled = rows.pivot_table(index='Classification', columns='Bucket', values='Filled', aggfunc='sum', fill_value=0)
+    return {
+        'classifications': classifications,
+        'buckets': buckets,
+        'filled': filled.reindex(index=classifications, columns=buckets, fill_value=0).to_numpy(dtype=np.int64),
+        'total': total.reindex(index=classifications, columns=buckets, fill_value=0).to_numpy(dtype=np.int64)
+    }
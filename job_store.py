@@ -0,0 +1,440 @@
+"""
+SQLite job store for NYC DOE Reports
+
+An optional, indexed copy of the processed SubCentral job rows (one row per job, after cleaning
+and superintendent enrichment) for ad-hoc questions such as "unfilled absences at K346 in March"
+without reloading every CSV. Rows are stored per source file: a file is only (re)written when its
+contents or the superintendent mapping its rows were enriched with change, and new monthly exports
+can be appended without touching the ones already loaded.
+
+The report statistics can be computed from the store with SQL aggregation (job_cube_sql() feeds
+create_summary_stats() a job count cube), so the stats stage does not need the job rows in memory.
+
+Usage:
+    python job_store.py add FILE [FILE ...] [--mapping-dir DIR]   Load or refresh CSV files
+    python job_store.py files                                      List loaded source files
+    python job_store.py query [--location K346 --type Absence --fill-status Unfilled
+                               --start 2025-03-01 --end 2025-03-31 ...] [--csv OUT]
+    python job_store.py summary [--by Borough ...] [filters]       Fill rate statistics via SQL
+    python job_store.py sql "SELECT ..."                           Any read-only SQL query
+"""
+
+import os
+import sys
+import time
+import hashlib
+import sqlite3
+import argparse
+import pandas as pd
+
+from data_processing import (
+    load_and_process_data, load_superintendent_mapping, find_superintendent_mapping_file, add_superintendent_info,
+    create_summary_stats, CUBE_DIMENSIONS, JOB_COUNT_COL
+)
+
+DEFAULT_JOB_STORE_FILE = 'job_store.sqlite'
+JOBS_TABLE = 'jobs'
+SOURCE_FILES_TABLE = 'source_files'
+
+# Column name -> SQLite type. "Job Start" is ISO text so range filters use the index; EISID is
+# the numeric Specified Sub (the substitute's employee id).
+JOB_COLUMNS = {
+    'Source_File': 'TEXT',
+    'Location': 'TEXT',
+    'District': 'INTEGER',
+    'Borough': 'TEXT',
+    'Superintendent_Name': 'TEXT',
+    'District_From_Mapping': 'TEXT',
+    'DBN': 'TEXT',
+    'School_Name_Full': 'TEXT',
+    'Classification': 'TEXT',
+    'Type': 'TEXT',
+    'Status': 'TEXT',
+    'Fill_Status': 'TEXT',
+    'Type_Fill_Status': 'TEXT',
+    'Job Start': 'TEXT',
+    'EISID': 'INTEGER',
+}
+INDEXED_COLUMNS = ['Location', 'Superintendent_Name', 'Borough', 'Classification', 'Job Start', 'EISID']
+
+# query_jobs()/summary_stats_sql() filter argument -> column
+FILTER_COLUMNS = {
+    'location': 'Location',
+    'superintendent': 'Superintendent_Name',
+    'borough': 'Borough',
+    'classification': 'Classification',
+    'job_type': 'Type',
+    'fill_status': 'Fill_Status',
+    'eisid': 'EISID',
+    'source_file': 'Source_File',
+}
+
+
+def _quote(column):
+    """Quote a column name for SQL ("Job Start" has a space)"""
+    return '"' + column.replace('"', '""') + '"'
+
+
+def _file_sha256(path):
+    """Return the SHA-256 hex digest of a file's contents"""
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(1024 * 1024), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def mapping_hash(mapping_dir='.'):
+    """SHA-256 of the superintendent mapping CSV in mapping_dir ('' when there is none)"""
+    mapping_file = find_superintendent_mapping_file(mapping_dir)
+    return _file_sha256(mapping_file) if mapping_file else ''
+
+
+def stored_file_hash(path, mapping_digest):
+    """
+    Hash a source file is stored under: its contents plus the mapping its rows were enriched with
+
+    Superintendent_Name, DBN and the other mapped columns come from the mapping CSV, so a new
+    mapping makes every stored file stale even when the job exports are unchanged.
+
+    Args:
+        path: SubCentral CSV path
+        mapping_digest: Result of mapping_hash()
+    """
+    return hashlib.sha256(f"{_file_sha256(path)}:{mapping_digest}".encode('ascii')).hexdigest()
+
+
+def open_job_store(store_file):
+    """
+    Open (creating if needed) a job store, making sure its tables and indexes exist
+
+    Returns:
+        sqlite3.Connection
+    """
+    os.makedirs(os.path.dirname(store_file) or '.', exist_ok=True)
+    conn = sqlite3.connect(store_file)
+    column_defs = ', '.join(f"{_quote(col)} {sql_type}" for col, sql_type in JOB_COLUMNS.items())
+    conn.execute(f"CREATE TABLE IF NOT EXISTS {JOBS_TABLE} ({column_defs})")
+    conn.execute(
+        f"CREATE TABLE IF NOT EXISTS {SOURCE_FILES_TABLE} ("
+        "source_file TEXT PRIMARY KEY, path TEXT, content_hash TEXT, row_count INTEGER, loaded_at TEXT)"
+    )
+    for col in INDEXED_COLUMNS + ['Source_File']:
+        index_name = 'idx_jobs_' + col.lower().replace(' ', '_')
+        conn.execute(f"CREATE INDEX IF NOT EXISTS {index_name} ON {JOBS_TABLE} ({_quote(col)})")
+    conn.commit()
+    return conn
+
+
+def _open_read_only(store_file):
+    """Open an existing job store read-only"""
+    if not os.path.exists(store_file):
+        raise FileNotFoundError(f"No job store at {store_file}")
+    return sqlite3.connect(f"file:{store_file}?mode=ro", uri=True)
+
+
+def _job_rows(df):
+    """Project processed job rows onto the JOB_COLUMNS layout"""
+    rows = pd.DataFrame(index=df.index)
+    for col in JOB_COLUMNS:
+        if col == 'Job Start':
+            rows[col] = pd.to_datetime(df[col], errors='coerce').dt.strftime('%Y-%m-%d %H:%M:%S') if col in df.columns else None
+        elif col == 'EISID':
+            eisid = df['Specified Sub'] if 'Specified Sub' in df.columns else pd.Series(index=df.index, dtype=float)
+            rows[col] = pd.to_numeric(eisid, errors='coerce').astype('Int64')
+        else:
+            rows[col] = df[col] if col in df.columns else None
+    return rows
+
+
+def replace_source_file(conn, source_file, path, content_hash, rows):
+    """
+    Replace every job row of one source file in a single transaction
+
+    Args:
+        conn: Connection from open_job_store()
+        source_file: File name as recorded in the Source_File column
+        path: Path the file was loaded from
+        content_hash: Hash of the file contents and mapping (stored_file_hash)
+        rows: Processed job rows of that file (load_and_process_data + add_superintendent_info)
+    """
+    with conn:
+        conn.execute(f"DELETE FROM {JOBS_TABLE} WHERE Source_File = ?", (source_file,))
+        _job_rows(rows).to_sql(JOBS_TABLE, conn, if_exists='append', index=False, chunksize=10000)
+        conn.execute(
+            f"INSERT OR REPLACE INTO {SOURCE_FILES_TABLE} (source_file, path, content_hash, row_count, loaded_at) "
+            "VALUES (?, ?, ?, ?, ?)",
+            (source_file, path, content_hash, len(rows), time.strftime('%Y-%m-%dT%H:%M:%S'))
+        )
+
+
+def _loaded_hashes(conn):
+    """Return {source_file: content_hash} for the files already in the store"""
+    return dict(conn.execute(f"SELECT source_file, content_hash FROM {SOURCE_FILES_TABLE}").fetchall())
+
+
+def update_job_store(store_file, df, csv_file_paths, mapping_dir='.'):
+    """
+    Bring the job store up to date with an ingest result
+
+    Only files whose contents or superintendent mapping changed since they were last stored are
+    rewritten. Files already in the store but not in csv_file_paths (e.g. earlier months) are kept.
+
+    Args:
+        store_file: Path of the SQLite job store
+        df: Processed main DataFrame with a Source_File column
+        csv_file_paths: Input CSV paths of this build (payroll files are ignored)
+        mapping_dir: Directory of the 8.8.25 mapping CSV df was enriched with
+
+    Returns:
+        dict: 'updated' and 'unchanged' lists of source file names
+    """
+    result = {'updated': [], 'unchanged': []}
+    sources = set(df['Source_File'].unique())
+    mapping_digest = mapping_hash(mapping_dir)
+    conn = open_job_store(store_file)
+    try:
+        loaded = _loaded_hashes(conn)
+        for path in csv_file_paths:
+            source_file = os.path.basename(path)
+            if source_file not in sources or not os.path.exists(path):
+                continue
+            content_hash = stored_file_hash(path, mapping_digest)
+            if loaded.get(source_file) == content_hash:
+                result['unchanged'].append(source_file)
+                continue
+            replace_source_file(conn, source_file, path, content_hash, df[df['Source_File'] == source_file])
+            result['updated'].append(source_file)
+    finally:
+        conn.close()
+    return result
+
+
+def append_csv_files(store_file, csv_file_paths, mapping_dir='.', force=False):
+    """
+    Load CSV files into the job store one at a time, skipping files that are already stored unchanged
+
+    Each file is cleaned and enriched on its own, so only one file is in memory at a time. A file
+    stored with a different mapping CSV counts as changed.
+
+    Args:
+        store_file: Path of the SQLite job store
+        csv_file_paths: SubCentral job CSVs to load
+        mapping_dir: Directory containing the 8.8.25 superintendent mapping CSV
+        force: Reload files even if their contents are unchanged
+
+    Returns:
+        dict: 'updated' and 'unchanged' lists of source file names
+    """
+    result = {'updated': [], 'unchanged': []}
+    mapping_df = None
+    mapping_digest = mapping_hash(mapping_dir)
+    conn = open_job_store(store_file)
+    try:
+        loaded = _loaded_hashes(conn)
+        for path in csv_file_paths:
+            source_file = os.path.basename(path)
+            content_hash = stored_file_hash(path, mapping_digest)
+            if not force and loaded.get(source_file) == content_hash:
+                print(f"✓ {source_file} unchanged, skipping")
+                result['unchanged'].append(source_file)
+                continue
+
+            df, _ = load_and_process_data([path])
+            if df.empty:
+                print(f"⚠ {source_file}: no job rows loaded")
+                continue
+            if mapping_df is None:
+                mapping_df = load_superintendent_mapping(mapping_dir)
+            df = add_superintendent_info(df, mapping_df)
+            replace_source_file(conn, source_file, path, content_hash, df)
+            print(f"✓ {source_file}: stored {len(df)} jobs")
+            result['updated'].append(source_file)
+    finally:
+        conn.close()
+    return result
+
+
+def list_source_files(store_file):
+    """Return the source files in the store with their row counts and load times"""
+    return run_query(store_file, f"SELECT * FROM {SOURCE_FILES_TABLE} ORDER BY source_file")
+
+
+def run_query(store_file, sql, params=()):
+    """
+    Run a read-only SQL query against the job store
+
+    Returns:
+        pandas.DataFrame: Query result
+    """
+    conn = _open_read_only(store_file)
+    try:
+        return pd.read_sql_query(sql, conn, params=params)
+    finally:
+        conn.close()
+
+
+def _where_clause(start=None, end=None, **filters):
+    """
+    Build a WHERE clause from query filters
+
+    Each filter in FILTER_COLUMNS takes a single value or a list of values. start/end are
+    inclusive job dates (anything pandas can parse).
+
+    Returns:
+        Tuple of (sql, params); sql is '' when there are no filters
+    """
+    conditions, params = [], []
+    for name, value in filters.items():
+        if name not in FILTER_COLUMNS:
+            raise ValueError(f"Unknown filter '{name}' (expected one of {', '.join(FILTER_COLUMNS)})")
+        if value is None:
+            continue
+        values = list(value) if isinstance(value, (list, tuple, set)) else [value]
+        conditions.append(f"{_quote(FILTER_COLUMNS[name])} IN ({', '.join('?' * len(values))})")
+        params.extend(values)
+    if start is not None:
+        conditions.append('"Job Start" >= ?')
+        params.append(pd.Timestamp(start).normalize().strftime('%Y-%m-%d %H:%M:%S'))
+    if end is not None:
+        conditions.append('"Job Start" < ?')
+        params.append((pd.Timestamp(end).normalize() + pd.Timedelta(days=1)).strftime('%Y-%m-%d %H:%M:%S'))
+    return (' WHERE ' + ' AND '.join(conditions) if conditions else ''), params
+
+
+def query_jobs(store_file, columns=None, limit=None, start=None, end=None, **filters):
+    """
+    Select job rows from the store
+
+    Args:
+        store_file: Path of the SQLite job store
+        columns: Columns to return (default: all)
+        limit: Maximum number of rows
+        start, end: Inclusive Job Start date range
+        **filters: location, superintendent, borough, classification, job_type, fill_status,
+                   eisid or source_file; each a value or a list of values
+
+    Returns:
+        pandas.DataFrame: Matching jobs ordered by Job Start, with Job Start as datetimes
+    """
+    select = ', '.join(_quote(col) for col in columns) if columns else '*'
+    where, params = _where_clause(start=start, end=end, **filters)
+    sql = f'SELECT {select} FROM {JOBS_TABLE}{where} ORDER BY "Job Start"'
+    if limit is not None:
+        sql += f" LIMIT {int(limit)}"
+    jobs = run_query(store_file, sql, params)
+    if 'Job Start' in jobs.columns:
+        jobs['Job Start'] = pd.to_datetime(jobs['Job Start'])
+    return jobs
+
+
+def job_cube_sql(store_file, dimensions=CUBE_DIMENSIONS, start=None, end=None, **filters):
+    """
+    Job count cube (as data_processing.build_job_cube) aggregated in SQL
+
+    Returns:
+        pandas.DataFrame: One row per dimension combination with a Job_Count column
+    """
+    dims = ', '.join(_quote(col) for col in dimensions)
+    where, params = _where_clause(start=start, end=end, **filters)
+    return run_query(
+        store_file,
+        f"SELECT {dims}, COUNT(*) AS {JOB_COUNT_COL} FROM {JOBS_TABLE}{where} GROUP BY {dims} ORDER BY {dims}",
+        params
+    )
+
+
+def summary_stats_sql(store_file, group_cols, start=None, end=None, **filters):
+    """
+    Fill rate statistics (as create_summary_stats) with the counting done in SQL
+
+    Args:
+        store_file: Path of the SQLite job store
+        group_cols: Grouping columns; [] for citywide statistics
+        start, end, **filters: As query_jobs()
+
+    Returns:
+        pandas.DataFrame: create_summary_stats() layout
+    """
+    cube = job_cube_sql(store_file, list(group_cols) + ['Classification', 'Type_Fill_Status'],
+                        start=start, end=end, **filters)
+    return create_summary_stats(cube, list(group_cols))
+
+
+def _add_filter_options(parser):
+    """Add the job filters shared by the query and summary commands"""
+    parser.add_argument('--location', action='append', help='School location code, e.g. K346; repeatable')
+    parser.add_argument('--superintendent', action='append', help='Superintendent name; repeatable')
+    parser.add_argument('--borough', action='append', help='Borough name; repeatable')
+    parser.add_argument('--classification', action='append', help='Job classification; repeatable')
+    parser.add_argument('--type', dest='job_type', choices=['Absence', 'Vacancy'])
+    parser.add_argument('--fill-status', choices=['Filled', 'Unfilled'])
+    parser.add_argument('--eisid', type=int, action='append', help='Substitute EISID; repeatable')
+    parser.add_argument('--start', help='First job date (inclusive)')
+    parser.add_argument('--end', help='Last job date (inclusive)')
+
+
+def _filters_from_args(args):
+    """Collect the filter options of the query/summary commands"""
+    filters = {name: getattr(args, name) for name in FILTER_COLUMNS if getattr(args, name, None) is not None}
+    return dict(filters, start=args.start, end=args.end)
+
+
+def _print_frame(df, csv_file=None):
+    """Print a query result, or write it to CSV"""
+    if csv_file:
+        df.to_csv(csv_file, index=False)
+        print(f"✓ Wrote {len(df)} rows to {csv_file}")
+    else:
+        with pd.option_context('display.max_rows', 200, 'display.width', 200):
+            print(df.to_string(index=False) if not df.empty else '(no rows)')
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Indexed SQLite store of SubCentral job rows')
+    parser.add_argument('--store', default=DEFAULT_JOB_STORE_FILE, help=f'Job store file (default: {DEFAULT_JOB_STORE_FILE})')
+    subparsers = parser.add_subparsers(dest='command', required=True)
+
+    add_parser = subparsers.add_parser('add', help='Load or refresh SubCentral CSV files')
+    add_parser.add_argument('files', nargs='+')
+    add_parser.add_argument('--mapping-dir', default='.', help='Directory containing the 8.8.25 mapping CSV')
+    add_parser.add_argument('-f', '--force', action='store_true', help='Reload files even if unchanged')
+
+    subparsers.add_parser('files', help='List loaded source files')
+
+    query_parser = subparsers.add_parser('query', help='Select job rows')
+    _add_filter_options(query_parser)
+    query_parser.add_argument('--columns', nargs='+', help='Columns to show')
+    query_parser.add_argument('--limit', type=int)
+    query_parser.add_argument('--csv', help='Write the result to this CSV file')
+
+    summary_parser = subparsers.add_parser('summary', help='Fill rate statistics computed in SQL')
+    _add_filter_options(summary_parser)
+    summary_parser.add_argument('--by', nargs='*', default=[], help='Grouping columns, e.g. Borough or Superintendent_Name Location')
+    summary_parser.add_argument('--csv', help='Write the result to this CSV file')
+
+    sql_parser = subparsers.add_parser('sql', help='Run a read-only SQL query')
+    sql_parser.add_argument('query')
+    sql_parser.add_argument('--csv', help='Write the result to this CSV file')
+
+    args = parser.parse_args(sys.argv[1:] if argv is None else argv)
+
+    try:
+        if args.command == 'add':
+            append_csv_files(args.store, args.files, mapping_dir=args.mapping_dir, force=args.force)
+        elif args.command == 'files':
+            _print_frame(list_source_files(args.store))
+        elif args.command == 'query':
+            _print_frame(query_jobs(args.store, columns=args.columns, limit=args.limit, **_filters_from_args(args)), args.csv)
+        elif args.command == 'summary':
+            _print_frame(summary_stats_sql(args.store, args.by, **_filters_from_args(args)), args.csv)
+        elif args.command == 'sql':
+            _print_frame(run_query(args.store, args.query), args.csv)
+    except (FileNotFoundError, sqlite3.Error, ValueError) as e:
+        print(f"✗ Error: {e}")
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
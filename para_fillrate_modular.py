@@ -3,220 +3,1090 @@ NYC DOE Paraprofessional Jobs Dashboard - Main Script (Modularized)
 
 This is the main entry point for generating the NYC DOE reports dashboard.
 The heavy lifting is now done by imported modules for better maintainability.
+
+Usage:
+    python para_fillrate_modular.py [-f]                    Full build (ingest, match, stats, render)
+    python para_fillrate_modular.py ingest                  Load CSVs and superintendent mapping, cache the result
+    python para_fillrate_modular.py match                   Payroll matching analysis
+    python para_fillrate_modular.py stats                   Statistics for every level, exported as CSV
+    python para_fillrate_modular.py render [--superintendent NAME | --borough NAME | --school LOC]
+
+Each stage caches its result in .build_cache/ so later stages (and scoped renders) reuse it
+instead of re-reading the raw CSVs. A cache is rebuilt when the input files change.
+
+The stats stage also writes a self-contained aggregate store (SQLite, see aggregate_store.py).
+`render` runs from that store alone, so it works on a machine without the raw data; when the
+raw inputs are present and have changed since the store was written, the stages are re-run.
+
+With --stream, ingest reads the SubCentral CSVs in chunks and folds them into a job count cube
+instead of keeping every row in memory, for multi-year histories.
+
+Every report level also gets a weekly/monthly fill rate trend chart with the rolling 4-week
+rate (see time_series.py); the charts share one plotly.min.js at the root of the report tree.
+Superintendent reports also show classification x day-of-week fill rate heatmaps (heatmaps.py),
+and school pages show the school's percentiles citywide, in its borough and among schools with a
+similar job volume (rankings.py). Schools whose fill rate or payroll match % is significantly
+below their peers are listed as needing attention (anomalies.py). With --internal, the borough,
+superintendent and overall pages also list the substitutes (by EISID) carrying the most job days,
+and the per-substitute tables are exported as CSV (substitutes.py).
+
+With --period (repeatable: all, last30d, semester or START:END), the statistics and render stages
+run once per Job Start window on the shared ingest and matching results, each writing its own
+aggregate store and report tree under {output_dir}/periods/ (see periods.py).
+
+Every full-scope build also records a dated snapshot of its rollups, one per date and period
+(see snapshots.py); the overall summary and superintendent pages list the biggest fill rate
+changes since the previous snapshot (or the one given with --compare-to). Scoped renders and
+--data-only/stats runs compare with the stored snapshots but do not record one.
+
+With --job-store, ingest also keeps an indexed SQLite copy of the job rows up to date (see
+job_store.py for ad-hoc queries) and the statistics are aggregated from it in SQL.
+
+With --chart-backend svg, the bar and pie charts are static SVG inlined in the pages instead of
+Plotly chart files (svg_charts.py). Chart files drawn from the same data as an earlier build are
+linked from .build_cache/charts/ instead of being built again (chart_cache.py; --no-chart-cache
+turns this off). With --chart-embed lazy, pages draw their Plotly charts from figure JSON files as
+they scroll into view instead of loading every chart iframe up front.
 """
 
 import os
+import sys
+import json
 import time
+import pickle
+import difflib
+import argparse
 import pandas as pd
 
 # Import our custom modules
 from data_processing import (
-    load_and_process_data, get_data_date_range, create_summary_stats, 
-    copy_logo_to_output, create_matching_analysis, load_superintendent_mapping, add_superintendent_info
+    load_and_process_data, get_data_date_range, create_summary_stats,
+    copy_logo_to_output, load_superintendent_mapping, add_superintendent_info,
+    build_matching_keys, aggregate_matching_keys, window_matching_keys,
+    export_stats_tables, build_job_cube, stream_job_cube, total_job_count, slice_job_window,
+    clean_superintendent_name, clean_borough_name, report_page_path
+)
+from aggregate_store import write_aggregate_store, read_aggregate_store, read_store_meta
+from time_series import compute_time_series, group_time_series
+from heatmaps import compute_heatmaps, group_heatmaps
+from rankings import compute_school_rankings, group_rankings
+from anomalies import compute_anomalies
+from substitutes import compute_substitute_stats
+from search_index import school_directory, write_search_index
+from periods import PERIOD_ALL, parse_period, resolve_period, period_output_dir, period_store_file
+from snapshots import (
+    DEFAULT_SNAPSHOT_FILE, build_rollup, write_snapshot, read_snapshot, previous_snapshot_date, diff_snapshots
 )
-from report_generators import create_borough_report, create_overall_summary, create_superintendent_report
+from job_store import update_job_store, job_cube_sql, DEFAULT_JOB_STORE_FILE
+from client_pages import write_school_page_shell, school_bundle_filename, SCHOOL_SHELL_FILENAME
+from chart_utils import CHART_BACKENDS, CHART_EMBEDS
+from chart_cache import DEFAULT_CHART_CACHE_DIR, configure_chart_cache, get_chart_cache_counts, prune_chart_cache
+from compression import compress_output_tree
+from profiling import (
+    stage, entity_timer, print_stage_summary, write_timing_report, start_profiler, stop_profiler,
+    start_memory_tracking, stop_memory_tracking, print_memory_summary, write_memory_report, get_stage_memory
+)
+
+# Default inputs, relative to --data-dir (or the working directory)
+DEFAULT_CSV_FILES = [
+    'Fill Rate Data/mayjobs.csv',
+    'Fill Rate Data/junejobs.csv',
+    'Fill Rate Data/apriljobs.csv',
+    'Fill Rate Data/febmarchjobs.csv',
+    'Fill Rate Data/decjanjobs.csv',
+    'Fill Rate Data/sepoctnovjobs.csv',
+    'SREPP1.csv',
+    'SREPP2.csv',
+]
+DEFAULT_OUTPUT_DIRECTORY = 'nycdoe_reports'
+
+# Where --profile / --memory-profile write their reports
+PROFILE_OUTPUT_DIR = 'build_profiles'
+# Where --data-only writes its CSV exports (inside the output directory)
+DATA_EXPORT_DIR = 'data'
+# Per-stage pickled results reused by later stages and scoped renders
+BUILD_CACHE_DIR = '.build_cache'
+# Aggregate store written by the stats stage and read by the render stage
+DEFAULT_STORE_FILE = os.path.join(BUILD_CACHE_DIR, 'aggregates.sqlite')
 
-def main():
+# Rows per chunk for --stream
+DEFAULT_CHUNKSIZE = 100000
+
+STATS_LEVELS = ['citywide_stats', 'borough_stats', 'superintendent_stats', 'school_stats']
+
+def load_build_config(config_file=None, data_dir=None, output_dir=None, stream=False, chunksize=None):
     """
-    Main function to generate static reports
+    Resolve input files and output directory from defaults, an optional JSON config file and CLI options
+
+    The config file may set "data_dir", "csv_files" (relative to data_dir), "output_directory",
+    "stream" and "chunksize". Command line options take precedence over the config file.
+
+    Returns:
+        dict: data_dir, csv_files (resolved paths), output_directory, stream and chunksize
     """
-    # Configuration - Updated to use multiple CSV files
-    csv_files = [
-        'Fill Rate Data/mayjobs.csv',
-        'Fill Rate Data/junejobs.csv',
-        'Fill Rate Data/apriljobs.csv',
-        'Fill Rate Data/febmarchjobs.csv',
-        'Fill Rate Data/decjanjobs.csv',
-        'Fill Rate Data/sepoctnovjobs.csv',
-        'SREPP1.csv',
-        'SREPP2.csv',
-    ]
-    output_directory = 'nycdoe_reports'
-    
-    # Check for force regeneration flag
-    import sys
-    force_regenerate = '--force' in sys.argv or '-f' in sys.argv
-    if force_regenerate:
-        print("🔄 Force regeneration mode: will overwrite existing reports")
-    else:
-        print("📋 Incremental mode: will skip existing reports (use --force or -f to regenerate all)")
-    
-    start_time = time.time()
-    print("🚀 NYC DOE Paraprofessional Fill Rate Analysis")
-    print("=" * 50)
-    
+    config = {}
+    if config_file:
+        with open(config_file, 'r', encoding='utf-8') as f:
+            config = json.load(f)
+
+    resolved_data_dir = data_dir or config.get('data_dir') or '.'
+    csv_files = [os.path.normpath(os.path.join(resolved_data_dir, path)) for path in config.get('csv_files', DEFAULT_CSV_FILES)]
+    return {
+        'data_dir': resolved_data_dir,
+        'csv_files': csv_files,
+        'output_directory': output_dir or config.get('output_directory') or DEFAULT_OUTPUT_DIRECTORY,
+        'stream': stream or bool(config.get('stream', False)),
+        'chunksize': chunksize or config.get('chunksize') or DEFAULT_CHUNKSIZE
+    }
+
+def get_input_signature(config):
+    """Return (path, size, mtime) for every input file so caches can tell when the inputs changed"""
+    data_files = os.listdir(config['data_dir']) if os.path.isdir(config['data_dir']) else []
+    mapping_files = sorted(f for f in data_files if f.startswith('8.8.25') and f.endswith('.csv'))
+    paths = config['csv_files'] + [os.path.join(config['data_dir'], f) for f in mapping_files]
+    signature = []
+    for path in paths:
+        if os.path.exists(path):
+            stat = os.stat(path)
+            signature.append((path, stat.st_size, int(stat.st_mtime)))
+        else:
+            signature.append((path, None, None))
+    return signature
+
+def save_stage_cache(name, payload):
+    """Pickle a stage result to the build cache"""
+    os.makedirs(BUILD_CACHE_DIR, exist_ok=True)
+    cache_file = os.path.join(BUILD_CACHE_DIR, f"{name}.pkl")
+    with open(cache_file, 'wb') as f:
+        pickle.dump(payload, f, protocol=pickle.HIGHEST_PROTOCOL)
+    return cache_file
+
+def load_stage_cache(name, source_id):
+    """
+    Load a cached stage result if it was built from the given source
+
+    Args:
+        name: Stage name ('ingest' or 'match')
+        source_id: Input signature (ingest) or the ingest build id (later stages)
+
+    Returns:
+        dict payload, or None if the cache is missing, unreadable or stale
+    """
+    cache_file = os.path.join(BUILD_CACHE_DIR, f"{name}.pkl")
+    if not os.path.exists(cache_file):
+        return None
     try:
-        # Create output directory
-        os.makedirs(output_directory, exist_ok=True)
-        
-        # Copy logo for deployment
-        copy_logo_to_output(output_directory)
-        
-        # Load and process data from multiple files
+        with open(cache_file, 'rb') as f:
+            payload = pickle.load(f)
+    except Exception as e:
+        print(f"⚠ Could not read {cache_file}, rebuilding: {e}")
+        return None
+    if payload.get('source_id') != source_id:
+        print(f"📋 Cached {name} results are out of date, rebuilding...")
+        return None
+    print(f"✓ Using cached {name} results from {cache_file}")
+    return payload
+
+def run_ingest(config):
+    """
+    Load the SubCentral and SREPP CSVs and add superintendent information
+
+    With config['stream'], the SubCentral rows are folded into a job count cube chunk by chunk
+    (stream_job_cube) instead of being loaded whole: df is then the cube and subcentral_keys
+    holds the folded payroll matching keys.
+
+    Returns:
+        dict: df, srepp_df, date_range_info, build_id and source_id (input signature); df is empty if nothing loaded
+    """
+    stream = config['stream']
+    subcentral_keys = None
+    with stage('ingest'):
         print("Loading data sources...")
-        df, srepp_df = load_and_process_data(csv_files)
-        
-        # Handle SREPP data if present
-        if not srepp_df.empty:
-            print(f"✓ SREPP payroll data: {len(srepp_df)} records")
-        else:
-            print("⚠ No SREPP payroll data found")
-            
-        # Show main data info
-        if not df.empty:
-            print(f"✓ SubCentral data: {len(df)} records")
-        else:
-            print("✗ No SubCentral data found")
-            
-        # Create matching analysis between SubCentral and SREPP data
-        print("Creating payroll matching analysis...")
-        matching_stats = create_matching_analysis(df, srepp_df)
-        if not matching_stats.empty:
-            print(f"✓ Analysis completed for {len(matching_stats)} locations")
+        if stream:
+            streamed = stream_job_cube(config['csv_files'], chunksize=config['chunksize'])
+            df, srepp_df, subcentral_keys = streamed['cube'], streamed['srepp_df'], streamed['subcentral_keys']
         else:
-            print("⚠ No matching analysis available")
-        
-        # Continue with main data processing
-        if df.empty:
-            print("✗ Error: No main data loaded. Check your CSV files.")
-            return
-        
-        # Load superintendent mapping and add to main data
+            df, srepp_df = load_and_process_data(config['csv_files'])
+
+    # Handle SREPP data if present
+    if not srepp_df.empty:
+        print(f"✓ SREPP payroll data: {len(srepp_df)} records")
+    else:
+        print("⚠ No SREPP payroll data found")
+
+    # Show main data info
+    if not df.empty:
+        print(f"✓ SubCentral data: {total_job_count(df)} records")
+    else:
+        print("✗ No SubCentral data found")
+        return {'df': df, 'srepp_df': srepp_df}
+
+    # Load superintendent mapping and add to main data
+    with stage('enrichment'):
         print("Loading superintendent mappings...")
         try:
-            mapping_df = load_superintendent_mapping()
+            mapping_df = load_superintendent_mapping(config['data_dir'])
             df = add_superintendent_info(df, mapping_df)
         except Exception as e:
             print(f"⚠ Warning: Could not load superintendent mapping: {e}")
             print("Continuing without superintendent information...")
-        
-        # Get date range information
-        date_range_info = get_data_date_range(df)
-        print(f"✓ Report period: {date_range_info}")
-        
-        # OPTIMIZATION: Calculate ALL statistics levels once (like matching analysis)
-        print("Creating comprehensive statistics...")
-        
+
+    # Get date range information (tracked while streaming, since the cube has no job dates)
+    date_range_info = streamed['date_range_info'] if stream else get_data_date_range(df)
+    print(f"✓ Report period: {date_range_info}")
+
+    return {
+        'df': df,
+        'srepp_df': srepp_df,
+        'subcentral_keys': subcentral_keys,
+        'date_range_info': date_range_info,
+        'build_id': f"{time.time():.6f}",
+        'source_id': _ingest_source_id(config)
+    }
+
+def run_match(ingest, memory_profile=False):
+    """
+    Run the SubCentral vs payroll matching analysis for an ingest result
+
+    Returns:
+        dict: matching_stats over all dates, the matching keys they were aggregated from
+              (build_matching_keys, kept so period windows can re-aggregate them) and source_id
+    """
+    with stage('matching'):
+        print("Creating payroll matching analysis...")
+        keys = build_matching_keys(ingest['df'], ingest['srepp_df'], ingest.get('subcentral_keys'))
+        matching_stats = aggregate_matching_keys(keys)
+    if memory_profile:
+        matching_memory = get_stage_memory()['matching']
+        print(f"  Matching peak memory: {matching_memory['peak_above_start_bytes'] / 1e6:.1f} MB above stage start")
+    if not matching_stats.empty:
+        print(f"✓ Analysis completed for {len(matching_stats)} locations")
+    else:
+        print("⚠ No matching analysis available")
+    return dict(keys, matching_stats=matching_stats, source_id=ingest['build_id'])
+
+def window_ingest(ingest, spec):
+    """
+    Restrict an ingest result to one report period
+
+    The job rows are sorted by Job Start, so the window is a slice of them. The SREPP rows and the
+    matching keys stay shared by every period; window_match() aggregates the keys of the period.
+
+    Args:
+        ingest: Result of run_ingest() over all jobs
+        spec: Period spec from parse_period(); None or 'all' returns the ingest unchanged
+
+    Returns:
+        dict: The ingest layout with the windowed df, a period-specific build_id and date range
+              label, and 'period' (the resolved period)
+    """
+    if spec is None or spec == PERIOD_ALL:
+        return ingest
+    df = ingest['df']
+    period = resolve_period(spec, df['Job Start'].max())
+    with stage('period window'):
+        window_df = slice_job_window(df, period['start'], period['end'])
+    print(f"📅 Period {period['label']}: {len(window_df):,} of {len(df):,} jobs")
+    return dict(
+        ingest, df=window_df, period=period,
+        build_id=f"{ingest['build_id']}:{period['name']}",
+        date_range_info=f"{period['label']} - {get_data_date_range(window_df)}"
+    )
+
+def window_match(match, period):
+    """
+    Matching analysis of one report period
+
+    The cached matching keys (run_match) are filtered to the jobs and payroll records dated in the
+    period and aggregated per location again, so a period's match percentages cover the same days
+    as its fill rates.
+
+    Args:
+        match: Result of run_match() over all dates
+        period: Resolved period (window_ingest), or None for all dates
+
+    Returns:
+        dict: match with the period's matching_stats
+    """
+    if not period or (period['start'] is None and period['end'] is None):
+        return match
+    with stage('matching'):
+        print(f"Matching payroll for period {period['label']}...")
+        matching_stats = aggregate_matching_keys(window_matching_keys(match, period['start'], period['end']))
+    return dict(match, matching_stats=matching_stats)
+
+def run_stats(ingest):
+    """
+    Calculate ALL statistics levels once (citywide, borough, superintendent, school)
+
+    Returns:
+        dict: One DataFrame per name in STATS_LEVELS
+    """
+    df = ingest['df']
+    print("Creating comprehensive statistics...")
+    with stage('stats'):
         # Create all levels of statistics - now using Superintendent instead of District
         citywide_stats = create_summary_stats(df, [])  # No grouping = citywide
         borough_stats = create_summary_stats(df, ['Borough'])
         superintendent_stats = create_summary_stats(df, ['Superintendent_Name'])  # Changed from District
         school_stats = create_summary_stats(df, ['Superintendent_Name', 'Location'])  # Changed grouping
-        
-        # Validate statistics were created successfully
-        stats_info = [
-            ('citywide', citywide_stats),
-            ('borough', borough_stats), 
-            ('superintendent', superintendent_stats),  # Changed from district
-            ('school', school_stats)
-        ]
-        
-        for name, stats in stats_info:
-            if stats.empty:
-                print(f"⚠ Warning: {name} statistics are empty")
-            else:
-                print(f"✓ {name.capitalize()} stats: {len(stats)} records, columns: {list(stats.columns)}")
-        
-        # Clean up any Type_Fill_Status columns
-        for stats in [citywide_stats, borough_stats, superintendent_stats, school_stats]:
-            if 'Type_Fill_Status' in stats.columns:
-                stats.drop(columns=['Type_Fill_Status'], inplace=True)
-
-        # Convert to int to avoid float display issues
-        int_cols = ['Vacancy_Filled', 'Vacancy_Unfilled', 'Absence_Filled', 'Absence_Unfilled', 
-                   'Total_Vacancy', 'Total_Absence', 'Total']
-        for stats in [citywide_stats, borough_stats, superintendent_stats, school_stats]:
-            for col in int_cols:
-                if col in stats.columns:
-                    stats[col] = stats[col].astype(int)
-        
-        print(f"✓ Statistics created: citywide, {len(borough_stats)} boroughs, {len(superintendent_stats)} superintendents, {len(school_stats)} schools")
-        
-        # For backward compatibility, keep summary_stats as superintendent level
-        summary_stats = superintendent_stats
-        
-        # Create reports for each Superintendent
+
+    # Validate statistics were created successfully
+    stats_info = [
+        ('citywide', citywide_stats),
+        ('borough', borough_stats),
+        ('superintendent', superintendent_stats),  # Changed from district
+        ('school', school_stats)
+    ]
+
+    for name, stats in stats_info:
+        if stats.empty:
+            print(f"⚠ Warning: {name} statistics are empty")
+        else:
+            print(f"✓ {name.capitalize()} stats: {len(stats)} records, columns: {list(stats.columns)}")
+
+    # Clean up any Type_Fill_Status columns
+    for stats in [citywide_stats, borough_stats, superintendent_stats, school_stats]:
+        if 'Type_Fill_Status' in stats.columns:
+            stats.drop(columns=['Type_Fill_Status'], inplace=True)
+
+    # Convert to int to avoid float display issues
+    int_cols = ['Vacancy_Filled', 'Vacancy_Unfilled', 'Absence_Filled', 'Absence_Unfilled',
+               'Total_Vacancy', 'Total_Absence', 'Total']
+    for stats in [citywide_stats, borough_stats, superintendent_stats, school_stats]:
+        for col in int_cols:
+            if col in stats.columns:
+                stats[col] = stats[col].astype(int)
+
+    print(f"✓ Statistics created: citywide, {len(borough_stats)} boroughs, {len(superintendent_stats)} superintendents, {len(school_stats)} schools")
+
+    return {
+        'citywide_stats': citywide_stats,
+        'borough_stats': borough_stats,
+        'superintendent_stats': superintendent_stats,
+        'school_stats': school_stats
+    }
+
+def _ingest_source_id(config):
+    """Cache key of an ingest result: the input signature, plus the mode (streamed cube or job rows)"""
+    return {'inputs': get_input_signature(config), 'mode': 'stream' if config['stream'] else 'rows'}
+
+def get_ingest(config, refresh=False, job_store=None):
+    """
+    Return the ingest result from the build cache, or run ingest and cache it
+
+    If job_store is given, source files that changed since they were last stored are written to it.
+    """
+    payload = None if refresh else load_stage_cache('ingest', _ingest_source_id(config))
+    if payload is None:
+        payload = run_ingest(config)
+        if not payload['df'].empty:
+            save_stage_cache('ingest', payload)
+    if job_store and not payload['df'].empty:
+        with stage('job store'):
+            result = update_job_store(job_store, payload['df'], config['csv_files'], mapping_dir=config['data_dir'])
+        print(f"✓ Job store {job_store}: {len(result['updated'])} file(s) updated, {len(result['unchanged'])} unchanged")
+    return payload
+
+def get_match(ingest, refresh=False, memory_profile=False):
+    """Return the matching analysis for an ingest result from the build cache, or compute and cache it"""
+    payload = None if refresh else load_stage_cache('match', ingest['build_id'])
+    # Match caches written before the matching keys were kept cannot be windowed by period
+    if payload is not None and 'srepp_keys' not in payload:
+        payload = None
+    if payload is None:
+        payload = run_match(ingest, memory_profile)
+        save_stage_cache('match', payload)
+    return payload
+
+def build_aggregates(config, ingest, match, store_file, job_store=None):
+    """
+    Compute every statistics level and write the aggregate store used by the render stage
+
+    With a job store, the job count cube is aggregated in SQL (limited to this build's source files
+    and period) and the statistics are computed from the cube instead of the job rows.
+
+    Returns:
+        dict: Render inputs in the read_aggregate_store() layout ('df' is the job count cube)
+    """
+    period = ingest.get('period') or {}
+    match = window_match(match, ingest.get('period'))
+    if job_store:
+        with stage('job store'):
+            job_cube = job_cube_sql(job_store, source_file=sorted(ingest['df']['Source_File'].unique()),
+                                    start=period.get('start'), end=period.get('end'))
+        aggregates = run_stats({'df': job_cube})
+    else:
+        aggregates = run_stats(ingest)
+    with stage('time series'):
+        time_series = compute_time_series(ingest['df'])
+    print(f"✓ Time series: {len(time_series)} weekly/monthly fill rates")
+    with stage('heatmaps'):
+        heatmaps = compute_heatmaps(ingest['df'])
+    print(f"✓ Heatmaps: {len(heatmaps)} classification x day/week cells")
+    with stage('rankings'):
+        school_ranks = compute_school_rankings(ingest['df'], aggregates['school_stats'], match['matching_stats'])
+    print(f"✓ School ranks: {len(school_ranks)} percentiles")
+    with stage('anomalies'):
+        anomalies = compute_anomalies(ingest['df'], aggregates['school_stats'], match['matching_stats'])
+    print(f"✓ Attention needed: {anomalies['Location'].nunique()} schools significantly below their peers")
+    with stage('substitutes'):
+        substitutes, top_substitutes = compute_substitute_stats(ingest['df'], ingest.get('srepp_df'), ingest.get('subcentral_keys'))
+    print(f"✓ Substitutes: {len(substitutes)} EISIDs, {len(top_substitutes)} top substitute rows")
+    with stage('aggregate store'):
+        if not job_store:
+            job_cube = build_job_cube(ingest['df'])
+        directory = school_directory(ingest['df'])
+        meta = {
+            'date_range_info': ingest['date_range_info'],
+            'source_id': ingest['build_id'],
+            'input_signature': get_input_signature(config),
+            'job_rows': len(ingest['df']),
+            'period': period.get('name', PERIOD_ALL)
+        }
+        write_aggregate_store(store_file, job_cube, aggregates, match['matching_stats'], meta,
+                              extra_tables={'time_series': time_series, 'heatmaps': heatmaps,
+                                            'school_ranks': school_ranks, 'anomalies': anomalies,
+                                            'substitutes': substitutes, 'top_substitutes': top_substitutes,
+                                            'school_directory': directory})
+    print(f"✓ Aggregate store written to {store_file} ({len(job_cube)} cube rows for {len(ingest['df'])} jobs)")
+
+    aggregates.update({
+        'df': job_cube,
+        'matching_stats': match['matching_stats'],
+        'time_series': time_series,
+        'heatmaps': heatmaps,
+        'school_ranks': school_ranks,
+        'anomalies': anomalies,
+        'substitutes': substitutes,
+        'top_substitutes': top_substitutes,
+        'school_directory': directory,
+        'date_range_info': ingest['date_range_info'],
+        'meta': meta
+    })
+    return aggregates
+
+def get_aggregates(config, ingest, match, store_file, refresh=False, job_store=None):
+    """Return the render inputs from the aggregate store if it matches this ingest, otherwise rebuild it"""
+    meta = None if refresh else read_store_meta(store_file)
+    if meta is not None and meta.get('source_id') == ingest['build_id']:
+        print(f"✓ Using aggregate store {store_file}")
+        return read_aggregate_store(store_file)
+    return build_aggregates(config, ingest, match, store_file, job_store)
+
+def load_render_aggregates(config, store_file, refresh=False, memory_profile=False, job_store=None, period=None):
+    """
+    Return the render inputs, reading only the aggregate store when it is usable
+
+    The store is used as-is when the raw inputs are not available (e.g. a render-only machine,
+    where --force only regenerates pages) or have not changed since it was written. Otherwise
+    ingest/match/stats are re-run from the cache, with stats limited to the given period spec.
+    """
+    inputs_available = any(os.path.exists(path) for path in config['csv_files'])
+    meta = None if refresh and inputs_available else read_store_meta(store_file)
+    if meta is not None:
+        if not inputs_available or [list(item) for item in get_input_signature(config)] == meta.get('input_signature'):
+            with stage('load aggregates'):
+                aggregates = read_aggregate_store(store_file)
+            print(f"✓ Rendering from aggregate store {store_file} (built {meta.get('created_at')}, {meta.get('job_rows')} jobs)")
+            return aggregates
+        print(f"📋 Input files changed since {store_file} was written, rebuilding...")
+
+    ingest = get_ingest(config, refresh=refresh, job_store=job_store)
+    if ingest['df'].empty:
+        return None
+    match = get_match(ingest, refresh=refresh, memory_profile=memory_profile)
+    ingest = window_ingest(ingest, period)
+    if ingest['df'].empty:
+        return None
+    return build_aggregates(config, ingest, match, store_file, job_store)
+
+def record_snapshot(aggregates, snapshot_file, snapshot_date, spec=None, compare_to=None, save=True):
+    """
+    Store the rollups of a build as the snapshot of a date and compare them with an earlier one
+
+    Sets aggregates['changes'] to {'diff', 'baseline', 'current'} for the report generators, or
+    None when there is no earlier snapshot of the period.
+
+    Args:
+        aggregates: Render inputs (read_aggregate_store() layout)
+        snapshot_file: Snapshot store file
+        snapshot_date: Date to store the snapshot under ('YYYY-MM-DD')
+        spec: Report period spec (None = all jobs)
+        compare_to: Snapshot date to compare with (default: the latest one before snapshot_date)
+        save: Store the snapshot; False only compares (scoped renders and data-only runs)
+    """
+    period = spec or PERIOD_ALL
+    with stage('snapshot'):
+        rollup = build_rollup(aggregates)
+        if save:
+            write_snapshot(snapshot_file, rollup, snapshot_date, period, aggregates['date_range_info'])
+        baseline = compare_to or previous_snapshot_date(snapshot_file, snapshot_date, period)
+        aggregates['changes'] = None
+        if save and baseline == snapshot_date:
+            # The snapshot just stored is this run itself
+            print(f"⚠ --compare-to {baseline} is this run's own snapshot date; reports will not show changes")
+            baseline = None
+        if baseline is not None:
+            try:
+                previous = read_snapshot(snapshot_file, baseline, period)
+            except ValueError as e:
+                print(f"⚠ {e}; reports will not show changes")
+                previous = None
+            if previous is not None:
+                aggregates['changes'] = {
+                    'diff': diff_snapshots(rollup, previous),
+                    'baseline': baseline,
+                    'current': snapshot_date
+                }
+    saved = f"saved to {snapshot_file}" if save else "not saved (scoped or data-only run)"
+    if aggregates['changes'] is None:
+        print(f"✓ Snapshot {snapshot_date} ({period}) {saved}; no earlier snapshot to compare with")
+    else:
+        changed = (aggregates['changes']['diff']['Status'] != 'unchanged').sum()
+        print(f"✓ Snapshot {snapshot_date} ({period}) {saved}; {changed} entities changed since {baseline}")
+
+def export_stats(aggregates, output_directory, internal=False):
+    """
+    Write every statistics level and the matching analysis to CSV in the output directory
+
+    The substitute (EISID) tables are only exported with internal=True.
+    """
+    export_dir = os.path.join(output_directory, DATA_EXPORT_DIR)
+    with stage('export'):
+        tables = {name: aggregates[name] for name in STATS_LEVELS}
+        tables['matching_stats'] = aggregates['matching_stats']
+        tables['time_series'] = aggregates['time_series']
+        tables['heatmaps'] = aggregates['heatmaps']
+        tables['school_ranks'] = aggregates['school_ranks']
+        tables['anomalies'] = aggregates['anomalies']
+        if internal:
+            tables['substitutes'] = aggregates['substitutes']
+            tables['top_substitutes'] = aggregates['top_substitutes']
+        if aggregates.get('changes'):
+            tables['snapshot_diff'] = aggregates['changes']['diff']
+        export_files = export_stats_tables(tables, export_dir)
+    print(f"✓ Exported {len(export_files)} tables to {export_dir}/")
+    return export_files
+
+def _closest_names(value, candidates):
+    """Format close matches for a mistyped superintendent, borough or school name"""
+    suggestions = difflib.get_close_matches(value, [str(c) for c in candidates], n=3, cutoff=0.5)
+    return f" Did you mean: {', '.join(suggestions)}?" if suggestions else ""
+
+def resolve_render_scope(df, superintendents=None, boroughs=None, schools=None):
+    """
+    Work out which pages a scoped render has to touch
+
+    A school touches its own page, its superintendent's page, its borough page and the index.
+    A superintendent touches their page (and all their school pages), their boroughs and the index.
+    A borough touches its page and the index.
+
+    Args:
+        df: Main dataframe with Superintendent_Name, Borough and Location columns
+        superintendents, boroughs, schools: Lists of names/locations requested on the command line
+
+    Returns:
+        dict: superintendents (list), boroughs (list), school_filter ({superintendent: set of locations}
+              for superintendents rendered only for specific schools) and index (bool); None if a name is unknown
+    """
+    scope = {'superintendents': set(), 'boroughs': set(), 'school_filter': {}, 'index': True}
+    known_superintendents = set(df['Superintendent_Name'].unique()) - {'Unknown'}
+    known_boroughs = set(df['Borough'].unique()) - {'Unknown'}
+    known_schools = set(df['Location'].unique())
+
+    for superintendent in superintendents or []:
+        if superintendent not in known_superintendents:
+            print(f"✗ Unknown superintendent '{superintendent}'.{_closest_names(superintendent, known_superintendents)}")
+            return None
+        scope['superintendents'].add(superintendent)
+        scope['boroughs'].update(df.loc[df['Superintendent_Name'] == superintendent, 'Borough'].unique())
+
+    for borough in boroughs or []:
+        if borough not in known_boroughs:
+            print(f"✗ Unknown borough '{borough}'.{_closest_names(borough, known_boroughs)}")
+            return None
+        scope['boroughs'].add(borough)
+
+    for school in schools or []:
+        if school not in known_schools:
+            print(f"✗ Unknown school '{school}'.{_closest_names(school, known_schools)}")
+            return None
+        school_rows = df.loc[df['Location'] == school, ['Superintendent_Name', 'Borough']].drop_duplicates()
+        for superintendent, borough in school_rows.itertuples(index=False):
+            if superintendent != 'Unknown':
+                scope['superintendents'].add(superintendent)
+                # A superintendent requested in full keeps rendering every school page
+                if superintendent not in (superintendents or []):
+                    scope['school_filter'].setdefault(superintendent, set()).add(school)
+            scope['boroughs'].add(borough)
+
+    scope['boroughs'].discard('Unknown')
+    scope['superintendents'] = sorted(scope['superintendents'])
+    scope['boroughs'] = sorted(scope['boroughs'])
+    return scope
+
+def render_reports(aggregates, output_directory, force_regenerate=False, school_page_mode='static',
+                   compress_bundle=False, scope=None, internal=False, chart_backend='plotly', chart_cache=True,
+                   chart_embed='iframe'):
+    """
+    Render the superintendent, borough and overall summary pages
+
+    Args:
+        aggregates: Render inputs from the aggregate store (see read_aggregate_store); 'df' is the
+                    job count cube, which the report generators use in place of the raw job data
+        output_directory: Root of the generated report tree
+        force_regenerate: Overwrite existing pages (scoped pages are always regenerated)
+        school_page_mode: 'static' or 'client' school pages
+        compress_bundle: Gzip client-mode school bundles
+        scope: Optional result of resolve_render_scope(); None renders everything
+        internal: Include the internal-only substitute (EISID) sections
+        chart_backend: Bar and pie chart backend, 'plotly' or 'svg' (see chart_utils.set_chart_backend)
+        chart_cache: Reuse chart files drawn from identical data (see chart_cache.py)
+        chart_embed: 'iframe' or 'lazy' (figure JSON drawn on scroll, see chart_utils.set_chart_embed)
+
+    Returns:
+        dict: Lists of superintendent, borough and school report files plus the index file
+    """
+    # Report rendering pulls in the HTML templates and chart code, so import it only when rendering
+    from report_generators import create_borough_report, create_overall_summary, create_superintendent_report
+    from chart_utils import write_shared_plotly_js, set_chart_backend, set_chart_embed
+    from templates import set_build_time
+
+    # Every page shows the same build time
+    set_build_time()
+    set_chart_backend(chart_backend)
+    configure_chart_cache(DEFAULT_CHART_CACHE_DIR if chart_cache else None)
+
+    df = aggregates['df']
+    date_range_info = aggregates['date_range_info']
+    matching_stats = aggregates['matching_stats']
+    citywide_stats = aggregates['citywide_stats']
+    borough_stats = aggregates['borough_stats']
+    superintendent_stats = aggregates['superintendent_stats']
+    school_stats = aggregates['school_stats']
+    trends = group_time_series(aggregates.get('time_series'))
+    heatmaps = group_heatmaps(aggregates.get('heatmaps'))
+    changes = aggregates.get('changes')
+    rankings = group_rankings(aggregates.get('school_ranks'))
+    anomalies = aggregates.get('anomalies')
+    top_substitutes = aggregates.get('top_substitutes') if internal else None
+
+    # For backward compatibility, keep summary_stats as superintendent level
+    summary_stats = superintendent_stats
+
+    # Scoped pages are always regenerated; everything else follows --force
+    if scope is not None:
+        force_regenerate = True
+
+    # Create output directory and copy logo for deployment
+    os.makedirs(output_directory, exist_ok=True)
+    copy_logo_to_output(output_directory)
+
+    # Write the shared school page shell once per build in client mode
+    if school_page_mode == 'client':
+        shell_file = write_school_page_shell(output_directory, school_bundle_filename(compress_bundle))
+        print(f"✓ School page shell written to {shell_file}")
+
+    # Trend charts and lazy chart embeds share one copy of the Plotly bundle at the root of the report tree
+    plotly_js_file = None
+    if trends or chart_embed == 'lazy':
+        plotly_js_file = write_shared_plotly_js(output_directory)
+    set_chart_embed(chart_embed, plotly_js_file)
+
+    # Create reports for each Superintendent
+    if scope is None:
         superintendents = sorted([s for s in df['Superintendent_Name'].unique() if s != 'Unknown'])
-        print(f"Generating superintendent reports ({len(superintendents)} superintendents)...")
-        report_files = []
-        all_school_reports = []
-        
+    else:
+        superintendents = scope['superintendents']
+    print(f"Generating superintendent reports ({len(superintendents)} superintendents)...")
+    report_files = []
+    all_school_reports = []
+
+    with stage('superintendent reports'):
         for superintendent in superintendents:
             superintendent_data = summary_stats[summary_stats['Superintendent_Name'] == superintendent].copy()
             if len(superintendent_data) > 0:
                 # Check if superintendent has schools in main dataframe
-                superintendent_schools = df[df['Superintendent_Name'] == superintendent]
-                if superintendent_schools.empty:
+                if not (df['Superintendent_Name'] == superintendent).any():
                     print(f"⚠ Superintendent {superintendent}: no schools found, skipping...")
                     continue
-                
+
                 # Check if report already exists (unless force regeneration)
-                safe_superintendent_name = superintendent.replace(" ", "_").replace(",", "").replace(".", "")
-                expected_report_file = os.path.join(output_directory, f"Superintendent_{safe_superintendent_name}", f"{safe_superintendent_name}_report.html")
+                expected_report_file = os.path.join(output_directory,
+                                                    report_page_path('superintendent', clean_superintendent_name(superintendent)))
                 if not force_regenerate and os.path.exists(expected_report_file):
                     print(f"⚠ Superintendent {superintendent}: report already exists, skipping...")
                     report_files.append(expected_report_file)
                     continue
-                
-                print(f"✓ Generating report for Superintendent {superintendent}...")
-                result = create_superintendent_report(
-                    superintendent, superintendent_data, df, output_directory, superintendent_stats, date_range_info, matching_stats, school_stats
-                )
+
+                school_filter = scope['school_filter'].get(superintendent) if scope is not None else None
+                if school_filter is not None:
+                    print(f"✓ Generating report for Superintendent {superintendent} (schools: {', '.join(sorted(school_filter))})...")
+                else:
+                    print(f"✓ Generating report for Superintendent {superintendent}...")
+                with entity_timer('superintendent', superintendent):
+                    result = create_superintendent_report(
+                        superintendent, superintendent_data, df, output_directory, superintendent_stats, date_range_info, matching_stats, school_stats,
+                        school_page_mode=school_page_mode, compress_bundle=compress_bundle, school_filter=school_filter,
+                        trends=trends, heatmaps=heatmaps, changes=changes, rankings=rankings,
+                        anomalies=anomalies, top_substitutes=top_substitutes
+                    )
                 if result is not None:
                     report_file, school_reports = result
                     report_files.append(report_file)
                     all_school_reports.extend(school_reports)
-        
-        # Create reports for each borough
-        boroughs = sorted(df['Borough'].unique())
-        print(f"Generating borough reports ({len(boroughs)} boroughs)...")
-        borough_report_files = []
 
+    # Create reports for each borough
+    boroughs = sorted(df['Borough'].unique()) if scope is None else scope['boroughs']
+    print(f"Generating borough reports ({len(boroughs)} boroughs)...")
+    borough_report_files = []
+
+    with stage('borough reports'):
         for borough in boroughs:
             if borough != 'Unknown':  # Skip if no valid borough found
                 borough_data = borough_stats[borough_stats['Borough'] == borough].copy()
                 if len(borough_data) > 0:
                     # Check if report already exists (unless force regeneration)
-                    borough_name_clean = borough.replace(" ", "_").replace("/", "_")
-                    expected_report_file = os.path.join(output_directory, f"Borough_{borough_name_clean}", f"{borough_name_clean}_report.html")
+                    expected_report_file = os.path.join(output_directory, report_page_path('borough', clean_borough_name(borough)))
                     if not force_regenerate and os.path.exists(expected_report_file):
                         print(f"⚠ Borough {borough}: report already exists, skipping...")
                         borough_report_files.append(expected_report_file)
                         continue
-                    
+
                     print(f"✓ Generating report for Borough {borough}...")
-                    report_file = create_borough_report(
-                        borough, borough_data, df, output_directory, superintendent_stats, date_range_info, matching_stats
-                    )
+                    with entity_timer('borough', borough):
+                        report_file = create_borough_report(
+                            borough, borough_data, df, output_directory, superintendent_stats, date_range_info, matching_stats,
+                            trends=trends, top_substitutes=top_substitutes
+                        )
                     borough_report_files.append(report_file)
-        
-        # Create overall summary
-        expected_index_file = os.path.join(output_directory, 'index.html')
-        if not force_regenerate and os.path.exists(expected_index_file):
-            print("⚠ Overall summary (index.html): report already exists, skipping...")
-            index_file = expected_index_file
-        else:
-            print("✓ Generating overall summary (index.html)...")
-            index_file = create_overall_summary(df, citywide_stats, borough_stats, output_directory, date_range_info, matching_stats, superintendent_stats)
-        
-        print("✓ Reports generated successfully!")
-        print(f"  • Main report: {index_file}")
-        print(f"  • District reports: {len(report_files)} files")
-        print(f"  • Borough reports: {len(borough_report_files)} files")
+
+    # Create overall summary
+    expected_index_file = os.path.join(output_directory, 'index.html')
+    if not force_regenerate and os.path.exists(expected_index_file):
+        print("⚠ Overall summary (index.html): report already exists, skipping...")
+        index_file = expected_index_file
+    else:
+        print("✓ Generating overall summary (index.html)...")
+        with stage('index'), entity_timer('index', 'index.html'):
+            index_file = create_overall_summary(df, citywide_stats, borough_stats, output_directory, date_range_info, matching_stats, superintendent_stats,
+                                                trends=trends, changes=changes, anomalies=anomalies, top_substitutes=top_substitutes)
+
+    # Search index behind the search box in every page header
+    with stage('search index'):
+        search_file, search_entries = write_search_index(
+            output_directory, school_stats, superintendent_stats, borough_stats, df,
+            aggregates.get('school_directory'), school_page_mode
+        )
+    print(f"✓ Search index: {search_entries} pages in {search_file} ({os.path.getsize(search_file) / 1024:.0f} KB)")
+
+    print("✓ Reports generated successfully!")
+    print(f"  • Main report: {index_file}")
+    print(f"  • District reports: {len(report_files)} files")
+    print(f"  • Borough reports: {len(borough_report_files)} files")
+    if school_page_mode == 'client':
+        print(f"  • School data bundles: {len(all_school_reports)} files (rendered by {SCHOOL_SHELL_FILENAME})")
+    else:
         print(f"  • School reports: {len(all_school_reports)} files")
-        print(f"  • Open '{index_file}' to view the dashboard")
-        
-        elapsed = time.time() - start_time
-        print(f"⏱ Completed in {elapsed:.1f} seconds")
-        
+    if chart_cache:
+        counts = get_chart_cache_counts()
+        pruned = prune_chart_cache()
+        print(f"  • Charts: {counts['reused']} reused from {DEFAULT_CHART_CACHE_DIR}/, {counts['built']} built"
+              + (f", {pruned} stale cache entries removed" if pruned else ""))
+    print(f"  • Open '{index_file}' to view the dashboard")
+
+    return {
+        'superintendent_reports': report_files,
+        'borough_reports': borough_report_files,
+        'school_reports': all_school_reports,
+        'index': index_file
+    }
+
+def finish_build(start_time, profile_build=False, memory_profile=False):
+    """
+    Print the elapsed time and stage summary, and write any requested profiling reports
+
+    Args:
+        start_time: time.time() at the start of the build
+        profile_build: Whether --profile was given (cProfile dump + JSON timing report)
+        memory_profile: Whether --memory-profile was given (per-stage memory table)
+    """
+    elapsed = time.time() - start_time
+    print(f"⏱ Completed in {elapsed:.1f} seconds")
+    print_stage_summary(elapsed)
+
+    if profile_build:
+        pstats_file = stop_profiler(os.path.join(PROFILE_OUTPUT_DIR, 'build_profile.pstats'))
+        timing_file = write_timing_report(os.path.join(PROFILE_OUTPUT_DIR, 'build_timings.json'), elapsed)
+        print(f"🔬 Profile written to {pstats_file} (view with: python -m pstats {pstats_file})")
+        print(f"🔬 Timing report written to {timing_file}")
+
+    if memory_profile:
+        print_memory_summary()
+        memory_file = write_memory_report(os.path.join(PROFILE_OUTPUT_DIR, 'memory_profile.txt'))
+        stop_memory_tracking()
+        print(f"🧠 Memory report written to {memory_file}")
+
+def _period_arg(value):
+    """argparse type for --period"""
+    try:
+        return parse_period(value)
+    except ValueError as e:
+        raise argparse.ArgumentTypeError(str(e))
+
+def _date_arg(value):
+    """argparse type for snapshot dates"""
+    try:
+        return pd.Timestamp(value).strftime('%Y-%m-%d')
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"invalid date '{value}' (expected YYYY-MM-DD)")
+
+def _add_build_options(parser, suppress_defaults=False):
+    """
+    Add the options shared by the full build and every subcommand
+
+    Subcommand parsers use SUPPRESS defaults so an option given before the subcommand
+    (e.g. `-f render`) is not reset by the subcommand's own default.
+    """
+    default = (lambda value: argparse.SUPPRESS) if suppress_defaults else (lambda value: value)
+    parser.add_argument('-f', '--force', action='store_true', default=default(False),
+                        help='Regenerate every page, and re-run cached stages')
+    parser.add_argument('--data-dir', default=default(None),
+                        help='Directory containing the SubCentral/SREPP CSVs and the 8.8.25 mapping CSV')
+    parser.add_argument('--config', default=default(None),
+                        help='JSON config file with data_dir, csv_files and output_directory')
+    parser.add_argument('--output-dir', default=default(None), help=f'Report output directory (default: {DEFAULT_OUTPUT_DIRECTORY})')
+    parser.add_argument('--store', default=default(DEFAULT_STORE_FILE),
+                        help=f'Aggregate store written by stats and read by render (default: {DEFAULT_STORE_FILE})')
+    parser.add_argument('--stream', action='store_true', default=default(False),
+                        help='Fold the SubCentral CSVs into a job count cube chunk by chunk instead of loading them whole')
+    parser.add_argument('--chunksize', type=int, default=default(None),
+                        help=f'Rows per chunk with --stream (default: {DEFAULT_CHUNKSIZE:,})')
+    parser.add_argument('--job-store', nargs='?', const=DEFAULT_JOB_STORE_FILE, default=default(None), metavar='PATH',
+                        help=f'Keep an indexed SQLite copy of the job rows (default path: {DEFAULT_JOB_STORE_FILE}) '
+                             'and aggregate statistics from it')
+    parser.add_argument('--client-schools', action='store_true', default=default(False),
+                        help='One shared school page shell plus one JSON bundle per superintendent')
+    parser.add_argument('--gzip-bundles', action='store_true', default=default(False),
+                        help='Gzip the client-mode school bundles')
+    parser.add_argument('--compress', action='store_true', default=default(False),
+                        help='Write .gz/.br siblings for the static host after rendering')
+    parser.add_argument('--profile', action='store_true', default=default(False),
+                        help=f'Write a cProfile dump and JSON timing report to {PROFILE_OUTPUT_DIR}/')
+    parser.add_argument('--memory-profile', action='store_true', default=default(False),
+                        help=f'Record per-stage memory high-water marks to {PROFILE_OUTPUT_DIR}/')
+    parser.add_argument('--data-only', action='store_true', default=default(False),
+                        help='Stop after statistics and export them as CSV (no HTML, no Plotly)')
+    parser.add_argument('--period', action='append', type=_period_arg, default=default(None), metavar='SPEC',
+                        help='Report period: all, lastNd (e.g. last30d), semester or START:END dates; repeatable, '
+                             'one report tree per period')
+    parser.add_argument('--snapshot-file', default=default(DEFAULT_SNAPSHOT_FILE),
+                        help=f'Dated rollup snapshots, compared between runs (default: {DEFAULT_SNAPSHOT_FILE}); '
+                             'only full-scope builds record one, replacing any earlier one of the same date and period')
+    parser.add_argument('--snapshot-date', type=_date_arg, default=default(None), metavar='DATE',
+                        help="Date to store this run's snapshot under (default: today); scoped renders and "
+                             "--data-only/stats runs only compare")
+    parser.add_argument('--compare-to', type=_date_arg, default=default(None), metavar='DATE',
+                        help='Snapshot date to compare with (default: the latest earlier snapshot)')
+    parser.add_argument('--internal', action='store_true', default=default(False),
+                        help='Include the internal-only substitute (EISID) sections and CSV exports')
+    parser.add_argument('--chart-backend', choices=CHART_BACKENDS, default=default('plotly'),
+                        help='Bar and pie charts as interactive Plotly chart files or static SVG inlined in the '
+                             'pages, without JavaScript (default: plotly)')
+    parser.add_argument('--chart-embed', choices=CHART_EMBEDS, default=default('iframe'),
+                        help='Embed charts as iframes, or lazily: figure JSON drawn when it scrolls into view '
+                             '(needs an HTTP server, e.g. the Netlify deploy; default: iframe)')
+    parser.add_argument('--no-chart-cache', dest='chart_cache', action='store_false', default=default(True),
+                        help=f'Build every chart instead of reusing identical charts from {DEFAULT_CHART_CACHE_DIR}/')
+
+def build_parser():
+    """Build the command line parser: a full build by default, or one of the stage subcommands"""
+    parser = argparse.ArgumentParser(description='NYC DOE Paraprofessional Fill Rate Reports')
+    _add_build_options(parser)
+    subparsers = parser.add_subparsers(dest='command', metavar='{ingest,match,stats,render}')
+
+    for name, help_text in [
+        ('ingest', 'Load the CSVs and superintendent mapping into the build cache'),
+        ('match', 'Run the SubCentral vs payroll matching analysis'),
+        ('stats', 'Compute statistics for every level and export them as CSV'),
+    ]:
+        _add_build_options(subparsers.add_parser(name, help=help_text), suppress_defaults=True)
+
+    render_parser = subparsers.add_parser('render', help='Render report pages (optionally only some of them)')
+    _add_build_options(render_parser, suppress_defaults=True)
+    render_parser.add_argument('--superintendent', action='append', metavar='NAME',
+                               help='Only render this superintendent (plus their boroughs and the index); repeatable')
+    render_parser.add_argument('--borough', action='append', metavar='NAME',
+                               help='Only render this borough (plus the index); repeatable')
+    render_parser.add_argument('--school', action='append', metavar='LOC',
+                               help='Only render this school (plus its superintendent, borough and the index); repeatable')
+    return parser
+
+def main(argv=None):
+    """
+    Main function to generate static reports
+
+    Args:
+        argv: Command line arguments (defaults to sys.argv[1:])
+
+    Returns:
+        int: Process exit code
+    """
+    args = build_parser().parse_args(sys.argv[1:] if argv is None else argv)
+    command = args.command or 'build'
+    config = load_build_config(args.config, args.data_dir, args.output_dir, args.stream, args.chunksize)
+    output_directory = config['output_directory']
+
+    # Check for force regeneration flag
+    force_regenerate = args.force
+    if force_regenerate:
+        print("🔄 Force regeneration mode: will overwrite existing reports")
+    elif command in ('build', 'render'):
+        print("📋 Incremental mode: will skip existing reports (use --force or -f to regenerate all)")
+
+    # Check for client-side school page mode (one shared shell + one JSON bundle per superintendent)
+    school_page_mode = 'client' if args.client_schools else 'static'
+    compress_bundle = args.gzip_bundles
+    if school_page_mode == 'client':
+        print("🧩 Client-rendered school pages: writing one data bundle per superintendent")
+    if args.chart_backend == 'svg':
+        print("🖼 SVG charts: bar and pie charts are inlined in the pages as static SVG without Plotly")
+
+    # Check for profiling mode (cProfile dump + JSON timing report)
+    if args.profile:
+        print(f"🔬 Profiling enabled: results will be written to {PROFILE_OUTPUT_DIR}/")
+        start_profiler()
+
+    # Check for memory profiling mode (tracemalloc peak + RSS per stage, largest live DataFrames)
+    if args.memory_profile:
+        print(f"🧠 Memory profiling enabled: results will be written to {PROFILE_OUTPUT_DIR}/ (expect a slower build)")
+        start_memory_tracking()
+
+    # Check for data-only mode (load, match and compute stats, export CSVs; no HTML or Plotly)
+    data_only = args.data_only or command == 'stats'
+    if data_only:
+        print(f"📊 Data-only mode: exporting statistics to {os.path.join(output_directory, DATA_EXPORT_DIR)}/, no reports")
+
+    # Check for streaming ingest (chunked read folded into a job count cube)
+    job_store = args.job_store
+    if config['stream']:
+        print(f"🌊 Streaming ingest: SubCentral files are read in chunks of {config['chunksize']:,} rows")
+        if job_store:
+            print("⚠ --job-store needs the individual job rows and is ignored with --stream")
+            job_store = None
+
+    # Check for period reports (stats and render repeated per Job Start window; None = all jobs)
+    periods = list(dict.fromkeys(args.period)) if args.period else [None]
+    if args.period:
+        if config['stream']:
+            print("✗ Error: --period slices the job rows by Job Start and cannot be used with --stream")
+            return 1
+        print(f"📅 Period reports: {', '.join(periods)} (one report tree each)")
+
+    start_time = time.time()
+    print("🚀 NYC DOE Paraprofessional Fill Rate Analysis")
+    print("=" * 50)
+
+    try:
+        # (period spec, render inputs) for every requested period
+        period_aggregates = []
+        if command == 'render':
+            # Render only needs the aggregate store; raw data is loaded only if the store is missing or stale
+            for spec in periods:
+                aggregates = load_render_aggregates(config, period_store_file(args.store, spec), refresh=force_regenerate,
+                                                    memory_profile=args.memory_profile, job_store=job_store, period=spec)
+                if aggregates is None:
+                    print("✗ Error: No main data loaded. Check your CSV files.")
+                    return 1
+                period_aggregates.append((spec, aggregates))
+        else:
+            # A full build always starts from the raw CSVs; subcommands reuse earlier stages from the cache
+            full_build = command == 'build'
+            ingest = get_ingest(config, refresh=full_build or command == 'ingest' or force_regenerate,
+                                job_store=job_store)
+
+            # Continue with main data processing
+            if ingest['df'].empty:
+                print("✗ Error: No main data loaded. Check your CSV files.")
+                return 1
+            if command == 'ingest':
+                finish_build(start_time, args.profile, args.memory_profile)
+                return 0
+
+            match = get_match(ingest, refresh=full_build or command == 'match' or force_regenerate,
+                              memory_profile=args.memory_profile)
+            if command == 'match':
+                finish_build(start_time, args.profile, args.memory_profile)
+                return 0
+
+            # Ingest and matching are shared; only the statistics are repeated per period window
+            for spec in periods:
+                period_ingest = window_ingest(ingest, spec)
+                if period_ingest['df'].empty:
+                    print(f"⚠ Period {spec}: no jobs in this window, skipping...")
+                    continue
+                aggregates = get_aggregates(config, period_ingest, match, period_store_file(args.store, spec),
+                                            refresh=full_build or command == 'stats' or force_regenerate,
+                                            job_store=job_store)
+                period_aggregates.append((spec, aggregates))
+                del period_ingest
+            # Rendering works from the aggregates, so the raw job rows can be released now
+            del ingest, match
+
+        snapshot_date = args.snapshot_date or time.strftime('%Y-%m-%d')
+        for spec, aggregates in period_aggregates:
+            period_directory = period_output_dir(output_directory, spec)
+            if spec is not None:
+                print(f"📅 Period {spec}: {period_directory}/")
+
+            scope = None
+            scoped_options = [getattr(args, name, None) for name in ('superintendent', 'borough', 'school')]
+            if any(scoped_options) and not data_only:
+                scope = resolve_render_scope(aggregates['df'], *scoped_options)
+                if scope is None:
+                    return 1
+                print(f"🎯 Scoped render: {len(scope['superintendents'])} superintendent(s), "
+                      f"{len(scope['boroughs'])} borough(s) and the overall summary")
+
+            # Only full-scope builds record a snapshot; the others only compare with the stored ones
+            record_snapshot(aggregates, args.snapshot_file, snapshot_date, spec, args.compare_to,
+                            save=not data_only and scope is None)
+
+            if data_only:
+                export_stats(aggregates, period_directory, internal=args.internal)
+                continue
+
+            render_reports(
+                aggregates, period_directory, force_regenerate=force_regenerate,
+                school_page_mode=school_page_mode, compress_bundle=compress_bundle, scope=scope,
+                internal=args.internal, chart_backend=args.chart_backend, chart_cache=args.chart_cache,
+                chart_embed=args.chart_embed
+            )
+
+        if data_only:
+            finish_build(start_time, args.profile, args.memory_profile)
+            return 0
+
+        # Optional post-build stage: pre-compress artifacts so they can be served directly
+        if args.compress:
+            print("Pre-compressing build artifacts...")
+            with stage('compression'):
+                compress_output_tree(output_directory, force=force_regenerate)
+
+        finish_build(start_time, args.profile, args.memory_profile)
+        return 0
+
     except FileNotFoundError as e:
-        print(f"Error: Could not find one or more CSV files: {csv_files}")
+        print(f"Error: Could not find one or more CSV files: {config['csv_files']}")
         print("Please make sure all files exist in the specified paths.")
         print(f"Details: {str(e)}")
+        return 1
     except Exception as e:
         print(f"Error: {str(e)}")
         import traceback
         traceback.print_exc()
+        return 1
 
 if __name__ == "__main__":
-    main()
+    sys.exit(main())
@@ -0,0 +1,122 @@
+"""
+Report periods for NYC DOE Reports
+
+A period is a Job Start window that the whole report tree can be rendered for, e.g. the last
+30 days or the current semester. Ingest and payroll matching run once over all jobs; each period
+then slices the sorted job rows (data_processing.slice_job_window) and repeats only the
+statistics and render stages, writing its own aggregate store and report tree.
+
+Period specs (--period, repeatable):
+    all                      Every job (the regular report tree)
+    last30d                  The last N days up to the latest job date (any N)
+    semester                 The semester of the latest job date (fall: Sep-Jan, spring: Feb-Aug)
+    2025-02-01:2025-03-31    An explicit date range, inclusive; either side may be left empty
+"""
+
+import os
+import re
+import pandas as pd
+
+PERIOD_ALL = 'all'
+PERIOD_SEMESTER = 'semester'
+# Report trees of periods other than 'all' go under {output_directory}/periods/{name}/
+PERIODS_DIR = 'periods'
+
+_LAST_DAYS_PATTERN = re.compile(r'^last(\d+)d?$')
+_RANGE_PATTERN = re.compile(r'^(\d{4}-\d{2}-\d{2})?:(\d{4}-\d{2}-\d{2})?$')
+
+
+def parse_period(spec):
+    """
+    Validate a period spec (for argparse)
+
+    Returns:
+        str: The normalized spec
+
+    Raises:
+        ValueError: If the spec is not one of the forms listed in the module docstring
+    """
+    spec = spec.strip().lower()
+    if spec in (PERIOD_ALL, PERIOD_SEMESTER):
+        return spec
+    match = _LAST_DAYS_PATTERN.match(spec)
+    if match:
+        if int(match.group(1)) < 1:
+            raise ValueError("a last-N-days period needs at least one day")
+        return f"last{int(match.group(1))}d"
+    match = _RANGE_PATTERN.match(spec)
+    if match and (match.group(1) or match.group(2)):
+        start, end = (pd.Timestamp(value) if value else None for value in match.groups())
+        if start is not None and end is not None and start > end:
+            raise ValueError(f"period '{spec}' ends before it starts")
+        return spec
+    raise ValueError(f"unknown period '{spec}' (expected all, lastNd, semester or START:END)")
+
+
+def period_name(spec):
+    """Directory and store file name of a period spec (the spec itself, with ':' spelled out)"""
+    return spec.replace(':', '_to_').strip('_')
+
+
+def _semester_bounds(date):
+    """First and last day of the semester containing a date"""
+    if date.month >= 9:
+        return pd.Timestamp(date.year, 9, 1), pd.Timestamp(date.year + 1, 1, 31), f"Fall {date.year}"
+    if date.month == 1:
+        return pd.Timestamp(date.year - 1, 9, 1), pd.Timestamp(date.year, 1, 31), f"Fall {date.year - 1}"
+    return pd.Timestamp(date.year, 2, 1), pd.Timestamp(date.year, 8, 31), f"Spring {date.year}"
+
+
+def resolve_period(spec, latest_date):
+    """
+    Turn a period spec into concrete dates
+
+    Relative periods (lastNd, semester) count back from the latest job date in the data rather
+    than from today, so re-running an older export gives the same windows.
+
+    Args:
+        spec: Spec returned by parse_period()
+        latest_date: Latest Job Start in the data (Timestamp, or None/NaT if there are no dates)
+
+    Returns:
+        dict: name (used for the output directory and store file), label (shown in the report
+              headers), start and end (inclusive Timestamps, None for an open side)
+    """
+    latest = None if latest_date is None or pd.isna(latest_date) else pd.Timestamp(latest_date).normalize()
+    if spec == PERIOD_ALL:
+        return {'name': PERIOD_ALL, 'label': 'All jobs', 'start': None, 'end': None}
+
+    match = _LAST_DAYS_PATTERN.match(spec)
+    if match:
+        days = int(match.group(1))
+        start = None if latest is None else latest - pd.Timedelta(days=days - 1)
+        return {'name': period_name(spec), 'label': f"Last {days} days", 'start': start, 'end': latest}
+
+    if spec == PERIOD_SEMESTER:
+        if latest is None:
+            return {'name': period_name(spec), 'label': 'Semester', 'start': None, 'end': None}
+        start, end, label = _semester_bounds(latest)
+        return {'name': period_name(spec), 'label': f"{label} semester", 'start': start, 'end': end}
+
+    start, end = (pd.Timestamp(value) if value else None for value in spec.split(':'))
+    label = ' to '.join(value.strftime('%B %d, %Y') for value in (start, end) if value is not None)
+    if start is None:
+        label = f"Through {label}"
+    elif end is None:
+        label = f"From {label}"
+    return {'name': period_name(spec), 'label': label, 'start': start, 'end': end}
+
+
+def period_output_dir(output_directory, spec):
+    """Report tree of a period: the output directory itself for 'all' (or None), otherwise periods/{name}/ inside it"""
+    if spec is None or spec == PERIOD_ALL:
+        return output_directory
+    return os.path.join(output_directory, PERIODS_DIR, period_name(spec))
+
+
+def period_store_file(store_file, spec):
+    """Aggregate store of a period: the regular store for 'all' (or None), otherwise {store}_{name}.sqlite"""
+    if spec is None or spec == PERIOD_ALL:
+        return store_file
+    root, ext = os.path.splitext(store_file)
+    return f"{root}_{period_name(spec)}{ext}"
@@ -0,0 +1,354 @@
+"""
+Build instrumentation for NYC DOE Reports
+
+Provides context-manager timers for the pipeline stages, per-entity render timings
+(superintendent, borough and school pages) and an optional cProfile/pstats dump plus a
+JSON timing report so slow nightly builds can be traced to the stage that regressed.
+
+With memory tracking enabled, each stage also records its tracemalloc high-water mark,
+RSS before/after and the largest DataFrames still alive when a top-level stage ends.
+"""
+
+import os
+import gc
+import sys
+import json
+import time
+import cProfile
+import functools
+import tracemalloc
+from contextlib import contextmanager
+
+try:
+    import psutil
+except ImportError:
+    psutil = None
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+# Stage name -> {'seconds': float, 'calls': int}, in first-seen order
+_stage_timings = {}
+# List of (kind, name, seconds) tuples for individual rendered pages
+_entity_timings = []
+_profiler = None
+
+# Stage name -> memory stats (only populated while memory tracking is enabled)
+_stage_memory = {}
+# Per-stage peak bookkeeping for nested stages: list of dicts with 'peak' and 'start'
+_memory_stack = []
+_memory_tracking = False
+MB = 1024 * 1024
+
+
+def reset_timings():
+    """Clear all recorded stage, entity and memory timings"""
+    _stage_timings.clear()
+    _entity_timings.clear()
+    _stage_memory.clear()
+    _memory_stack.clear()
+
+
+@contextmanager
+def stage(name):
+    """
+    Time a pipeline stage. Re-entering a stage with the same name accumulates its time,
+    so nested stages (e.g. chart generation inside report rendering) report totals.
+    """
+    if _memory_tracking:
+        _enter_memory_stage()
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        elapsed = time.perf_counter() - start
+        entry = _stage_timings.setdefault(name, {'seconds': 0.0, 'calls': 0})
+        entry['seconds'] += elapsed
+        entry['calls'] += 1
+        if _memory_tracking:
+            _exit_memory_stage(name)
+
+
+def timed_stage(name):
+    """Decorator form of stage() for functions that are always part of one stage"""
+    def decorator(func):
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            with stage(name):
+                return func(*args, **kwargs)
+        return wrapper
+    return decorator
+
+
+@contextmanager
+def entity_timer(kind, name):
+    """Time the rendering of a single entity page (superintendent, borough, school, index)"""
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        _entity_timings.append((kind, str(name), time.perf_counter() - start))
+
+
+def get_stage_timings():
+    """Return a copy of the accumulated stage timings"""
+    return {name: dict(entry) for name, entry in _stage_timings.items()}
+
+
+def slowest_entities(n=10, kind=None):
+    """
+    Return the N slowest rendered entities
+
+    Args:
+        n: Number of entities to return
+        kind: Optional entity kind filter ('superintendent', 'borough', 'school', 'index')
+
+    Returns:
+        List of (kind, name, seconds) tuples, slowest first
+    """
+    timings = [t for t in _entity_timings if kind is None or t[0] == kind]
+    return sorted(timings, key=lambda t: t[2], reverse=True)[:n]
+
+
+def print_stage_summary(total_seconds=None, top_n=5):
+    """Print a table of stage timings and the slowest rendered pages"""
+    if not _stage_timings:
+        return
+    print("⏱ Stage timings:")
+    for name, entry in _stage_timings.items():
+        share = f" ({entry['seconds'] / total_seconds * 100:.0f}%)" if total_seconds else ""
+        calls = f" x{entry['calls']}" if entry['calls'] > 1 else ""
+        print(f"  • {name:<28} {entry['seconds']:8.2f}s{share}{calls}")
+    slowest = slowest_entities(top_n)
+    if slowest:
+        print(f"  Slowest {len(slowest)} pages:")
+        for kind, name, seconds in slowest:
+            print(f"    {seconds:6.2f}s  {kind}: {name}")
+
+
+def write_timing_report(report_file, total_seconds=None, top_n=25):
+    """
+    Write stage timings, per-kind entity totals and the slowest pages as JSON
+
+    Returns:
+        str: Path of the written report
+    """
+    by_kind = {}
+    for kind, _, seconds in _entity_timings:
+        entry = by_kind.setdefault(kind, {'count': 0, 'seconds': 0.0})
+        entry['count'] += 1
+        entry['seconds'] += seconds
+
+    report = {
+        'generated_at': time.strftime('%Y-%m-%dT%H:%M:%S'),
+        'total_seconds': total_seconds,
+        'stages': get_stage_timings(),
+        'memory': get_stage_memory(),
+        'entities': by_kind,
+        'slowest_entities': [
+            {'kind': kind, 'name': name, 'seconds': round(seconds, 4)}
+            for kind, name, seconds in slowest_entities(top_n)
+        ]
+    }
+
+    os.makedirs(os.path.dirname(report_file) or '.', exist_ok=True)
+    with open(report_file, 'w', encoding='utf-8') as f:
+        json.dump(report, f, indent=2)
+    return report_file
+
+
+def get_rss():
+    """Return the current resident set size in bytes, or None if it cannot be determined"""
+    if psutil is not None:
+        return psutil.Process().memory_info().rss
+    try:
+        with open('/proc/self/statm', 'r') as f:
+            return int(f.read().split()[1]) * os.sysconf('SC_PAGE_SIZE')
+    except (OSError, ValueError, AttributeError):
+        return None
+
+
+def get_max_rss():
+    """Return the process-lifetime peak RSS in bytes, or None if unavailable"""
+    if resource is None:
+        return None
+    max_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss is kilobytes on Linux and bytes on macOS
+    return max_rss if sys.platform == 'darwin' else max_rss * 1024
+
+
+def start_memory_tracking(frames=1):
+    """Start tracemalloc and record memory high-water marks for every stage() from now on"""
+    global _memory_tracking
+    if not tracemalloc.is_tracing():
+        tracemalloc.start(frames)
+    _memory_tracking = True
+
+
+def stop_memory_tracking():
+    """Stop tracemalloc and stage memory recording"""
+    global _memory_tracking
+    _memory_tracking = False
+    if tracemalloc.is_tracing():
+        tracemalloc.stop()
+
+
+def _enter_memory_stage():
+    """Save the enclosing stage's running peak, then measure this stage's peak from zero"""
+    current, peak = tracemalloc.get_traced_memory()
+    if _memory_stack:
+        _memory_stack[-1]['peak'] = max(_memory_stack[-1]['peak'], peak)
+    tracemalloc.reset_peak()
+    _memory_stack.append({'peak': current, 'start': current, 'rss': get_rss()})
+
+
+def _exit_memory_stage(name):
+    """Record this stage's peak/net allocation and propagate its peak to the enclosing stage"""
+    current, peak = tracemalloc.get_traced_memory()
+    frame = _memory_stack.pop()
+    stage_peak = max(frame['peak'], peak)
+    if _memory_stack:
+        _memory_stack[-1]['peak'] = max(_memory_stack[-1]['peak'], stage_peak)
+
+    rss_after = get_rss()
+    entry = _stage_memory.setdefault(name, {
+        'peak_bytes': 0, 'peak_above_start_bytes': 0, 'net_bytes': 0,
+        'rss_before': frame['rss'], 'rss_after': None, 'rss_delta': 0, 'live_dataframes': []
+    })
+    entry['peak_bytes'] = max(entry['peak_bytes'], stage_peak)
+    entry['peak_above_start_bytes'] = max(entry['peak_above_start_bytes'], stage_peak - frame['start'])
+    entry['net_bytes'] += current - frame['start']
+    entry['rss_after'] = rss_after
+    if rss_after is not None and frame['rss'] is not None:
+        entry['rss_delta'] += rss_after - frame['rss']
+
+    # Scanning the heap is slow, so only snapshot DataFrames when a top-level stage ends
+    if not _memory_stack:
+        entry['live_dataframes'] = largest_live_dataframes()
+
+
+def largest_live_dataframes(n=8):
+    """
+    Find the largest DataFrames still alive, named after the variables that hold them
+
+    Names are looked up in the locals of every frame on the current call stack (and one level
+    into dict locals), so frames held by the pipeline's main() are reported as e.g. 'main.df'
+    or "main.stats['school_stats']".
+
+    Returns:
+        List of (name, bytes) tuples, largest first
+    """
+    pandas = sys.modules.get('pandas')
+    if pandas is None:
+        return []
+
+    names = {}
+    frame = sys._getframe(1)
+    while frame is not None:
+        if frame.f_globals.get('__name__') not in (__name__, 'contextlib'):
+            for var_name, value in frame.f_locals.items():
+                if isinstance(value, pandas.DataFrame):
+                    names.setdefault(id(value), f"{frame.f_code.co_name}.{var_name}")
+                elif isinstance(value, dict):
+                    # Stage results are passed around as dicts of frames
+                    for key, item in value.items():
+                        if isinstance(item, pandas.DataFrame):
+                            names.setdefault(id(item), f"{frame.f_code.co_name}.{var_name}[{key!r}]")
+        frame = frame.f_back
+
+    frames = []
+    for obj in gc.get_objects():
+        if isinstance(obj, pandas.DataFrame):
+            try:
+                size = int(obj.memory_usage(index=True, deep=True).sum())
+            except Exception:
+                continue
+            frames.append((names.get(id(obj), f"<unnamed {obj.shape[0]}x{obj.shape[1]}>"), size))
+    return sorted(frames, key=lambda f: f[1], reverse=True)[:n]
+
+
+def get_stage_memory():
+    """Return a copy of the recorded per-stage memory statistics"""
+    return {name: dict(entry) for name, entry in _stage_memory.items()}
+
+
+def _format_mb(value, signed=False):
+    """Format a byte count as megabytes for the memory table"""
+    if value is None:
+        return 'n/a'
+    return f"{value / MB:+.1f}" if signed else f"{value / MB:.1f}"
+
+
+def format_memory_table():
+    """Return the per-stage memory summary as a fixed-width text table"""
+    lines = [
+        f"{'Stage':<28} {'Peak MB':>9} {'Peak+ MB':>9} {'Net MB':>9} {'RSS MB':>9} {'RSS Δ MB':>9}",
+        '-' * 78
+    ]
+    for name, entry in _stage_memory.items():
+        lines.append(
+            f"{name:<28} {_format_mb(entry['peak_bytes']):>9} {_format_mb(entry['peak_above_start_bytes']):>9} "
+            f"{_format_mb(entry['net_bytes'], signed=True):>9} {_format_mb(entry['rss_after']):>9} "
+            f"{_format_mb(entry['rss_delta'], signed=True):>9}"
+        )
+    lines.append('-' * 78)
+    lines.append(f"Process peak RSS: {_format_mb(get_max_rss())} MB")
+    lines.append("Peak = traced Python allocations at the stage high-water mark; "
+                 "Peak+ = peak above the stage's starting allocation")
+
+    for name, entry in _stage_memory.items():
+        if entry['live_dataframes']:
+            lines.append('')
+            lines.append(f"Largest live DataFrames after '{name}':")
+            for df_name, size in entry['live_dataframes']:
+                lines.append(f"  {_format_mb(size):>9} MB  {df_name}")
+    return '\n'.join(lines)
+
+
+def print_memory_summary():
+    """Print the per-stage memory table"""
+    if not _stage_memory:
+        return
+    print("🧠 Stage memory:")
+    for line in format_memory_table().splitlines():
+        print(f"  {line}")
+
+
+def write_memory_report(report_file):
+    """
+    Write the per-stage memory table to a text file
+
+    Returns:
+        str: Path of the written report
+    """
+    os.makedirs(os.path.dirname(report_file) or '.', exist_ok=True)
+    with open(report_file, 'w', encoding='utf-8') as f:
+        f.write(format_memory_table() + '\n')
+    return report_file
+
+
+def start_profiler():
+    """Start a cProfile profiler for the whole build"""
+    global _profiler
+    _profiler = cProfile.Profile()
+    _profiler.enable()
+    return _profiler
+
+
+def stop_profiler(pstats_file):
+    """
+    Stop the build profiler and dump its statistics for pstats/snakeviz
+
+    Returns:
+        str: Path of the pstats dump, or None if no profiler was running
+    """
+    global _profiler
+    if _profiler is None:
+        return None
+    _profiler.disable()
+    os.makedirs(os.path.dirname(pstats_file) or '.', exist_ok=True)
+    _profiler.dump_stats(pstats_file)
+    _profiler = None
+    return pstats_file
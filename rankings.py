@@ -0,0 +1,171 @@
+"""
+School percentile ranks for NYC DOE Reports
+
+The school comparison cards show a school next to its superintendent, borough and citywide
+averages, but not where it stands among other schools. This module ranks every school on overall,
+vacancy and absence fill rate and average match % within three groups: all schools citywide, the
+schools of its borough, and a peer group of schools with a similar job volume.
+
+All schools are ranked in one pass: the per-school metrics are melted into one long frame with a
+row per school, group and metric, and a single groupby rank over (Scope, Group, Metric) ranks
+every group at once. The school pages then look their ranks up instead of scanning the data.
+
+The result is one long table (RANKING_COLUMNS) that the stats stage stores in the aggregate store.
+"""
+
+import numpy as np
+import pandas as pd
+
+from data_processing import get_match_column
+
+RANKING_COLUMNS = ['Location', 'Scope', 'Group', 'Metric', 'Value', 'Rank', 'Count', 'Percentile']
+# Ranked metric -> label on the school pages
+RANK_METRICS = {
+    'Fill_Pct': 'Overall Fill Rate',
+    'Vacancy_Fill_Pct': 'Vacancy Fill Rate',
+    'Absence_Fill_Pct': 'Absence Fill Rate',
+    'Match_Pct': 'Average Match %'
+}
+# Ranking group -> label on the school pages
+RANK_SCOPES = {'citywide': 'Citywide', 'borough': 'Borough', 'peer': 'Similar Job Volume'}
+# Group name of the citywide ranking
+CITYWIDE_GROUP = 'All schools'
+# Number of job volume bands (quantiles of the school job totals) that form the peer groups
+PEER_GROUPS = 5
+
+_COUNT_COLUMNS = ['Total', 'Total_Filled', 'Total_Vacancy', 'Vacancy_Filled', 'Total_Absence', 'Absence_Filled']
+
+
+def _pct(part, whole):
+    """Percentage with NaN where the whole is zero"""
+    with np.errstate(invalid='ignore', divide='ignore'):
+        return np.where(whole > 0, part / whole * 100, np.nan)
+
+
+def peer_groups(totals, n_groups=PEER_GROUPS):
+    """
+    Assign schools to job volume bands
+
+    Args:
+        totals: Series of total jobs indexed by Location
+        n_groups: Number of bands (fewer if there are fewer schools)
+
+    Returns:
+        pandas.Series: Band number per Location (0 = fewest jobs); group on this, not on the
+                       labels of peer_group_labels(), which two bands can share
+    """
+    if totals.empty:
+        return pd.Series(dtype=np.int64)
+    # Ranking first keeps the bands equal-sized even when many schools share a total
+    return pd.qcut(totals.rank(method='first'), min(n_groups, len(totals)), labels=False).astype(np.int64)
+
+
+def peer_group_labels(totals, bands):
+    """
+    Display label of every school's job volume band
+
+    Args:
+        totals: Series of total jobs indexed by Location
+        bands: Result of peer_groups(totals)
+
+    Returns:
+        pandas.Series: Label per Location, e.g. '120-180 jobs'
+    """
+    if totals.empty:
+        return pd.Series(dtype=object)
+    low = totals.groupby(bands).transform('min')
+    high = totals.groupby(bands).transform('max')
+    return pd.Series([f"{lo:,}-{hi:,} jobs" for lo, hi in zip(low.astype(int), high.astype(int))], index=totals.index)
+
+
+def compute_school_rankings(df, school_stats, matching_stats=None):
+    """
+    Rank and percentile of every school on every metric within every ranking group
+
+    Rank 1 is the highest value in the group (ties share the best rank). Percentile is the share
+    of schools in the group at or below the school's value. Schools without a value for a metric
+    (e.g. no vacancies) are left out of that metric's ranking.
+
+    Args:
+        df: Main processed DataFrame or job count cube (for each school's borough)
+        school_stats: School-level statistics (one row per school and classification)
+        matching_stats: Optional matching analysis DataFrame, for Match_Pct
+
+    Returns:
+        pandas.DataFrame: RANKING_COLUMNS; empty if there are no schools
+    """
+    if school_stats is None or school_stats.empty:
+        return pd.DataFrame(columns=RANKING_COLUMNS)
+
+    counts = school_stats.groupby('Location')[_COUNT_COLUMNS].sum()
+    values = pd.DataFrame({
+        'Fill_Pct': _pct(counts['Total_Filled'], counts['Total']),
+        'Vacancy_Fill_Pct': _pct(counts['Vacancy_Filled'], counts['Total_Vacancy']),
+        'Absence_Fill_Pct': _pct(counts['Absence_Filled'], counts['Total_Absence'])
+    }, index=counts.index)
+    match_col = get_match_column(matching_stats)
+    values['Match_Pct'] = (
+        values.index.map(matching_stats.groupby('Location')[match_col].mean()) if match_col else np.nan
+    )
+
+    long = values.rename_axis('Location').reset_index().melt(id_vars='Location', var_name='Metric', value_name='Value')
+    long = long[long['Value'].notna()]
+
+    # Scope -> (grouping key, display name) per school; peers are grouped on their band number
+    boroughs = df.drop_duplicates('Location').set_index('Location')['Borough'].reindex(counts.index)
+    bands = peer_groups(counts['Total'])
+    school_groups = {
+        'citywide': (pd.Series(CITYWIDE_GROUP, index=counts.index),) * 2,
+        'borough': (boroughs, boroughs),
+        'peer': (bands, peer_group_labels(counts['Total'], bands))
+    }
+    ranked = pd.concat(
+        [long.assign(Scope=scope, Group_Key=long['Location'].map(keys).to_numpy(), Group=long['Location'].map(names).to_numpy())
+         for scope, (keys, names) in school_groups.items()],
+        ignore_index=True
+    )
+
+    by_group = ranked.groupby(['Scope', 'Group_Key', 'Metric'], sort=False)['Value']
+    ranked['Rank'] = by_group.rank(ascending=False, method='min').astype(np.int64)
+    ranked['Count'] = by_group.transform('size').astype(np.int64)
+    ranked['Percentile'] = (by_group.rank(method='max', pct=True) * 100).round(1)
+    ranked['Value'] = ranked['Value'].round(1)
+    return ranked[RANKING_COLUMNS]
+
+
+def group_rankings(rankings):
+    """
+    Index a ranking table by school for the report generators
+
+    Returns:
+        dict: Location -> that school's rows; empty if there are no rankings
+    """
+    if rankings is None or rankings.empty:
+        return {}
+    return {location: rows for location, rows in rankings.groupby('Location', sort=False)}
+
+
+def school_rank_cells(rows):
+    """
+    Arrange one school's ranking rows as a metrics x scopes grid
+
+    Returns:
+        dict with 'metrics' (labels, in RANK_METRICS order), 'scopes' (labels, in RANK_SCOPES order),
+        'groups' (group name per scope) and 'cells' (per metric, one [percentile, rank, count] or
+        None per scope), or None if the school has no rankings
+    """
+    if rows is None or rows.empty:
+        return None
+    lookup = {
+        (metric, scope): [float(percentile), int(rank), int(count)]
+        for metric, scope, percentile, rank, count
+        in rows[['Metric', 'Scope', 'Percentile', 'Rank', 'Count']].itertuples(index=False, name=None)
+    }
+    groups = rows.drop_duplicates('Scope').set_index('Scope')['Group']
+    metrics = [metric for metric in RANK_METRICS if metric in set(rows['Metric'])]
+    return {
+        'metrics': [RANK_METRICS[metric] for metric in metrics],
+        'scopes': list(RANK_SCOPES.values()),
+        'groups': [str(groups.get(scope, '')) for scope in RANK_SCOPES],
+        'cells': [[lookup.get((metric, scope)) for scope in RANK_SCOPES] for metric in metrics]
+    }
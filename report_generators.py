@@ -4,19 +4,216 @@ Report generation functions for NYC DOE Reports
 
 import os
 import re
+import posixpath
 import numpy as np
 from templates import (
     get_html_template, get_header_html, get_professional_footer,
-    get_navigation_html, get_comparison_card_html, create_classification_tabbed_tables, create_school_tabbed_tables,
+    get_navigation_html, get_comparison_card_html, get_trend_chart_html, create_heatmap_table, create_movers_table,
+    create_ranking_table, create_anomaly_table, create_substitute_table,
+    create_classification_tabbed_tables, create_school_tabbed_tables,
     create_district_tabbed_tables, create_borough_tabbed_tables,
     create_conditional_formatted_table
 )
 from chart_utils import (
-    create_bar_chart, create_pie_charts_for_data, create_overall_bar_chart
+    create_bar_chart, create_pie_charts_for_data, create_overall_bar_chart, create_trend_chart, chart_embed_html,
+    PLOTLY_JS_FILENAME
 )
 from data_processing import (
-    format_pct, format_int, create_summary_stats, calculate_fill_rates, get_totals_from_data, copy_logo_to_output
+    format_pct, format_int, create_summary_stats, calculate_fill_rates, get_totals_from_data, copy_logo_to_output,
+    weighted_mode, weighted_value_counts, total_job_count, clean_location_name, clean_superintendent_name,
+    clean_borough_name, report_page_path, report_root_prefix
 )
+from client_pages import (
+    build_superintendent_school_bundle, write_superintendent_school_bundle, get_school_page_url
+)
+from time_series import get_entity_series, latest_rolling_rate, CITYWIDE_ENTITY
+from heatmaps import heatmap_matrix
+from snapshots import top_movers, MIN_MOVER_JOBS
+from rankings import school_rank_cells, PEER_GROUPS
+from anomalies import ANOMALY_METRICS
+from profiling import entity_timer
+
+# Flagged schools listed on the overall summary
+ATTENTION_SUMMARY_ROWS = 15
+
+def create_trend_section(trends, level, entity, chart_dir, chart_stem, plotly_js_file, title):
+    """
+    Write the fill rate trend chart of one entity and return its embed HTML
+    
+    Args:
+        trends: Result of time_series.group_time_series() (may be None or empty)
+        level: Time-series level ('school', 'superintendent', 'borough' or 'citywide')
+        entity: Entity name at that level
+        chart_dir: Directory of the page; the chart is written next to it as {chart_stem}_trend_chart.html
+        plotly_js_file: Path of the shared plotly.min.js
+        title: Chart title
+    
+    Returns:
+        str: Chart embed HTML, or an empty string if the entity has no time-series data
+    """
+    series = get_entity_series(trends, level, entity)
+    if series is None or series.empty:
+        return ""
+    chart_file = os.path.join(chart_dir, f"{chart_stem}_trend_chart.html")
+    create_trend_chart(series, title, chart_file, plotly_js_file)
+    return get_trend_chart_html(chart_embed_html(chart_file, 1220, 470, 'plotly'), latest_rolling_rate(series))
+
+def create_heatmap_section(heatmaps, level, entity):
+    """
+    Day-of-week heatmap of one entity, with the week-by-week heatmap in a collapsible block
+    
+    Args:
+        heatmaps: Result of heatmaps.group_heatmaps() (may be None or empty)
+        level: Heatmap level ('school' or 'superintendent')
+        entity: Entity name at that level
+    
+    Returns:
+        str: Heatmap HTML, or an empty string if the entity has no heatmap data
+    """
+    import pandas as pd
+    
+    rows = heatmaps.get((level, entity)) if heatmaps else None
+    weekday = heatmap_matrix(rows, 'weekday')
+    if weekday is None:
+        return ""
+    html = create_heatmap_table(weekday)
+    
+    weekly = heatmap_matrix(rows, 'week')
+    if weekly is not None:
+        weeks = [pd.Timestamp(week) for week in weekly['buckets']]
+        html += f"""
+    <details>
+        <summary><strong>Fill rate by week</strong> ({len(weeks)} weeks, columns are ISO week numbers)</summary>
+        {create_heatmap_table(weekly, [f"W{week.isocalendar()[1]}" for week in weeks],
+                              [f"Week of {week.strftime('%B %d, %Y')}" for week in weeks])}
+    </details>
+    """
+    return html
+
+def create_movers_section(changes, levels, entities=None):
+    """
+    Improved/declined fill rate tables against the previous build snapshot
+    
+    Args:
+        changes: Dict with 'diff' (snapshots.diff_snapshots()), 'baseline' and 'current' snapshot dates, or None
+        levels: List of (level, entity label) pairs to rank, e.g. [('school', 'School')]
+        entities: Optional collection of entity names to rank within
+    
+    Returns:
+        str: Movers HTML, or an empty string without a previous snapshot
+    """
+    if not changes:
+        return ""
+    
+    html = f"""
+    <p><em>Overall fill rate changes since the build snapshot of {changes['baseline']}
+    (entities with at least {MIN_MOVER_JOBS} jobs in both builds).</em></p>
+    """
+    for level, label in levels:
+        improved, declined = top_movers(changes['diff'], level, entities=entities)
+        html += f"""
+    <div class="comparison-grid">
+        <div>
+            <h4>{label}s - Biggest Improvements</h4>
+            {create_movers_table(improved, label)}
+        </div>
+        <div>
+            <h4>{label}s - Biggest Declines</h4>
+            {create_movers_table(declined, label)}
+        </div>
+    </div>
+    """
+    return html
+
+def create_attention_section(anomalies, locations=None, limit=None):
+    """
+    Table of schools flagged by anomalies.compute_anomalies()
+    
+    Args:
+        anomalies: Flagged schools (largest gap first), or None when the anomaly stage did not run
+        locations: Optional collection of Locations to limit the table to (e.g. one superintendent's schools)
+        limit: Optional maximum number of rows; the summary line still counts every flagged school
+    
+    Returns:
+        str: Section body HTML, or an empty string without anomaly data
+    """
+    if anomalies is None:
+        return ""
+    if locations is not None and not anomalies.empty:
+        anomalies = anomalies[anomalies['Location'].isin(locations)]
+    
+    intro = """
+    <p><em>Schools whose overall fill rate or payroll match % is below that of schools with a similar number of
+    jobs by more than chance explains: the school's whole 95% range (Wilson score interval) lies below the peer
+    rate. The range is wider for schools with few jobs, so small schools are only flagged on large gaps.</em></p>
+    """
+    if anomalies.empty:
+        return intro + "<p><strong>No schools flagged.</strong></p>"
+    
+    school_count = anomalies['Location'].nunique()
+    summary = f"<p><strong>{school_count} school{'s' if school_count != 1 else ''} flagged</strong>"
+    if limit is not None and len(anomalies) > limit:
+        summary += f" (largest {limit} gaps shown)"
+        anomalies = anomalies.head(limit)
+    return intro + summary + "</p>" + create_anomaly_table(anomalies, ANOMALY_METRICS, show_superintendent=locations is None)
+
+def create_substitute_section(top_substitutes, level, entities):
+    """
+    Internal-only tables of the substitutes carrying the most job days (see substitutes.py)
+    
+    Args:
+        top_substitutes: Top substitutes table, or None unless the build runs with --internal
+        level: 'borough' or 'superintendent'
+        entities: Areas to show one table each for
+    
+    Returns:
+        str: Section HTML, or an empty string
+    """
+    if top_substitutes is None or top_substitutes.empty:
+        return ""
+    level_rows = top_substitutes[top_substitutes['Level'] == level]
+    tables_html = ""
+    for entity in entities:
+        rows = level_rows[level_rows['Entity'] == entity]
+        if rows.empty:
+            continue
+        heading = f"<h4>{entity}</h4>" if len(entities) > 1 else ""
+        tables_html += f"{heading}{create_substitute_table(rows)}"
+    if not tables_html:
+        return ""
+    return f"""
+            <div class="section">
+                <h3>Substitute Coverage (Internal)</h3>
+                <p><em><strong>Internal use only:</strong> identifies individual substitutes by EISID. The substitutes
+                who filled the most job days (distinct school days) here, with their share of all substitute job days
+                in the area, the number of schools they served overall and the share of their job days found in payroll.</em></p>
+                {tables_html}
+            </div>
+            """
+
+def create_ranking_section(rankings, location):
+    """
+    Percentile table of one school (see rankings.py)
+    
+    Args:
+        rankings: Result of rankings.group_rankings(), or None
+        location: School location code
+    
+    Returns:
+        str: Section HTML, or an empty string without rankings
+    """
+    ranks = school_rank_cells(rankings.get(location)) if rankings else None
+    if ranks is None:
+        return ""
+    return f"""
+            <div class="section">
+                <h3>How This School Ranks</h3>
+                <p><em>Percentile among all schools, the schools in the same borough, and schools with a similar
+                number of jobs (one of {PEER_GROUPS} job volume bands). The 80th percentile means the school is at or
+                above 80% of the schools in that group; #1 is the highest value.</em></p>
+                {create_ranking_table(ranks)}
+            </div>
+            """
 
 def create_school_report(district, location, location_clean, school_data, df, summary_stats, output_dir, date_range_info, matching_stats=None):
     """
@@ -44,24 +241,26 @@ def create_school_report(district, location, location_clean, school_data, df, su
     return os.path.join(school_dir, f'{safe_location_name}_report.html')
 
 
-def create_superintendent_school_report(superintendent, location, location_clean, school_data, df, summary_stats, superintendent_dir, date_range_info, matching_stats=None):
+def create_superintendent_school_report(superintendent, location, location_clean, school_data, df, summary_stats, superintendent_dir, date_range_info, matching_stats=None,
+                                        trends=None, rankings=None):
     """
     Create a comprehensive report for a single school under a superintendent
+
+    Args:
+        trends: Optional result of time_series.group_time_series() for the fill rate trend section
+        rankings: Optional result of rankings.group_rankings() for the percentile section
     """
     import pandas as pd
     import numpy as np
     
     # Create subfolder for school directly under the superintendent directory
-    school_dir = os.path.join(superintendent_dir, "Schools", f"School_{location_clean}")
+    safe_location_name = clean_location_name(location_clean)
+    safe_superintendent_name = clean_superintendent_name(superintendent)
+    report_file = os.path.join(os.path.dirname(superintendent_dir),
+                               report_page_path('school', safe_superintendent_name, safe_location_name))
+    school_dir = os.path.dirname(report_file)
     os.makedirs(school_dir, exist_ok=True)
     
-    # Sanitize location name for files - more robust for Windows
-    safe_location_name = re.sub(r'[<>:"/\\|?*\n\r\t\s]', '_', str(location_clean)).strip()
-    safe_location_name = re.sub(r'_+', '_', safe_location_name).strip('_')
-    safe_location_name = safe_location_name.replace('.', '_')
-    if len(safe_location_name) > 200:
-        safe_location_name = safe_location_name[:200].rstrip('._')
-    
     # Create tabbed summary tables - handle both Series and DataFrame input
     # For school reports, check what type of data we received
     if isinstance(school_data, pd.Series):
@@ -124,7 +323,7 @@ def create_superintendent_school_report(superintendent, location, location_clean
     
     # Create bar chart with sorted data (highest to lowest total jobs)
     bar_chart_file = os.path.join(school_dir, f'{safe_location_name}_bar_chart.html')
-    create_bar_chart(
+    bar_chart_html = create_bar_chart(
         school_classification_data,  # Use sorted classification data instead of raw school_data
         f'Jobs by Classification and Type - {location}',
         bar_chart_file,
@@ -137,7 +336,6 @@ def create_superintendent_school_report(superintendent, location, location_clean
     # Get comparison data
     school_borough = df[df['Location'] == location]['Borough'].iloc[0]
     school_superintendent = df[df['Location'] == location]['Superintendent_Name'].iloc[0]
-    safe_superintendent_name = school_superintendent.replace(',', '').replace(' ', '_').replace('.', '').replace("'", "")
     overall_totals = summary_stats.agg({
         'Vacancy_Filled': 'sum', 'Vacancy_Unfilled': 'sum', 'Absence_Filled': 'sum',
         'Absence_Unfilled': 'sum', 'Total_Vacancy': 'sum', 'Total_Absence': 'sum', 'Total': 'sum'
@@ -242,12 +440,29 @@ def create_superintendent_school_report(superintendent, location, location_clean
     
     comparison_html = f'<div class="comparison-grid-four">{"".join(comparison_cards)}</div>'
     
+    # Percentiles among all schools, the borough's schools and similar-volume schools (precomputed)
+    ranking_html = create_ranking_section(rankings, location)
+    
+    # Weekly/monthly fill rate trend (the shared Plotly bundle sits at the root of the report tree)
+    trend_html = create_trend_section(
+        trends, 'school', location, school_dir, safe_location_name,
+        os.path.join(os.path.dirname(superintendent_dir), PLOTLY_JS_FILENAME), f"Fill Rate Trend - {location}"
+    )
+    if trend_html:
+        trend_html = f"""
+            <div class="section">
+                <h3>Fill Rate Trend</h3>
+                <p><em>Weekly and monthly fill rates by job start date, with the rolling 4-week fill rate.</em></p>
+                {trend_html}
+            </div>
+            """
+    
     # Build content with new structure
     content = f"""
         {get_header_html("../../../Horizontal_logo_White_PublicSchools.png", 
                         "Substitute Paraprofessional Jobs Report", 
                         f"School: {location} (Superintendent: {school_superintendent})", 
-                        date_range_info)}
+                        date_range_info, root_prefix=report_root_prefix('school'))}
         
         <div class="content">
             {get_navigation_html([
@@ -260,6 +475,8 @@ def create_superintendent_school_report(superintendent, location, location_clean
                 stuperintendent, the borough, and citywide averages.</em></p>
                 {comparison_html}
             </div>
+            {ranking_html}
+            {trend_html}
             
             <div class="section">
                 <h3>Fill Rate Analysis by Classification</h3>
@@ -272,7 +489,7 @@ def create_superintendent_school_report(superintendent, location, location_clean
             <div class="section">
                 <h3>Jobs by Classification and Type</h3>
                 <div class="chart-container">
-                    <iframe src="{safe_location_name}_bar_chart.html" width="1220" height="520" frameborder="0"></iframe>
+                    {bar_chart_html}
                 </div>
             </div>
 
@@ -289,7 +506,6 @@ def create_superintendent_school_report(superintendent, location, location_clean
     html_content = get_html_template(f"Jobs Report - {location}", "../../../Horizontal_logo_White_PublicSchools.png", content)
     
     # Save report
-    report_file = os.path.join(school_dir, f'{safe_location_name}_report.html')
     with open(report_file, 'w', encoding='utf-8') as f:
         f.write(html_content)
     
@@ -474,7 +690,7 @@ def create_district_report(district, district_data, df, output_dir, summary_stat
     
     # Create bar chart (use full data for chart)
     bar_chart_file = os.path.join(district_dir, f'{int(float(district))}_bar_chart.html')
-    create_bar_chart(
+    bar_chart_html = create_bar_chart(
         district_data_sorted,
         f'Jobs by Classification and Type - District {int(float(district))}',
         bar_chart_file,
@@ -557,7 +773,7 @@ def create_district_report(district, district_data, df, output_dir, summary_stat
         {get_header_html("../Horizontal_logo_White_PublicSchools.png", 
                         "Substitute Paraprofessional Jobs Report", 
                         f"District: {int(float(district))}", 
-                        date_range_info)}
+                        date_range_info, root_prefix="../")}
         
         <div class="content">
             {get_navigation_html([
@@ -581,7 +797,7 @@ def create_district_report(district, district_data, df, output_dir, summary_stat
             <div class="section">
                 <h3>Jobs by Classification and Type</h3>
                 <div class="chart-container">
-                    <iframe src="{int(float(district))}_bar_chart.html" width="1220" height="520" frameborder="0"></iframe>
+                    {bar_chart_html}
                 </div>
             </div>
 
@@ -614,13 +830,29 @@ def create_district_report(district, district_data, df, output_dir, summary_stat
     return report_file, school_reports
 
 
-def create_superintendent_report(superintendent, superintendent_data, df, output_dir, summary_stats, date_range_info, matching_stats=None, school_stats=None):
+def create_superintendent_report(superintendent, superintendent_data, df, output_dir, summary_stats, date_range_info, matching_stats=None, school_stats=None,
+                                 school_page_mode='static', compress_bundle=False, school_filter=None, trends=None,
+                                 heatmaps=None, changes=None, rankings=None, anomalies=None, top_substitutes=None):
     """
     Create a comprehensive report for a single Superintendent following the same structure as district reports
+
+    Args:
+        school_page_mode: 'static' writes a standalone page per school; 'client' writes one JSON data
+                          bundle for the superintendent that the shared school page shell renders
+        compress_bundle: Write the client-mode bundle as gzipped JSON
+        school_filter: Optional collection of Locations; when given, only those static school pages are
+                       regenerated (the others are left as they are on disk, links still cover every school)
+        trends: Optional result of time_series.group_time_series() for the fill rate trend sections
+        heatmaps: Optional result of heatmaps.group_heatmaps() for the day-of-week heatmap section
+        changes: Optional snapshot comparison (see create_movers_section) for the school movers section
+        rankings: Optional result of rankings.group_rankings() for the school percentile sections
+        anomalies: Optional result of anomalies.compute_anomalies() for the attention needed section
+        top_substitutes: Optional top substitutes table (substitutes.py) for the internal substitute section
     """
     # Create subfolder for Superintendent (safe filename)
-    safe_superintendent_name = superintendent.replace(',', '').replace(' ', '_').replace('.', '').replace("'", "")
-    superintendent_dir = os.path.join(output_dir, f"Superintendent_{safe_superintendent_name}")
+    safe_superintendent_name = clean_superintendent_name(superintendent)
+    report_file = os.path.join(output_dir, report_page_path('superintendent', safe_superintendent_name))
+    superintendent_dir = os.path.dirname(report_file)
     os.makedirs(superintendent_dir, exist_ok=True)
     
     # Copy logo to superintendent directory
@@ -633,7 +865,7 @@ def create_superintendent_report(superintendent, superintendent_data, df, output
         return None, []
     
     # Get the most common borough for this superintendent
-    superintendent_borough = superintendent_schools['Borough'].mode().iloc[0] if not superintendent_schools['Borough'].empty else 'Unknown'
+    superintendent_borough = weighted_mode(superintendent_schools, 'Borough')
     
     # Get comparison data - similar to district report
     overall_totals = summary_stats.agg({
@@ -754,7 +986,7 @@ def create_superintendent_report(superintendent, superintendent_data, df, output
     
     # Create bar chart for classification analysis
     bar_chart_file = os.path.join(superintendent_dir, f'{safe_superintendent_name}_bar_chart.html')
-    create_bar_chart(
+    bar_chart_html = create_bar_chart(
         superintendent_data_sorted,
         f'Jobs by Classification and Type - Superintendent {superintendent}',
         bar_chart_file,
@@ -816,16 +1048,22 @@ def create_superintendent_report(superintendent, superintendent_data, df, output
             
             # Generate school reports and track successful ones
             school_reports = []
+            if school_page_mode == 'client':
+                # One compact data bundle replaces the per-school pages and chart files
+                bundle = build_superintendent_school_bundle(
+                    superintendent, df, summary_stats, school_stats, date_range_info, matching_stats, trends=trends,
+                    rankings=rankings
+                )
+                school_reports.append(write_superintendent_school_bundle(bundle, superintendent_dir, compress=compress_bundle))
+                unique_schools = []
+            if school_filter is not None:
+                unique_schools = [location for location in unique_schools if location in school_filter]
             for location in unique_schools:
                 # Get data for this specific school
                 location_data = school_aggregated[school_aggregated['Location'] == location]
                 if not location_data.empty:
                     # Create safe filename for school
-                    location_clean = re.sub(r'[<>:"/\\|?*\n\r\t\s]', '_', str(location)).strip()
-                    location_clean = re.sub(r'_+', '_', location_clean).strip('_')
-                    location_clean = location_clean.replace('.', '_')
-                    if len(location_clean) > 200:
-                        location_clean = location_clean[:200].rstrip('._')
+                    location_clean = clean_location_name(location)
                     
                     # Get school data for this location from school_stats (pre-calculated)
                     if school_stats is not None:
@@ -836,10 +1074,12 @@ def create_superintendent_report(superintendent, superintendent_data, df, output
                         if not school_data.empty:
                             # Create school report using the superintendent school report function
                             try:
-                                school_report = create_superintendent_school_report(
-                                    superintendent, location, location_clean, school_data, 
-                                    df, summary_stats, superintendent_dir, date_range_info, matching_stats
-                                )
+                                with entity_timer('school', location):
+                                    school_report = create_superintendent_school_report(
+                                        superintendent, location, location_clean, school_data, 
+                                        df, summary_stats, superintendent_dir, date_range_info, matching_stats,
+                                        trends=trends, rankings=rankings
+                                    )
                                 if school_report:
                                     school_reports.append(school_report)
                             except Exception as e:
@@ -855,13 +1095,14 @@ def create_superintendent_report(superintendent, superintendent_data, df, output
                 location = school['Location']
                 total_jobs = school['Total']  # Use 'Total' instead of 'Total_Jobs'
                 # Create clean location name for file path
-                location_clean = re.sub(r'[<>:"/\\|?*\n\r\t\s]', '_', str(location)).strip()
-                location_clean = re.sub(r'_+', '_', location_clean).strip('_')
-                location_clean = location_clean.replace('.', '_')
-                if len(location_clean) > 200:
-                    location_clean = location_clean[:200].rstrip('._')
+                location_clean = clean_location_name(location)
                 
-                school_links_list.append(f'<li><a href="Schools/School_{location_clean}/{location_clean}_report.html">{location} ({total_jobs:,} jobs)</a></li>')
+                if school_page_mode == 'client':
+                    school_url = get_school_page_url(safe_superintendent_name, location_clean)
+                else:
+                    school_url = posixpath.relpath(report_page_path('school', safe_superintendent_name, location_clean),
+                                                   posixpath.dirname(report_page_path('superintendent', safe_superintendent_name)))
+                school_links_list.append(f'<li><a href="{school_url}">{location} ({total_jobs:,} jobs)</a></li>')
             
             school_links = f'''
             <div class="superintendent-links">
@@ -930,12 +1171,58 @@ def create_superintendent_report(superintendent, superintendent_data, df, output
                 </div>
                 """
     
+    # Weekly/monthly fill rate trend
+    trend_html = create_trend_section(
+        trends, 'superintendent', superintendent, superintendent_dir, safe_superintendent_name,
+        os.path.join(output_dir, PLOTLY_JS_FILENAME), f"Fill Rate Trend - Superintendent {superintendent}"
+    )
+    if trend_html:
+        trend_html = f"""
+            <div class="section">
+                <h3>Fill Rate Trend</h3>
+                <p><em>Weekly and monthly fill rates by job start date across all schools under this superintendent, with the rolling 4-week fill rate.</em></p>
+                {trend_html}
+            </div>
+            """
+    
+    # Classification x day-of-week fill rates
+    heatmap_html = create_heatmap_section(heatmaps, 'superintendent', superintendent)
+    if heatmap_html:
+        heatmap_html = f"""
+            <div class="section">
+                <h3>Fill Rate by Day of Week</h3>
+                <p><em>Overall fill rate of each classification by the weekday of the job. Red cells mark
+                the days that go unfilled most often; hover over a cell for the job counts.</em></p>
+                {heatmap_html}
+            </div>
+            """
+    
+    # Schools whose fill rate moved most since the previous build snapshot
+    movers_html = create_movers_section(changes, [('school', 'School')], entities=superintendent_schools['Location'].unique())
+    if movers_html:
+        movers_html = f"""
+            <div class="section">
+                <h3>Changes Since {changes['baseline']}</h3>
+                {movers_html}
+            </div>
+            """
+    
+    # Schools significantly below their peers
+    attention_html = create_attention_section(anomalies, locations=superintendent_schools['Location'].unique())
+    if attention_html:
+        attention_html = f"""
+            <div class="section">
+                <h3>Attention Needed</h3>
+                {attention_html}
+            </div>
+            """
+    
     # Combine content
     content = f"""
         {get_header_html("Horizontal_logo_White_PublicSchools.png", 
                         "Substitute Paraprofessional Jobs Report", 
                         f"Superintendent: {superintendent}", 
-                        date_range_info)}
+                        date_range_info, root_prefix=report_root_prefix('superintendent'))}
         
         <div class="content">
             <div class="section">
@@ -943,8 +1230,12 @@ def create_superintendent_report(superintendent, superintendent_data, df, output
                 <p><em>This comparison shows how schools under this superintendent perform relative to the borough and citywide averages.</em></p>
                 {comparison_html}
             </div>
+            {attention_html}
+            {trend_html}
+            {movers_html}
             
             {matching_analysis_html}
+            {create_substitute_section(top_substitutes, 'superintendent', [superintendent])}
             
             <div class="section">
                 <h3>Fill Rate Analysis by Classification</h3>
@@ -952,11 +1243,12 @@ def create_superintendent_report(superintendent, superintendent_data, df, output
                 different views. Data is sorted from highest to lowest number of total jobs.</em></p>
                 {classification_html}
             </div>
+            {heatmap_html}
             
             <div class="section">
                 <h3>Jobs by Classification and Type</h3>
                 <div class="chart-container">
-                    <iframe src="{safe_superintendent_name}_bar_chart.html" width="1220" height="520" frameborder="0"></iframe>
+                    {bar_chart_html}
                 </div>
             </div>
             
@@ -969,62 +1261,6 @@ def create_superintendent_report(superintendent, superintendent_data, df, output
             </div>
         </div>
         
-        <style>
-        .school-links {{
-            margin: 20px 0;
-        }}
-        
-        .links-grid {{
-            display: grid;
-            grid-template-columns: repeat(auto-fit, minmax(300px, 1fr));
-            gap: 15px;
-            margin-top: 15px;
-        }}
-        
-        .school-link-item {{
-            border: 1px solid #ddd;
-            border-radius: 8px;
-            overflow: hidden;
-            transition: all 0.3s ease;
-        }}
-        
-        .school-link-item:hover {{
-            border-color: #007bff;
-            box-shadow: 0 2px 8px rgba(0,123,255,0.1);
-            transform: translateY(-2px);
-        }}
-        
-        .school-link {{
-            display: block;
-            padding: 15px;
-            text-decoration: none;
-            color: inherit;
-        }}
-        
-        .school-link:hover {{
-            text-decoration: none;
-            color: inherit;
-        }}
-        
-        .school-info {{
-            display: flex;
-            justify-content: space-between;
-            align-items: center;
-        }}
-        
-        .school-name {{
-            font-weight: bold;
-            color: #007bff;
-            font-size: 16px;
-        }}
-        
-        .school-stats {{
-            color: #666;
-            font-size: 14px;
-            font-style: italic;
-        }}
-        </style>
-        
         {get_professional_footer(['SubCentral@schools.nyc.gov'])}
     """
     
@@ -1032,25 +1268,29 @@ def create_superintendent_report(superintendent, superintendent_data, df, output
     html_content = get_html_template(f"Jobs Report - Superintendent {superintendent}", "Horizontal_logo_White_PublicSchools.png", content)
     
     # Save report
-    report_file = os.path.join(superintendent_dir, f'{safe_superintendent_name}_report.html')
     with open(report_file, 'w', encoding='utf-8') as f:
         f.write(html_content)
     
     return report_file, school_reports
 
 
-def create_borough_report(borough, borough_data, df, output_dir, district_stats, date_range_info, matching_stats=None):
+def create_borough_report(borough, borough_data, df, output_dir, district_stats, date_range_info, matching_stats=None, trends=None,
+                          top_substitutes=None):
     """
     Create a comprehensive report for a single borough with restructured sections per feedback:
     1. Overall Summary (Borough vs Citywide) with Average Match %
     2. Match Payroll Analysis (sorted lowest to highest Match %)
     3. Classification Information (sorted highest to lowest total jobs)
     4. Individual Schools (with helpful notes)
+
+    With trends (time_series.group_time_series()), section 1 also shows the borough's fill rate trend;
+    with top_substitutes (internal builds only), section 2 ends with the borough's top substitutes.
     """
     import pandas as pd
     # Create subfolder for borough
-    borough_clean = borough.replace(' ', '_').replace('/', '_')
-    borough_dir = os.path.join(output_dir, f"Borough_{borough_clean}")
+    borough_clean = clean_borough_name(borough)
+    report_file = os.path.join(output_dir, report_page_path('borough', borough_clean))
+    borough_dir = os.path.dirname(report_file)
     os.makedirs(borough_dir, exist_ok=True)
     
     # Get borough data
@@ -1226,7 +1466,7 @@ def create_borough_report(borough, borough_data, df, output_dir, district_stats,
     
     # Create bar chart
     bar_chart_file = os.path.join(borough_dir, f'{borough_clean}_bar_chart.html')
-    create_bar_chart(
+    bar_chart_html = create_bar_chart(
         borough_data_sorted,
         f'Jobs by Classification and Type - {borough}',
         bar_chart_file,
@@ -1277,12 +1517,22 @@ def create_borough_report(borough, borough_data, df, output_dir, district_stats,
         total_jobs = district_summary[district_summary['District'] == district]['Total'].iloc[0]
         district_links += f'<li><a href="../District_{int(float(district))}/{int(float(district))}_report.html">District {int(float(district))} Report</a> - {int(total_jobs):,} total jobs</li>\n'
     
+    # Weekly/monthly fill rate trend, shown under the comparison
+    trend_html = create_trend_section(
+        trends, 'borough', borough, borough_dir, borough_clean,
+        os.path.join(output_dir, PLOTLY_JS_FILENAME), f"Fill Rate Trend - {borough}"
+    )
+    if trend_html:
+        trend_html = f"""
+                <h4>Fill Rate Trend</h4>
+                {trend_html}"""
+    
     # Build content with new structure
     content = f"""
         {get_header_html("../Horizontal_logo_White_PublicSchools.png", 
                         "Substitute Paraprofessional Jobs Report", 
                         f"Borough: {borough}", 
-                        date_range_info)}
+                        date_range_info, root_prefix=report_root_prefix('borough'))}
         
         <div class="content">
             {get_navigation_html([("../index.html", "← Back to Overall Summary")])}
@@ -1291,11 +1541,12 @@ def create_borough_report(borough, borough_data, df, output_dir, district_stats,
             <div class="section">
                 <h3>1. Overall Summary - {borough} vs. Citywide</h3>
                 <p><em>Comparison frames everything else you will see on this page</em></p>
-                {comparison_html}
+                {comparison_html}{trend_html}
             </div>
 
             <!-- SECTION 2: Match Payroll Analysis -->
             {payroll_analysis_html}
+            {create_substitute_section(top_substitutes, 'borough', [borough])}
 
             <!-- SECTION 3: Classification Information -->
             <div class="section">
@@ -1308,7 +1559,7 @@ def create_borough_report(borough, borough_data, df, output_dir, district_stats,
             <div class="section">
                 <h4>Jobs by Classification Type</h4>
                 <div class="chart-container">
-                    <iframe src="{borough_clean}_bar_chart.html" width="1220" height="520" frameborder="0"></iframe>
+                    {bar_chart_html}
                 </div>
             </div>
 
@@ -1336,20 +1587,26 @@ def create_borough_report(borough, borough_data, df, output_dir, district_stats,
     html_content = get_html_template(f"Jobs Report - {borough}", "../Horizontal_logo_White_PublicSchools.png", content)
     
     # Save report
-    report_file = os.path.join(borough_dir, f'{borough_clean}_report.html')
     with open(report_file, 'w', encoding='utf-8') as f:
         f.write(html_content)
     
     return report_file
 
 
-def create_overall_summary(df, citywide_stats, borough_stats, output_dir, date_range_info, matching_stats=None, superintendent_stats=None):
+def create_overall_summary(df, citywide_stats, borough_stats, output_dir, date_range_info, matching_stats=None, superintendent_stats=None,
+                           trends=None, changes=None, anomalies=None, top_substitutes=None):
     """
     Create an overall summary report across all districts with restructured sections:
     1. Overall Summary with Average Match Percentage
     2. Match Payroll Analysis (citywide)
     3. Classification Information (sorted highest to lowest total jobs)
     4. Borough Breakdowns
+
+    With trends (time_series.group_time_series()), section 1 also shows the citywide fill rate trend;
+    with changes (see create_movers_section), the superintendents and schools that moved most since
+    the previous build snapshot; with anomalies (anomalies.compute_anomalies()), the schools that
+    need attention; with top_substitutes (internal builds only), the substitutes carrying the most
+    job days in every borough.
     """
     import pandas as pd
     
@@ -1519,7 +1776,7 @@ def create_overall_summary(df, citywide_stats, borough_stats, output_dir, date_r
                 """
 
     overall_chart_file = os.path.join(output_dir, 'overall_bar_chart.html')
-    create_overall_bar_chart(overall_stats, overall_chart_file)
+    overall_chart_html = create_overall_bar_chart(overall_stats, overall_chart_file)
 
     # Create district summary for overall summary page
     district_summary = district_stats
@@ -1536,20 +1793,20 @@ def create_overall_summary(df, citywide_stats, borough_stats, output_dir, date_r
     # Create superintendent links (new addition)
     superintendent_totals = superintendent_stats.groupby('Superintendent_Name')['Total'].sum() if superintendent_stats is not None else pd.Series()
     superintendent_links = ''.join([
-        f'<li><a href="Superintendent_{superintendent.replace(" ", "_").replace(",", "").replace(".", "")}/{superintendent.replace(" ", "_").replace(",", "").replace(".", "")}_report.html">{superintendent} Report</a> - {int(total):,} total jobs</li>\n'
+        f'<li><a href="{report_page_path("superintendent", clean_superintendent_name(superintendent))}">{superintendent} Report</a> - {int(total):,} total jobs</li>\n'
         for superintendent, total in superintendent_totals.items() if superintendent != 'Unknown'
     ])
 
     borough_totals = borough_stats.groupby('Borough')['Total'].sum()
     borough_links = ''.join([
-        f'<li><a href="Borough_{borough.replace(" ", "_").replace("/", "_")}/{borough.replace(" ", "_").replace("/", "_")}_report.html">{borough} Report</a> - {int(total):,} total jobs</li>\n'
+        f'<li><a href="{report_page_path("borough", clean_borough_name(borough))}">{borough} Report</a> - {int(total):,} total jobs</li>\n'
         for borough, total in borough_totals.items() if borough != 'Unknown'
     ])
 
     # Vectorized statistics
-    fill_status_counts = df['Fill_Status'].value_counts()
-    type_counts = df['Type'].value_counts()
-    total_jobs = len(df)
+    fill_status_counts = weighted_value_counts(df, 'Fill_Status')
+    type_counts = weighted_value_counts(df, 'Type')
+    total_jobs = total_job_count(df)
     total_filled = fill_status_counts.get('Filled', 0)
     total_vacancies = type_counts.get('Vacancy', 0)
     total_absences = type_counts.get('Absence', 0)
@@ -1654,19 +1911,45 @@ def create_overall_summary(df, citywide_stats, borough_stats, output_dir, date_r
         map_file = os.path.join(output_dir, 'district_fillrate_map.html')
         map_content = create_district_choropleth(district_summary, map_file)
         if map_content:
-            district_map_html = get_district_map_section_html(district_summary, 'district_fillrate_map.html')
+            district_map_html = get_district_map_section_html(
+                district_summary, 'district_fillrate_map.html', chart_embed_html(map_file, 1400, 950, 'plotly')
+            )
         else:
             print("⚠ Could not create district choropleth map")
     except Exception as e:
         print(f"⚠ Could not create district map - {e}")
         # Continue without the map
     
+    # Weekly/monthly citywide fill rate trend, shown under the key statistics
+    trend_html = create_trend_section(
+        trends, 'citywide', CITYWIDE_ENTITY, output_dir, 'citywide',
+        os.path.join(output_dir, PLOTLY_JS_FILENAME), "Citywide Fill Rate Trend"
+    )
+    if trend_html:
+        trend_html = f"""
+                <h4>Fill Rate Trend</h4>
+                {trend_html}"""
+    
+    # Superintendents and schools whose fill rate moved most since the previous build snapshot
+    movers_html = create_movers_section(changes, [('superintendent', 'Superintendent'), ('school', 'School')])
+    if movers_html:
+        movers_html = f"""
+                <h4>Changes Since {changes['baseline']}</h4>
+                {movers_html}"""
+    
+    # Schools significantly below their peers, largest gaps first
+    attention_html = create_attention_section(anomalies, limit=ATTENTION_SUMMARY_ROWS)
+    if attention_html:
+        attention_html = f"""
+                <h4>Attention Needed</h4>
+                {attention_html}"""
+    
     # Build content with clean structure matching original ParaJobs format
     content = f"""
         {get_header_html("Horizontal_logo_White_PublicSchools.png", 
                         "Substitute Paraprofessional Jobs Dashboard", 
                         "Citywide Summary Report", 
-                        date_range_info)}
+                        date_range_info, root_prefix="")}
         
         <div class="content">
             <!-- SECTION 1: Overall Summary with Match Percentage -->
@@ -1684,11 +1967,12 @@ def create_overall_summary(df, citywide_stats, borough_stats, output_dir, date_r
                         <li><strong>Total Schools:</strong> {unique_schools}</li>
                         <li><strong>Total Classifications:</strong> {unique_classifications}</li>
                     </ul>
-                </div>
+                </div>{attention_html}{trend_html}{movers_html}
             </div>
 
             <!-- SECTION 2: Match Payroll Analysis -->
             {payroll_analysis_html}
+            {create_substitute_section(top_substitutes, 'borough', sorted(borough_stats['Borough'].unique()))}
             
             <!-- SECTION 3: Classification Information -->
             <div class="section">
@@ -1701,7 +1985,7 @@ def create_overall_summary(df, citywide_stats, borough_stats, output_dir, date_r
             <div class="section">
                 <h4>Jobs by Classification Type</h4>
                 <div class="chart-container">
-                    <iframe src="overall_bar_chart.html" width="1450" height="600" frameborder="0"></iframe>
+                    {overall_chart_html}
                 </div>
             </div>
             
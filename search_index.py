@@ -0,0 +1,177 @@
+"""
+Client-side search index for NYC DOE Reports
+
+Finding a school otherwise means clicking from the overall summary through its superintendent.
+The render stage writes one compact JSON index of every school, superintendent and borough page
+at the root of the report tree; the search box in every page header (templates.get_header_html)
+loads it on first use and searches it in the browser.
+
+Every entry carries its page link (as arguments to a per-kind URL template, which keeps the
+repeated paths out of the index) and key fill stats. Entries are searched on DBN, location
+code, school name (School_Name_Full), superintendent and borough, normalized to lowercase
+alphanumeric words. The index maps every trigram of that text, and every 1-2 character word
+prefix for short queries, to the entries containing it; postings are delta-encoded sorted entry
+numbers, which keeps the index at a few hundred KB for ~1,600 schools.
+
+The entries are built in one pass over the school, superintendent and borough statistics. DBN
+and school names are not part of the job count cube, so the stats stage stores them in a small
+school directory table (SCHOOL_DIRECTORY_COLUMNS).
+"""
+
+import os
+import re
+import json
+import pandas as pd
+
+from templates import SEARCH_INDEX_FILENAME
+from client_pages import get_school_page_url
+from data_processing import REPORT_PAGE_PATHS, clean_location_name, clean_superintendent_name, clean_borough_name
+
+SEARCH_INDEX_VERSION = 1
+SCHOOL_DIRECTORY_COLUMNS = ['Location', 'DBN', 'School_Name_Full']
+# Fields of every index entry, in order; 'link' holds the arguments of the kind's URL template
+SEARCH_ENTRY_FIELDS = ['kind', 'title', 'detail', 'link', 'jobs', 'fill_pct']
+# Length of the word prefixes indexed for queries too short for trigrams
+PREFIX_LENGTH = 2
+
+
+def school_directory(df):
+    """
+    DBN and full school name of every location
+
+    Args:
+        df: Main processed DataFrame or job count cube after add_superintendent_info()
+
+    Returns:
+        pandas.DataFrame: SCHOOL_DIRECTORY_COLUMNS, one row per location ('Unknown' where the
+                          superintendent mapping has no entry)
+    """
+    columns = [col for col in SCHOOL_DIRECTORY_COLUMNS if col in df.columns]
+    directory = df[columns].drop_duplicates('Location')
+    for col in SCHOOL_DIRECTORY_COLUMNS:
+        if col not in directory.columns:
+            directory[col] = 'Unknown'
+    return directory[SCHOOL_DIRECTORY_COLUMNS].reset_index(drop=True)
+
+
+def normalize_search_text(text):
+    """Lowercase alphanumeric words separated by single spaces (mirrored by the page JavaScript)"""
+    return re.sub(r'[^a-z0-9]+', ' ', str(text).lower()).strip()
+
+
+def search_url_templates(school_page_mode='static'):
+    """
+    Page URL of every entry kind, relative to the report root, with {0}, {1} for the entry's link arguments
+
+    The static pages are where the report generators write them (data_processing.REPORT_PAGE_PATHS).
+
+    Args:
+        school_page_mode: 'static' or 'client' school pages
+    """
+    urls = dict(REPORT_PAGE_PATHS)
+    if school_page_mode == 'client':
+        urls['school'] = get_school_page_url('{0}', '{1}', root_prefix='')
+    return urls
+
+
+def _fill_pct(filled, total):
+    """Overall fill rate rounded for the index, or None without jobs"""
+    return round(filled / total * 100, 1) if total > 0 else None
+
+
+def build_search_entries(school_stats, superintendent_stats, borough_stats, df, directory=None):
+    """
+    One search entry per school, superintendent and borough page
+
+    Args:
+        school_stats: School-level statistics (one row per school and classification)
+        superintendent_stats: Superintendent-level statistics
+        borough_stats: Borough-level statistics
+        df: Job count cube (for each school's borough)
+        directory: Optional school directory from school_directory()
+
+    Returns:
+        list: Entries with SEARCH_ENTRY_FIELDS (links for search_url_templates()), schools first
+    """
+    entries = []
+    boroughs = df.drop_duplicates('Location').set_index('Location')['Borough']
+    names = (directory.set_index('Location') if directory is not None and not directory.empty
+             else pd.DataFrame(columns=SCHOOL_DIRECTORY_COLUMNS[1:]))
+
+    schools = school_stats.groupby(['Superintendent_Name', 'Location'], sort=True)[['Total_Filled', 'Total']].sum()
+    for (superintendent, location), filled, total in schools.itertuples(name=None):
+        if superintendent == 'Unknown':
+            continue
+        link = [clean_superintendent_name(superintendent), clean_location_name(location)]
+        dbn = names['DBN'].get(location, 'Unknown')
+        school_name = names['School_Name_Full'].get(location, 'Unknown')
+        code = dbn if dbn != 'Unknown' else location
+        title = f"{code} {school_name}" if school_name != 'Unknown' else code
+        detail = f"{location} · {superintendent} · {boroughs.get(location, 'Unknown')}"
+        entries.append(['school', title, detail, link, int(total), _fill_pct(filled, total)])
+
+    for superintendent, filled, total in superintendent_stats.groupby('Superintendent_Name')[['Total_Filled', 'Total']].sum().itertuples(name=None):
+        if superintendent == 'Unknown':
+            continue
+        entries.append(['superintendent', superintendent, 'Superintendent', [clean_superintendent_name(superintendent)],
+                        int(total), _fill_pct(filled, total)])
+
+    for borough, filled, total in borough_stats.groupby('Borough')[['Total_Filled', 'Total']].sum().itertuples(name=None):
+        if borough == 'Unknown':
+            continue
+        entries.append(['borough', borough, 'Borough', [clean_borough_name(borough)],
+                        int(total), _fill_pct(filled, total)])
+    return entries
+
+
+def _delta_postings(postings):
+    """Sorted entry numbers as the first number followed by the gaps between them"""
+    return {key: [ids[0]] + [b - a for a, b in zip(ids, ids[1:])] for key, ids in sorted(postings.items())}
+
+
+def build_search_index(entries, school_page_mode='static'):
+    """
+    Trigram and word prefix index of search entries
+
+    Args:
+        entries: Result of build_search_entries()
+        school_page_mode: 'static' or 'client' school pages (the school links differ)
+
+    Returns:
+        dict: 'version', 'fields', 'urls' (see search_url_templates), 'entries', 'trigrams' and
+              'prefixes' (key -> delta-encoded entry numbers)
+    """
+    trigrams, prefixes = {}, {}
+    for number, entry in enumerate(entries):
+        text = normalize_search_text(f"{entry[1]} {entry[2]}")
+        for gram in {text[i:i + 3] for i in range(len(text) - 2)}:
+            trigrams.setdefault(gram, []).append(number)
+        for prefix in {word[:PREFIX_LENGTH] for word in text.split()}:
+            prefixes.setdefault(prefix, []).append(number)
+    return {
+        'version': SEARCH_INDEX_VERSION,
+        'fields': SEARCH_ENTRY_FIELDS,
+        'urls': search_url_templates(school_page_mode),
+        'entries': entries,
+        'trigrams': _delta_postings(trigrams),
+        'prefixes': _delta_postings(prefixes)
+    }
+
+
+def write_search_index(output_dir, school_stats, superintendent_stats, borough_stats, df, directory=None,
+                       school_page_mode='static'):
+    """
+    Build the search index and write it to the root of the report tree
+
+    Args:
+        output_dir: Root of the report tree
+        (the rest as for build_search_entries)
+
+    Returns:
+        Tuple of (index file path, number of entries)
+    """
+    entries = build_search_entries(school_stats, superintendent_stats, borough_stats, df, directory)
+    index_file = os.path.join(output_dir, SEARCH_INDEX_FILENAME)
+    with open(index_file, 'w', encoding='utf-8') as f:
+        json.dump(build_search_index(entries, school_page_mode), f, ensure_ascii=False, separators=(',', ':'))
+    return index_file, len(entries)
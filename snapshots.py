@@ -0,0 +1,328 @@
+"""
+Build snapshots for NYC DOE Reports
+
+Every build records its rollup (job volume, fill rates and average payroll match % for citywide,
+every borough, superintendent and school) in a dated SQLite snapshot store, so later builds can
+show what changed since an earlier one. One snapshot is kept per date and report period;
+re-running a build on the same day replaces that day's snapshot.
+
+diff_snapshots() aligns two rollups on their (Level, Entity) index and computes every change as
+whole-column arithmetic, so comparing any two snapshots takes milliseconds and needs no rerun.
+
+Usage:
+    python snapshots.py list [--period all]                        List stored snapshots
+    python snapshots.py diff [--from DATE] [--to DATE] [--level school] [--csv OUT]
+                                                                   Changes between two snapshots
+"""
+
+import os
+import sys
+import time
+import sqlite3
+import argparse
+import numpy as np
+import pandas as pd
+
+from data_processing import get_match_column
+from time_series import CITYWIDE_ENTITY
+
+DEFAULT_SNAPSHOT_FILE = 'snapshots.sqlite'
+SNAPSHOTS_TABLE = 'snapshots'
+ROLLUPS_TABLE = 'rollups'
+
+# Rollup level -> grouping column of its statistics table (None = one citywide row)
+ROLLUP_LEVELS = {'citywide': None, 'borough': 'Borough', 'superintendent': 'Superintendent_Name', 'school': 'Location'}
+# Count columns summed over the classifications of each entity
+ROLLUP_COUNT_COLUMNS = ['Total', 'Total_Filled', 'Total_Vacancy', 'Vacancy_Filled', 'Total_Absence', 'Absence_Filled']
+ROLLUP_COLUMNS = ['Level', 'Entity'] + ROLLUP_COUNT_COLUMNS + ['Match_Pct']
+
+DIFF_COLUMNS = [
+    'Level', 'Entity', 'Status',
+    'Previous_Total', 'Total', 'Total_Change',
+    'Previous_Fill_Pct', 'Fill_Pct', 'Fill_Pct_Change',
+    'Previous_Vacancy_Fill_Pct', 'Vacancy_Fill_Pct', 'Vacancy_Fill_Pct_Change',
+    'Previous_Absence_Fill_Pct', 'Absence_Fill_Pct', 'Absence_Fill_Pct_Change',
+    'Previous_Match_Pct', 'Match_Pct', 'Match_Pct_Change'
+]
+# Entities with fewer jobs than this in either snapshot are left out of the movers lists
+MIN_MOVER_JOBS = 20
+
+
+def build_rollup(aggregates):
+    """
+    Roll the statistics of a build up to one row per entity at every level
+
+    Match_Pct is the average school match percentage, as on the report cards.
+
+    Args:
+        aggregates: Render inputs (read_aggregate_store() layout)
+
+    Returns:
+        pandas.DataFrame: ROLLUP_COLUMNS
+    """
+    matching_stats = aggregates.get('matching_stats')
+    match_col = get_match_column(matching_stats)
+    school_match = (
+        matching_stats.groupby('Location')[match_col].mean() if match_col else pd.Series(dtype=float)
+    )
+    # Schools of every superintendent and borough, for their average match percentages
+    school_areas = aggregates['df'][['Location', 'Borough', 'Superintendent_Name']].drop_duplicates()
+
+    frames = []
+    for level, group_col in ROLLUP_LEVELS.items():
+        stats = aggregates[f'{level}_stats']
+        if group_col is None:
+            rollup = stats[ROLLUP_COUNT_COLUMNS].sum().to_frame().T
+            rollup.insert(0, 'Entity', CITYWIDE_ENTITY)
+            rollup['Match_Pct'] = school_match.mean() if len(school_match) else np.nan
+        else:
+            rollup = stats.groupby(group_col, as_index=False)[ROLLUP_COUNT_COLUMNS].sum().rename(columns={group_col: 'Entity'})
+            if level == 'school':
+                rollup['Match_Pct'] = rollup['Entity'].map(school_match)
+            else:
+                parent_match = (
+                    school_areas[[group_col, 'Location']].drop_duplicates()
+                    .assign(Match_Pct=lambda frame: frame['Location'].map(school_match))
+                    .groupby(group_col)['Match_Pct'].mean()
+                )
+                rollup['Match_Pct'] = rollup['Entity'].map(parent_match)
+        rollup.insert(0, 'Level', level)
+        frames.append(rollup)
+
+    rollup = pd.concat(frames, ignore_index=True)[ROLLUP_COLUMNS]
+    rollup[ROLLUP_COUNT_COLUMNS] = rollup[ROLLUP_COUNT_COLUMNS].astype(np.int64)
+    rollup['Entity'] = rollup['Entity'].astype(str)
+    return rollup
+
+
+def open_snapshot_store(snapshot_file):
+    """
+    Open (creating if needed) a snapshot store, making sure its tables exist
+
+    Returns:
+        sqlite3.Connection
+    """
+    os.makedirs(os.path.dirname(snapshot_file) or '.', exist_ok=True)
+    conn = sqlite3.connect(snapshot_file)
+    conn.execute(
+        f"CREATE TABLE IF NOT EXISTS {SNAPSHOTS_TABLE} ("
+        "snapshot_date TEXT, period TEXT, date_range TEXT, entities INTEGER, created_at TEXT, "
+        "PRIMARY KEY (snapshot_date, period))"
+    )
+    count_defs = ', '.join(f"{col} INTEGER" for col in ROLLUP_COUNT_COLUMNS)
+    conn.execute(
+        f"CREATE TABLE IF NOT EXISTS {ROLLUPS_TABLE} ("
+        f"snapshot_date TEXT, period TEXT, Level TEXT, Entity TEXT, {count_defs}, Match_Pct REAL)"
+    )
+    conn.execute(f"CREATE INDEX IF NOT EXISTS idx_rollups_snapshot ON {ROLLUPS_TABLE} (snapshot_date, period)")
+    conn.commit()
+    return conn
+
+
+def write_snapshot(snapshot_file, rollup, snapshot_date, period='all', date_range_info=''):
+    """
+    Store a rollup as the snapshot of a date and period, replacing any earlier one of that date
+
+    Args:
+        snapshot_file: Path of the SQLite snapshot store
+        rollup: DataFrame from build_rollup()
+        snapshot_date: Snapshot date ('YYYY-MM-DD')
+        period: Report period name (see periods.py)
+        date_range_info: Job date range of the snapshotted build, for listings
+
+    Returns:
+        int: Number of rollup rows written
+    """
+    conn = open_snapshot_store(snapshot_file)
+    try:
+        with conn:
+            conn.execute(f"DELETE FROM {ROLLUPS_TABLE} WHERE snapshot_date = ? AND period = ?", (snapshot_date, period))
+            conn.execute(
+                f"INSERT OR REPLACE INTO {SNAPSHOTS_TABLE} (snapshot_date, period, date_range, entities, created_at) "
+                "VALUES (?, ?, ?, ?, ?)",
+                (snapshot_date, period, date_range_info, len(rollup), time.strftime('%Y-%m-%dT%H:%M:%S'))
+            )
+            rollup[ROLLUP_COLUMNS].assign(snapshot_date=snapshot_date, period=period).to_sql(
+                ROLLUPS_TABLE, conn, if_exists='append', index=False
+            )
+    finally:
+        conn.close()
+    return len(rollup)
+
+
+def _open_read_only(snapshot_file):
+    """Open an existing snapshot store read-only"""
+    if not os.path.exists(snapshot_file):
+        raise FileNotFoundError(f"No snapshot store at {snapshot_file}")
+    return sqlite3.connect(f"file:{snapshot_file}?mode=ro", uri=True)
+
+
+def list_snapshots(snapshot_file, period=None):
+    """Stored snapshots (newest first), optionally of one period"""
+    conn = _open_read_only(snapshot_file)
+    try:
+        where, params = (" WHERE period = ?", [period]) if period else ("", [])
+        return pd.read_sql_query(
+            f"SELECT snapshot_date, period, date_range, entities, created_at FROM {SNAPSHOTS_TABLE}{where} "
+            "ORDER BY snapshot_date DESC, period", conn, params=params
+        )
+    finally:
+        conn.close()
+
+
+def read_snapshot(snapshot_file, snapshot_date, period='all'):
+    """
+    Rollup stored for a date and period
+
+    Raises:
+        ValueError: If there is no such snapshot
+    """
+    conn = _open_read_only(snapshot_file)
+    try:
+        rollup = pd.read_sql_query(
+            f"SELECT {', '.join(ROLLUP_COLUMNS)} FROM {ROLLUPS_TABLE} WHERE snapshot_date = ? AND period = ?",
+            conn, params=[snapshot_date, period]
+        )
+    finally:
+        conn.close()
+    if rollup.empty:
+        raise ValueError(f"No '{period}' snapshot for {snapshot_date} in {snapshot_file}")
+    return rollup
+
+
+def previous_snapshot_date(snapshot_file, before_date, period='all'):
+    """Date of the latest snapshot of a period taken before the given date, or None"""
+    if not os.path.exists(snapshot_file):
+        return None
+    snapshots = list_snapshots(snapshot_file, period)
+    earlier = snapshots[snapshots['snapshot_date'] < before_date]
+    return earlier['snapshot_date'].iloc[0] if not earlier.empty else None
+
+
+def _pct(part, whole):
+    """Percentage column with NaN where the whole is zero"""
+    with np.errstate(invalid='ignore', divide='ignore'):
+        return np.where(whole > 0, part / whole * 100, np.nan)
+
+
+def diff_snapshots(current, previous):
+    """
+    Changes between two rollups, aligned on (Level, Entity)
+
+    Args:
+        current: Rollup of the newer build
+        previous: Rollup of the older build
+
+    Returns:
+        pandas.DataFrame: DIFF_COLUMNS; Status is 'new' or 'dropped' for entities found in only one
+                          snapshot, otherwise 'changed' or 'unchanged'. Rates are percentages and their
+                          changes percentage points.
+    """
+    keys = ['Level', 'Entity']
+    aligned = current.set_index(keys).join(previous.set_index(keys), how='outer', rsuffix='_prev')
+    has_current = aligned['Total'].notna().to_numpy()
+    has_previous = aligned['Total_prev'].notna().to_numpy()
+    counts = aligned.fillna({col: 0 for col in ROLLUP_COUNT_COLUMNS + [f'{col}_prev' for col in ROLLUP_COUNT_COLUMNS]})
+
+    diff = pd.DataFrame(index=aligned.index)
+    diff['Previous_Total'] = counts['Total_prev'].astype(np.int64)
+    diff['Total'] = counts['Total'].astype(np.int64)
+    diff['Total_Change'] = diff['Total'] - diff['Previous_Total']
+    for name, filled, total in [('Fill_Pct', 'Total_Filled', 'Total'),
+                                ('Vacancy_Fill_Pct', 'Vacancy_Filled', 'Total_Vacancy'),
+                                ('Absence_Fill_Pct', 'Absence_Filled', 'Total_Absence')]:
+        diff[f'Previous_{name}'] = _pct(counts[f'{filled}_prev'], counts[f'{total}_prev'])
+        diff[name] = _pct(counts[filled], counts[total])
+        diff[f'{name}_Change'] = diff[name] - diff[f'Previous_{name}']
+    diff['Previous_Match_Pct'] = aligned['Match_Pct_prev']
+    diff['Match_Pct'] = aligned['Match_Pct']
+    diff['Match_Pct_Change'] = diff['Match_Pct'] - diff['Previous_Match_Pct']
+
+    moved = (diff['Total_Change'] != 0) | (diff['Fill_Pct_Change'].fillna(0) != 0) | (diff['Match_Pct_Change'].fillna(0) != 0)
+    diff['Status'] = np.select(
+        [~has_previous, ~has_current, moved.to_numpy()], ['new', 'dropped', 'changed'], default='unchanged'
+    )
+    return diff.reset_index()[DIFF_COLUMNS].round(2)
+
+
+def top_movers(diff, level, n=5, entities=None, min_jobs=MIN_MOVER_JOBS):
+    """
+    Entities whose overall fill rate rose and fell the most
+
+    Args:
+        diff: DataFrame from diff_snapshots()
+        level: Rollup level to rank
+        n: Entities per list
+        entities: Optional collection of entity names to rank within (e.g. one superintendent's schools)
+        min_jobs: Minimum jobs in both snapshots
+
+    Returns:
+        Tuple of (improved, declined) DataFrames, biggest change first
+    """
+    candidates = diff[
+        (diff['Level'] == level) & diff['Status'].isin(['changed', 'unchanged'])
+        & (diff['Total'] >= min_jobs) & (diff['Previous_Total'] >= min_jobs)
+    ]
+    if entities is not None:
+        candidates = candidates[candidates['Entity'].isin(entities)]
+    improved = candidates[candidates['Fill_Pct_Change'] > 0].nlargest(n, 'Fill_Pct_Change')
+    declined = candidates[candidates['Fill_Pct_Change'] < 0].nsmallest(n, 'Fill_Pct_Change')
+    return improved, declined
+
+
+def _print_frame(df, csv_file=None):
+    """Print a result, or write it to CSV"""
+    if csv_file:
+        df.to_csv(csv_file, index=False)
+        print(f"✓ Wrote {len(df)} rows to {csv_file}")
+    else:
+        with pd.option_context('display.max_rows', 200, 'display.width', 200):
+            print(df.to_string(index=False) if not df.empty else '(no rows)')
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Dated snapshots of the report rollups')
+    parser.add_argument('--snapshot-file', default=DEFAULT_SNAPSHOT_FILE,
+                        help=f'Snapshot store file (default: {DEFAULT_SNAPSHOT_FILE})')
+    subparsers = parser.add_subparsers(dest='command', required=True)
+
+    list_parser = subparsers.add_parser('list', help='List stored snapshots')
+    list_parser.add_argument('--period', help='Only snapshots of this report period')
+
+    diff_parser = subparsers.add_parser('diff', help='Changes between two snapshots')
+    diff_parser.add_argument('--period', default='all', help='Report period (default: all)')
+    diff_parser.add_argument('--from', dest='from_date', help='Older snapshot date (default: the one before --to)')
+    diff_parser.add_argument('--to', dest='to_date', help='Newer snapshot date (default: the latest)')
+    diff_parser.add_argument('--level', choices=list(ROLLUP_LEVELS), help='Only this level')
+    diff_parser.add_argument('--changed', action='store_true', help='Only entities that changed')
+    diff_parser.add_argument('--csv', help='Write the result to this CSV file')
+
+    args = parser.parse_args(sys.argv[1:] if argv is None else argv)
+
+    try:
+        if args.command == 'list':
+            _print_frame(list_snapshots(args.snapshot_file, args.period))
+        elif args.command == 'diff':
+            snapshots = list_snapshots(args.snapshot_file, args.period)
+            if snapshots.empty:
+                raise ValueError(f"No '{args.period}' snapshots in {args.snapshot_file}")
+            to_date = args.to_date or snapshots['snapshot_date'].iloc[0]
+            from_date = args.from_date or previous_snapshot_date(args.snapshot_file, to_date, args.period)
+            if from_date is None:
+                raise ValueError(f"No snapshot before {to_date} to compare with")
+            diff = diff_snapshots(read_snapshot(args.snapshot_file, to_date, args.period),
+                                  read_snapshot(args.snapshot_file, from_date, args.period))
+            if args.level:
+                diff = diff[diff['Level'] == args.level]
+            if args.changed:
+                diff = diff[diff['Status'] != 'unchanged']
+            print(f"Changes from {from_date} to {to_date} ({args.period}):")
+            _print_frame(diff, args.csv)
+    except (FileNotFoundError, sqlite3.Error, ValueError) as e:
+        print(f"✗ Error: {e}")
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,187 @@
+"""
+Substitute (EISID) utilization for NYC DOE Reports
+
+The matching analysis uses SubCentral's Specified Sub and the SREPP EISID only as join keys. This
+module looks at the substitutes themselves: for every EISID, the jobs and job days it filled, the
+schools and classifications it covered and the share of its job days found in payroll, plus the
+substitutes carrying the most job days in every borough and superintendency.
+
+EISIDs are factorized to integer codes once; every per-substitute measure is then an np.bincount
+over those codes (distinct schools, days and classifications are counted over np.unique'd
+combined codes), so the stage stays fast at hundreds of thousands of job days. The top-K lists
+keep a heap of size K per borough/superintendent (heapq.nlargest).
+
+EISIDs identify individual employees, so these tables are only rendered and exported when the
+build is run with --internal (the aggregate store always keeps them).
+"""
+
+import heapq
+import numpy as np
+import pandas as pd
+
+from data_processing import JOB_COUNT_COL
+
+SUBSTITUTE_COLUMNS = ['EISID', 'Jobs', 'Job_Days', 'Schools', 'Classifications', 'Matched_Days', 'Match_Pct',
+                      'Primary_Location', 'Borough', 'Superintendent_Name']
+TOP_SUBSTITUTE_COLUMNS = ['Level', 'Entity', 'Rank', 'EISID', 'Job_Days', 'Share_Pct', 'Schools', 'Match_Pct']
+# Report level -> column naming each school's parent at that level
+TOP_SUBSTITUTE_LEVELS = {'borough': 'Borough', 'superintendent': 'Superintendent_Name'}
+TOP_SUBSTITUTES = 10
+
+
+def _stripped_strings(values, drop_chars=0):
+    """
+    values.astype(str).str.strip() (minus the first drop_chars characters), stripping each distinct
+    value once instead of every row
+    """
+    codes, uniques = pd.factorize(values)
+    labels = pd.Index(uniques).astype(str).str.strip().str[drop_chars:].to_numpy(dtype=object)
+    return np.where(codes >= 0, labels[codes], 'nan') if len(labels) else np.full(len(codes), 'nan', dtype=object)
+
+
+def _substitute_rows(df, subcentral_keys=None):
+    """
+    Filled SubCentral jobs with a numeric Specified Sub and a valid Job Start
+
+    Returns:
+        pandas.DataFrame: Location (stripped string), EISID (int64), Day (days since epoch),
+                          Classification (None for pre-aggregated keys) and Jobs (job count)
+    """
+    if 'Specified Sub' not in df.columns or 'Job Start' not in df.columns:
+        if subcentral_keys is None or subcentral_keys.empty:
+            return None
+        # Streamed builds only keep the folded matching keys (no classification)
+        return pd.DataFrame({
+            'Location': subcentral_keys['Location'].to_numpy(),
+            'EISID': subcentral_keys['EISID'].to_numpy(dtype=np.int64),
+            'Day': subcentral_keys['Day'].to_numpy(dtype=np.int64),
+            'Classification': None,
+            'Jobs': subcentral_keys[JOB_COUNT_COL].to_numpy(dtype=np.int64)
+        })
+
+    filled = (df['Fill_Status'] == 'Filled').to_numpy()
+    eisid = pd.to_numeric(df['Specified Sub'][filled], errors='coerce')
+    job_start = pd.to_datetime(df['Job Start'][filled], errors='coerce')
+    valid = (eisid.notna() & job_start.notna()).to_numpy()
+    return pd.DataFrame({
+        'Location': _stripped_strings(df['Location'][filled][valid]),
+        'EISID': eisid.to_numpy()[valid].astype(np.int64),
+        'Day': job_start.to_numpy()[valid].astype('datetime64[D]').astype(np.int64),
+        'Classification': df['Classification'][filled][valid].to_numpy(),
+        'Jobs': np.ones(int(valid.sum()), dtype=np.int64)
+    })
+
+
+def _payroll_day_codes(srepp_df, eisids, locations, first_day, n_days):
+    """
+    Payroll records as (substitute, school, day) codes in the layout of compute_substitute_stats()
+
+    SCHOOL values are DBNs; without the 2-digit district prefix they are the location code, which
+    carries the same job as SubCentral only when it is the full SubCentral Location (the rule the
+    matching analysis uses for Matched Jobs). Records of other substitutes, schools or days cannot
+    match a SubCentral job day and are dropped.
+
+    Returns:
+        numpy.ndarray of int64 codes, or None without usable payroll data
+    """
+    if srepp_df is None or srepp_df.empty or not {'SCHOOL', 'EISID', 'DATE'} <= set(srepp_df.columns):
+        return None
+    sub_codes = pd.Index(eisids).get_indexer(pd.to_numeric(srepp_df['EISID'], errors='coerce'))
+    loc_codes = pd.Index(locations).get_indexer(_stripped_strings(srepp_df['SCHOOL'], drop_chars=2))
+    pay_date = pd.to_datetime(srepp_df['DATE'], errors='coerce').to_numpy(dtype='datetime64[ns]').astype('datetime64[D]')
+    day_codes = pay_date.astype(np.int64) - first_day
+    valid = (sub_codes >= 0) & (loc_codes >= 0) & ~np.isnat(pay_date) & (day_codes >= 0) & (day_codes < n_days)
+    return (sub_codes[valid].astype(np.int64) * len(locations) + loc_codes[valid]) * n_days + day_codes[valid]
+
+
+def _distinct_per_code(codes, n_codes, other_codes, n_other):
+    """Number of distinct other_codes of every code"""
+    pairs = pd.unique(codes.astype(np.int64) * n_other + other_codes)
+    return np.bincount(pairs // n_other, minlength=n_codes)
+
+
+def compute_substitute_stats(df, srepp_df=None, subcentral_keys=None, top_k=TOP_SUBSTITUTES):
+    """
+    Per-substitute utilization and the top substitutes of every borough and superintendent
+
+    A job day is a distinct (school, day) a substitute filled jobs on; Match_Pct is the share of
+    those job days that have a payroll record for the same EISID, school and day.
+
+    Args:
+        df: Main processed DataFrame, or the streaming job count cube together with subcentral_keys
+        srepp_df: Optional SREPP payroll data, for Matched_Days and Match_Pct
+        subcentral_keys: Optional SubCentral keys folded by stream_job_cube()
+        top_k: Substitutes kept per borough and superintendent
+
+    Returns:
+        Tuple of (substitutes, top_substitutes) DataFrames with SUBSTITUTE_COLUMNS (most job days
+        first) and TOP_SUBSTITUTE_COLUMNS; both empty without substitute data
+    """
+    empty = pd.DataFrame(columns=SUBSTITUTE_COLUMNS), pd.DataFrame(columns=TOP_SUBSTITUTE_COLUMNS)
+    rows = _substitute_rows(df, subcentral_keys)
+    if rows is None or rows.empty:
+        return empty
+
+    sub_codes, eisids = pd.factorize(rows['EISID'], sort=True)
+    loc_codes, locations = pd.factorize(rows['Location'], sort=True)
+    first_day = int(rows['Day'].min())
+    day_codes = rows['Day'].to_numpy(dtype=np.int64) - first_day
+    n_subs, n_locations, n_days = len(eisids), len(locations), int(day_codes.max()) + 1
+    jobs = rows['Jobs'].to_numpy(dtype=np.float64)
+
+    # (substitute, school) pairs and their distinct (substitute, school, day) job days
+    pair_codes = sub_codes.astype(np.int64) * n_locations + loc_codes
+    pair_inverse, pair_index = pd.factorize(pair_codes, sort=True)
+    pair_jobs = np.bincount(pair_inverse, weights=jobs)
+    day_keys = pd.unique(pair_codes * n_days + day_codes)
+    pair_days = np.bincount(np.searchsorted(pair_index, day_keys // n_days), minlength=len(pair_index))
+    pair_subs, pair_locs = pair_index // n_locations, pair_index % n_locations
+
+    substitutes = pd.DataFrame({
+        'EISID': eisids.to_numpy(),
+        'Jobs': np.bincount(sub_codes, weights=jobs, minlength=n_subs).astype(np.int64),
+        'Job_Days': np.bincount(pair_subs, weights=pair_days, minlength=n_subs).astype(np.int64),
+        'Schools': np.bincount(pair_subs, minlength=n_subs)
+    })
+    class_codes, _ = pd.factorize(rows['Classification'])
+    has_class = class_codes >= 0
+    substitutes['Classifications'] = _distinct_per_code(
+        sub_codes[has_class], n_subs, class_codes[has_class], int(class_codes.max()) + 1
+    ) if has_class.any() else 0
+
+    # Job days found in payroll: SubCentral job day codes that are also payroll codes
+    payroll = _payroll_day_codes(srepp_df, eisids, locations, first_day, n_days)
+    if payroll is not None:
+        matched = day_keys[pd.Series(day_keys).isin(payroll).to_numpy()]
+        substitutes['Matched_Days'] = np.bincount(matched // (n_locations * n_days), minlength=n_subs)
+        substitutes['Match_Pct'] = (substitutes['Matched_Days'] / substitutes['Job_Days'] * 100).round(1)
+    else:
+        substitutes['Matched_Days'] = 0
+        substitutes['Match_Pct'] = np.nan
+
+    # Primary school: the pair with the most job days (then jobs, then location) of every substitute
+    order = np.lexsort((-pair_jobs, -pair_days, pair_subs))
+    first = order[np.unique(pair_subs[order], return_index=True)[1]]
+    schools = df[['Location'] + [col for col in TOP_SUBSTITUTE_LEVELS.values() if col in df.columns]].drop_duplicates('Location')
+    schools = schools.assign(Location=schools['Location'].astype(str).str.strip()).drop_duplicates('Location').set_index('Location')
+    substitutes['Primary_Location'] = locations.to_numpy()[pair_locs[first]]
+    for col in TOP_SUBSTITUTE_LEVELS.values():
+        substitutes[col] = substitutes['Primary_Location'].map(schools[col]) if col in schools.columns else None
+
+    # Job days of every substitute in every borough/superintendency, top K by heap per entity
+    pairs = pd.DataFrame({'Sub': pair_subs, 'Location': locations.to_numpy()[pair_locs], 'Job_Days': pair_days})
+    sub_eisids, sub_schools, sub_match = (substitutes[col].to_numpy() for col in ('EISID', 'Schools', 'Match_Pct'))
+    top_rows = []
+    for level, col in TOP_SUBSTITUTE_LEVELS.items():
+        if col not in schools.columns:
+            continue
+        entity_days = pairs.assign(Entity=pairs['Location'].map(schools[col])).groupby(['Entity', 'Sub'])['Job_Days'].sum()
+        for entity, days in entity_days.groupby(level='Entity', sort=True):
+            total_days = int(days.sum())
+            top = heapq.nlargest(top_k, zip(days.to_numpy(), -days.index.get_level_values('Sub').to_numpy()))
+            for rank, (sub_days, neg_sub) in enumerate(top, start=1):
+                top_rows.append((level, entity, rank, sub_eisids[-neg_sub], int(sub_days), round(sub_days / total_days * 100, 1),
+                                 sub_schools[-neg_sub], sub_match[-neg_sub]))
+
+    substitutes = substitutes[SUBSTITUTE_COLUMNS].sort_values(['Job_Days', 'EISID'], ascending=[False, True], ignore_index=True)
+    return substitutes, pd.DataFrame(top_rows, columns=TOP_SUBSTITUTE_COLUMNS)
@@ -0,0 +1,190 @@
+"""
+Static SVG charts for NYC DOE Reports
+
+A dependency-free alternative to the Plotly grouped bar and classification pie charts, selected
+with --chart-backend svg (see chart_utils.set_chart_backend). The charts show the same four
+series with the same colors and labels, drawn as SVG markup that is inlined in the report page:
+no chart file, no iframe and no JavaScript. Building one is a few string joins instead of a
+Plotly figure, and each chart adds a few KB to its page instead of a separate ~3.5 MB chart file.
+"""
+
+import math
+from html import escape
+
+# Job series shown by the bar and pie charts: (label, statistics column, color)
+CHART_SERIES = [
+    ('Vacancy Filled', 'Vacancy_Filled', 'darkgreen'),
+    ('Vacancy Unfilled', 'Vacancy_Unfilled', 'lightcoral'),
+    ('Absence Filled', 'Absence_Filled', 'forestgreen'),
+    ('Absence Unfilled', 'Absence_Unfilled', 'red')
+]
+FONT_FAMILY = 'Arial, sans-serif'
+# Approximate width of one character of 12px Arial, for label layout
+CHAR_WIDTH = 6.5
+# Slices smaller than this share of a pie get no inside label
+MIN_LABEL_SHARE = 0.04
+
+
+def _text(x, y, label, size=12, anchor='middle', color='#444', weight='normal', transform=''):
+    """One SVG text element"""
+    transform_attr = f' transform="{transform}"' if transform else ''
+    return (f'<text x="{x:.1f}" y="{y:.1f}" font-size="{size}" text-anchor="{anchor}" fill="{color}" '
+            f'font-weight="{weight}"{transform_attr}>{escape(str(label))}</text>')
+
+
+def _svg(width, height, body):
+    """Wrap SVG elements in an svg element"""
+    return (f'<svg xmlns="http://www.w3.org/2000/svg" width="{width}" height="{height}" '
+            f'viewBox="0 0 {width} {height}" font-family="{FONT_FAMILY}">{"".join(body)}</svg>')
+
+
+def _legend(x, y, labels, colors):
+    """Vertical legend with one colored swatch per series"""
+    body = []
+    for i, (label, color) in enumerate(zip(labels, colors)):
+        body.append(f'<rect x="{x}" y="{y + i * 20}" width="12" height="12" fill="{color}"/>')
+        body.append(_text(x + 18, y + i * 20 + 10, label, anchor='start'))
+    return body
+
+
+def nice_axis(max_value, ticks=5):
+    """
+    Round axis maximum and tick step (1, 2 or 5 x 10^n) covering max_value
+
+    Returns:
+        Tuple of (axis_max, step)
+    """
+    if max_value <= 0:
+        return 1, 1
+    raw_step = max_value / ticks
+    magnitude = 10 ** math.floor(math.log10(raw_step))
+    step = next(m * magnitude for m in (1, 2, 5, 10) if m * magnitude >= raw_step)
+    return step * math.ceil(max_value / step), step
+
+
+def grouped_bar_svg(categories, series, title, width=1200, height=500):
+    """
+    Grouped bar chart: one group per category, one bar per series, values on the bars
+
+    Args:
+        categories: Category labels (x axis)
+        series: List of (label, values, color), values aligned with categories
+        title: Chart title
+        width: Width in pixels
+        height: Height in pixels
+
+    Returns:
+        str: SVG markup
+    """
+    left, right, top, bottom = 70, 170, 50, 60
+    max_label = max((len(str(category)) for category in categories), default=0)
+    group_width = (width - left - right) / max(len(categories), 1)
+    # Rotate the category labels when they do not fit under their group, as Plotly does
+    rotate = max_label * CHAR_WIDTH > group_width
+    if rotate:
+        bottom += int(min(max_label, 40) * CHAR_WIDTH * 0.5)
+    plot_width, plot_height = width - left - right, height - top - bottom
+    axis_max, step = nice_axis(max((max(values, default=0) for _, values, _ in series), default=0))
+
+    body = [f'<rect width="{width}" height="{height}" fill="white"/>', _text(left, 30, title, size=17, anchor='start')]
+    # Gridlines and y axis labels
+    for i in range(int(round(axis_max / step)) + 1):
+        y = top + plot_height - i * step / axis_max * plot_height
+        body.append(f'<line x1="{left}" x2="{left + plot_width}" y1="{y:.1f}" y2="{y:.1f}" stroke="#e5e5e5"/>')
+        body.append(_text(left - 8, y + 4, f"{int(i * step):,}", anchor='end'))
+    body.append(_text(18, top + plot_height / 2, 'Number of Jobs', size=13, transform=f'rotate(-90 18 {top + plot_height / 2:.1f})'))
+
+    # Bars, with a small gap on both sides of every group
+    bar_width = group_width * 0.8 / max(len(series), 1)
+    for c, category in enumerate(categories):
+        group_left = left + c * group_width + group_width * 0.1
+        for s, (label, values, color) in enumerate(series):
+            value = values[c]
+            bar_height = value / axis_max * plot_height
+            x, y = group_left + s * bar_width, top + plot_height - bar_height
+            body.append(f'<rect x="{x:.1f}" y="{y:.1f}" width="{bar_width:.1f}" height="{bar_height:.1f}" fill="{color}">'
+                        f'<title>{escape(label)}: {int(value):,}</title></rect>')
+            if value > 0:
+                body.append(_text(x + bar_width / 2, y - 4, f"{int(value):,}", size=10))
+        label_x, label_y = left + (c + 0.5) * group_width, top + plot_height + 18
+        if rotate:
+            body.append(_text(label_x, label_y, category, anchor='end', transform=f'rotate(-30 {label_x:.1f} {label_y:.1f})'))
+        else:
+            body.append(_text(label_x, label_y, category))
+    body.append(f'<line x1="{left}" x2="{left + plot_width}" y1="{top + plot_height}" y2="{top + plot_height}" stroke="#999"/>')
+    body.append(_text(left + plot_width / 2, height - 12, 'Classification', size=13))
+    body.extend(_legend(width - right + 20, top, [label for label, _, _ in series], [color for _, _, color in series]))
+    return _svg(width, height, body)
+
+
+def _ring_slice(cx, cy, outer, inner, start, end):
+    """Path of one donut slice between two angles (radians, clockwise from 12 o'clock)"""
+    def point(radius, angle):
+        return cx + radius * math.sin(angle), cy - radius * math.cos(angle)
+    large = 1 if end - start > math.pi else 0
+    (x0, y0), (x1, y1) = point(outer, start), point(outer, end)
+    (x2, y2), (x3, y3) = point(inner, end), point(inner, start)
+    return (f'M{x0:.2f},{y0:.2f} A{outer},{outer} 0 {large} 1 {x1:.2f},{y1:.2f} '
+            f'L{x2:.2f},{y2:.2f} A{inner},{inner} 0 {large} 0 {x3:.2f},{y3:.2f} Z')
+
+
+def donut_svg(labels, values, colors, title_lines, width=400, height=450, hole=0.3):
+    """
+    Donut chart with value and percent inside every slice that is large enough
+
+    Args:
+        labels: Slice labels (legend)
+        values: Slice values
+        colors: Slice colors
+        title_lines: Title lines, centered above the chart
+        width: Width in pixels
+        height: Height in pixels
+        hole: Inner radius as a share of the outer radius
+
+    Returns:
+        str: SVG markup
+    """
+    total = sum(values)
+    title_height = 24 * len(title_lines) + 20
+    legend_height = 20 * len(labels) + 10
+    outer = min(width - 40, height - title_height - legend_height - 20) / 2
+    inner = outer * hole
+    cx, cy = width / 2, title_height + 10 + outer
+
+    body = [f'<rect width="{width}" height="{height}" fill="white"/>']
+    for i, line in enumerate(title_lines):
+        body.append(_text(width / 2, 28 + i * 22, line, size=16 if i == 0 else 14, color='#333'))
+
+    angle = 0.0
+    for label, value, color in zip(labels, values, colors):
+        if total <= 0 or value <= 0:
+            continue
+        share = value / total
+        tooltip = f'<title>{escape(label)}: {int(value):,} ({share:.1%})</title>'
+        if share >= 0.9999:
+            # A full ring cannot be drawn as one arc, so draw two halves
+            for start, end in ((0, math.pi), (math.pi, 2 * math.pi)):
+                body.append(f'<path d="{_ring_slice(cx, cy, outer, inner, start, end)}" fill="{color}">{tooltip}</path>')
+        else:
+            path = _ring_slice(cx, cy, outer, inner, angle, angle + share * 2 * math.pi)
+            body.append(f'<path d="{path}" fill="{color}" stroke="white" stroke-width="1">{tooltip}</path>')
+        if share >= MIN_LABEL_SHARE:
+            middle = angle + share * math.pi
+            radius = (outer + inner) / 2
+            x, y = cx + radius * math.sin(middle), cy - radius * math.cos(middle)
+            body.append(_text(x, y - 2, f"{int(value):,}", size=14, color='white'))
+            body.append(_text(x, y + 14, f"{share:.1%}", size=14, color='white'))
+        angle += share * 2 * math.pi
+
+    body.extend(_legend(cx - 60, cy + outer + 20, labels, colors))
+    return _svg(width, height, body)
+
+
+def inline_svg_chart(svg, title):
+    """
+    Wrap an SVG chart for inlining in a report page
+
+    Returns:
+        str: A div (class svg-chart) holding the SVG, labelled with the chart title
+    """
+    return f'<div class="svg-chart" role="img" aria-label="{escape(title)}">{svg}</div>'
@@ -0,0 +1,329 @@
+"""
+Seeded synthetic data generator for NYC DOE Reports
+
+Produces SubCentral job exports, SREPP payroll exports and a superintendent mapping table
+with the same file names and quirks as the real inputs (Excel-serial and string job
+dates, alternating blank SREPP columns with a junk second row, 2-digit DBN prefixes), so
+the pipeline can be exercised and benchmarked without the real data leaving the building.
+"""
+
+import os
+import sys
+import numpy as np
+import pandas as pd
+
+# File names expected by para_fillrate_modular.main()
+SUBCENTRAL_DIR = 'Fill Rate Data'
+SUBCENTRAL_FILENAMES = [
+    'mayjobs.csv', 'junejobs.csv', 'apriljobs.csv',
+    'febmarchjobs.csv', 'decjanjobs.csv', 'sepoctnovjobs.csv'
+]
+SREPP_FILENAMES = ['SREPP1.csv', 'SREPP2.csv']
+MAPPING_FILENAME = '8.8.25 Synthetic DBN Affiliation.csv'
+
+# Community school districts by borough letter (District 75 schools exist in every borough)
+BOROUGH_DISTRICTS = {
+    'M': [1, 2, 3, 4, 5, 6],
+    'X': [7, 8, 9, 10, 11, 12],
+    'K': [13, 14, 15, 16, 17, 18, 19, 20, 21, 22, 23, 32],
+    'Q': [24, 25, 26, 27, 28, 29, 30],
+    'R': [31]
+}
+BOROUGH_NAMES = {'M': 'Manhattan', 'X': 'Bronx', 'K': 'Brooklyn', 'Q': 'Queens', 'R': 'Staten Island'}
+BOROUGH_WEIGHTS = {'M': 0.20, 'X': 0.22, 'K': 0.30, 'Q': 0.22, 'R': 0.06}
+
+# Classification spellings as they appear in SubCentral exports, with rough relative frequency
+CLASSIFICATIONS = {
+    'PARAPROFESSIONAL': 0.46,
+    'FEMALE PARA': 0.10,
+    'MALE PARA': 0.04,
+    'SPANISH SPEAKING PARA': 0.12,
+    'CHINESE SPEAKING PARA': 0.05,
+    'HEALTH PARA': 0.09,
+    'BEHAVIOR MANAGEMENT PARA': 0.06,
+    'CREOLE SPEAKING\nPARA': 0.03,
+    'ARABIC SPEAKING PARA': 0.03,
+    'BENGALI  SPEAKING PARA': 0.02
+}
+FILLED_STATUSES = {
+    'Finished/Admin Assigned': 0.18,
+    'Finished/IVR Assigned': 0.06,
+    'Finished/IVR Sub Search': 0.05,
+    'Finished/Pre Arranged': 0.16,
+    'Finished/Web Sub Search': 0.25
+}
+UNFILLED_STATUSES = {'Unfilled': 0.22, 'Cancelled': 0.06, 'Finished/No Sub Required': 0.02}
+JOB_TYPES = {'Absence': 0.62, 'Vacancy': 0.38}
+
+SREPP_COLUMNS = ['SCHOOL', 'EISID', 'DATE', 'HOURS', 'TITLE', 'PAYCODE', 'RATE', 'AMOUNT', 'PAY_PERIOD', 'AGENCY']
+
+LAST_NAMES = [
+    'Alvarez', 'Brown', 'Chen', 'Davis', 'Edwards', 'Fernandez', 'Garcia', 'Harris', 'Ibrahim',
+    'Johnson', 'Kim', 'Lopez', 'Martinez', 'Nguyen', 'Okafor', 'Patel', 'Quinn', 'Rivera',
+    'Smith', 'Thompson', 'Umar', 'Vasquez', 'Williams', 'Xu', 'Young', 'Zhang'
+]
+FIRST_NAMES = [
+    'Ana', 'Brian', 'Carmen', 'David', 'Elena', 'Frank', 'Grace', 'Hector', 'Irene', 'James',
+    'Karen', 'Luis', 'Maria', 'Nadia', 'Omar', 'Priya', 'Rafael', 'Sandra', 'Tomas', 'Yvonne'
+]
+
+
+def _weighted_choice(rng, options, size):
+    """Draw `size` values from an {option: weight} dict"""
+    values = list(options)
+    weights = np.array(list(options.values()), dtype=float)
+    return np.asarray(values, dtype=object)[rng.choice(len(values), size=size, p=weights / weights.sum())]
+
+
+def generate_schools(rng, n_schools=1600, n_superintendents=45, d75_share=0.05):
+    """
+    Generate a school directory with realistic DBN/Location codes
+
+    Args:
+        rng: numpy Generator
+        n_schools: Number of schools
+        n_superintendents: Number of superintendents the schools are spread across
+        d75_share: Share of schools in District 75 (citywide special education)
+
+    Returns:
+        pandas.DataFrame: Columns DBN, Dist, Boro, Location, Superintendent, School Name
+    """
+    borough_letters = list(BOROUGH_WEIGHTS)
+    weights = np.array(list(BOROUGH_WEIGHTS.values()))
+    boroughs = rng.choice(borough_letters, size=n_schools, p=weights / weights.sum())
+
+    districts = np.array([rng.choice(BOROUGH_DISTRICTS[b]) for b in boroughs])
+    districts[rng.random(n_schools) < d75_share] = 75
+
+    # School numbers are unique within a borough so Location (borough letter + number) is unique
+    locations = []
+    used = {b: set() for b in borough_letters}
+    for borough in boroughs:
+        number = int(rng.integers(1, 1000))
+        while number in used[borough]:
+            number = int(rng.integers(1, 1000))
+        used[borough].add(number)
+        locations.append(f"{borough}{number:03d}")
+    locations = np.array(locations)
+    dbns = np.char.add(np.char.zfill(districts.astype(str), 2), locations)
+
+    superintendents = [
+        f"{LAST_NAMES[i % len(LAST_NAMES)]}, {FIRST_NAMES[(i * 7) % len(FIRST_NAMES)]}"
+        + (f" {chr(65 + i // len(LAST_NAMES))}." if i >= len(LAST_NAMES) else '')
+        for i in range(n_superintendents)
+    ]
+    # Superintendents oversee districts, so assign by district with a little spread
+    district_ids = np.unique(districts)
+    district_supt = {d: superintendents[i % n_superintendents] for i, d in enumerate(district_ids)}
+    supt = np.array([district_supt[d] for d in districts], dtype=object)
+    reassign = rng.random(n_schools) < 0.5
+    supt[reassign] = np.asarray(superintendents, dtype=object)[rng.integers(0, n_superintendents, reassign.sum())]
+
+    return pd.DataFrame({
+        'DBN': dbns,
+        'Dist': districts,
+        'Boro': [BOROUGH_NAMES[b] for b in boroughs],
+        'Location': locations,
+        'Superintendent': supt,
+        'School Name': [f"P.S. {int(loc[1:])} {BOROUGH_NAMES[loc[0]]}" for loc in locations]
+    })
+
+
+def school_day_calendar(start_date='2024-09-05', end_date='2025-06-26', years=1):
+    """Return the weekdays of one or more consecutive school years"""
+    days = []
+    start, end = pd.Timestamp(start_date), pd.Timestamp(end_date)
+    for year in range(years):
+        offset = pd.DateOffset(years=year - years + 1)
+        days.append(pd.bdate_range(start + offset, end + offset))
+    return days[0].append(days[1:]) if len(days) > 1 else days[0]
+
+
+def generate_subcentral_jobs(rng, schools, n_jobs, calendar, sub_pool_size=None,
+                             excel_serial_share=0.3, unnamed_sub_share=0.05):
+    """
+    Generate SubCentral job rows
+
+    Args:
+        rng: numpy Generator
+        schools: DataFrame from generate_schools()
+        n_jobs: Number of job rows
+        calendar: DatetimeIndex of school days to draw job dates from
+        sub_pool_size: Number of distinct substitute EISIDs (defaults to 6 per school)
+        excel_serial_share: Share of Job Start values written as Excel serial numbers
+        unnamed_sub_share: Share of filled jobs with no Specified Sub recorded
+
+    Returns:
+        pandas.DataFrame: Columns Location, District, Classification, Type, Status, Job Start, Specified Sub
+    """
+    # Larger schools post more jobs: draw school volume weights from a lognormal
+    school_weights = rng.lognormal(mean=0.0, sigma=0.8, size=len(schools))
+    school_idx = rng.choice(len(schools), size=n_jobs, p=school_weights / school_weights.sum())
+
+    statuses = _weighted_choice(rng, {**FILLED_STATUSES, **UNFILLED_STATUSES}, n_jobs)
+    filled = np.isin(statuses, list(FILLED_STATUSES))
+
+    job_dates = calendar[rng.integers(0, len(calendar), n_jobs)]
+    job_start = np.asarray(job_dates.strftime('%m/%d/%Y'), dtype=object)
+    serial_mask = rng.random(n_jobs) < excel_serial_share
+    serials = (job_dates - pd.Timestamp('1899-12-30')).days.to_numpy()
+    job_start[serial_mask] = serials[serial_mask].astype(str)
+
+    # Subs mostly work near home: draw each school's subs from its own slice of the pool
+    sub_pool_size = sub_pool_size or max(50, 6 * len(schools))
+    pool = rng.choice(np.arange(100000, 9999999), size=sub_pool_size, replace=False)
+    home_offset = (school_idx * (sub_pool_size // max(1, len(schools)))) % sub_pool_size
+    sub_idx = (home_offset + rng.geometric(0.25, n_jobs) - 1) % sub_pool_size
+    specified_sub = pool[sub_idx].astype(float)
+    specified_sub[~filled | (rng.random(n_jobs) < unnamed_sub_share)] = np.nan
+
+    # Real exports have inconsistent whitespace and casing in the Type column
+    job_types = _weighted_choice(rng, JOB_TYPES, n_jobs)
+    messy = rng.random(n_jobs) < 0.2
+    job_types[messy] = np.char.add(' ', np.char.lower(job_types[messy].astype(str)))
+
+    return pd.DataFrame({
+        'Location': schools['Location'].to_numpy()[school_idx],
+        'District': schools['Dist'].to_numpy()[school_idx],
+        'Classification': _weighted_choice(rng, CLASSIFICATIONS, n_jobs),
+        'Type': job_types,
+        'Status': statuses,
+        'Job Start': job_start,
+        'Specified Sub': specified_sub
+    })
+
+
+def generate_srepp_payroll(rng, jobs, schools, overlap_rate=0.85, payroll_only_share=0.08):
+    """
+    Generate SREPP payroll records from the filled SubCentral jobs
+
+    Args:
+        rng: numpy Generator
+        jobs: DataFrame from generate_subcentral_jobs()
+        schools: DataFrame from generate_schools()
+        overlap_rate: Share of filled jobs with a named sub that show up in payroll
+        payroll_only_share: Extra payroll records (relative to the matched ones) with no SubCentral job,
+            including some for schools that are not in SubCentral at all
+
+    Returns:
+        pandas.DataFrame: Payroll records with the SREPP_COLUMNS columns
+    """
+    candidates = jobs[jobs['Specified Sub'].notna()]
+    paid = candidates[rng.random(len(candidates)) < overlap_rate]
+
+    job_start = paid['Job Start']
+    serial_mask = job_start.str.isdigit().to_numpy()
+    dates = pd.to_datetime(job_start.where(~serial_mask), format='%m/%d/%Y', errors='coerce')
+    serial_dates = pd.Timestamp('1899-12-30') + pd.to_timedelta(
+        pd.to_numeric(job_start.where(serial_mask), errors='coerce'), unit='D'
+    )
+    dates = dates.where(~serial_mask, serial_dates)
+
+    dbn_by_location = dict(zip(schools['Location'], schools['DBN']))
+    school = paid['Location'].map(dbn_by_location).to_numpy()
+    eisid = paid['Specified Sub'].astype(np.int64).to_numpy()
+    pay_dates = dates.to_numpy()
+
+    n_extra = int(len(paid) * payroll_only_share)
+    if n_extra:
+        extra_school = schools['DBN'].to_numpy()[rng.integers(0, len(schools), n_extra)]
+        unmapped = rng.random(n_extra) < 0.25
+        extra_school[unmapped] = np.char.add('84', np.char.zfill(rng.integers(1, 999, unmapped.sum()).astype(str), 4))
+        extra_dates = pd.to_datetime(dates.dropna().sample(n_extra, replace=True, random_state=int(rng.integers(1 << 31))).to_numpy())
+        school = np.concatenate([school, extra_school])
+        eisid = np.concatenate([eisid, rng.integers(100000, 9999999, n_extra)])
+        pay_dates = np.concatenate([pay_dates, extra_dates.to_numpy()])
+
+    n_records = len(school)
+    order = rng.permutation(n_records)
+    return pd.DataFrame({
+        'SCHOOL': school[order],
+        'EISID': pd.Series(eisid[order]).astype(str).str.zfill(7).to_numpy(),
+        'DATE': pd.DatetimeIndex(pay_dates[order]).strftime('%m/%d/%Y'),
+        'HOURS': np.round(rng.choice([6.0, 6.5, 7.0], n_records), 1),
+        'TITLE': 'PARA',
+        'PAYCODE': rng.choice(['REG', 'SUB'], n_records),
+        'RATE': 32.15,
+        'AMOUNT': 0.0,
+        'PAY_PERIOD': pd.DatetimeIndex(pay_dates[order]).strftime('%Y%m'),
+        'AGENCY': '740'
+    })
+
+
+def write_srepp_csv(payroll, path):
+    """Write payroll records in the SREPP export layout: data columns interleaved with blank columns, plus a junk second row"""
+    frame = pd.DataFrame(index=range(len(payroll)))
+    for i, col in enumerate(payroll.columns):
+        frame[col] = payroll[col].to_numpy()
+        frame[f'__blank_{i}'] = ''
+    header = ['' if c.startswith('__blank_') else c for c in frame.columns]
+
+    junk_row = ','.join(['Report generated by SREPP'] + [''] * (len(header) - 1))
+    with open(path, 'w', encoding='utf-8', newline='') as f:
+        f.write(','.join(header) + '\n')
+        f.write(junk_row + '\n')
+        frame.to_csv(f, header=False, index=False)
+
+
+def write_synthetic_dataset(output_dir, scale=1, base_jobs=100000, n_schools=1600, n_superintendents=45,
+                            years=1, seed=42, overlap_rate=0.85, excel_serial_share=0.3):
+    """
+    Generate and write a complete synthetic input set into output_dir
+
+    Args:
+        output_dir: Directory to write into (laid out like the project root)
+        scale: Multiplier on base_jobs (1 = roughly one citywide school year)
+        base_jobs: Number of SubCentral job rows at scale 1
+        n_schools: Number of schools in the mapping table
+        n_superintendents: Number of superintendents
+        years: Number of school years the job dates are spread over
+        seed: Random seed; the same arguments always produce byte-identical files
+        overlap_rate: Share of filled, named-sub jobs that appear in payroll
+        excel_serial_share: Share of Job Start values written as Excel serial numbers
+
+    Returns:
+        dict: csv_files (in the order main() loads them), mapping_file and row counts
+    """
+    rng = np.random.default_rng(seed)
+    n_jobs = int(base_jobs * scale)
+
+    schools = generate_schools(rng, n_schools, n_superintendents)
+    calendar = school_day_calendar(years=years)
+    jobs = generate_subcentral_jobs(rng, schools, n_jobs, calendar, excel_serial_share=excel_serial_share)
+    payroll = generate_srepp_payroll(rng, jobs, schools, overlap_rate=overlap_rate)
+
+    subcentral_dir = os.path.join(output_dir, SUBCENTRAL_DIR)
+    os.makedirs(subcentral_dir, exist_ok=True)
+    csv_files = []
+    for i, filename in enumerate(SUBCENTRAL_FILENAMES):
+        path = os.path.join(subcentral_dir, filename)
+        jobs.iloc[i::len(SUBCENTRAL_FILENAMES)].to_csv(path, index=False)
+        csv_files.append(path)
+
+    half = len(payroll) // 2
+    for filename, part in zip(SREPP_FILENAMES, [payroll.iloc[:half], payroll.iloc[half:]]):
+        path = os.path.join(output_dir, filename)
+        write_srepp_csv(part, path)
+        csv_files.append(path)
+
+    mapping_file = os.path.join(output_dir, MAPPING_FILENAME)
+    schools.drop(columns=['Location']).to_csv(mapping_file, index=False)
+
+    return {
+        'csv_files': csv_files,
+        'mapping_file': mapping_file,
+        'subcentral_rows': len(jobs),
+        'srepp_rows': len(payroll),
+        'schools': len(schools),
+        'superintendents': int(schools['Superintendent'].nunique())
+    }
+
+
+if __name__ == "__main__":
+    # Usage: python synthetic_data.py [output_dir] [scale] [seed]
+    target_dir = sys.argv[1] if len(sys.argv) > 1 else 'synthetic_data'
+    scale_factor = float(sys.argv[2]) if len(sys.argv) > 2 else 1
+    random_seed = int(sys.argv[3]) if len(sys.argv) > 3 else 42
+    info = write_synthetic_dataset(target_dir, scale=scale_factor, seed=random_seed)
+    print(f"✓ Wrote {info['subcentral_rows']:,} SubCentral jobs and {info['srepp_rows']:,} payroll records "
+          f"for {info['schools']} schools / {info['superintendents']} superintendents to {target_dir}/")
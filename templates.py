@@ -2,9 +2,29 @@
 HTML Templates and CSS Styles for NYC DOE Reports
 """
 
-import time
 import pandas as pd
 
+# Search index at the root of the report tree (search_index.py), loaded by the header search box
+SEARCH_INDEX_FILENAME = 'search_index.json'
+
+# Build time shown in every page header and footer; captured once per build by set_build_time()
+_build_time = None
+
+def set_build_time(timestamp=None):
+    """Capture the build time shown on every page (now, by default)"""
+    global _build_time
+    _build_time = pd.Timestamp.now() if timestamp is None else pd.Timestamp(timestamp)
+
+def get_build_time():
+    """Return the build time, capturing it on first use when set_build_time() was not called"""
+    if _build_time is None:
+        set_build_time()
+    return _build_time
+
+def get_build_time_text():
+    """Return the build time as shown in the page headers, e.g. 'June 02, 2025 at 09:15 AM'"""
+    return get_build_time().strftime('%B %d, %Y at %I:%M %p')
+
 def get_base_css():
     """Return the base CSS styles used across all reports"""
     return """
@@ -89,6 +109,58 @@ def get_base_css():
                 align-items: center;
             }
 
+            .header-search {
+                position: relative;
+                flex-shrink: 0;
+                width: 340px;
+                margin-right: 30px;
+            }
+
+            .header-search .search-input {
+                width: 100%;
+                box-sizing: border-box;
+                padding: 10px 14px;
+                border: none;
+                border-radius: 8px;
+                font-size: 0.95em;
+                box-shadow: 0 2px 4px rgba(0,0,0,0.15);
+            }
+
+            .header-search .search-results {
+                position: absolute;
+                top: 100%;
+                left: 0;
+                right: 0;
+                z-index: 1000;
+                margin: 4px 0 0 0;
+                padding: 0;
+                list-style: none;
+                background: white;
+                border-radius: 8px;
+                box-shadow: var(--card-shadow);
+                max-height: 420px;
+                overflow-y: auto;
+            }
+
+            .header-search .search-results a {
+                display: block;
+                padding: 8px 14px;
+                color: #333;
+                text-decoration: none;
+                border-bottom: 1px solid #eee;
+            }
+
+            .header-search .search-results a:hover,
+            .header-search .search-results a.active {
+                background-color: #e3f2fd;
+            }
+
+            .header-search .search-detail {
+                display: block;
+                font-size: 0.8em;
+                color: #666;
+            }
+
             .logo {
                 height: 80px;
                 width: auto;
@@ -240,6 +312,45 @@ def get_base_css():
                 box-shadow: 0 2px 8px rgba(0,0,0,0.1);
             }
 
+            .heatmap-scroll {
+                overflow-x: auto;
+                margin: 15px 0 25px 0;
+            }
+
+            .heatmap-table {
+                border-collapse: collapse;
+                background: white;
+                font-size: 0.9em;
+            }
+
+            .heatmap-table th, .heatmap-table td {
+                padding: 8px 10px;
+                text-align: center;
+                border: 1px solid #e0e0e0;
+                white-space: nowrap;
+            }
+
+            .heatmap-table th {
+                background: #6c757d;
+                color: white;
+                font-weight: 600;
+            }
+
+            .heatmap-table th.row-label, .heatmap-table td.row-label {
+                text-align: left;
+                background: #f8f9fa;
+                color: #333;
+            }
+
+            .heatmap-table td.no-jobs {
+                color: #aaa;
+                background: #fafafa;
+            }
+
+            .heatmap-table .total-cell {
+                font-weight: 600;
+            }
+
             .pie-container { 
                 display: grid;
                 grid-template-columns: repeat(auto-fit, minmax(400px, 1fr));
@@ -492,6 +603,29 @@ def get_base_css():
                 margin: 0 auto;
             }
 
+            /* Static SVG charts (--chart-backend svg), inlined in the page and scaled to fit */
+            .svg-chart {
+                text-align: center;
+            }
+
+            .svg-chart svg {
+                max-width: 100%;
+                height: auto;
+            }
+
+            /* Lazy chart embeds: sized placeholders drawn when they scroll into view */
+            .lazy-chart {
+                max-width: 100%;
+                margin: 0 auto;
+                border-radius: 15px;
+                background-color: #f8f9fa;
+                overflow: hidden;
+            }
+
+            .lazy-chart.loaded {
+                background-color: white;
+            }
+
             .footer {
                 background-color: var(--primary-color);
                 color: white;
@@ -542,6 +676,16 @@ def get_base_css():
                     font-size: 1.8em;
                 }
 
+                .header-content {
+                    flex-wrap: wrap;
+                }
+
+                .header-search {
+                    order: 3;
+                    width: 100%;
+                    margin: 15px 0 0 0;
+                }
+
                 .content {
                     padding: 15px;
                 }
@@ -872,6 +1016,43 @@ def get_base_css():
                     padding: 12px;
                 }
             }
+
+            .school-link-item {
+                border: 1px solid #ddd;
+                border-radius: 8px;
+                overflow: hidden;
+                transition: all 0.3s ease;
+            }
+
+            .school-link-item:hover {
+                border-color: #007bff;
+                box-shadow: 0 2px 8px rgba(0,123,255,0.1);
+                transform: translateY(-2px);
+            }
+
+            .school-link {
+                display: block;
+                padding: 15px;
+                text-decoration: none;
+                color: inherit;
+            }
+
+            .school-link:hover {
+                text-decoration: none;
+                color: inherit;
+            }
+
+            .school-info {
+                display: flex;
+                justify-content: space-between;
+                align-items: center;
+            }
+
+            .school-stats {
+                color: #666;
+                font-size: 14px;
+                font-style: italic;
+            }
     """
 
 def get_base_javascript():
@@ -952,6 +1133,169 @@ def get_base_javascript():
                     }
                 });
             });
+            
+            // Lazy chart embeds: fetch each chart's figure JSON and draw it when it nears the viewport,
+            // loading the shared plotly.min.js on first use
+            var plotlyReady = null;
+            function loadPlotly(src) {
+                if (!plotlyReady) {
+                    plotlyReady = window.Plotly ? Promise.resolve() : new Promise(function(resolve, reject) {
+                        var script = document.createElement('script');
+                        script.src = src;
+                        script.onload = resolve;
+                        script.onerror = reject;
+                        document.head.appendChild(script);
+                    });
+                }
+                return plotlyReady;
+            }
+            
+            function drawLazyChart(el) {
+                var figure = fetch(el.dataset.figure).then(function(response) { return response.json(); });
+                Promise.all([loadPlotly(el.dataset.plotly), figure]).then(function(results) {
+                    var fig = results[1];
+                    // Fit the figure to its placeholder so the page does not shift
+                    fig.layout.width = el.clientWidth;
+                    fig.layout.height = el.clientHeight;
+                    Plotly.newPlot(el, fig.data, fig.layout);
+                    el.classList.add('loaded');
+                }).catch(function(e) {
+                    console.warn('Chart could not be loaded:', el.dataset.figure, e);
+                    el.textContent = 'Chart could not be loaded.';
+                });
+            }
+            
+            var lazyCharts = document.querySelectorAll('.lazy-chart');
+            if (lazyCharts.length && 'IntersectionObserver' in window) {
+                var chartObserver = new IntersectionObserver(function(entries) {
+                    entries.forEach(function(entry) {
+                        if (entry.isIntersecting) {
+                            chartObserver.unobserve(entry.target);
+                            drawLazyChart(entry.target);
+                        }
+                    });
+                }, { rootMargin: '200px' });
+                lazyCharts.forEach(function(el) { chartObserver.observe(el); });
+            } else {
+                lazyCharts.forEach(drawLazyChart);
+            }
+            
+            // Header search: load the search index on first use, find candidates through its trigram
+            // (3+ characters) or word prefix (1-2 characters) postings and check them against the query
+            function decodePostings(deltas) {
+                var ids = [], id = 0;
+                for (var i = 0; i < deltas.length; i++) {
+                    id += deltas[i];
+                    ids.push(id);
+                }
+                return ids;
+            }
+            
+            function intersectSorted(a, b) {
+                var result = [], i = 0, j = 0;
+                while (i < a.length && j < b.length) {
+                    if (a[i] === b[j]) { result.push(a[i]); i++; j++; }
+                    else if (a[i] < b[j]) { i++; }
+                    else { j++; }
+                }
+                return result;
+            }
+            
+            function normalizeSearch(text) {
+                return String(text).toLowerCase().replace(/[^a-z0-9]+/g, ' ').trim();
+            }
+            
+            function searchReports(index, query, limit) {
+                var q = normalizeSearch(query);
+                if (!q) return [];
+                var candidates = [];
+                if (q.length < 3) {
+                    var seen = {};
+                    Object.keys(index.prefixes).forEach(function(prefix) {
+                        if (prefix.indexOf(q) === 0) {
+                            decodePostings(index.prefixes[prefix]).forEach(function(id) { seen[id] = true; });
+                        }
+                    });
+                    candidates = Object.keys(seen).map(Number);
+                } else {
+                    for (var i = 0; i + 3 <= q.length; i++) {
+                        var postings = index.trigrams[q.substr(i, 3)];
+                        if (!postings) return [];
+                        candidates = i === 0 ? decodePostings(postings) : intersectSorted(candidates, decodePostings(postings));
+                    }
+                }
+                var results = [];
+                candidates.forEach(function(id) {
+                    var entry = index.entries[id];
+                    var text = normalizeSearch(entry[1] + ' ' + entry[2]);
+                    if (text.indexOf(q) < 0) return;
+                    // Rank matches at the start, then at the start of a word, then anywhere
+                    var score = text.indexOf(q) === 0 ? 0 : ((' ' + text).indexOf(' ' + q) >= 0 ? 1 : 2);
+                    results.push({entry: entry, score: score});
+                });
+                results.sort(function(a, b) { return a.score - b.score || b.entry[4] - a.entry[4]; });
+                return results.slice(0, limit).map(function(result) { return result.entry; });
+            }
+            
+            document.querySelectorAll('.header-search').forEach(function(box) {
+                var input = box.querySelector('.search-input');
+                var list = box.querySelector('.search-results');
+                var index = null, loading = null;
+                
+                function load() {
+                    if (!loading) {
+                        loading = fetch(input.dataset.index).then(function(response) {
+                            if (!response.ok) throw new Error(response.status);
+                            return response.json();
+                        }).then(function(data) {
+                            index = data;
+                        }).catch(function(e) {
+                            console.warn('Search index could not be loaded:', e);
+                            input.placeholder = 'Search is not available';
+                            input.disabled = true;
+                        });
+                    }
+                    return loading;
+                }
+                
+                function show() {
+                    list.innerHTML = '';
+                    var entries = index ? searchReports(index, input.value, 10) : [];
+                    entries.forEach(function(entry, i) {
+                        var link = document.createElement('a');
+                        link.href = input.dataset.root + index.urls[entry[0]].replace(/\{(\d)\}/g, function(match, i) {
+                            return encodeURI(entry[3][i]);
+                        });
+                        if (i === 0) link.className = 'active';
+                        var title = document.createElement('strong');
+                        title.textContent = entry[1];
+                        var detail = document.createElement('span');
+                        detail.className = 'search-detail';
+                        detail.textContent = entry[2] + ' · ' + entry[4].toLocaleString() + ' jobs' +
+                            (entry[5] === null ? '' : ' · ' + entry[5].toFixed(1) + '% filled');
+                        link.appendChild(title);
+                        link.appendChild(detail);
+                        var item = document.createElement('li');
+                        item.appendChild(link);
+                        list.appendChild(item);
+                    });
+                    list.hidden = entries.length === 0;
+                }
+                
+                input.addEventListener('focus', load);
+                input.addEventListener('input', function() { load().then(show); });
+                input.addEventListener('keydown', function(event) {
+                    if (event.key === 'Enter') {
+                        var first = list.querySelector('a');
+                        if (first) window.location.href = first.href;
+                    } else if (event.key === 'Escape') {
+                        list.hidden = true;
+                    }
+                });
+                document.addEventListener('click', function(event) {
+                    if (!box.contains(event.target)) list.hidden = true;
+                });
+            });
         });
     """
 
@@ -1012,8 +1356,15 @@ def get_html_template(title, logo_path, content, extra_css="", extra_js=""):
     </html>
     """
 
-def get_header_html(logo_path, title, subtitle="", date_range_info=""):
-    """Generate header HTML section"""
+def get_header_html(logo_path, title, subtitle="", date_range_info="", root_prefix=""):
+    """
+    Generate header HTML section with the report search box
+
+    Args:
+        root_prefix: Relative path from the page to the root of the report tree ('' or ending in
+                     '/', see data_processing.report_root_prefix); the search box loads the search
+                     index and links its results relative to it
+    """
     return f"""
     <div class="header">
         <div class="header-content">
@@ -1021,7 +1372,13 @@ def get_header_html(logo_path, title, subtitle="", date_range_info=""):
                 <h1>{title}</h1>
                 {f"<h2>{subtitle}</h2>" if subtitle else ""}
                 {f'<div class="date-info">{date_range_info}</div>' if date_range_info else ""}
-                <p>Generated on: {time.strftime('%B %d, %Y at %I:%M %p')}</p>
+                <p>Generated on: {get_build_time_text()}</p>
+            </div>
+            <div class="header-search">
+                <input type="search" class="search-input" placeholder="Search schools, DBNs, superintendents..."
+                       aria-label="Search reports" autocomplete="off"
+                       data-index="{root_prefix}{SEARCH_INDEX_FILENAME}" data-root="{root_prefix}">
+                <ul class="search-results" hidden></ul>
             </div>
             <div class="header-logo">
                 <img src="{logo_path}" alt="NYC Public Schools" class="logo">
@@ -1043,7 +1400,7 @@ def get_professional_footer(contact_emails=None):
     <div class="footer">
         <p>Property of the New York City Department of Education</p>
         {contact_info}
-        <p>HR School Support Analysis Team | {pd.Timestamp.now().year}</p>
+        <p>HR School Support Analysis Team | {get_build_time().year}</p>
     </div>
     """
 
@@ -1083,6 +1440,226 @@ def get_comparison_card_html(title, stats, card_class=""):
     </div>
     """
 
+def get_trend_chart_html(chart_embed, rolling=None):
+    """
+    Generate the fill rate trend chart embed with a note on the rolling 4-week fill rate
+    
+    Args:
+        chart_embed: Embed HTML of the trend chart (see chart_utils.chart_embed_html)
+        rolling: Optional dict from time_series.latest_rolling_rate()
+    """
+    note = ""
+    if rolling is not None:
+        change = ""
+        if rolling['previous'] is not None:
+            delta = round(rolling['rate'] - rolling['previous'], 1)
+            if delta:
+                change = f", {'up' if delta > 0 else 'down'} {abs(delta):.1f} points from four weeks earlier"
+            else:
+                change = ", unchanged from four weeks earlier"
+        note = (f'<p><em><strong>Rolling 4-week fill rate:</strong> {rolling["rate"]:.1f}% '
+                f'(4 weeks to the week of {rolling["week"]}){change}.</em></p>')
+    
+    return f"""
+    {note}
+    <div class="chart-container">
+        {chart_embed}
+    </div>
+    """
+
+def _heatmap_cell(filled, total, css_class=""):
+    """One heatmap cell: fill % shaded from red (0%) through yellow to green (100%)"""
+    if total <= 0:
+        return f'<td class="{f"no-jobs {css_class}".strip()}">–</td>'
+    pct = filled / total * 100
+    class_attr = f' class="{css_class}"' if css_class else ''
+    return (f'<td{class_attr} style="background: hsl({pct * 1.2:.0f}, 70%, 82%);" '
+            f'title="{filled:,} of {total:,} jobs filled">{pct:.0f}%</td>')
+
+def create_heatmap_table(matrix, column_labels=None, column_titles=None):
+    """
+    Render a classification x bucket fill rate matrix as a lightweight HTML heatmap
+    
+    Args:
+        matrix: Dict from heatmaps.heatmap_matrix() (classifications, buckets, filled, total)
+        column_labels: Optional header text per bucket (defaults to the bucket names)
+        column_titles: Optional tooltip per bucket header
+    """
+    column_labels = column_labels or matrix['buckets']
+    column_titles = column_titles or [None] * len(column_labels)
+    filled, total = matrix['filled'], matrix['total']
+    
+    header = ''.join(
+        f'<th title="{title}">{label}</th>' if title else f'<th>{label}</th>'
+        for label, title in zip(column_labels, column_titles)
+    )
+    body = ""
+    for i, classification in enumerate(matrix['classifications']):
+        cells = ''.join(_heatmap_cell(filled[i, j], total[i, j]) for j in range(len(column_labels)))
+        body += (f'<tr><td class="row-label">{classification}</td>{cells}'
+                 f'{_heatmap_cell(filled[i].sum(), total[i].sum(), "total-cell")}</tr>')
+    column_totals = ''.join(
+        _heatmap_cell(filled[:, j].sum(), total[:, j].sum(), "total-cell") for j in range(len(column_labels))
+    )
+    body += (f'<tr><td class="row-label total-cell">All Classifications</td>{column_totals}'
+             f'{_heatmap_cell(filled.sum(), total.sum(), "total-cell")}</tr>')
+    
+    return f"""
+    <div class="heatmap-scroll">
+        <table class="heatmap-table">
+            <thead><tr><th class="row-label">Classification</th>{header}<th>All</th></tr></thead>
+            <tbody>{body}</tbody>
+        </table>
+    </div>
+    """
+
+def _format_change(value, suffix=" pts"):
+    """Signed change with an up/down color, or N/A"""
+    if value is None or value != value:
+        return "N/A"
+    color = "forestgreen" if value > 0 else "#c0392b" if value < 0 else "#666"
+    return f'<span style="color: {color}; font-weight: 600;">{value:+.1f}{suffix}</span>'
+
+def create_movers_table(movers, entity_label):
+    """
+    Generate a table of entities whose fill rate changed the most between two snapshots
+    
+    Args:
+        movers: Rows of snapshots.diff_snapshots() (e.g. from snapshots.top_movers())
+        entity_label: Header of the entity column (e.g. "School")
+    """
+    if movers.empty:
+        return "<p><em>No changes above the minimum job volume.</em></p>"
+    
+    rows_html = ""
+    for _, row in movers.iterrows():
+        rows_html += f"""
+            <tr>
+                <td>{row['Entity']}</td>
+                <td>{row['Previous_Fill_Pct']:.1f}% → {row['Fill_Pct']:.1f}%</td>
+                <td>{_format_change(row['Fill_Pct_Change'])}</td>
+                <td>{row['Previous_Total']:,} → {row['Total']:,} ({row['Total_Change']:+,})</td>
+                <td>{_format_change(row['Match_Pct_Change'])}</td>
+            </tr>"""
+    
+    return f"""
+    <div class="table-responsive">
+        <table class="table">
+            <thead>
+                <tr><th>{entity_label}</th><th>Fill Rate</th><th>Change</th><th>Jobs</th><th>Match % Change</th></tr>
+            </thead>
+            <tbody>{rows_html}
+            </tbody>
+        </table>
+    </div>
+    """
+
+def create_anomaly_table(anomalies, metric_labels, show_superintendent=False):
+    """
+    Generate the table of schools flagged as needing attention
+    
+    Args:
+        anomalies: Rows of anomalies.compute_anomalies()
+        metric_labels: Dict of Metric value -> label
+        show_superintendent: Add a Superintendent column (for the overall summary)
+    """
+    superintendent_header = "<th>Superintendent</th>" if show_superintendent else ""
+    rows_html = ""
+    for _, row in anomalies.iterrows():
+        superintendent_cell = f"<td>{row['Superintendent_Name']}</td>" if show_superintendent else ""
+        rows_html += f"""
+            <tr>
+                <td>{row['Location']}</td>{superintendent_cell}
+                <td>{metric_labels.get(row['Metric'], row['Metric'])}</td>
+                <td><strong>{row['Value']:.1f}%</strong> <small>({row['Lower']:.1f}% - {row['Upper']:.1f}%)</small></td>
+                <td>{row['Jobs']:,}</td>
+                <td>{row['Peer_Pct']:.1f}% <small>({row['Peer_Group']})</small></td>
+                <td>{_format_change(-row['Gap'])}</td>
+            </tr>"""
+    
+    return f"""
+    <div class="table-responsive">
+        <table class="table">
+            <thead>
+                <tr><th>School</th>{superintendent_header}<th>Metric</th><th>School Rate (95% range)</th><th>Jobs / Job Days</th><th>Peer Rate</th><th>Gap</th></tr>
+            </thead>
+            <tbody>{rows_html}
+            </tbody>
+        </table>
+    </div>
+    """
+
+def create_substitute_table(substitutes):
+    """
+    Generate a table of the substitutes (EISIDs) with the most job days in an area
+    
+    Args:
+        substitutes: Rows of substitutes.compute_substitute_stats()'s top substitutes for one area
+    """
+    rows_html = ""
+    for _, row in substitutes.iterrows():
+        match_pct = f"{row['Match_Pct']:.1f}%" if pd.notna(row['Match_Pct']) else "N/A"
+        rows_html += f"""
+            <tr>
+                <td>{row['Rank']}</td>
+                <td>{row['EISID']}</td>
+                <td>{row['Job_Days']:,} <small>({row['Share_Pct']:.1f}%)</small></td>
+                <td>{row['Schools']:,}</td>
+                <td>{match_pct}</td>
+            </tr>"""
+    
+    return f"""
+    <div class="table-responsive">
+        <table class="table">
+            <thead>
+                <tr><th>#</th><th>EISID</th><th>Job Days (share)</th><th>Schools Served (all)</th><th>Payroll Match %</th></tr>
+            </thead>
+            <tbody>{rows_html}
+            </tbody>
+        </table>
+    </div>
+    """
+
+def format_percentile(percentile):
+    """Percentile as an ordinal ("72nd percentile"), kept within 1st-99th"""
+    n = min(max(int(round(percentile)), 1), 99)
+    suffix = "th" if 10 <= n % 100 <= 20 else {1: "st", 2: "nd", 3: "rd"}.get(n % 10, "th")
+    return f"{n}{suffix} percentile"
+
+def create_ranking_table(ranks):
+    """
+    Generate a school's percentile table (metrics x ranking groups)
+    
+    Args:
+        ranks: Dict from rankings.school_rank_cells()
+    """
+    header_html = "".join(
+        f"<th>{scope}<br><small>{group}</small></th>" for scope, group in zip(ranks['scopes'], ranks['groups'])
+    )
+    rows_html = ""
+    for metric, cells in zip(ranks['metrics'], ranks['cells']):
+        cells_html = ""
+        for cell in cells:
+            if cell is None:
+                cells_html += "<td>N/A</td>"
+            else:
+                percentile, rank, count = cell
+                cells_html += f"<td><strong>{format_percentile(percentile)}</strong><br><small>#{rank} of {count}</small></td>"
+        rows_html += f"""
+            <tr><td>{metric}</td>{cells_html}</tr>"""
+    
+    return f"""
+    <div class="table-responsive">
+        <table class="table">
+            <thead>
+                <tr><th>Metric</th>{header_html}</tr>
+            </thead>
+            <tbody>{rows_html}
+            </tbody>
+        </table>
+    </div>
+    """
+
 def create_classification_tabbed_tables(data, formatters, debug_district=False):
     """
     Create tabbed summary tables for CLASSIFICATION data with Combined Totals and Vacancy/Absence Details tabs
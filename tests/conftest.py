@@ -0,0 +1,41 @@
+"""
+Shared fixtures for the NYC DOE Reports tests
+
+The modules live at the project root, so it is put on sys.path here.
+"""
+
+import os
+import sys
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from synthetic_data import write_synthetic_dataset
+
+
+@pytest.fixture(scope='session')
+def synthetic_builds(tmp_path_factory):
+    """
+    --data-only builds of one small synthetic dataset, loaded whole and streamed in small chunks
+
+    Returns:
+        dict: 'input' (the synthetic data directory), 'memory' and 'stream' (build directories
+              holding data/*.csv and aggregates.sqlite)
+    """
+    import para_fillrate_modular
+
+    root = tmp_path_factory.mktemp('synthetic')
+    write_synthetic_dataset(str(root / 'input'), base_jobs=3000, n_schools=60, n_superintendents=4)
+    builds = {'input': root / 'input'}
+    cwd = os.getcwd()
+    # The stage and chart caches live under the working directory
+    os.chdir(root)
+    try:
+        for name, options in [('memory', []), ('stream', ['--stream', '--chunksize', '700'])]:
+            para_fillrate_modular.main(['--data-only', '--data-dir', 'input', '--output-dir', name,
+                                        '--store', os.path.join(name, 'aggregates.sqlite'),
+                                        '--snapshot-file', os.path.join(name, 'snapshots.sqlite')] + options)
+            builds[name] = root / name
+    finally:
+        os.chdir(cwd)
+    return builds
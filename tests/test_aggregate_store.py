@@ -0,0 +1,86 @@
+"""
+Tests for the aggregate store and rendering from it
+"""
+
+import os
+import shutil
+import pandas as pd
+import pytest
+
+from aggregate_store import STATS_TABLES, write_aggregate_store, read_aggregate_store, read_store_meta
+from data_processing import clean_superintendent_name, format_int, report_page_path
+
+
+def test_aggregate_store_round_trip(tmp_path):
+    stats = {name: pd.DataFrame({'Classification': ['PARAPROFESSIONAL', 'HEALTH PARA'], 'Total': [10, 4]})
+             for name in STATS_TABLES}
+    cube = pd.DataFrame({'Location': ['M123', 'X045'], 'Classification': ['PARAPROFESSIONAL', 'HEALTH PARA'],
+                         'Fill_Status': ['Filled', 'Unfilled'], 'Job_Count': [10, 4]})
+    matching = pd.DataFrame({'Location': ['M123'], 'Match %': [87.5]})
+    heatmaps = pd.DataFrame({'Level': ['citywide'], 'Bucket': ['Monday'], 'Total': [3]})
+    store_file = str(tmp_path / 'aggregates.sqlite')
+    write_aggregate_store(store_file, cube, stats, matching, {'date_range_info': 'Sep 2024 - Jun 2025', 'job_rows': 14},
+                          extra_tables={'heatmaps': heatmaps, 'anomalies': pd.DataFrame()})
+
+    aggregates = read_aggregate_store(store_file)
+    for name in STATS_TABLES:
+        pd.testing.assert_frame_equal(aggregates[name], stats[name])
+    pd.testing.assert_frame_equal(aggregates['df'], cube)
+    pd.testing.assert_frame_equal(aggregates['matching_stats'], matching)
+    pd.testing.assert_frame_equal(aggregates['heatmaps'], heatmaps)
+    # Empty and missing optional tables read back as empty frames
+    assert aggregates['anomalies'].empty and aggregates['time_series'].empty
+    assert aggregates['date_range_info'] == 'Sep 2024 - Jun 2025'
+    assert aggregates['meta']['job_rows'] == 14
+    assert not os.path.exists(store_file + '.tmp')
+
+
+def test_unknown_table_is_rejected(tmp_path):
+    stats = {name: pd.DataFrame({'Total': [1]}) for name in STATS_TABLES}
+    with pytest.raises(ValueError):
+        write_aggregate_store(str(tmp_path / 'aggregates.sqlite'), pd.DataFrame({'Job_Count': [1]}), stats, None, {},
+                              extra_tables={'raw_jobs': pd.DataFrame({'EISID': [1]})})
+
+
+def test_unreadable_store_has_no_meta(tmp_path):
+    store_file = tmp_path / 'aggregates.sqlite'
+    assert read_store_meta(str(store_file)) is None
+    store_file.write_bytes(b'not a database')
+    assert read_store_meta(str(store_file)) is None
+
+
+@pytest.fixture(scope='module')
+def rendered_from_store(synthetic_builds, tmp_path_factory):
+    """Report tree rendered from a copy of the in-memory build's store, with no raw inputs around"""
+    import para_fillrate_modular
+
+    root = tmp_path_factory.mktemp('render_only')
+    shutil.copy(os.path.join(synthetic_builds['memory'], 'aggregates.sqlite'), root / 'aggregates.sqlite')
+    cwd = os.getcwd()
+    os.chdir(root)
+    try:
+        exit_code = para_fillrate_modular.main(['render', '--store', 'aggregates.sqlite', '--output-dir', 'site',
+                                                '--chart-backend', 'svg', '--snapshot-file', 'snapshots.sqlite'])
+    finally:
+        os.chdir(cwd)
+    assert exit_code == 0
+    return root / 'site', read_aggregate_store(str(root / 'aggregates.sqlite'))
+
+
+def test_render_from_store_writes_every_report(rendered_from_store):
+    site, aggregates = rendered_from_store
+    school_stats = aggregates['school_stats']
+    superintendents = school_stats['Superintendent_Name'].unique()
+    assert len(superintendents) > 1
+    for superintendent in superintendents:
+        assert (site / report_page_path('superintendent', clean_superintendent_name(superintendent))).is_file()
+    school_pages = list(site.glob('Superintendent_*/Schools/School_*/*_report.html'))
+    assert len(school_pages) == school_stats['Location'].nunique()
+
+
+def test_render_from_store_shows_the_stored_totals(rendered_from_store):
+    site, aggregates = rendered_from_store
+    index = (site / 'index.html').read_text(encoding='utf-8')
+    total = int(aggregates['citywide_stats']['Total'].sum())
+    assert f"<strong>Total Jobs:</strong> {format_int(total)}</li>" in index
+    assert total == aggregates['meta']['job_rows']
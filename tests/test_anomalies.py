@@ -0,0 +1,55 @@
+"""
+Tests for the Wilson score interval and the anomaly flags
+"""
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from anomalies import ANOMALY_COLUMNS, wilson_interval, compute_anomalies
+
+
+def test_wilson_interval_known_values():
+    lower, upper = wilson_interval([0, 5, 10, 81], [10, 10, 10, 100])
+    np.testing.assert_allclose(lower, [0.0, 23.6590, 72.2460, 72.2210], atol=1e-3)
+    np.testing.assert_allclose(upper, [27.7540, 76.3410, 100.0, 87.4853], atol=1e-3)
+
+
+def test_wilson_interval_z_score():
+    lower, upper = wilson_interval([50], [100], z=1.0)
+    assert lower[0] == pytest.approx(45.0248, abs=1e-3)
+    assert upper[0] == pytest.approx(54.9752, abs=1e-3)
+
+
+def test_wilson_interval_without_trials_is_nan():
+    lower, upper = wilson_interval([0, 3], [0, 4])
+    assert np.isnan(lower[0]) and np.isnan(upper[0])
+    assert 0 < lower[1] < 75 < upper[1] <= 100
+
+
+def _school_stats(filled, total):
+    """One row per school, all of one superintendent in Manhattan"""
+    return pd.DataFrame({
+        'Location': [f'M{i:03d}' for i in range(len(filled))],
+        'Superintendent_Name': 'Lee. Kim',
+        'Borough': 'Manhattan',
+        'Total_Filled': filled,
+        'Total': total
+    })
+
+
+def test_anomalies_flag_schools_below_their_peers():
+    # Ten schools of 100 jobs form five peer bands of two; M000 fills 20% against its peer's 90%
+    stats = _school_stats([20] + [90] * 9, [100] * 10)
+    anomalies = compute_anomalies(stats, stats)
+    assert anomalies['Location'].tolist() == ['M000']
+    row = anomalies.iloc[0]
+    assert (row['Metric'], row['Value'], row['Jobs'], row['Peer_Pct'], row['Gap']) == ('Fill_Pct', 20.0, 100, 90.0, 70.0)
+    assert row['Upper'] < row['Peer_Pct']
+
+
+def test_anomalies_do_not_flag_small_schools_on_noise():
+    # No job filled out of one is well within the interval of a 70% peer rate
+    stats = _school_stats([0, 7, 7, 7, 7, 7, 7, 7, 7, 7], [1, 10, 10, 10, 10, 10, 10, 10, 10, 10])
+    assert compute_anomalies(stats, stats).empty
+    assert compute_anomalies(stats, None).columns.tolist() == ANOMALY_COLUMNS
@@ -0,0 +1,84 @@
+"""
+Tests for the chart file cache
+"""
+
+import os
+import time
+import pytest
+
+import chart_cache
+from chart_cache import configure_chart_cache, get_chart_cache_counts, cached_chart, prune_chart_cache
+
+
+@pytest.fixture
+def cache_dir(tmp_path):
+    cache_dir = str(tmp_path / 'cache')
+    configure_chart_cache(cache_dir)
+    yield cache_dir
+    configure_chart_cache(None)
+
+
+def _render(content, calls):
+    """Chart renderer writing content and recording the paths it was asked to write"""
+    def render(path):
+        calls.append(path)
+        with open(path, 'w') as f:
+            f.write(content)
+    return render
+
+
+def test_identical_chart_is_reused(tmp_path, cache_dir):
+    calls = []
+    first = cached_chart(str(tmp_path / 'a' / 'chart.html'), 'bar', 'plotly', [[1, 2], 'Title'], _render('chart', calls))
+    second = cached_chart(str(tmp_path / 'b' / 'chart.html'), 'bar', 'plotly', [[1, 2], 'Title'], _render('other', calls))
+
+    # The second chart is linked to the cache entry written by the first, not rendered
+    assert len(calls) == 1
+    assert get_chart_cache_counts() == {'reused': 1, 'built': 1}
+    assert os.path.samefile(first, second)
+    with open(second) as f:
+        assert f.read() == 'chart'
+
+    cached_chart(second, 'bar', 'plotly', [[1, 3], 'Title'], _render('changed', calls))
+    assert len(calls) == 2 and get_chart_cache_counts()['built'] == 2
+    with open(first) as f:
+        assert f.read() == 'chart'
+
+
+def test_uncached_render_does_not_write_through_a_link(tmp_path, cache_dir):
+    output_file = str(tmp_path / 'chart.html')
+    cached_chart(output_file, 'pie', 'plotly', ['PARA', [3, 1]], _render('cached', []))
+    cache_file = next(os.path.join(root, name) for root, _, files in os.walk(cache_dir) for name in files)
+    assert os.path.samefile(cache_file, output_file)
+
+    # With the cache turned off the output is replaced, and the cache entry keeps its content
+    configure_chart_cache(None)
+    cached_chart(output_file, 'pie', 'plotly', ['PARA', [3, 1]], _render('rebuilt', []))
+    assert not os.path.samefile(cache_file, output_file)
+    with open(cache_file) as f:
+        assert f.read() == 'cached'
+    with open(output_file) as f:
+        assert f.read() == 'rebuilt'
+
+
+def test_fingerprint_covers_kind_backend_and_plotly_version(monkeypatch):
+    parts = [[1, 2], 'Title']
+    assert chart_cache.chart_fingerprint('bar', 'plotly', parts) != chart_cache.chart_fingerprint('pie', 'plotly', parts)
+    assert chart_cache.chart_fingerprint('bar', 'plotly', parts) != chart_cache.chart_fingerprint('bar', 'svg', parts)
+    fingerprint = chart_cache.chart_fingerprint('bar', 'plotly', parts)
+    monkeypatch.setattr(chart_cache, '_plotly_version', lambda: '0.0.0')
+    assert chart_cache.chart_fingerprint('bar', 'plotly', parts) != fingerprint
+
+
+def test_prune_removes_unused_entries(tmp_path, cache_dir):
+    cached_chart(str(tmp_path / 'old.html'), 'bar', 'plotly', ['old'], _render('old', []))
+    cached_chart(str(tmp_path / 'new.html'), 'bar', 'plotly', ['new'], _render('new', []))
+    key = chart_cache.chart_fingerprint('bar', 'plotly', ['old'])
+    stale = time.time() - 30 * 86400
+    os.utime(os.path.join(cache_dir, key[:2], key + '.html'), (stale, stale))
+
+    assert prune_chart_cache(cache_dir, max_age_days=14) == 1
+    # The report file linked to the removed entry keeps its content
+    with open(tmp_path / 'old.html') as f:
+        assert f.read() == 'old'
+    assert prune_chart_cache(str(tmp_path / 'missing')) == 0
@@ -0,0 +1,70 @@
+"""
+Tests for the pre-compression stage and its manifest
+"""
+
+import os
+import gzip
+import json
+
+from compression import MANIFEST_FILENAME, compress_output_tree
+
+
+def _write(path, text):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, 'w', encoding='utf-8') as f:
+        f.write(text)
+
+
+def _tree(tmp_path):
+    root = str(tmp_path / 'site')
+    _write(os.path.join(root, 'index.html'), '<html>' + 'fill rate ' * 500 + '</html>')
+    _write(os.path.join(root, 'Superintendent_A', 'A_report.html'), '<html>' + 'school ' * 800 + '</html>')
+    _write(os.path.join(root, 'data.json'), json.dumps({'rows': list(range(300))}))
+    _write(os.path.join(root, 'logo.png'), 'not compressible')
+    return root
+
+
+def test_manifest_records_every_file(tmp_path):
+    root = _tree(tmp_path)
+    summary = compress_output_tree(root, workers=1)
+
+    with open(os.path.join(root, MANIFEST_FILENAME), encoding='utf-8') as f:
+        manifest = json.load(f)
+    assert sorted(manifest) == ['Superintendent_A/A_report.html', 'data.json', 'index.html']
+    assert summary['files_compressed'] == 3 and summary['files_skipped'] == 0
+    assert summary['original_bytes'] == sum(os.path.getsize(os.path.join(root, path)) for path in manifest)
+    assert summary['gzip_bytes'] == sum(os.path.getsize(os.path.join(root, path + '.gz')) for path in manifest)
+    with gzip.open(os.path.join(root, 'index.html.gz'), 'rt', encoding='utf-8') as f:
+        assert f.read().startswith('<html>fill rate')
+    assert not os.path.exists(os.path.join(root, 'logo.png.gz'))
+
+
+def test_incremental_run_reports_the_whole_tree(tmp_path):
+    root = _tree(tmp_path)
+    first = compress_output_tree(root, workers=1)
+    assert compress_output_tree(root, workers=1)['files_skipped'] == 3
+
+    _write(os.path.join(root, 'data.json'), json.dumps({'rows': list(range(400))}))
+    second = compress_output_tree(root, workers=1)
+    assert second['files_compressed'] == 1 and second['files_skipped'] == 2
+    # Totals cover the skipped files too, not only the one recompressed
+    assert second['original_bytes'] > first['original_bytes']
+    assert second['original_bytes'] == sum(
+        os.path.getsize(os.path.join(root, path)) for path in ['index.html', 'Superintendent_A/A_report.html', 'data.json']
+    )
+
+
+def test_stale_siblings_are_removed(tmp_path):
+    root = _tree(tmp_path)
+    compress_output_tree(root, workers=1)
+    os.remove(os.path.join(root, 'Superintendent_A', 'A_report.html'))
+    # A .gz the build wrote itself (no source file, not in the manifest) is left alone
+    with gzip.open(os.path.join(root, 'Superintendent_A', 'schools_data.json.gz'), 'wt', encoding='utf-8') as f:
+        f.write('{}')
+
+    summary = compress_output_tree(root, workers=1)
+    assert summary['siblings_removed'] >= 1
+    assert not os.path.exists(os.path.join(root, 'Superintendent_A', 'A_report.html.gz'))
+    assert os.path.exists(os.path.join(root, 'Superintendent_A', 'schools_data.json.gz'))
+    with open(os.path.join(root, MANIFEST_FILENAME), encoding='utf-8') as f:
+        assert 'Superintendent_A/A_report.html' not in json.load(f)
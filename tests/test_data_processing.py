@@ -0,0 +1,145 @@
+"""
+Tests for the job row cleaning, job windows, matching keys and the streamed job count cube in data_processing
+"""
+
+import os
+import glob
+import numpy as np
+import pandas as pd
+import pytest
+
+import data_processing
+from data_processing import (
+    clean_job_rows, stream_job_cube, sort_by_job_start, slice_job_window, build_matching_keys, window_matching_keys,
+    aggregate_matching_keys, create_matching_analysis
+)
+from synthetic_data import generate_schools, generate_subcentral_jobs, school_day_calendar
+
+
+def _job_rows(job_starts):
+    """Raw SubCentral rows, as read from a CSV, with the given Job Start values"""
+    return pd.DataFrame({
+        'Location': 'M123',
+        'District': 2,
+        'Classification': 'PARAPROFESSIONAL',
+        'Type': 'Vacancy',
+        'Status': 'Unfilled',
+        'Job Start': job_starts
+    })
+
+
+def test_excel_serial_dates_use_the_excel_epoch():
+    # Excel shows serial 45658 as 1/1/2025 and 45292 as 1/1/2024
+    cleaned = clean_job_rows(_job_rows(['45658', '45292']))
+    assert pd.to_datetime(cleaned['Job Start']).tolist() == [pd.Timestamp('2025-01-01'), pd.Timestamp('2024-01-01')]
+
+
+def test_synthetic_serial_dates_round_trip():
+    rng = np.random.default_rng(7)
+    calendar = school_day_calendar()
+    jobs = generate_subcentral_jobs(rng, generate_schools(rng, 20, 2), 400, calendar, excel_serial_share=0.5)
+    serial = jobs['Job Start'].str.isdigit()
+    assert serial.any() and not serial.all()
+
+    cleaned = clean_job_rows(jobs.copy())
+    job_start = pd.to_datetime(cleaned['Job Start'])
+    expected = pd.to_datetime(jobs['Job Start'].where(~serial), format='%m/%d/%Y')
+    assert job_start[~serial].equals(expected[~serial])
+    # Serial-dated jobs land on school days of the generated calendar, like the string-dated ones
+    assert job_start.isin(calendar).all()
+
+
+
+@pytest.fixture
+def jobs():
+    """Job rows out of date order, two on the same day at different times and one undated"""
+    return sort_by_job_start(pd.DataFrame({
+        'Job Start': ['2025-03-03 08:00', '2025-03-01 08:00', None, '2025-03-02 14:30', '2025-03-04 08:00',
+                      '2025-03-02 00:00'],
+        'Job': ['d', 'a', 'none', 'b2', 'e', 'b1']
+    }))
+
+
+def test_sort_by_job_start_keeps_undated_jobs_last(jobs):
+    assert jobs['Job'].tolist() == ['a', 'b1', 'b2', 'd', 'e', 'none']
+
+
+def test_slice_job_window_is_inclusive_of_both_days(jobs):
+    window = slice_job_window(jobs, '2025-03-02', '2025-03-03')
+    # The end day includes jobs starting later that day
+    assert window['Job'].tolist() == ['b1', 'b2', 'd']
+
+
+def test_slice_job_window_open_ends(jobs):
+    assert slice_job_window(jobs, start='2025-03-03')['Job'].tolist() == ['d', 'e']
+    assert slice_job_window(jobs, end='2025-03-01')['Job'].tolist() == ['a']
+    # Undated jobs are left out once either bound is given, kept when neither is
+    assert slice_job_window(jobs, end='2025-12-31')['Job'].tolist() == ['a', 'b1', 'b2', 'd', 'e']
+    assert slice_job_window(jobs) is jobs
+
+
+def test_slice_job_window_outside_the_data(jobs):
+    assert slice_job_window(jobs, '2024-01-01', '2024-12-31').empty
+    assert slice_job_window(jobs, '2026-01-01').empty
+    # A window whose end comes before its start is empty rather than an error
+    assert slice_job_window(jobs, '2025-03-04', '2025-03-01').empty
+
+
+def _matching_inputs():
+    """Filled jobs at one school on three days (one twice) and payroll records for two of those days"""
+    main_df = pd.DataFrame({
+        'Location': 'M123', 'Fill_Status': 'Filled', 'Specified Sub': 1001.0,
+        'Job Start': pd.to_datetime(['2025-03-03', '2025-03-03', '2025-03-10', '2025-04-07'])
+    })
+    srepp_df = pd.DataFrame({'SCHOOL': '02M123', 'EISID': '1001', 'DATE': ['03/03/2025', '04/07/2025', '04/08/2025']})
+    return main_df, srepp_df
+
+
+def test_matching_keys_aggregate_like_the_matching_analysis():
+    main_df, srepp_df = _matching_inputs()
+    keys = build_matching_keys(main_df, srepp_df)
+    assert keys['subcentral_keys']['Job_Count'].tolist() == [2, 1, 1]
+    pd.testing.assert_frame_equal(aggregate_matching_keys(keys), create_matching_analysis(main_df, srepp_df))
+
+    row = aggregate_matching_keys(keys).iloc[0]
+    assert (row['SubCentral Job Days'], row['Payroll Job Days'], row['Matched Jobs']) == (4, 3, 2)
+
+
+def test_windowed_matching_keys_cover_only_the_window():
+    main_df, srepp_df = _matching_inputs()
+    keys = build_matching_keys(main_df, srepp_df)
+    april = aggregate_matching_keys(window_matching_keys(keys, '2025-04-01', '2025-04-07')).iloc[0]
+    # The end day is inclusive: the 04/07 job and pay day are in, the 04/08 pay day is not
+    assert (april['SubCentral Job Days'], april['Payroll Job Days'], april['Matched Jobs']) == (1, 1, 1)
+    assert april['Match Percentage'] == 100.0
+    # Without bounds the keys are passed through as they are
+    unbounded = window_matching_keys(keys)
+    assert all(unbounded[name] is keys[name] for name in keys)
+
+
+EXPORTS = ['citywide_stats.csv', 'borough_stats.csv', 'superintendent_stats.csv', 'school_stats.csv',
+           'matching_stats.csv', 'school_ranks.csv', 'anomalies.csv', 'heatmaps.csv', 'time_series.csv']
+
+
+@pytest.mark.parametrize('export', EXPORTS)
+def test_streamed_exports_match_in_memory_exports(synthetic_builds, export):
+    with open(os.path.join(synthetic_builds['memory'], 'data', export), 'rb') as f:
+        in_memory = f.read()
+    with open(os.path.join(synthetic_builds['stream'], 'data', export), 'rb') as f:
+        streamed = f.read()
+    assert in_memory.count(b'\n') > 1
+    assert streamed == in_memory
+
+
+def test_fold_batch_size_does_not_change_the_cube(synthetic_builds, monkeypatch):
+    csv_files = sorted(glob.glob(os.path.join(str(synthetic_builds['input']), 'Fill Rate Data', '*.csv')))
+    whole = stream_job_cube(csv_files, chunksize=100000)
+    # Fold after every chunk of 300 rows instead of once at the end
+    monkeypatch.setattr(data_processing, 'FOLD_BATCH_ROWS', 1)
+    batched = stream_job_cube(csv_files, chunksize=300)
+
+    pd.testing.assert_frame_equal(batched['cube'], whole['cube'])
+    key = ['Location', 'EISID', 'Day']
+    pd.testing.assert_frame_equal(batched['subcentral_keys'].sort_values(key, ignore_index=True),
+                                  whole['subcentral_keys'].sort_values(key, ignore_index=True))
+    assert batched['rows'] == whole['rows'] == int(whole['cube']['Job_Count'].sum())
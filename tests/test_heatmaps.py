@@ -0,0 +1,73 @@
+"""
+Tests for the day-of-week and week fill rate heatmaps
+"""
+
+import os
+import pandas as pd
+import pytest
+
+from aggregate_store import read_aggregate_store
+from heatmaps import DAY_NAMES, compute_heatmaps, group_heatmaps, heatmap_matrix
+
+
+@pytest.fixture
+def jobs():
+    """Two schools of one superintendent; a Saturday job, and no jobs in the week of 2025-03-10"""
+    rows = [
+        ('M123', 'PARAPROFESSIONAL', '2025-03-03', 'Filled'),    # Monday
+        ('M123', 'PARAPROFESSIONAL', '2025-03-03', 'Unfilled'),
+        ('M123', 'HEALTH PARA', '2025-03-05', 'Filled'),         # Wednesday
+        ('M123', 'PARAPROFESSIONAL', '2025-03-17', 'Filled'),    # Monday, two weeks later
+        ('M456', 'PARAPROFESSIONAL', '2025-03-08', 'Unfilled'),  # Saturday
+        ('M456', 'HEALTH PARA', '2025-03-05', 'Filled'),
+    ]
+    df = pd.DataFrame(rows, columns=['Location', 'Classification', 'Job Start', 'Fill_Status'])
+    df['Job Start'] = pd.to_datetime(df['Job Start'])
+    df['Superintendent_Name'] = 'Lee. Kim'
+    df['Borough'] = 'Manhattan'
+    df['Type_Fill_Status'] = 'Absence_' + df['Fill_Status']
+    return df
+
+
+def test_weekday_counts(jobs):
+    heatmaps = compute_heatmaps(jobs)
+    weekday = heatmaps[heatmaps['Axis'] == 'weekday'].set_index(['Level', 'Entity', 'Classification', 'Bucket'])
+    assert weekday.loc[('school', 'M123', 'PARAPROFESSIONAL', 'Mon'), ['Filled', 'Total']].tolist() == [2, 3]
+    assert weekday.loc[('school', 'M456', 'PARAPROFESSIONAL', 'Sat'), ['Filled', 'Total']].tolist() == [0, 1]
+    # The superintendent sums its schools
+    assert weekday.loc[('superintendent', 'Lee. Kim', 'HEALTH PARA', 'Wed'), ['Filled', 'Total']].tolist() == [2, 2]
+    assert weekday.loc[('superintendent', 'Lee. Kim', 'PARAPROFESSIONAL', 'Mon'), 'Fill_Pct'] == pytest.approx(66.7, abs=0.05)
+    assert heatmaps.groupby(['Level', 'Axis'])['Total'].sum().eq(len(jobs)).all()
+
+
+def test_rows_sort_weekdays_in_day_order(jobs):
+    heatmaps = compute_heatmaps(jobs)
+    rows = heatmaps[(heatmaps['Level'] == 'school') & (heatmaps['Entity'] == 'M123') & (heatmaps['Axis'] == 'weekday')
+                    & (heatmaps['Classification'] == 'PARAPROFESSIONAL')]
+    assert rows['Bucket'].tolist() == sorted(rows['Bucket'], key=DAY_NAMES.index)
+    assert list(heatmaps.columns[:5]) == ['Level', 'Entity', 'Axis', 'Classification', 'Bucket']
+
+
+def test_heatmap_matrix_layout(jobs):
+    grouped = group_heatmaps(compute_heatmaps(jobs))
+    weekday = heatmap_matrix(grouped[('superintendent', 'Lee. Kim')], 'weekday')
+    # Monday to Friday always, plus the weekend days that have jobs; most jobs first
+    assert weekday['buckets'] == ['Mon', 'Tue', 'Wed', 'Thu', 'Fri', 'Sat']
+    assert weekday['classifications'] == ['PARAPROFESSIONAL', 'HEALTH PARA']
+    assert weekday['total'].tolist() == [[3, 0, 0, 0, 0, 1], [0, 0, 2, 0, 0, 0]]
+
+    week = heatmap_matrix(grouped[('school', 'M123')], 'week')
+    # Every week from the first to the last, including the week without jobs
+    assert week['buckets'] == ['2025-03-03', '2025-03-10', '2025-03-17']
+    assert week['total'].tolist() == [[2, 0, 1], [1, 0, 0]]
+    assert heatmap_matrix(grouped[('school', 'M123')], 'month') is None
+
+
+def test_weekday_totals_match_school_stats(synthetic_builds):
+    aggregates = read_aggregate_store(os.path.join(synthetic_builds['memory'], 'aggregates.sqlite'))
+    heatmaps = aggregates['heatmaps']
+    weekday = heatmaps[(heatmaps['Level'] == 'school') & (heatmaps['Axis'] == 'weekday')]
+    totals = weekday.groupby(['Entity', 'Classification'])['Total'].sum()
+    expected = aggregates['school_stats'].groupby(['Location', 'Classification'])['Total'].sum()
+    expected = expected[expected > 0]
+    pd.testing.assert_series_equal(totals.sort_index(), expected.sort_index(), check_names=False, check_dtype=False)
@@ -0,0 +1,95 @@
+"""
+Tests for the SQLite job store: incremental loading and queries
+"""
+
+import os
+import shutil
+import pandas as pd
+import pytest
+
+from data_processing import load_and_process_data, load_superintendent_mapping, add_superintendent_info, \
+    create_summary_stats
+from job_store import append_csv_files, update_job_store, query_jobs, summary_stats_sql, list_source_files
+
+
+@pytest.fixture
+def inputs(synthetic_builds, tmp_path):
+    """Copy of the synthetic inputs that a test may change: (data directory, SubCentral CSV paths)"""
+    data_dir = str(tmp_path / 'input')
+    shutil.copytree(synthetic_builds['input'], data_dir)
+    subcentral_dir = os.path.join(data_dir, 'Fill Rate Data')
+    return data_dir, sorted(os.path.join(subcentral_dir, name) for name in os.listdir(subcentral_dir))
+
+
+def _jobs(data_dir, csv_files):
+    """The same job rows the store is loaded with, computed in memory"""
+    df, _ = load_and_process_data(csv_files)
+    return add_superintendent_info(df, load_superintendent_mapping(data_dir))
+
+
+def test_append_skips_unchanged_files(tmp_path, inputs):
+    data_dir, csv_files = inputs
+    store_file = str(tmp_path / 'jobs.sqlite')
+    assert append_csv_files(store_file, csv_files[:2], mapping_dir=data_dir)['updated'] == [
+        os.path.basename(path) for path in csv_files[:2]]
+
+    result = append_csv_files(store_file, csv_files[:3], mapping_dir=data_dir)
+    assert result['updated'] == [os.path.basename(csv_files[2])]
+    assert len(result['unchanged']) == 2
+    files = list_source_files(store_file)
+    assert len(files) == 3
+    assert files['row_count'].sum() == len(query_jobs(store_file))
+
+
+def test_queries_match_the_job_rows(tmp_path, inputs):
+    data_dir, csv_files = inputs
+    store_file = str(tmp_path / 'jobs.sqlite')
+    append_csv_files(store_file, csv_files, mapping_dir=data_dir)
+    jobs = _jobs(data_dir, csv_files)
+    job_start = pd.to_datetime(jobs['Job Start'])
+
+    location = jobs['Location'].value_counts().index[0]
+    selected = query_jobs(store_file, location=location, job_type='Absence', start='2024-11-01', end='2024-11-30')
+    expected = (jobs['Location'] == location) & (jobs['Type'] == 'Absence') & \
+        (job_start >= '2024-11-01') & (job_start < '2024-12-01')
+    assert len(selected) == expected.sum() > 0
+    assert selected['Job Start'].is_monotonic_increasing
+
+    by_borough = summary_stats_sql(store_file, ['Borough'])
+    in_memory = create_summary_stats(jobs, ['Borough'])
+    key = ['Borough', 'Classification']
+    pd.testing.assert_frame_equal(by_borough.sort_values(key).reset_index(drop=True)[in_memory.columns],
+                                  in_memory.sort_values(key).reset_index(drop=True), check_dtype=False)
+
+
+def _reassign_school(data_dir, superintendent):
+    """Move the first school of the mapping CSV to another superintendent; returns its location"""
+    mapping_file = [os.path.join(data_dir, name) for name in os.listdir(data_dir) if name.startswith('8.8.25')][0]
+    mapping = pd.read_csv(mapping_file)
+    mapping.loc[0, 'Superintendent'] = superintendent
+    mapping.to_csv(mapping_file, index=False)
+    return mapping.loc[0, 'DBN'][2:]
+
+
+def test_mapping_change_refreshes_appended_files(tmp_path, inputs):
+    data_dir, csv_files = inputs
+    store_file = str(tmp_path / 'jobs.sqlite')
+    append_csv_files(store_file, csv_files, mapping_dir=data_dir)
+    location = _reassign_school(data_dir, 'Moved, Test')
+
+    assert len(append_csv_files(store_file, csv_files, mapping_dir=data_dir)['updated']) == len(csv_files)
+    names = query_jobs(store_file, columns=['Superintendent_Name'], location=location)['Superintendent_Name']
+    assert len(names) > 0 and set(names) == {'Moved, Test'}
+
+
+def test_mapping_change_refreshes_build_updates(tmp_path, inputs):
+    data_dir, csv_files = inputs
+    store_file = str(tmp_path / 'jobs.sqlite')
+    update_job_store(store_file, _jobs(data_dir, csv_files), csv_files, mapping_dir=data_dir)
+    assert update_job_store(store_file, _jobs(data_dir, csv_files), csv_files, mapping_dir=data_dir)['updated'] == []
+
+    location = _reassign_school(data_dir, 'Moved, Test')
+    result = update_job_store(store_file, _jobs(data_dir, csv_files), csv_files, mapping_dir=data_dir)
+    assert len(result['updated']) == len(csv_files)
+    names = query_jobs(store_file, columns=['Superintendent_Name'], location=location)['Superintendent_Name']
+    assert set(names) == {'Moved, Test'}
@@ -0,0 +1,55 @@
+"""
+Tests for report period windows
+"""
+
+import os
+import glob
+import pandas as pd
+import pytest
+
+from data_processing import load_and_process_data
+from periods import period_output_dir
+
+
+@pytest.fixture(scope='module')
+def period_build(synthetic_builds, tmp_path_factory):
+    """--data-only build of the synthetic data for the last 30 days; returns its export directory"""
+    import para_fillrate_modular
+
+    root = tmp_path_factory.mktemp('period')
+    cwd = os.getcwd()
+    os.chdir(root)
+    try:
+        exit_code = para_fillrate_modular.main(['--data-only', '--data-dir', str(synthetic_builds['input']),
+                                                '--output-dir', 'site', '--period', 'last30d',
+                                                '--store', 'aggregates.sqlite', '--snapshot-file', 'snapshots.sqlite'])
+    finally:
+        os.chdir(cwd)
+    assert exit_code == 0
+    return root / period_output_dir('site', 'last30d') / 'data'
+
+
+def test_period_match_stats_cover_the_period(synthetic_builds, period_build):
+    full = pd.read_csv(os.path.join(synthetic_builds['memory'], 'data', 'matching_stats.csv')).set_index('Location')
+    period = pd.read_csv(period_build / 'matching_stats.csv').set_index('Location')
+
+    assert not period.equals(full.loc[period.index])
+    columns = ['SubCentral Job Days', 'Payroll Job Days', 'Matched Jobs']
+    assert (period[columns] <= full.loc[period.index, columns]).all().all()
+    assert period['Payroll Job Days'].sum() < full['Payroll Job Days'].sum()
+
+    # The period's SubCentral job days are exactly the filled, named-sub jobs of its last 30 days
+    jobs, _ = load_and_process_data(sorted(glob.glob(os.path.join(str(synthetic_builds['input']), 'Fill Rate Data', '*.csv'))))
+    job_start = pd.to_datetime(jobs['Job Start'])
+    last_day = job_start.max().normalize()
+    in_period = (job_start >= last_day - pd.Timedelta(days=29)) & (job_start < last_day + pd.Timedelta(days=1))
+    named = (jobs['Fill_Status'] == 'Filled') & pd.to_numeric(jobs['Specified Sub'], errors='coerce').notna()
+    assert period['SubCentral Job Days'].sum() == (in_period & named).sum()
+
+
+def test_period_fill_rates_and_match_stats_cover_the_same_jobs(period_build):
+    school_stats = pd.read_csv(period_build / 'school_stats.csv')
+    period = pd.read_csv(period_build / 'matching_stats.csv')
+    # Every school with period job days has period jobs in its fill rate statistics
+    with_jobs = set(period.loc[period['SubCentral Job Days'] > 0, 'Location'])
+    assert with_jobs and with_jobs <= set(school_stats['Location'])
@@ -0,0 +1,79 @@
+"""
+Tests for the school percentile ranks and job volume peer bands
+"""
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from rankings import (
+    RANK_METRICS, RANK_SCOPES, CITYWIDE_GROUP, peer_groups, peer_group_labels, compute_school_rankings,
+    group_rankings, school_rank_cells
+)
+
+
+def test_peer_groups_are_equal_sized_bands():
+    totals = pd.Series([10, 10, 10, 10, 50, 90], index=list('abcdef'))
+    bands = peer_groups(totals, n_groups=3)
+    assert bands.dtype == np.int64
+    # Tied totals are still split so that every band has two schools
+    assert bands.tolist() == [0, 0, 1, 1, 2, 2]
+    assert peer_group_labels(totals, bands).tolist() == ['10-10 jobs'] * 4 + ['50-90 jobs'] * 2
+
+
+def test_peer_groups_with_few_schools():
+    assert peer_groups(pd.Series([5, 7], index=['a', 'b'])).tolist() == [0, 1]
+    assert peer_groups(pd.Series(dtype=np.int64)).empty
+    assert peer_group_labels(pd.Series(dtype=np.int64), pd.Series(dtype=np.int64)).empty
+
+
+@pytest.fixture
+def school_stats():
+    """Four schools in two boroughs; M4 has no vacancies"""
+    stats = pd.DataFrame({
+        'Location': ['M1', 'M2', 'M3', 'M4'],
+        'Borough': ['Manhattan', 'Manhattan', 'Manhattan', 'Bronx'],
+        'Classification': 'PARAPROFESSIONAL',
+        'Total_Vacancy': [10, 10, 10, 0],
+        'Vacancy_Filled': [9, 5, 5, 0],
+        'Total_Absence': [10, 20, 30, 40],
+        'Absence_Filled': [10, 10, 15, 20]
+    })
+    stats['Total'] = stats['Total_Vacancy'] + stats['Total_Absence']
+    stats['Total_Filled'] = stats['Vacancy_Filled'] + stats['Absence_Filled']
+    return stats
+
+
+def test_school_rankings(school_stats):
+    rankings = compute_school_rankings(school_stats, school_stats)
+    ranks = rankings.set_index(['Location', 'Scope', 'Metric'])
+
+    citywide = ranks.xs(('citywide', 'Vacancy_Fill_Pct'), level=['Scope', 'Metric'])
+    # M4 has no vacancies and is left out; M2 and M3 tie for second
+    assert citywide['Rank'].to_dict() == {'M1': 1, 'M2': 2, 'M3': 2}
+    assert citywide['Percentile'].to_dict() == {'M1': 100.0, 'M2': 66.7, 'M3': 66.7}
+    assert (citywide['Group'] == CITYWIDE_GROUP).all()
+
+    borough = ranks.xs(('borough', 'Fill_Pct'), level=['Scope', 'Metric'])
+    assert borough.loc['M4', ['Rank', 'Count', 'Group']].tolist() == [1, 1, 'Bronx']
+    assert borough.loc['M1', ['Value', 'Rank', 'Count']].tolist() == [95.0, 1, 3]
+    # Without a matching analysis there is nothing to rank on match %
+    assert 'Match_Pct' not in set(rankings['Metric'])
+
+
+def test_school_rankings_with_match_pct(school_stats):
+    matching = pd.DataFrame({'Location': ['M1', 'M1', 'M2'], 'Match Percentage': [50.0, 70.0, 80.0]})
+    rankings = compute_school_rankings(school_stats, school_stats, matching)
+    match = rankings[(rankings['Scope'] == 'citywide') & (rankings['Metric'] == 'Match_Pct')].set_index('Location')
+    assert match['Value'].to_dict() == {'M1': 60.0, 'M2': 80.0}
+    assert match['Rank'].to_dict() == {'M1': 2, 'M2': 1}
+
+
+def test_school_rank_cells(school_stats):
+    rows = group_rankings(compute_school_rankings(school_stats, school_stats))['M4']
+    cells = school_rank_cells(rows)
+    assert cells['scopes'] == list(RANK_SCOPES.values())
+    assert cells['metrics'] == [RANK_METRICS['Fill_Pct'], RANK_METRICS['Absence_Fill_Pct']]
+    assert cells['groups'][:2] == [CITYWIDE_GROUP, 'Bronx']
+    assert cells['cells'][0][1] == [100.0, 1, 1]
+    assert school_rank_cells(None) is None
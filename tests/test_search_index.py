@@ -0,0 +1,43 @@
+"""
+Tests for the delta-encoded postings of the header search index
+"""
+
+import itertools
+
+from search_index import PREFIX_LENGTH, build_search_index, normalize_search_text
+
+
+def decode_postings(deltas):
+    """Entry numbers of delta-encoded postings (as decodePostings() in the page JavaScript)"""
+    return list(itertools.accumulate(deltas))
+
+
+ENTRIES = [
+    ['school', 'P.S. 123 Mahalia Jackson', '05M123', ['Lee. Kim', 'P.S. 123 Mahalia Jackson'], 120, 81.7],
+    ['school', 'I.S. 52 Jacob H. Schiff', '06M052', ['Lee. Kim', 'I.S. 52 Jacob H. Schiff'], 95, 74.2],
+    ['superintendent', 'Lee. Kim', 'Superintendent', ['Lee. Kim'], 215, 78.4],
+    ['borough', 'Manhattan', 'Borough', ['Manhattan'], 215, 78.4],
+    ['school', 'M.S. 123 Jackson Heights', '30Q123', ['Park Min', 'M.S. 123 Jackson Heights'], 60, 90.0],
+]
+
+
+def test_postings_decode_to_the_matching_entries():
+    index = build_search_index(ENTRIES)
+    texts = [normalize_search_text(f"{entry[1]} {entry[2]}") for entry in ENTRIES]
+
+    for gram, deltas in index['trigrams'].items():
+        assert decode_postings(deltas) == [number for number, text in enumerate(texts) if gram in text]
+    for prefix, deltas in index['prefixes'].items():
+        assert decode_postings(deltas) == [
+            number for number, text in enumerate(texts)
+            if prefix in {word[:PREFIX_LENGTH] for word in text.split()}
+        ]
+
+
+def test_postings_are_delta_encoded():
+    index = build_search_index(ENTRIES)
+    assert index['trigrams']['123'] == [0, 4]
+    assert decode_postings(index['trigrams']['jac']) == [0, 1, 4]
+    assert index['trigrams']['jac'] == [0, 1, 3]
+    assert decode_postings(index['prefixes']['ja']) == [0, 1, 4]
+    assert list(index['trigrams']) == sorted(index['trigrams'])
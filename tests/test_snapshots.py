@@ -0,0 +1,60 @@
+"""
+Tests for the snapshot store and snapshot diffs
+"""
+
+import os
+import pytest
+
+from aggregate_store import read_aggregate_store
+from snapshots import (
+    ROLLUP_COLUMNS, build_rollup, write_snapshot, read_snapshot, list_snapshots, previous_snapshot_date,
+    diff_snapshots
+)
+
+
+@pytest.fixture
+def rollup(synthetic_builds):
+    return build_rollup(read_aggregate_store(os.path.join(synthetic_builds['memory'], 'aggregates.sqlite')))
+
+
+def test_snapshot_round_trip(tmp_path, rollup):
+    snapshot_file = str(tmp_path / 'snapshots.sqlite')
+    assert write_snapshot(snapshot_file, rollup, '2025-06-01') == len(rollup)
+    stored = read_snapshot(snapshot_file, '2025-06-01')
+
+    assert stored.columns.tolist() == ROLLUP_COLUMNS
+    assert stored.sort_values(['Level', 'Entity']).reset_index(drop=True).equals(
+        rollup.sort_values(['Level', 'Entity']).reset_index(drop=True))
+    assert set(diff_snapshots(stored, rollup)['Status']) == {'unchanged'}
+
+
+def test_snapshot_diff_shows_changes(tmp_path, rollup):
+    snapshot_file = str(tmp_path / 'snapshots.sqlite')
+    write_snapshot(snapshot_file, rollup, '2025-06-01')
+    school = rollup.index[rollup['Level'] == 'school'][0]
+    dropped = rollup.index[rollup['Level'] == 'school'][1]
+    current = rollup.copy()
+    current.loc[school, ['Total', 'Total_Filled']] += 10
+    current = current.drop(index=dropped)
+    write_snapshot(snapshot_file, current, '2025-06-08')
+
+    assert list_snapshots(snapshot_file)['snapshot_date'].tolist() == ['2025-06-08', '2025-06-01']
+    assert previous_snapshot_date(snapshot_file, '2025-06-08') == '2025-06-01'
+
+    diff = diff_snapshots(read_snapshot(snapshot_file, '2025-06-08'), read_snapshot(snapshot_file, '2025-06-01'))
+    status = diff.set_index(['Level', 'Entity'])['Status']
+    assert status[('school', rollup.at[school, 'Entity'])] == 'changed'
+    assert status[('school', rollup.at[dropped, 'Entity'])] == 'dropped'
+    # The rollups are compared as stored, so the parents of the edited school are unchanged
+    assert (status == 'unchanged').sum() == len(rollup) - 2
+    changed = diff[(diff['Level'] == 'school') & (diff['Entity'] == rollup.at[school, 'Entity'])].iloc[0]
+    assert changed['Total_Change'] == 10
+
+
+def test_rewriting_a_date_replaces_its_snapshot(tmp_path, rollup):
+    snapshot_file = str(tmp_path / 'snapshots.sqlite')
+    write_snapshot(snapshot_file, rollup, '2025-06-01')
+    write_snapshot(snapshot_file, rollup.iloc[:5], '2025-06-01')
+    assert len(read_snapshot(snapshot_file, '2025-06-01')) == 5
+    with pytest.raises(ValueError):
+        read_snapshot(snapshot_file, '2025-05-01')
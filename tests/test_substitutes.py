@@ -0,0 +1,76 @@
+"""
+Tests for the substitute utilization table and the top substitutes of every borough and superintendent
+"""
+
+import os
+import pandas as pd
+import pytest
+
+from aggregate_store import read_aggregate_store
+from substitutes import SUBSTITUTE_COLUMNS, TOP_SUBSTITUTE_COLUMNS, compute_substitute_stats
+
+
+def _jobs(rows):
+    """Job rows from (Location, Specified Sub, Job Start, Classification, Fill_Status) tuples"""
+    df = pd.DataFrame(rows, columns=['Location', 'Specified Sub', 'Job Start', 'Classification', 'Fill_Status'])
+    df['Job Start'] = pd.to_datetime(df['Job Start'])
+    df['Borough'] = df['Location'].str.strip().str[0].map({'M': 'Manhattan', 'X': 'Bronx'})
+    df['Superintendent_Name'] = df['Borough'].map({'Manhattan': 'Lee. Kim', 'Bronx': 'Diaz. Ana'})
+    return df
+
+
+@pytest.fixture
+def jobs():
+    return _jobs([
+        ('M123', 1001.0, '2025-03-03 08:00:00', 'PARAPROFESSIONAL', 'Filled'),
+        ('M123', 1001.0, '2025-03-03 12:00:00', 'HEALTH PARA', 'Filled'),     # same job day
+        ('M123 ', 1001.0, '2025-03-04 08:00:00', 'PARAPROFESSIONAL', 'Filled'),     # padded location
+        ('X456', 1001.0, '2025-03-05 08:00:00', 'PARAPROFESSIONAL', 'Filled'),
+        ('X456', 1002.0, '2025-03-05 08:00:00', 'PARAPROFESSIONAL', 'Filled'),
+        ('X456', 1003.0, '2025-03-06 08:00:00', 'PARAPROFESSIONAL', 'Filled'),
+        ('X456', 1003.0, '2025-03-07 08:00:00', 'PARAPROFESSIONAL', 'Filled'),
+        ('X456', 1004.0, '2025-03-07 08:00:00', 'PARAPROFESSIONAL', 'Unfilled'),   # not filled
+        ('X456', None, '2025-03-07 08:00:00', 'PARAPROFESSIONAL', 'Filled'),       # no substitute
+    ])
+
+
+def test_substitute_stats(jobs):
+    srepp = pd.DataFrame({'SCHOOL': ['02M123', '09X456', '09X456'], 'EISID': ['1001', '1001', '1003'],
+                          'DATE': ['03/03/2025', '03/06/2025', '03/07/2025']})
+    substitutes, _ = compute_substitute_stats(jobs, srepp)
+    assert substitutes.columns.tolist() == SUBSTITUTE_COLUMNS
+    assert substitutes['EISID'].tolist() == [1001, 1003, 1002]
+
+    first = substitutes.iloc[0]
+    assert (first['Jobs'], first['Job_Days'], first['Schools'], first['Classifications']) == (4, 3, 2, 2)
+    # Only the 03/03 payroll record is on one of its job days
+    assert (first['Matched_Days'], first['Match_Pct']) == (1, 33.3)
+    assert (first['Primary_Location'], first['Borough'], first['Superintendent_Name']) == ('M123', 'Manhattan', 'Lee. Kim')
+    assert substitutes.set_index('EISID').loc[1003, ['Job_Days', 'Matched_Days', 'Match_Pct']].tolist() == [2, 1, 50.0]
+
+
+def test_substitute_stats_without_payroll(jobs):
+    substitutes, _ = compute_substitute_stats(jobs)
+    assert (substitutes['Matched_Days'] == 0).all() and substitutes['Match_Pct'].isna().all()
+    empty, top = compute_substitute_stats(jobs[jobs['Fill_Status'] == 'Unfilled'])
+    assert empty.empty and top.empty and top.columns.tolist() == TOP_SUBSTITUTE_COLUMNS
+
+
+def test_top_substitutes_keep_the_k_with_most_job_days(jobs):
+    _, top = compute_substitute_stats(jobs, top_k=2)
+    bronx = top[(top['Level'] == 'borough') & (top['Entity'] == 'Bronx')]
+    # 1003 has two job days in the Bronx; 1001 and 1002 tie on one and the lower EISID is kept
+    assert bronx['EISID'].tolist() == [1003, 1001]
+    assert bronx['Rank'].tolist() == [1, 2]
+    assert bronx['Share_Pct'].tolist() == [50.0, 25.0]
+    manhattan = top[(top['Level'] == 'superintendent') & (top['Entity'] == 'Lee. Kim')]
+    assert manhattan[['EISID', 'Job_Days', 'Share_Pct']].values.tolist() == [[1001, 2, 100.0]]
+
+
+def test_streamed_substitutes_match_in_memory(synthetic_builds):
+    tables = [read_aggregate_store(os.path.join(synthetic_builds[name], 'aggregates.sqlite')) for name in ('memory', 'stream')]
+    columns = ['EISID', 'Jobs', 'Job_Days', 'Schools', 'Matched_Days', 'Primary_Location']
+    memory, stream = (aggregates['substitutes'][columns] for aggregates in tables)
+    assert len(memory) > 0
+    pd.testing.assert_frame_equal(stream, memory, check_dtype=False)
+    pd.testing.assert_frame_equal(tables[1]['top_substitutes'], tables[0]['top_substitutes'], check_dtype=False)
@@ -0,0 +1,66 @@
+"""
+Tests for the static SVG bar and pie charts
+"""
+
+import xml.etree.ElementTree as ET
+import pytest
+
+from svg_charts import CHART_SERIES, nice_axis, grouped_bar_svg, donut_svg, inline_svg_chart
+
+SVG = '{http://www.w3.org/2000/svg}'
+
+
+def _series(values):
+    """CHART_SERIES as (label, values, color) with the given values per series"""
+    return [(label, series_values, color) for (label, _, color), series_values in zip(CHART_SERIES, values)]
+
+
+@pytest.mark.parametrize('max_value, expected', [
+    (0, (1, 1)), (7, (8, 2)), (43, (50, 10)), (999, (1000, 200)), (12000, (15000, 5000))
+])
+def test_nice_axis(max_value, expected):
+    assert nice_axis(max_value) == expected
+
+
+def test_grouped_bar_svg():
+    svg = grouped_bar_svg(['PARA & <HEALTH>', 'SPED'], _series([[10, 0], [3, 4], [7, 1], [0, 2]]), 'Jobs by Classification')
+    root = ET.fromstring(svg)
+    assert root.tag == SVG + 'svg' and root.get('viewBox') == '0 0 1200 500'
+    bars = [rect for rect in root.iter(SVG + 'rect') if rect.find(SVG + 'title') is not None]
+    assert len(bars) == 8
+    assert [bar.find(SVG + 'title').text for bar in bars[:2]] == ['Vacancy Filled: 10', 'Vacancy Unfilled: 3']
+    texts = [text.text for text in root.iter(SVG + 'text')]
+    # Labels are escaped, and zero bars get no value label
+    assert 'PARA & <HEALTH>' in texts and 'Jobs by Classification' in texts
+    assert texts.count('0') == 1
+
+
+def test_grouped_bar_svg_rotates_long_labels():
+    categories = ['A VERY LONG CLASSIFICATION NAME %d' % i for i in range(12)]
+    root = ET.fromstring(grouped_bar_svg(categories, _series([[1] * 12] * 4), 'Jobs'))
+    labels = [text for text in root.iter(SVG + 'text') if text.text in categories]
+    assert len(labels) == 12 and all(label.get('transform', '').startswith('rotate(-30') for label in labels)
+
+
+def test_donut_svg():
+    labels = [label for label, _, _ in CHART_SERIES]
+    colors = [color for _, _, color in CHART_SERIES]
+    root = ET.fromstring(donut_svg(labels, [60, 38, 2, 0], colors, ['PARAPROFESSIONAL', '100 jobs']))
+    slices = list(root.iter(SVG + 'path'))
+    # No slice for the empty series; the 2% slice has no inside label
+    assert [path.get('fill') for path in slices] == colors[:3]
+    texts = [text.text for text in root.iter(SVG + 'text')]
+    assert '60.0%' in texts and '38.0%' in texts and '2.0%' not in texts
+
+    # A single series is drawn as two halves of a full ring
+    full = ET.fromstring(donut_svg(labels[:1], [5], colors[:1], ['Total']))
+    assert len(list(full.iter(SVG + 'path'))) == 2
+
+
+def test_inline_svg_chart_is_an_accessible_image_without_script():
+    svg = grouped_bar_svg(['SPED'], _series([[1], [2], [3], [4]]), 'Jobs')
+    html = inline_svg_chart(svg, 'Jobs "by" Classification')
+    div = ET.fromstring(html)
+    assert div.tag == 'div' and div.get('role') == 'img' and div.get('class') == 'svg-chart'
+    assert div.get('aria-label') == 'Jobs "by" Classification'
+    assert '<script' not in html.lower() and 'iframe' not in html.lower()
@@ -0,0 +1,58 @@
+"""
+Tests for the weekly and monthly fill rate time series
+"""
+
+import os
+import pandas as pd
+import pytest
+
+from aggregate_store import read_aggregate_store
+from time_series import compute_time_series, CITYWIDE_ENTITY
+
+# Report level -> statistics table and its grouping column (None = one citywide row)
+LEVEL_STATS = {'citywide': ('citywide_stats', None), 'borough': ('borough_stats', 'Borough'),
+               'superintendent': ('superintendent_stats', 'Superintendent_Name'), 'school': ('school_stats', 'Location')}
+
+
+@pytest.fixture(scope='module')
+def aggregates(synthetic_builds):
+    return read_aggregate_store(os.path.join(synthetic_builds['memory'], 'aggregates.sqlite'))
+
+
+@pytest.mark.parametrize('freq', ['W', 'M'])
+@pytest.mark.parametrize('level', list(LEVEL_STATS))
+def test_period_totals_add_up_to_report_totals(aggregates, level, freq):
+    series = aggregates['time_series']
+    series = series[(series['Level'] == level) & (series['Frequency'] == freq)]
+    totals = series.groupby('Entity')[['Filled', 'Total']].sum()
+
+    table, group_col = LEVEL_STATS[level]
+    stats = aggregates[table]
+    if group_col is None:
+        expected = stats[['Total_Filled', 'Total']].sum().to_frame(CITYWIDE_ENTITY).T
+    else:
+        expected = stats.groupby(group_col)[['Total_Filled', 'Total']].sum()
+    expected = expected.rename(columns={'Total_Filled': 'Filled'})
+    expected.index = expected.index.astype(str)
+
+    assert len(totals) > 0
+    pd.testing.assert_frame_equal(totals.sort_index(), expected.sort_index(), check_dtype=False, check_names=False)
+
+
+def test_weeks_start_on_monday_and_roll_over_four_weeks():
+    # Two jobs a week at one school for five weeks, the first week's both filled, then one of two
+    days = pd.date_range('2025-03-03', periods=5, freq='W-MON').repeat(2) + pd.Timedelta(days=2)
+    df = pd.DataFrame({
+        'Location': 'M123', 'Borough': 'Manhattan', 'Superintendent_Name': 'Lee. Kim',
+        'Classification': 'PARAPROFESSIONAL', 'Job Start': days,
+        'Fill_Status': ['Filled', 'Filled'] + ['Filled', 'Unfilled'] * 4
+    })
+    df['Type_Fill_Status'] = 'Vacancy_' + df['Fill_Status']
+
+    weekly = compute_time_series(df)
+    weekly = weekly[(weekly['Level'] == 'school') & (weekly['Frequency'] == 'W')]
+    assert pd.to_datetime(weekly['Period_Start']).dt.weekday.eq(0).all()
+    assert weekly['Total'].tolist() == [2] * 5
+    assert weekly['Fill_Pct'].tolist() == [100.0, 50.0, 50.0, 50.0, 50.0]
+    # The window grows to four weeks (5 of 8 jobs filled in weeks 1-4), then slides (4 of 8 in weeks 2-5)
+    assert weekly['Rolling_Fill_Pct'].tolist() == [100.0, 75.0, 66.7, 62.5, 50.0]
@@ -0,0 +1,214 @@
+"""
+Time-series fill rates for NYC DOE Reports
+
+Buckets every job by the week (starting Monday) and month of its Job Start and counts filled and
+total jobs for every school, superintendent, borough and citywide. Each frequency is one pass over
+the jobs: school and period codes are combined into a flat index and counted with np.bincount into
+a dense schools x periods grid, which is then summed up the hierarchy. Cumulative sums along the
+weekly grid give the rolling 4-week fill rate.
+
+The result is one long table (TIME_SERIES_COLUMNS) that the stats stage stores in the aggregate
+store and the report generators turn into a trend chart on every report level.
+"""
+
+import numpy as np
+import pandas as pd
+
+from data_processing import JOB_COUNT_COL, JOB_WEEK_COL, JOB_MONTH_COL
+
+TIME_SERIES_COLUMNS = ['Level', 'Entity', 'Frequency', 'Period_Start', 'Filled', 'Total', 'Fill_Pct', 'Rolling_Fill_Pct']
+# 'W' = weeks starting Monday, 'M' = calendar months
+FREQUENCIES = ['W', 'M']
+ROLLING_WEEKS = 4
+CITYWIDE_ENTITY = 'Citywide'
+
+# Report level above the school -> column naming each school's parent at that level
+LEVEL_PARENT_COLUMNS = {'borough': 'Borough', 'superintendent': 'Superintendent_Name'}
+
+
+def bucket_codes(days, freq):
+    """
+    Map day numbers (days since 1970-01-01) to period codes
+
+    Week codes count Mondays since the epoch (1970-01-01 was a Thursday, hence the 3 day shift);
+    month codes count months since January 1970.
+    """
+    if freq == 'W':
+        return (days + 3) // 7
+    return days.astype('datetime64[D]').astype('datetime64[M]').astype(np.int64)
+
+
+def bucket_start(codes, freq):
+    """First day of each period code as datetime64[D]"""
+    if freq == 'W':
+        return (codes * 7 - 3).astype('datetime64[D]')
+    return codes.astype('datetime64[M]').astype('datetime64[D]')
+
+
+def period_days(df, freq):
+    """
+    Day numbers to bucket each row by, or None if the frame carries no job dates
+
+    Raw job rows use Job Start. The streaming job count cube has no Job Start but keeps the
+    Monday of each job's week and its month, which fall in the same week/month bucket.
+    """
+    if 'Job Start' in df.columns:
+        dates = pd.to_datetime(df['Job Start'], errors='coerce')
+    elif freq == 'W' and JOB_WEEK_COL in df.columns:
+        dates = pd.to_datetime(df[JOB_WEEK_COL], format='%Y-%m-%d', errors='coerce')
+    elif freq == 'M' and JOB_MONTH_COL in df.columns:
+        dates = pd.to_datetime(df[JOB_MONTH_COL], format='%Y-%m', errors='coerce')
+    else:
+        return None
+    days = dates.to_numpy(dtype='datetime64[ns]').astype('datetime64[D]')
+    return np.where(np.isnat(days), np.iinfo(np.int64).min, days.astype(np.int64))
+
+
+def school_parents(df, school_codes, n_schools, counted):
+    """
+    Each school's parent at every level in LEVEL_PARENT_COLUMNS (both follow from the Location),
+    taken from the school's first counted row
+
+    Returns:
+        dict: level -> (parent code per school, parent names), for the parent columns present in df
+    """
+    first_row = np.zeros(n_schools, dtype=np.int64)
+    rows = np.flatnonzero(counted)[::-1]
+    first_row[school_codes[rows]] = rows
+    return {
+        level: pd.factorize(df[col].to_numpy()[first_row])
+        for level, col in LEVEL_PARENT_COLUMNS.items() if col in df.columns
+    }
+
+
+def _rolling_pct(filled, total, window):
+    """Rolling fill percentage over the last `window` periods of each grid row (NaN without jobs)"""
+    zeros = np.zeros((filled.shape[0], 1))
+    filled_cs = np.concatenate([zeros, np.cumsum(filled, axis=1)], axis=1)
+    total_cs = np.concatenate([zeros, np.cumsum(total, axis=1)], axis=1)
+    start = np.maximum(np.arange(1, filled.shape[1] + 1) - window, 0)
+    rolling_filled = filled_cs[:, 1:] - filled_cs[:, start]
+    rolling_total = total_cs[:, 1:] - total_cs[:, start]
+    with np.errstate(invalid='ignore', divide='ignore'):
+        return np.where(rolling_total > 0, rolling_filled / rolling_total * 100, np.nan)
+
+
+def _grid_rows(level, entities, freq, first_code, filled, total):
+    """Turn a dense entities x periods grid into long TIME_SERIES_COLUMNS rows (periods with jobs only)"""
+    rolling = _rolling_pct(filled, total, ROLLING_WEEKS) if freq == 'W' else np.full(total.shape, np.nan)
+    entity_idx, period_idx = np.nonzero(total > 0)
+    period_start = bucket_start(period_idx + first_code, freq)
+    cell_filled = filled[entity_idx, period_idx]
+    cell_total = total[entity_idx, period_idx]
+    return pd.DataFrame({
+        'Level': level,
+        'Entity': np.asarray(entities, dtype=object)[entity_idx],
+        'Frequency': freq,
+        'Period_Start': np.datetime_as_string(period_start, unit='D'),
+        'Filled': cell_filled.astype(np.int64),
+        'Total': cell_total.astype(np.int64),
+        'Fill_Pct': np.round(cell_filled / cell_total * 100, 1),
+        'Rolling_Fill_Pct': np.round(rolling[entity_idx, period_idx], 1)
+    })
+
+
+def compute_time_series(df):
+    """
+    Weekly and monthly fill rates for every school, superintendent, borough and citywide
+
+    Only jobs counted by create_summary_stats (a Classification and a Type_Fill_Status) with a
+    valid Job Start are included, so period totals add up to the report totals.
+
+    Args:
+        df: Main processed DataFrame (one row per job) or the streaming job count cube
+
+    Returns:
+        pandas.DataFrame: TIME_SERIES_COLUMNS, sorted by Level, Entity, Frequency and Period_Start;
+                          empty if the data has no job dates
+    """
+    empty = pd.DataFrame(columns=TIME_SERIES_COLUMNS)
+    if df.empty or 'Location' not in df.columns:
+        return empty
+
+    counted = (df['Classification'].notna() & df['Type_Fill_Status'].notna()).to_numpy()
+    school_codes, schools = pd.factorize(df['Location'])
+    counted &= school_codes >= 0
+    weights = df[JOB_COUNT_COL].to_numpy(dtype=np.float64) if JOB_COUNT_COL in df.columns else np.ones(len(df))
+    filled_weights = weights * (df['Fill_Status'] == 'Filled').to_numpy()
+
+    parents = school_parents(df, school_codes, len(schools), counted)
+
+    frames = []
+    for freq in FREQUENCIES:
+        days = period_days(df, freq)
+        if days is None:
+            continue
+        valid = counted & (days != np.iinfo(np.int64).min)
+        if not valid.any():
+            continue
+        codes = bucket_codes(days[valid], freq)
+        first_code = int(codes.min())
+        n_periods = int(codes.max()) - first_code + 1
+
+        # One bincount per measure over the flattened school x period index
+        flat = school_codes[valid].astype(np.int64) * n_periods + (codes - first_code)
+        size = len(schools) * n_periods
+        total = np.bincount(flat, weights=weights[valid], minlength=size).reshape(len(schools), n_periods)
+        filled = np.bincount(flat, weights=filled_weights[valid], minlength=size).reshape(len(schools), n_periods)
+
+        frames.append(_grid_rows('school', schools, freq, first_code, filled, total))
+        for level, (parent_codes, parent_names) in parents.items():
+            parent_total = np.zeros((len(parent_names), n_periods))
+            parent_filled = np.zeros((len(parent_names), n_periods))
+            np.add.at(parent_total, parent_codes, total)
+            np.add.at(parent_filled, parent_codes, filled)
+            frames.append(_grid_rows(level, parent_names, freq, first_code, parent_filled, parent_total))
+        frames.append(_grid_rows('citywide', [CITYWIDE_ENTITY], freq, first_code,
+                                 filled.sum(axis=0, keepdims=True), total.sum(axis=0, keepdims=True)))
+
+    if not frames:
+        return empty
+    return pd.concat(frames, ignore_index=True).sort_values(
+        ['Level', 'Entity', 'Frequency', 'Period_Start'], ignore_index=True
+    )
+
+
+def group_time_series(time_series):
+    """
+    Index a time-series table by entity for the report generators
+
+    Returns:
+        dict: (level, entity) -> that entity's rows; empty if there is no time series
+    """
+    if time_series is None or time_series.empty:
+        return {}
+    return {key: rows for key, rows in time_series.groupby(['Level', 'Entity'], sort=False)}
+
+
+def get_entity_series(trends, level, entity):
+    """Rows of one entity from group_time_series(), or None"""
+    if not trends:
+        return None
+    return trends.get((level, entity))
+
+
+def latest_rolling_rate(series):
+    """
+    Latest rolling 4-week fill rate of an entity and the rate four weeks earlier
+
+    Returns:
+        dict with 'week', 'rate' and 'previous' (None if unavailable), or None without weekly data
+    """
+    if series is None:
+        return None
+    weekly = series[(series['Frequency'] == 'W') & series['Rolling_Fill_Pct'].notna()]
+    if weekly.empty:
+        return None
+    latest = weekly.iloc[-1]
+    earlier_cutoff = (pd.Timestamp(latest['Period_Start']) - pd.Timedelta(weeks=ROLLING_WEEKS)).strftime('%Y-%m-%d')
+    earlier = weekly[weekly['Period_Start'] <= earlier_cutoff]
+    return {
+        'week': latest['Period_Start'],
+        'rate': float(latest['Rolling_Fill_Pct']),
+        'previous': float(earlier['Rolling_Fill_Pct'].iloc[-1]) if not earlier.empty else None
+    }